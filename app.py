@@ -1,15 +1,23 @@
 from flask import Flask
 from flask_cors import CORS
-from src.config import init_db
+from src.config import init_db, init_app
+from src.jobs import init_app as init_jobs
 from src.routes import (
     collaborators, types, projects, technos, relations,
     competences, project_history, imports,
-    scoring, matrix, allocation, dashboard, cv_parser
+    scoring, matrix, allocation, dashboard, cv_parser, jobs, trends,
+    availability, analytics, events
 )
 import os
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['Link', 'X-Next-Cursor', 'Location'])
+
+# Une connexion SQLite poolée par requête, libérée au teardown
+init_app(app)
+
+# Pool de workers des tâches de fond, démarré à la première requête (src/jobs)
+init_jobs(app)
 
 # Configuration pour les uploads
 UPLOAD_FOLDER = 'uploads'
@@ -34,11 +42,20 @@ app.register_blueprint(imports.bp)
 
 # Routes MVP avancées
 app.register_blueprint(scoring.bp)
+app.register_blueprint(trends.bp)
 app.register_blueprint(matrix.bp)
 app.register_blueprint(allocation.bp)
+app.register_blueprint(availability.bp)
 app.register_blueprint(dashboard.bp)
+app.register_blueprint(analytics.bp)
 app.register_blueprint(cv_parser.bp)
 
+# Suivi des tâches de fond
+app.register_blueprint(jobs.bp)
+
+# Notifications de modifications (Server-Sent Events)
+app.register_blueprint(events.bp)
+
 if __name__ == "__main__":
     init_db()
     app.run(debug=True)
@@ -75,26 +75,27 @@ PROJECT_NAMES = [
 ]
 
 
+def post_bulk(resource, items):
+    """Envoie une liste d'items en une seule requête POST /<resource>/bulk"""
+    response = requests.post(f"{BASE_URL}/{resource}/bulk", json={"items": items})
+    data = response.json()
+
+    for error in data.get('errors', []):
+        print(f"  ❌ Item {error['index']}: {error['error']}")
+
+    return data
+
+
 def create_collaborators(n=30):
     """Crée n collaborateurs"""
     print(f"\n🔧 Création de {n} collaborateurs...")
-    created = []
-
-    for i in range(n):
-        firstname = random.choice(FIRSTNAMES)
-        lastname = random.choice(LASTNAMES)
 
-        response = requests.post(f"{BASE_URL}/collaborators", json={
-            "firstname": firstname,
-            "lastname": lastname
-        })
-
-        if response.status_code == 201:
-            data = response.json()
-            created.append(data['id'])
-            print(f"  ✅ {firstname} {lastname} (ID: {data['id']})")
-        else:
-            print(f"  ❌ Erreur: {response.text}")
+    items = [
+        {"firstname": random.choice(FIRSTNAMES), "lastname": random.choice(LASTNAMES)}
+        for i in range(n)
+    ]
+    data = post_bulk("collaborators", items)
+    created = [item_id for item_id in data.get('ids', []) if item_id]
 
     print(f"✅ {len(created)} collaborateurs créés")
     return created
@@ -103,17 +104,9 @@ def create_collaborators(n=30):
 def create_types(types=TYPES):
     """Crée les types"""
     print(f"\n🔧 Création de {len(types)} types...")
-    created = []
-
-    for type_name in types:
-        response = requests.post(f"{BASE_URL}/types", json={
-            "name": type_name
-        })
 
-        if response.status_code == 201:
-            data = response.json()
-            created.append(data['id'])
-            print(f"  ✅ {type_name} (ID: {data['id']})")
+    data = post_bulk("types", [{"name": type_name} for type_name in types])
+    created = [item_id for item_id in data.get('ids', []) if item_id]
 
     print(f"✅ {len(created)} types créés")
     return created
@@ -122,27 +115,19 @@ def create_types(types=TYPES):
 def create_technologies(technologies=TECHNOLOGIES):
     """Crée les technologies"""
     print(f"\n🔧 Création de {len(technologies)} technologies...")
-    created = []
-
-    for techno_name in technologies:
-        response = requests.post(f"{BASE_URL}/technos", json={
-            "name": techno_name
-        })
 
-        if response.status_code == 201:
-            data = response.json()
-            created.append(data['id'])
-            print(f"  ✅ {techno_name} (ID: {data['id']})")
+    data = post_bulk("technos", [{"name": techno_name} for techno_name in technologies])
+    created = [item_id for item_id in data.get('ids', []) if item_id]
 
     print(f"✅ {len(created)} technologies créées")
     return created
 
 
 def create_projects(n=30):
-    """Crée n projets"""
+    """Crée n projets, retourne {id: projet}"""
     print(f"\n🔧 Création de {n} projets...")
-    created = []
 
+    items = []
     for i in range(n):
         # Date aléatoire dans les 2 dernières années
         months_ago = random.randint(1, 24)
@@ -153,25 +138,27 @@ def create_projects(n=30):
         if i > 0:
             project_name = f"{project_name} v{random.randint(1, 5)}"
 
-        response = requests.post(f"{BASE_URL}/projects", json={
+        items.append({
             "name": project_name,
             "date_fin": date_fin.strftime("%Y-%m"),
             "duree_mois": duree
         })
 
-        if response.status_code == 201:
-            data = response.json()
-            created.append(data['id'])
-            print(f"  ✅ {project_name} (ID: {data['id']}, {duree} mois)")
+    data = post_bulk("projects", items)
+    created = {
+        item_id: item
+        for item_id, item in zip(data.get('ids', []), items)
+        if item_id
+    }
 
     print(f"✅ {len(created)} projets créés")
     return created
 
 
 def create_competences(collaborator_ids, techno_ids, n=200):
-    """Crée n compétences aléatoires"""
-    print(f"\n🔧 Création de {n} compétences...")
-    created = 0
+    """Crée les compétences aléatoires"""
+    print(f"\n🔧 Création des compétences...")
+    items = []
 
     # Chaque collaborateur a entre 5 et 15 compétences
     for collab_id in collaborator_ids:
@@ -180,29 +167,25 @@ def create_competences(collaborator_ids, techno_ids, n=200):
 
         for techno_id in selected_technos:
             niveau = random.randint(1, 5)
-
-            response = requests.post(f"{BASE_URL}/competences", json={
+            items.append({
                 "id_collaborator": collab_id,
                 "id_techno": techno_id,
                 "niveau_declare": niveau,
                 "niveau_calcule": niveau
             })
 
-            if response.status_code == 201:
-                created += 1
-                if created % 20 == 0:
-                    print(f"  ✅ {created} compétences créées...")
+    created = post_bulk("competences", items).get('created', 0)
 
     print(f"✅ {created} compétences créées")
     return created
 
 
-def create_project_history(project_ids, collaborator_ids, techno_ids, n=300):
-    """Crée n entrées d'historique de projet"""
-    print(f"\n🔧 Création de {n} entrées d'historique...")
-    created = 0
+def create_project_history(projects, collaborator_ids, techno_ids, n=300):
+    """Crée les entrées d'historique de projet"""
+    print(f"\n🔧 Création de l'historique...")
+    items = []
 
-    for project_id in project_ids:
+    for project_id, project in projects.items():
         # Chaque projet a entre 2 et 5 développeurs
         nb_devs = random.randint(2, 5)
         selected_devs = random.sample(collaborator_ids, min(nb_devs, len(collaborator_ids)))
@@ -211,14 +194,12 @@ def create_project_history(project_ids, collaborator_ids, techno_ids, n=300):
         nb_technos = random.randint(3, 8)
         selected_technos = random.sample(techno_ids, min(nb_technos, len(techno_ids)))
 
-        # Obtenir les infos du projet
-        project = requests.get(f"{BASE_URL}/projects/{project_id}").json()
         date_fin = project.get('date_fin')
         duree_mois = project.get('duree_mois', random.randint(3, 12))
 
         for dev_id in selected_devs:
             for techno_id in selected_technos:
-                response = requests.post(f"{BASE_URL}/project_history", json={
+                items.append({
                     "id_project": project_id,
                     "id_techno": techno_id,
                     "id_collaborator": dev_id,
@@ -226,10 +207,7 @@ def create_project_history(project_ids, collaborator_ids, techno_ids, n=300):
                     "duree_mois": duree_mois
                 })
 
-                if response.status_code == 201:
-                    created += 1
-                    if created % 50 == 0:
-                        print(f"  ✅ {created} entrées d'historique créées...")
+    created = post_bulk("project_history", items).get('created', 0)
 
     print(f"✅ {created} entrées d'historique créées")
     return created
@@ -241,44 +219,29 @@ def create_relations(techno_ids, type_ids, project_ids, collaborator_ids):
     created = {"techno_type": 0, "techno_project": 0, "collaborator_project": 0}
 
     # Techno ↔ Type
+    items = []
     for techno_id in techno_ids:
         # Chaque techno appartient à 1-3 types
         nb_types = random.randint(1, 3)
         selected_types = random.sample(type_ids, min(nb_types, len(type_ids)))
-
-        for type_id in selected_types:
-            response = requests.post(f"{BASE_URL}/techno_type", json={
-                "id_techno": techno_id,
-                "id_type": type_id
-            })
-            if response.status_code == 201:
-                created["techno_type"] += 1
+        items += [{"id_techno": techno_id, "id_type": type_id} for type_id in selected_types]
+    created["techno_type"] = post_bulk("techno_type", items).get('created', 0)
 
     # Techno ↔ Project
+    items = []
     for project_id in project_ids:
         nb_technos = random.randint(3, 8)
         selected_technos = random.sample(techno_ids, min(nb_technos, len(techno_ids)))
-
-        for techno_id in selected_technos:
-            response = requests.post(f"{BASE_URL}/techno_project", json={
-                "id_techno": techno_id,
-                "id_project": project_id
-            })
-            if response.status_code == 201:
-                created["techno_project"] += 1
+        items += [{"id_techno": techno_id, "id_project": project_id} for techno_id in selected_technos]
+    created["techno_project"] = post_bulk("techno_project", items).get('created', 0)
 
     # Collaborator ↔ Project
+    items = []
     for project_id in project_ids:
         nb_devs = random.randint(2, 5)
         selected_devs = random.sample(collaborator_ids, min(nb_devs, len(collaborator_ids)))
-
-        for dev_id in selected_devs:
-            response = requests.post(f"{BASE_URL}/collaborator_project", json={
-                "id_collaborator": dev_id,
-                "id_project": project_id
-            })
-            if response.status_code == 201:
-                created["collaborator_project"] += 1
+        items += [{"id_collaborator": dev_id, "id_project": project_id} for dev_id in selected_devs]
+    created["collaborator_project"] = post_bulk("collaborator_project", items).get('created', 0)
 
     print(f"✅ Relations créées: {created}")
     return created
@@ -304,13 +267,14 @@ def main():
     collaborator_ids = create_collaborators(30)
     type_ids = create_types(TYPES)
     techno_ids = create_technologies(TECHNOLOGIES)
-    project_ids = create_projects(30)
+    projects = create_projects(30)
+    project_ids = list(projects.keys())
 
     # Créer les compétences
     create_competences(collaborator_ids, techno_ids)
 
     # Créer l'historique des projets
-    create_project_history(project_ids, collaborator_ids, techno_ids)
+    create_project_history(projects, collaborator_ids, techno_ids)
 
     # Créer les relations
     create_relations(techno_ids, type_ids, project_ids, collaborator_ids)
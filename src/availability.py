@@ -0,0 +1,256 @@
+"""
+Calendrier des disponibilités des collaborateurs (/availability)
+
+Un engagement est la présence d'un collaborateur sur un projet pendant un
+intervalle de mois [début, fin] (index de mois entiers, bornes incluses) :
+- project_techno_history : mois_debut / mois_fin, l'un complété par
+  duree_mois si l'autre manque ; les lignes d'un même projet (une par
+  techno) sont réunies
+- collaborator_project : les duree_mois mois se terminant à project.mois_fin
+  (le mois de fin seul si la durée est inconnue) ; un projet sans date de
+  fin n'occupe personne
+Les deux sources d'un même couple (collaborateur, projet) sont réunies.
+
+Par collaborateur, les engagements sont triés par début et fusionnés en
+blocs occupés disjoints, avec la somme cumulée de leurs longueurs : les
+mois occupés sur une fenêtre et les engagements qui la croisent se
+trouvent par recherche dichotomique, en O(log n) quel que soit le nombre
+d'années d'historique.
+
+Comme la matrice de compétences (src/competence_matrix.py), le calendrier
+est construit une fois par process puis tenu à jour à partir du journal
+des modifications : une écriture sur project_techno_history ou
+collaborator_project ne recharge que les collaborateurs touchés, une
+écriture sur project ou collaborator le reconstruit.
+"""
+import datetime
+import threading
+from bisect import bisect_left, bisect_right
+from src.changes import changes_since, latest_change_id, pruned_through, register_version_holder
+from src.scoring_engine import current_month_index, format_month, month_index
+
+MAX_INCREMENTAL_CHANGES = 5000
+MAX_WINDOW_MONTHS = 240
+
+
+class Calendar:
+    """Engagements d'un collaborateur et blocs occupés fusionnés"""
+
+    def __init__(self, engagements):
+        """engagements: [(début, fin, id_project)]"""
+        engagements = sorted(engagements)
+        self.starts = [start for start, _, _ in engagements]
+        self.ends = [end for _, end, _ in engagements]
+        self.projects = [project for _, _, project in engagements]
+
+        # Blocs: les engagements d'un bloc sont contigus dans l'ordre des débuts
+        self.block_starts, self.block_ends, self.block_first = [], [], []
+        for index, (start, end, _) in enumerate(engagements):
+            if self.block_ends and start <= self.block_ends[-1] + 1:
+                self.block_ends[-1] = max(self.block_ends[-1], end)
+            else:
+                self.block_starts.append(start)
+                self.block_ends.append(end)
+                self.block_first.append(index)
+        self.block_first.append(len(engagements))
+
+        # cumulated[k] = mois occupés dans les blocs < k
+        self.cumulated = [0]
+        for start, end in zip(self.block_starts, self.block_ends):
+            self.cumulated.append(self.cumulated[-1] + end - start + 1)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _blocks(self, start, end):
+        """Plage [lo, hi) des blocs qui croisent [start, end]"""
+        return bisect_left(self.block_ends, start), bisect_right(self.block_starts, end)
+
+    def busy_months(self, start, end):
+        """Nombre de mois occupés dans [start, end]"""
+        lo, hi = self._blocks(start, end)
+        if lo >= hi:
+            return 0
+        busy = self.cumulated[hi] - self.cumulated[lo]
+        # Les blocs extrêmes peuvent déborder de la fenêtre
+        busy -= max(0, start - self.block_starts[lo])
+        busy -= max(0, self.block_ends[hi - 1] - end)
+        return busy
+
+    def busy_periods(self, start, end):
+        """Blocs occupés [(début, fin)] restreints à la fenêtre"""
+        lo, hi = self._blocks(start, end)
+        return [
+            (max(start, self.block_starts[k]), min(end, self.block_ends[k]))
+            for k in range(lo, hi)
+        ]
+
+    def free_periods(self, start, end):
+        """Intervalles libres [(début, fin)] de la fenêtre"""
+        free = []
+        cursor = start
+        for busy_start, busy_end in self.busy_periods(start, end):
+            if busy_start > cursor:
+                free.append((cursor, busy_start - 1))
+            cursor = busy_end + 1
+        if cursor <= end:
+            free.append((cursor, end))
+        return free
+
+    def engagements(self, start, end):
+        """Engagements [(début, fin, id_project)] qui croisent la fenêtre"""
+        lo, hi = self._blocks(start, end)
+        found = []
+        for index in range(self.block_first[lo], self.block_first[hi]):
+            if self.starts[index] <= end and self.ends[index] >= start:
+                found.append((self.starts[index], self.ends[index], self.projects[index]))
+        return found
+
+
+def load_engagements(conn, ids=None):
+    """Engagements par collaborateur {id: [(début, fin, id_project)]}, limité aux ids donnés"""
+    where, params = "", []
+    if ids is not None:
+        where = f"AND {{alias}}.id_collaborator IN ({', '.join(['?'] * len(ids))})"
+        params = list(ids)
+
+    bounds = {}
+
+    def add(id_collaborator, id_project, start, end):
+        if start is None or end is None:
+            return
+        start, end = min(start, end), max(start, end)
+        key = (id_collaborator, id_project)
+        if key in bounds:
+            start, end = min(start, bounds[key][0]), max(end, bounds[key][1])
+        bounds[key] = (start, end)
+
+    rows = conn.execute(f"""
+        SELECT h.id_collaborator, h.id_project,
+               MIN(COALESCE(h.mois_debut, h.mois_fin - MAX(h.duree_mois, 1) + 1, h.mois_fin)),
+               MAX(COALESCE(h.mois_fin, h.mois_debut + MAX(h.duree_mois, 1) - 1, h.mois_debut))
+        FROM project_techno_history h
+        WHERE (h.mois_debut IS NOT NULL OR h.mois_fin IS NOT NULL) {where.format(alias='h')}
+        GROUP BY h.id_collaborator, h.id_project
+    """, params).fetchall()
+    for row in rows:
+        add(*row)
+
+    rows = conn.execute(f"""
+        SELECT cp.id_collaborator, cp.id_project,
+               COALESCE(p.mois_fin - MAX(p.duree_mois, 1) + 1, p.mois_fin), p.mois_fin
+        FROM collaborator_project cp
+        JOIN project p ON p.id = cp.id_project
+        WHERE p.mois_fin IS NOT NULL {where.format(alias='cp')}
+    """, params).fetchall()
+    for row in rows:
+        add(*row)
+
+    engagements = {}
+    for (id_collaborator, id_project), (start, end) in bounds.items():
+        engagements.setdefault(id_collaborator, []).append((start, end, id_project))
+    return engagements
+
+
+class AvailabilityIndex:
+    """Calendriers de tous les collaborateurs à une version donnée"""
+
+    def __init__(self, conn, version):
+        self.version = version
+        self.built_at = datetime.datetime.now()
+
+        collaborators = conn.execute(
+            "SELECT id, firstname, lastname FROM collaborator ORDER BY lastname, firstname, id"
+        ).fetchall()
+        self.collaborator_ids = [row['id'] for row in collaborators]
+        self.collaborator_names = {row['id']: f"{row['firstname']} {row['lastname']}" for row in collaborators}
+        self.project_names = {row['id']: row['name'] for row in conn.execute("SELECT id, name FROM project")}
+
+        engagements = load_engagements(conn)
+        self.calendars = {id: Calendar(engagements.get(id, [])) for id in self.collaborator_ids}
+
+    def reload_collaborators(self, conn, ids):
+        ids = [id for id in ids if id in self.calendars]
+        if not ids:
+            return
+        engagements = load_engagements(conn, ids)
+        for id in ids:
+            self.calendars[id] = Calendar(engagements.get(id, []))
+
+    def free_months(self, id, start, end):
+        return end - start + 1 - self.calendars[id].busy_months(start, end)
+
+    def available(self, start, end, min_rate=1.0):
+        """Ids des collaborateurs libres au moins min_rate de la fenêtre"""
+        months = end - start + 1
+        return {
+            id for id in self.collaborator_ids
+            if self.free_months(id, start, end) >= min_rate * months - 1e-9
+        }
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "collaborators": len(self.collaborator_ids),
+            "engagements": sum(len(calendar) for calendar in self.calendars.values()),
+            "built_at": self.built_at.isoformat(sep=' ')
+        }
+
+
+def parse_window(start_value, end_value, start_name='from', end_name='to'):
+    """
+    Bornes YYYY-MM -> (début, fin) en index de mois ; début par défaut le
+    mois courant, fin par défaut le début. ValueError si invalide
+    """
+    start = month_index(start_value) if start_value else current_month_index()
+    if start is None:
+        raise ValueError(f"{start_name} must be a date (YYYY-MM)")
+    end = month_index(end_value) if end_value else start
+    if end is None:
+        raise ValueError(f"{end_name} must be a date (YYYY-MM)")
+    if end < start:
+        raise ValueError(f"{end_name} must not be before {start_name}")
+    if end - start + 1 > MAX_WINDOW_MONTHS:
+        raise ValueError(f"Window too long (max {MAX_WINDOW_MONTHS} months)")
+    return start, end
+
+
+def describe_period(start, end):
+    return {"date_debut": format_month(start), "date_fin": format_month(end)}
+
+
+_index = None
+_index_lock = threading.Lock()
+register_version_holder(lambda: _index.version if _index is not None else None)
+
+
+def refresh(conn):
+    """Met le calendrier à jour jusqu'à la dernière modification, le reconstruit si besoin"""
+    global _index
+    if _index is None or _index.version < pruned_through(conn):
+        # Première lecture, ou journal purgé au-delà de la version du cache
+        _index = AvailabilityIndex(conn, latest_change_id(conn))
+        return
+
+    changes = changes_since(conn, _index.version, limit=MAX_INCREMENTAL_CHANGES + 1)
+    if not changes:
+        return
+
+    tables = {change['table_name'] for change in changes}
+    if len(changes) > MAX_INCREMENTAL_CHANGES or tables & {'collaborator', 'project'}:
+        _index = AvailabilityIndex(conn, latest_change_id(conn))
+        return
+
+    ids = {
+        change['id_collaborator'] for change in changes
+        if change['table_name'] in ('project_techno_history', 'collaborator_project')
+    }
+    _index.reload_collaborators(conn, ids)
+    _index.version = changes[-1]['id']
+
+
+def read_availability(conn, reader):
+    """Appelle reader(index) sur le calendrier à jour, sous verrou"""
+    with _index_lock:
+        refresh(conn)
+        return reader(_index)
@@ -0,0 +1,189 @@
+"""
+Écritures en masse des routes /<ressource>/bulk
+
+- POST   /<ressource>/bulk : création
+- PATCH  /<ressource>/bulk : mise à jour, chaque item contient son "id"
+- DELETE /<ressource>/bulk : suppression d'une liste d'ids (ou de couples pour les relations)
+
+Body: {"items": [...], "atomic": false} ou directement le tableau d'items.
+- atomic=false (défaut): les items valides sont écrits, les erreurs sont rapportées par index
+- atomic=true: tout ou rien, aucun item n'est écrit si l'un d'eux est invalide ou échoue
+
+Tous les items sont écrits dans une seule transaction (executemany).
+"""
+from flask import request, jsonify
+
+MAX_BULK_ITEMS = 10000
+
+
+def read_bulk_body():
+    data = request.get_json(silent=True)
+
+    if isinstance(data, list):
+        items, atomic = data, False
+    elif isinstance(data, dict) and isinstance(data.get('items'), list):
+        items, atomic = data['items'], bool(data.get('atomic', False))
+    else:
+        raise ValueError('Body must be an array or {"items": [...]}')
+
+    if not items:
+        raise ValueError("No items provided")
+    if len(items) > MAX_BULK_ITEMS:
+        raise ValueError(f"Too many items (max {MAX_BULK_ITEMS})")
+
+    return items, atomic
+
+
+def validate_items(items, parse):
+    """Applique parse à chaque item, retourne ([(index, data)], errors)"""
+    valid = []
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("Item must be an object")
+            valid.append((index, parse(item)))
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+    return valid, errors
+
+
+def remap_errors(valid, errors):
+    """Ramène les index d'erreurs du lot validé aux index du body"""
+    return [{'index': valid[e['index']][0], 'error': e['error']} for e in errors]
+
+
+def parse_item_id(item):
+    item_id = item.get('id')
+    if not isinstance(item_id, int) or isinstance(item_id, bool):
+        raise ValueError("id is required")
+    return item_id
+
+
+def bulk_create_response(model, parse):
+    """
+    Création en masse. parse(item) retourne les données à insérer
+    ou lève ValueError avec le message d'erreur de l'item.
+    """
+    try:
+        items, atomic = read_bulk_body()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    valid, errors = validate_items(items, parse)
+    if atomic and errors:
+        return jsonify({"created": 0, "errors": errors, "atomic": True}), 400
+
+    try:
+        results, db_errors = model.bulk_create([data for _, data in valid], atomic)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    errors = sorted(errors + remap_errors(valid, db_errors), key=lambda e: e['index'])
+    created = [None] * len(items)
+    for (index, _), result in zip(valid, results):
+        created[index] = result
+
+    body = {
+        "created": len([r for r in created if r is not None]),
+        "errors": errors,
+        "atomic": atomic
+    }
+    if model.key_columns == ('id',):
+        body["ids"] = created
+
+    return jsonify(body), 400 if atomic and errors else 201
+
+
+def bulk_update_response(model, parse):
+    """
+    Mise à jour en masse. Chaque item contient "id" ; parse(item) retourne
+    les colonnes à modifier ou lève ValueError.
+    """
+    try:
+        items, atomic = read_bulk_body()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def parse_with_id(item):
+        item_id = parse_item_id(item)
+        return item_id, parse({k: v for k, v in item.items() if k != 'id'})
+
+    valid, errors = validate_items(items, parse_with_id)
+
+    found = model.existing_ids([item_id for _, (item_id, _) in valid])
+    for index, (item_id, _) in valid:
+        if item_id not in found:
+            errors.append({'index': index, 'error': f"Item {item_id} not found"})
+    valid = [(index, data) for index, data in valid if data[0] in found]
+
+    if atomic and errors:
+        return jsonify({"updated": 0, "errors": sorted(errors, key=lambda e: e['index']), "atomic": True}), 400
+
+    try:
+        updated, db_errors = model.bulk_update([data for _, data in valid], atomic)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    errors = sorted(errors + remap_errors(valid, db_errors), key=lambda e: e['index'])
+
+    return jsonify({
+        "updated": updated,
+        "errors": errors,
+        "atomic": atomic
+    }), 400 if atomic and errors else 200
+
+
+def bulk_delete_response(model):
+    """Suppression en masse d'une liste d'ids (BaseModel)"""
+    try:
+        items, atomic = read_bulk_body()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    errors = []
+    item_ids = []
+    for index, item in enumerate(items):
+        if not isinstance(item, int) or isinstance(item, bool):
+            errors.append({'index': index, 'error': "Item must be an id"})
+        else:
+            item_ids.append((index, item))
+
+    found = model.existing_ids([item_id for _, item_id in item_ids])
+    errors += [
+        {'index': index, 'error': f"Item {item_id} not found"}
+        for index, item_id in item_ids if item_id not in found
+    ]
+    errors.sort(key=lambda e: e['index'])
+
+    if atomic and errors:
+        return jsonify({"deleted": 0, "errors": errors, "atomic": True}), 400
+
+    deleted = model.bulk_delete([item_id for _, item_id in item_ids if item_id in found])
+
+    return jsonify({
+        "deleted": deleted,
+        "errors": errors,
+        "atomic": atomic
+    }), 200
+
+
+def bulk_delete_relations_response(model):
+    """Suppression en masse de relations [{field1: .., field2: ..}] (RelationModel)"""
+    try:
+        items, _ = read_bulk_body()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def parse(item):
+        if not item.get(model.field1) or not item.get(model.field2):
+            raise ValueError(f"{model.field1} and {model.field2} are required")
+        return item
+
+    valid, errors = validate_items(items, parse)
+    deleted = model.bulk_delete([data for _, data in valid])
+
+    return jsonify({
+        "deleted": deleted,
+        "errors": errors
+    }), 200
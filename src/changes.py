@@ -0,0 +1,79 @@
+"""
+Lecture du journal des modifications (table change_log, migrations 0008 et 0010)
+
+Les caches en mémoire (snapshot de simulation, matrice...) mémorisent
+l'id de la dernière modification vue et se mettent à jour, ou se
+reconstruisent, quand latest_change_id() a avancé.
+
+Le journal est purgé par le moniteur des workers (src/jobs) :
+prune_change_log() supprime les lignes que plus aucun cache du process
+n'a à relire (register_version_holder), en gardant toujours les
+CHANGE_LOG_RETENTION_SECONDS dernières secondes pour les caches des
+autres process et les clients SSE qui se reconnectent. Un cache dont la
+version est antérieure à pruned_through() se reconstruit.
+"""
+
+TRACKED_TABLES = (
+    'competence', 'project_techno_history', 'collaborator', 'techno',
+    'project', 'collaborator_project'
+)
+
+CHANGE_LOG_RETENTION_SECONDS = 600
+
+# Fonctions retournant la version encore utilisée par un cache du process (None si aucune)
+_version_holders = []
+
+
+def register_version_holder(holder):
+    _version_holders.append(holder)
+    return holder
+
+
+def latest_change_id(conn):
+    """
+    Version courante des données suivies (0 si aucune modification).
+    Lue dans sqlite_sequence (AUTOINCREMENT) : elle ne recule pas quand le journal est purgé
+    """
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+    return row[0] if row else 0
+
+
+def pruned_through(conn):
+    """Dernier id supprimé du journal : les modifications jusqu'à cet id ne sont plus relisibles"""
+    row = conn.execute("SELECT MIN(id) FROM change_log").fetchone()
+    return row[0] - 1 if row[0] is not None else latest_change_id(conn)
+
+
+def prune_change_log(conn, retention_seconds=CHANGE_LOG_RETENTION_SECONDS):
+    """
+    Supprime les lignes du journal antérieures à la plus petite version
+    encore utilisée et à la fenêtre de rétention, sans commit.
+    Retourne le nombre de lignes supprimées
+    """
+    row = conn.execute(
+        """SELECT MAX(id) FROM change_log
+           WHERE date_add <= strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime', ?)""",
+        (f"-{retention_seconds} seconds",)
+    ).fetchone()
+    floor = row[0] or 0
+    for holder in _version_holders:
+        version = holder()
+        if version is not None:
+            floor = min(floor, version)
+    if floor <= 0:
+        return 0
+    return conn.execute("DELETE FROM change_log WHERE id <= ?", (floor,)).rowcount
+
+
+def changes_since(conn, last_id, tables=None, limit=None):
+    """Modifications d'id > last_id, dans l'ordre, filtrées par table"""
+    query = "SELECT * FROM change_log WHERE id > ?"
+    params = [last_id]
+    if tables:
+        query += f" AND table_name IN ({', '.join(['?'] * len(tables))})"
+        params.extend(tables)
+    query += " ORDER BY id"
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+    return [dict(row) for row in conn.execute(query, params).fetchall()]
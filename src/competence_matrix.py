@@ -0,0 +1,261 @@
+"""
+Matrice de compétences matérialisée en mémoire (/matrix/competences*)
+
+Les niveaux sont gardés dans des tableaux NumPy denses indexés par
+l'ordinal du collaborateur (trié par nom, prénom) et de la techno (triée
+par nom), avec les index id -> ordinal. La matrice est construite une
+fois par process puis mise à jour à partir du journal des modifications
+(change_log) :
+- une écriture sur competence ne recharge que les lignes des
+  collaborateurs touchés (et invalide les listes de l'index inversé des
+  technos concernées, src/techno_index.py ; recalcule leurs profils de
+  similarité, src/skill_similarity.py, et leur contribution aux agrégats
+  de risque, src/skill_risk.py)
+- une écriture sur collaborator ou techno (ordinaux et tri changés), ou
+  un retard de plus de MAX_INCREMENTAL_CHANGES modifications, reconstruit
+  la matrice
+
+Les filtres techno / collaborator / niveau_min sont évalués sur les
+tableaux : le travail par requête se limite aux cellules retournées.
+"""
+import datetime
+import threading
+from collections import namedtuple
+import numpy as np
+from src.changes import changes_since, latest_change_id, pruned_through, register_version_holder
+from src.matrix_encoding import SparseMatrix
+from src.skill_risk import RiskAggregates
+from src.skill_similarity import SkillProfiles
+from src.techno_index import TechnoIndex
+
+MAX_INCREMENTAL_CHANGES = 5000
+
+# Fenêtre sur les lignes / colonnes retenues, limit None = jusqu'à la fin
+MatrixWindow = namedtuple('MatrixWindow', ['row_offset', 'row_limit', 'col_offset', 'col_limit'])
+
+
+def name_mask(names, needle):
+    """Équivalent de LIKE '%needle%' (insensible à la casse) sur une liste de noms"""
+    needle = needle.lower()
+    return np.array([needle in name.lower() for name in names], dtype=bool)
+
+
+class CompetenceMatrix:
+    """Niveaux déclarés et calculés de toutes les compétences à une version donnée"""
+
+    def __init__(self, conn, version):
+        self.version = version
+        self.built_at = datetime.datetime.now()
+
+        collaborators = conn.execute(
+            "SELECT id, firstname, lastname FROM collaborator ORDER BY lastname, firstname, id"
+        ).fetchall()
+        technos = conn.execute("SELECT id, name FROM techno ORDER BY name, id").fetchall()
+
+        self.collaborator_ids = [row['id'] for row in collaborators]
+        self.collaborator_names = [f"{row['firstname']} {row['lastname']}" for row in collaborators]
+        # Recherche par nom comme (firstname LIKE ? OR lastname LIKE ?)
+        self.collaborator_search = [f"{row['firstname']}\n{row['lastname']}" for row in collaborators]
+        self.techno_ids = [row['id'] for row in technos]
+        self.techno_names = [row['name'] for row in technos]
+        self.collaborator_index = {id: i for i, id in enumerate(self.collaborator_ids)}
+        self.techno_index = {id: j for j, id in enumerate(self.techno_ids)}
+
+        shape = (len(self.collaborator_ids), len(self.techno_ids))
+        self.present = np.zeros(shape, dtype=bool)
+        self.niveau_declare = np.full(shape, np.nan)
+        self.niveau_calcule = np.full(shape, np.nan)
+
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        self._load(cursor.execute(
+            "SELECT id_collaborator, id_techno, niveau_declare, niveau_calcule FROM competence"
+        ))
+        self.index = TechnoIndex(self)
+        self._profiles = None
+        self._risk = None
+
+    def _load(self, rows):
+        for id_collaborator, id_techno, niveau_declare, niveau_calcule in rows:
+            i = self.collaborator_index.get(id_collaborator)
+            j = self.techno_index.get(id_techno)
+            if i is None or j is None:
+                continue
+            self.present[i, j] = True
+            self.niveau_declare[i, j] = np.nan if niveau_declare is None else niveau_declare
+            self.niveau_calcule[i, j] = np.nan if niveau_calcule is None else niveau_calcule
+
+    def reload_collaborators(self, conn, ids):
+        """Recharge les lignes des collaborateurs donnés depuis competence"""
+        ordinals = [self.collaborator_index[id] for id in ids if id in self.collaborator_index]
+        if not ordinals:
+            return
+        touched = self.present[ordinals].any(axis=0)
+        if self._risk is not None:
+            self._risk.remove(ordinals)
+        self.present[ordinals] = False
+        self.niveau_declare[ordinals] = np.nan
+        self.niveau_calcule[ordinals] = np.nan
+
+        ids = [self.collaborator_ids[i] for i in ordinals]
+        placeholders = ', '.join(['?'] * len(ids))
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        self._load(cursor.execute(
+            f"""SELECT id_collaborator, id_techno, niveau_declare, niveau_calcule
+                FROM competence WHERE id_collaborator IN ({placeholders})""",
+            ids
+        ))
+        # Listes de l'index inversé des technos avant / après rechargement
+        self.index.invalidate(np.flatnonzero(touched | self.present[ordinals].any(axis=0)))
+        if self._profiles is not None:
+            self._profiles.update(ordinals)
+        if self._risk is not None:
+            self._risk.add(ordinals)
+
+    def risk(self):
+        """Agrégats de risque par techno (src/skill_risk.py), construits à la demande"""
+        if self._risk is None:
+            self._risk = RiskAggregates(self)
+        return self._risk
+
+    def profiles(self):
+        """Profils de compétences normalisés (src/skill_similarity.py), construits à la demande"""
+        if self._profiles is None:
+            self._profiles = SkillProfiles(self)
+        return self._profiles
+
+    def select(self, techno=None, collaborator=None, niveau_min=None):
+        """
+        Ordinaux des lignes et colonnes retenues par les filtres, et masque
+        des cellules retenues (sous-matrice lignes × colonnes)
+
+        Comme la jointure SQL d'origine : une colonne n'apparaît que si au
+        moins une cellule retenue la remplit, une ligne sans cellule retenue
+        n'est gardée que sans filtre techno / niveau_min
+        """
+        cells = self.present
+        if techno:
+            cells = cells & name_mask(self.techno_names, techno)[np.newaxis, :]
+        if niveau_min is not None:
+            with np.errstate(invalid='ignore'):
+                cells = cells & (self.niveau_calcule >= niveau_min)
+
+        if collaborator:
+            rows = name_mask(self.collaborator_search, collaborator)
+        else:
+            rows = np.ones(len(self.collaborator_ids), dtype=bool)
+        if techno or niveau_min is not None:
+            rows &= cells.any(axis=1)
+
+        rows = np.flatnonzero(rows)
+        columns = np.flatnonzero(cells[rows].any(axis=0))
+        return rows, columns, cells[np.ix_(rows, columns)]
+
+    def select_present(self, columns=None):
+        """
+        Lignes, colonnes et masque des compétences existantes (heatmaps),
+        limité aux colonnes données
+        """
+        if columns is None:
+            columns = np.flatnonzero(self.present.any(axis=0))
+        rows = np.flatnonzero(self.present[:, columns].any(axis=1))
+        return rows, columns, self.present[np.ix_(rows, columns)]
+
+    def most_used_technos(self, n):
+        """Ordinaux des n technos ayant le plus de collaborateurs (ex aequo par nom)"""
+        counts = self.present.sum(axis=0)
+        order = np.argsort(-counts, kind='stable')
+        order = order[counts[order] > 0][:n]
+        return np.sort(order)
+
+    def to_sparse(self, rows, columns, cells, values):
+        """SparseMatrix (copie) du bloc lignes × colonnes, values: nom -> tableau complet"""
+        block = np.ix_(rows, columns)
+        return SparseMatrix(
+            [self.collaborator_ids[i] for i in rows.tolist()],
+            [self.collaborator_names[i] for i in rows.tolist()],
+            [self.techno_ids[j] for j in columns.tolist()],
+            [self.techno_names[j] for j in columns.tolist()],
+            cells,
+            {name: array[block] for name, array in values.items()}
+        )
+
+    def niveau(self, rows=None):
+        """Niveau affiché: niveau calculé, à défaut le niveau déclaré (lignes données ou toutes)"""
+        if rows is None:
+            rows = slice(None)
+        calcule = np.nan_to_num(self.niveau_calcule[rows])
+        return np.where(calcule != 0, calcule, self.niveau_declare[rows])
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "collaborators": len(self.collaborator_ids),
+            "technos": len(self.techno_ids),
+            "competences": int(self.present.sum()),
+            "built_at": self.built_at.isoformat(sep=' ')
+        }
+
+
+def apply_window(window, rows, columns, cells):
+    """
+    Restreint une sélection (lignes, colonnes, masque) à la fenêtre. Les
+    lignes et colonnes gardent l'ordre du tri (nom, prénom, id / nom, id),
+    les colonnes sont celles de toute la sélection et non de la fenêtre
+    de lignes : elles ne bougent pas quand on défile verticalement.
+    """
+    def window_slice(offset, limit):
+        return slice(offset, None if limit is None else offset + limit)
+
+    row_slice = window_slice(window.row_offset, window.row_limit)
+    col_slice = window_slice(window.col_offset, window.col_limit)
+    return rows[row_slice], columns[col_slice], cells[row_slice, col_slice]
+
+
+def describe_window(window, total_rows, total_columns):
+    return {
+        'row_offset': window.row_offset,
+        'row_limit': window.row_limit,
+        'col_offset': window.col_offset,
+        'col_limit': window.col_limit,
+        'total_rows': total_rows,
+        'total_columns': total_columns
+    }
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+register_version_holder(lambda: _matrix.version if _matrix is not None else None)
+
+
+def refresh(conn):
+    """Met la matrice à jour jusqu'à la dernière modification, la reconstruit si besoin"""
+    global _matrix
+    if _matrix is None or _matrix.version < pruned_through(conn):
+        # Première lecture, ou journal purgé au-delà de la version du cache
+        _matrix = CompetenceMatrix(conn, latest_change_id(conn))
+        return
+
+    changes = changes_since(conn, _matrix.version, limit=MAX_INCREMENTAL_CHANGES + 1)
+    if not changes:
+        return
+
+    tables = {change['table_name'] for change in changes}
+    if len(changes) > MAX_INCREMENTAL_CHANGES or tables & {'collaborator', 'techno'}:
+        _matrix = CompetenceMatrix(conn, latest_change_id(conn))
+        return
+
+    ids = {change['id_collaborator'] for change in changes if change['table_name'] == 'competence'}
+    _matrix.reload_collaborators(conn, ids)
+    _matrix.version = changes[-1]['id']
+
+
+def read_matrix(conn, reader):
+    """
+    Appelle reader(matrix) sur la matrice à jour, sous verrou : reader doit
+    copier ce qu'il retourne (les tableaux sont modifiés en place)
+    """
+    with _matrix_lock:
+        refresh(conn)
+        return reader(_matrix)
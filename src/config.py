@@ -1,11 +1,114 @@
 import sqlite3
+from queue import LifoQueue, Empty, Full
+from flask import g, has_app_context
 
 DATABASE = "data/database.db"
 
+# Nombre maximal de connexions inactives conservées dans le pool
+POOL_SIZE = 8
+
+# Workers de la file de tâches de fond (src/jobs). Avec JOB_WORKERS_IN_PROCESS = False,
+# les tâches sont exécutées par un process séparé: python -m src.jobs
+JOB_WORKERS = 2
+JOB_WORKERS_IN_PROCESS = True
+
+# Pragmas appliqués une seule fois, à l'ouverture de chaque connexion
+PRAGMAS = (
+    ("journal_mode", "WAL"),        # les lectures ne bloquent plus derrière les imports
+    ("busy_timeout", 5000),         # ms d'attente sur un verrou avant "database is locked"
+    ("synchronous", "NORMAL"),      # suffisant en WAL, un fsync par checkpoint
+    ("cache_size", -20000),         # ~20 Mo de cache de pages par connexion
+    ("mmap_size", 268435456),       # 256 Mo lus via mmap
+)
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Connexion SQLite rendue au pool au lieu d'être fermée.
+    Tant qu'elle est liée au contexte Flask, close() est sans effet :
+    la connexion est libérée dans le teardown de la requête.
+    """
+    pool = None
+    bound = False
+    idle = False
+
+    def close(self):
+        if self.bound:
+            return
+        self.pool.release(self)
+
+
+class ConnectionPool:
+    """Pool borné de connexions SQLite déjà configurées"""
+
+    def __init__(self, size=POOL_SIZE):
+        self._idle = LifoQueue(maxsize=size)
+
+    def _connect(self):
+        conn = sqlite3.connect(DATABASE, factory=PooledConnection, check_same_thread=False)
+        for name, value in PRAGMAS:
+            conn.execute(f"PRAGMA {name} = {value}")
+        conn.pool = self
+        return conn
+
+    def acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+        except Empty:
+            conn = self._connect()
+        conn.idle = False
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def release(self, conn):
+        if conn.idle:
+            return
+        conn.bound = False
+        if conn.in_transaction:
+            conn.rollback()
+        conn.idle = True
+        try:
+            self._idle.put_nowait(conn)
+        except Full:
+            sqlite3.Connection.close(conn)
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except Empty:
+                return
+            sqlite3.Connection.close(conn)
+
+
+pool = ConnectionPool()
+
+
 def get_db_connection():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """
+    Retourne la connexion de la requête courante (une par contexte Flask),
+    ou une connexion du pool hors contexte (scripts, threads de fond).
+    """
+    if has_app_context():
+        conn = g.get('_db_conn')
+        if conn is None:
+            conn = pool.acquire()
+            conn.bound = True
+            g._db_conn = conn
+        return conn
+    return pool.acquire()
+
+
+def release_db_connection(exception=None):
+    """Rend au pool la connexion liée au contexte Flask"""
+    conn = g.pop('_db_conn', None)
+    if conn is not None:
+        pool.release(conn)
+
+
+def init_app(app):
+    app.teardown_appcontext(release_db_connection)
+
 
 def init_db():
     conn = get_db_connection()
@@ -34,6 +137,7 @@ def init_db():
             name TEXT NOT NULL,
             date_fin TEXT,
             duree_mois INTEGER,
+            mois_fin INTEGER,
             date_add DATETIME NOT NULL,
             date_upd DATETIME NOT NULL
         )
@@ -73,6 +177,8 @@ def init_db():
             date_debut TEXT,
             date_fin TEXT,
             duree_mois INTEGER,
+            mois_debut INTEGER,
+            mois_fin INTEGER,
             FOREIGN KEY(id_project) REFERENCES project(id),
             FOREIGN KEY(id_techno) REFERENCES techno(id),
             FOREIGN KEY(id_collaborator) REFERENCES collaborator(id)
@@ -104,3 +210,7 @@ def init_db():
 
     conn.commit()
     conn.close()
+
+    # Index, contraintes et évolutions du schéma (src/migrations)
+    from src.migrations import migrate
+    return migrate()
@@ -0,0 +1,238 @@
+"""
+Widgets du dashboard (routes /dashboard/*, src/routes/dashboard.py)
+
+Chaque widget est une fonction qui prend une connexion et ses propres
+paramètres et retourne un dict, le payload JSON de sa route. Les widgets
+top-technologies et at-risk-technologies se calculent sur la matrice en
+mémoire (src/competence_matrix.py) : matrix_aggregates() les lit en un seul
+passage sous le verrou de la matrice, pour /dashboard/bundle.
+"""
+from src.competence_matrix import read_matrix
+from src.skill_risk import techno_risk
+from src.stats_counters import overview_stats, read_counters
+
+TOP_TECHNOLOGIES_LIMIT = 10
+RISK_THRESHOLD = 2
+
+
+def overview_widget(conn):
+    """Métriques principales, lues sur la ligne de compteurs (src/stats_counters.py)"""
+    return {'stats': overview_stats(read_counters(conn))}
+
+
+def techno_stats(store):
+    """Agrégats par techno lus sur les listes triées de l'index inversé"""
+    stats = []
+    for j, name in enumerate(store.techno_names):
+        postings = store.index.get(j)
+        if not len(postings):
+            continue
+        stats.append({
+            'techno': name,
+            'nb_collaborators': len(postings),
+            'avg_niveau': postings.mean(),
+            'nb_experts': postings.count_above(4),
+            'max_niveau': postings.max()
+        })
+    return stats
+
+
+def top_technologies(stats, limit=TOP_TECHNOLOGIES_LIMIT):
+    """Payload de top-technologies à partir de techno_stats()"""
+    # Plus d'experts d'abord, puis meilleur niveau moyen (sans niveau en dernier)
+    stats = sorted(stats, key=lambda s: (-s['nb_experts'], s['avg_niveau'] is None, -(s['avg_niveau'] or 0)))
+    if limit >= 0:
+        stats = stats[:limit]
+
+    return {
+        'top_technologies': [
+            {
+                'techno': row['techno'],
+                'nb_collaborators': row['nb_collaborators'],
+                'avg_niveau': round(row['avg_niveau'], 2) if row['avg_niveau'] else 0,
+                'nb_experts': row['nb_experts'],
+                'max_niveau': row['max_niveau']
+            }
+            for row in stats
+        ],
+        'limit': limit
+    }
+
+
+def at_risk_technologies(technos, threshold=RISK_THRESHOLD, expert_level=4):
+    """Payload de at-risk-technologies à partir de techno_risk() (src/skill_risk.py)"""
+    # Technos possédées par au moins un collaborateur, moins d'experts puis meilleur niveau d'abord
+    results = [row for row in technos if row['nb_collaborators'] > 0 and row['nb_experts'] < threshold]
+    results.sort(key=lambda row: (
+        row['nb_experts'], row['max_niveau'] is None, -(row['max_niveau'] or 0), row['techno']
+    ))
+
+    at_risk = []
+    for row in results:
+        risk_level = 'critical' if row['nb_experts'] == 0 else 'high' if row['nb_experts'] == 1 else 'medium'
+
+        at_risk.append({
+            'techno': row['techno'],
+            'nb_collaborators': row['nb_collaborators'],
+            'nb_experts': row['nb_experts'],
+            'avg_niveau': round(row['avg_niveau'], 2) if row['avg_niveau'] else 0,
+            'best_niveau': row['max_niveau'] if row['max_niveau'] else 0,
+            'risk_level': risk_level
+        })
+
+    return {
+        'at_risk_technologies': at_risk,
+        'total': len(at_risk),
+        'threshold': threshold,
+        'expert_level': expert_level,
+        'critical': len([t for t in at_risk if t['risk_level'] == 'critical']),
+        'high': len([t for t in at_risk if t['risk_level'] == 'high'])
+    }
+
+
+def top_technologies_widget(conn, limit=TOP_TECHNOLOGIES_LIMIT):
+    return top_technologies(read_matrix(conn, techno_stats), limit)
+
+
+def at_risk_technologies_widget(conn, threshold=RISK_THRESHOLD, expert_level=4):
+    return at_risk_technologies(read_matrix(conn, lambda store: techno_risk(store, expert_level)), threshold, expert_level)
+
+
+def matrix_aggregates(conn, expert_level=None):
+    """
+    techno_stats() et, si expert_level est donné, techno_risk() en une seule
+    lecture de la matrice : (stats, risques ou None)
+    """
+    return read_matrix(conn, lambda store: (
+        techno_stats(store),
+        techno_risk(store, expert_level) if expert_level is not None else None
+    ))
+
+
+def heatmap_points(conn, top_n=None):
+    """
+    Itère sur les points de la heatmap globale directement depuis le curseur SQLite
+    top_n: limiter aux N technologies les plus utilisées
+    """
+    if top_n:
+        # Récupérer les top N technologies
+        query = """
+            SELECT
+                t.name as techno,
+                COUNT(DISTINCT comp.id_collaborator) as nb_users
+            FROM techno t
+            JOIN competence comp ON t.id = comp.id_techno
+            GROUP BY t.id, t.name
+            ORDER BY nb_users DESC
+            LIMIT ?
+        """
+        top_technos = conn.execute(query, (top_n,)).fetchall()
+        techno_names = [t['techno'] for t in top_technos]
+
+        # Filtrer les données de la heatmap
+        placeholders = ','.join(['?'] * len(techno_names))
+        query = f"""
+            SELECT
+                c.firstname || ' ' || c.lastname as collaborator,
+                t.name as techno,
+                comp.niveau_calcule as niveau
+            FROM competence comp
+            JOIN collaborator c ON comp.id_collaborator = c.id
+            JOIN techno t ON comp.id_techno = t.id
+            WHERE t.name IN ({placeholders})
+            ORDER BY c.lastname, c.firstname, t.name
+        """
+        results = conn.execute(query, techno_names)
+    else:
+        # Toutes les compétences
+        query = """
+            SELECT
+                c.firstname || ' ' || c.lastname as collaborator,
+                t.name as techno,
+                comp.niveau_calcule as niveau
+            FROM competence comp
+            JOIN collaborator c ON comp.id_collaborator = c.id
+            JOIN techno t ON comp.id_techno = t.id
+            ORDER BY c.lastname, c.firstname, t.name
+        """
+        results = conn.execute(query)
+
+    for row in results:
+        yield {
+            'collaborator': row['collaborator'],
+            'techno': row['techno'],
+            'niveau': row['niveau'] if row['niveau'] else 0
+        }
+
+
+def heatmap_widget(conn, top_n=None):
+    heatmap_data = list(heatmap_points(conn, top_n))
+    return {
+        'heatmap_data': heatmap_data,
+        'total_points': len(heatmap_data),
+        'top_n_filter': top_n
+    }
+
+
+def statistics_widget(conn):
+    """Statistiques détaillées : distribution des niveaux, top technos des projets, polyvalents"""
+    stats = {}
+
+    # Distribution des niveaux
+    niveau_distribution = conn.execute("""
+        SELECT
+            CASE
+                WHEN niveau_calcule >= 4 THEN 'Expert (4-5)'
+                WHEN niveau_calcule >= 2 THEN 'Intermédiaire (2-3)'
+                ELSE 'Débutant (0-1)'
+            END as category,
+            COUNT(*) as count
+        FROM competence
+        GROUP BY category
+    """).fetchall()
+
+    stats['niveau_distribution'] = [
+        {'category': row['category'], 'count': row['count']}
+        for row in niveau_distribution
+    ]
+
+    # Technologies les plus demandées (dans les projets)
+    top_project_technos = conn.execute("""
+        SELECT
+            t.name as techno,
+            COUNT(DISTINCT pth.id_project) as nb_projects
+        FROM project_techno_history pth
+        JOIN techno t ON pth.id_techno = t.id
+        GROUP BY t.id, t.name
+        ORDER BY nb_projects DESC
+        LIMIT 10
+    """).fetchall()
+
+    stats['top_project_technos'] = [
+        {'techno': row['techno'], 'nb_projects': row['nb_projects']}
+        for row in top_project_technos
+    ]
+
+    # Collaborateurs les plus polyvalents
+    top_polyvalent = conn.execute("""
+        SELECT
+            c.firstname || ' ' || c.lastname as name,
+            COUNT(DISTINCT comp.id_techno) as nb_technos,
+            AVG(comp.niveau_calcule) as avg_niveau
+        FROM collaborator c
+        JOIN competence comp ON c.id = comp.id_collaborator
+        GROUP BY c.id, name
+        ORDER BY nb_technos DESC, avg_niveau DESC
+        LIMIT 10
+    """).fetchall()
+
+    stats['top_polyvalent'] = [
+        {
+            'name': row['name'],
+            'nb_technos': row['nb_technos'],
+            'avg_niveau': round(row['avg_niveau'], 2) if row['avg_niveau'] else 0
+        }
+        for row in top_polyvalent
+    ]
+
+    return stats
@@ -0,0 +1,70 @@
+"""
+Impact du départ d'un collaborateur sur la couverture des technos
+(/analytics/departure-impact)
+
+Sur la matrice en mémoire (src/competence_matrix.py), experts = niveau
+calculé >= expert_level. Un départ retire la ligne du collaborateur :
+- last_expert : techno dont il est le seul expert (passe en critique)
+- below_min_experts : techno qui passe sous min_experts experts sans
+  tomber à 0 (min_experts >= 2)
+- orphaned : techno que personne d'autre ne possède, à aucun niveau
+
+Le dommage d'un départ pondère ces trois effets (DAMAGE_WEIGHTS). Pour
+le classement de toute l'organisation, chaque effet est un produit
+masque × vecteur sur la matrice collaborateurs × technos : le coût est
+celui de quelques passes sur la matrice, quel que soit le nombre de
+collaborateurs classés.
+"""
+from collections import namedtuple
+import numpy as np
+
+DAMAGE_WEIGHTS = {'last_expert': 3, 'below_min_experts': 1, 'orphaned': 1}
+
+DepartureImpact = namedtuple('DepartureImpact', [
+    'experts', 'expert_counts', 'holder_counts', 'last_expert', 'below_min_experts', 'orphaned'
+])
+
+
+def risk_level(nb_experts, min_experts):
+    """Même échelle que /allocation/gaps, 'ok' à partir de min_experts experts"""
+    if nb_experts == 0:
+        return 'critical'
+    if nb_experts == 1:
+        return 'high'
+    return 'medium' if nb_experts < min_experts else 'ok'
+
+
+def departure_impact(matrix, expert_level, min_experts):
+    """
+    Masques (collaborateurs × technos) des effets du départ de chaque
+    collaborateur, et comptes d'experts / de détenteurs par techno
+    """
+    with np.errstate(invalid='ignore'):
+        experts = matrix.niveau_calcule >= expert_level
+    expert_counts = experts.sum(axis=0)
+    holder_counts = matrix.present.sum(axis=0)
+
+    last_expert = experts & (expert_counts == 1)[np.newaxis, :]
+    if min_experts >= 2:
+        below_min_experts = experts & (expert_counts == min_experts)[np.newaxis, :]
+    else:
+        below_min_experts = np.zeros_like(experts)
+    orphaned = matrix.present & (holder_counts == 1)[np.newaxis, :]
+
+    return DepartureImpact(experts, expert_counts, holder_counts, last_expert, below_min_experts, orphaned)
+
+
+def damage_scores(impact):
+    """Nombre de technos par effet et dommage pondéré, par collaborateur"""
+    counts = {
+        name: getattr(impact, name).sum(axis=1)
+        for name in DAMAGE_WEIGHTS
+    }
+    damage = sum(weight * counts[name] for name, weight in DAMAGE_WEIGHTS.items())
+    return counts, damage
+
+
+def rank_departures(damage, counts):
+    """Ordinaux par dommage décroissant, puis technos perdues, puis ordre des lignes (nom)"""
+    rows = np.arange(len(damage))
+    return np.lexsort((rows, -counts['last_expert'], -damage))
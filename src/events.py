@@ -0,0 +1,195 @@
+"""
+Notifications de modifications en Server-Sent Events (GET /events)
+
+Un seul thread relit le journal des modifications (change_log, src/changes.py)
+toutes les POLL_SECONDS et met les événements construits dans un tampon
+circulaire partagé par tous les clients connectés :
+- un événement par ligne du journal, de type = table modifiée, avec l'id du
+  journal comme id d'événement ; les compétences portent leurs niveaux courants
+- un événement 'counters' (statistiques de /dashboard/overview, lues sur
+  src/stats_counters.py) après chaque lot qui change un compte ou un niveau,
+  d'id '<id de la dernière modification du lot>:counters'
+
+Les triggers écrivent dans le journal dans la transaction de la modification :
+un événement n'est donc émis qu'une fois la modification commitée.
+
+Les positions dans le flux sont ordonnées (id, compteurs) : les compteurs
+d'un lot viennent juste après sa dernière modification. Un client qui se
+reconnecte avec Last-Event-ID reprend juste après cette position. Si elle est
+plus ancienne que le tampon, le rattrapage est relu dans le journal, précédé
+des compteurs courants si ceux de la dernière modification reçue ont pu être
+manqués ; si elle est plus ancienne que la purge du journal, un événement
+'reset' indique au client de tout relire avant de suivre les modifications
+suivantes.
+"""
+from collections import deque, namedtuple
+import json
+import logging
+import threading
+import time
+from src.changes import TRACKED_TABLES, changes_since, latest_change_id, pruned_through, register_version_holder
+from src.config import get_db_connection
+from src.stats_counters import COUNTED_TABLES, overview_stats, read_counters
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_TOPIC = 'counters'
+RESET_EVENT = 'reset'      # reprise impossible (journal purgé), envoyé quels que soient les topics
+EVENT_TOPICS = TRACKED_TABLES + (COUNTERS_TOPIC,)
+
+POLL_SECONDS = 0.5         # fréquence de lecture du journal
+KEEPALIVE_SECONDS = 15.0   # commentaire envoyé sans événement, pour les proxys
+RETRY_MS = 3000            # délai de reconnexion conseillé au navigateur
+BATCH_SIZE = 500           # lignes du journal lues par requête
+BUFFER_SIZE = 10000        # événements gardés en mémoire pour les clients
+
+Event = namedtuple('Event', ['id', 'topic', 'data'])
+
+
+def build_events(conn, changes):
+    """Événements d'un lot du journal, suivis des compteurs si un compte ou un niveau a changé"""
+    competence_ids = [c['row_id'] for c in changes if c['table_name'] == 'competence' and c['operation'] != 'delete']
+    levels = {}
+    if competence_ids:
+        placeholders = ', '.join(['?'] * len(competence_ids))
+        for row in conn.execute(
+            f"SELECT id, niveau_declare, niveau_calcule FROM competence WHERE id IN ({placeholders})",
+            competence_ids
+        ):
+            levels[row['id']] = {'niveau_declare': row['niveau_declare'], 'niveau_calcule': row['niveau_calcule']}
+
+    events = []
+    for change in changes:
+        data = {'operation': change['operation'], 'row_id': change['row_id']}
+        for key in ('id_collaborator', 'id_techno'):
+            if change[key] is not None:
+                data[key] = change[key]
+        if change['table_name'] == 'competence' and change['row_id'] in levels:
+            data.update(levels[change['row_id']])
+        events.append(Event(change['id'], change['table_name'], data))
+
+    if any(c['table_name'] in COUNTED_TABLES.values() for c in changes):
+        events.append(counters_event(conn, changes[-1]['id']))
+    return events
+
+
+def counters_event(conn, change_id):
+    return Event(change_id, COUNTERS_TOPIC, overview_stats(read_counters(conn)))
+
+
+def event_position(event):
+    """Position (id, compteurs) : les compteurs suivent la modification de même id"""
+    return event.id, event.topic == COUNTERS_TOPIC
+
+
+def format_position(position):
+    change_id, counters = position
+    return f"{change_id}:{COUNTERS_TOPIC}" if counters else str(change_id)
+
+
+def parse_position(value):
+    """'<id>' ou '<id>:counters' -> (id, compteurs), ValueError si invalide"""
+    change_id, separator, suffix = value.partition(':')
+    if separator and suffix != COUNTERS_TOPIC:
+        raise ValueError(f"Invalid event id: {value}")
+    return int(change_id), bool(separator)
+
+
+def format_event(event):
+    data = json.dumps(event.data, ensure_ascii=False, separators=(',', ':'))
+    return f"id: {format_position(event_position(event))}\nevent: {event.topic}\ndata: {data}\n\n"
+
+
+class EventHub:
+    """Tampon des derniers événements, alimenté par un thread de lecture du journal"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.events = deque(maxlen=BUFFER_SIZE)
+        self.first_id = None    # le tampon contient tous les événements d'id > first_id
+        self.last_id = None     # dernier id du journal lu
+        self.thread = None
+
+    def start(self):
+        with self.condition:
+            if self.thread is not None:
+                return False
+            conn = get_db_connection()
+            self.first_id = self.last_id = latest_change_id(conn)
+            conn.close()
+            self.thread = threading.Thread(target=self._poll, name='events', daemon=True)
+            self.thread.start()
+            return True
+
+    def _poll(self):
+        while True:
+            time.sleep(POLL_SECONDS)
+            try:
+                self._read_journal()
+            except Exception:
+                # Base verrouillée ou indisponible, ou lot invalide : relu au tour suivant
+                logger.exception("Lecture du journal des modifications en échec")
+
+    def _read_journal(self):
+        conn = get_db_connection()
+        try:
+            changes = changes_since(conn, self.last_id, limit=BATCH_SIZE)
+            events = build_events(conn, changes) if changes else []
+        finally:
+            conn.close()
+        if not changes:
+            return
+        with self.condition:
+            for event in events:
+                if len(self.events) == self.events.maxlen:
+                    self.first_id = self.events[0].id
+                self.events.append(event)
+            self.last_id = changes[-1]['id']
+            self.condition.notify_all()
+
+    def _pending(self, position):
+        """Événements du tampon après position, None si le tampon ne remonte pas jusque-là"""
+        if position[0] < self.first_id:
+            return None
+        return [event for event in self.events if event_position(event) > position]
+
+    def stream(self, position, topics):
+        """Flux SSE des événements après position (id, compteurs) sur les topics demandés"""
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            with self.condition:
+                pending = self._pending(position)
+                if pending == []:
+                    self.condition.wait(KEEPALIVE_SECONDS)
+                    pending = self._pending(position)
+
+            if pending is None:
+                # Rattrapage plus ancien que le tampon, relu dans le journal
+                conn = get_db_connection()
+                try:
+                    floor = pruned_through(conn)
+                    last_id, counters_sent = position
+                    if last_id < floor:
+                        pending = [Event(floor, RESET_EVENT, {'latest_id': latest_change_id(conn)})]
+                    else:
+                        pending = build_events(conn, changes_since(conn, last_id, limit=BATCH_SIZE))
+                        if not counters_sent and COUNTERS_TOPIC in topics:
+                            pending.insert(0, counters_event(conn, last_id))
+                finally:
+                    conn.close()
+
+            if not pending:
+                yield ": keepalive\n\n"
+                continue
+            position = event_position(pending[-1])
+            chunk = ''.join(
+                format_event(event) for event in pending
+                if event.topic in topics or event.topic == RESET_EVENT
+            )
+            if chunk:
+                yield chunk
+
+
+hub = EventHub()
+# Le journal couvre au moins le tampon de rejeu
+register_version_holder(lambda: hub.first_id)
@@ -0,0 +1,488 @@
+"""
+File de tâches de fond durable, stockée dans la table job (migration 0005)
+
+Les opérations longues (recalcul des scores, imports, CV) sont soumises
+comme tâches: la requête HTTP retourne immédiatement un id de tâche, un
+pool de threads workers exécute la tâche et enregistre progression et
+résultat dans la table.
+
+- submit(type, payload, data) crée une tâche et réveille les workers
+- les handlers sont enregistrés par type avec @job_handler("type")
+  et reçoivent un Job (payload, data, progress(done, total))
+- une tâche annulée s'arrête au prochain appel à progress()
+- les erreurs SQLite transitoires (base occupée, table verrouillée) sont
+  rejouées avec un délai croissant, jusqu'à max_attempts ; les autres
+  (table absente, SQL invalide...) font échouer la tâche immédiatement
+- une tâche running dont le heartbeat est trop ancien (process arrêté
+  en cours de route) est remise en file, ou marquée failed si elle a
+  épuisé ses tentatives
+- les tâches périodiques (@scheduled) sont soumises une fois par période
+  par le pool de workers, la dernière période est gardée dans job_schedule
+- le moniteur purge aussi le journal des modifications (prune_change_log)
+"""
+import datetime
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+from src.changes import prune_change_log
+from src.config import get_db_connection, JOB_WORKERS, JOB_WORKERS_IN_PROCESS
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed', 'cancelled')
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+DEFAULT_MAX_ATTEMPTS = 3
+POLL_SECONDS = 1.0             # attente max d'un worker inactif avant de relire la file
+HEARTBEAT_SECONDS = 5.0        # fréquence du heartbeat des tâches en cours
+STALE_SECONDS = 30.0           # heartbeat plus ancien: la tâche est considérée orpheline
+PROGRESS_MIN_INTERVAL = 0.5    # s entre deux écritures de progression
+
+# Codes SQLite rejoués automatiquement (base occupée / table verrouillée),
+# les autres erreurs (table ou colonne absente, SQL invalide...) font échouer la tâche
+RETRYABLE_ERRORCODES = (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+RETRYABLE_MESSAGES = ('database is locked', 'database table is locked')
+
+HANDLERS = {}
+
+# Tâches périodiques: type -> fonction retournant la période courante (entier croissant)
+SCHEDULES = {}
+
+
+class JobCancelled(Exception):
+    """Levée par Job.progress() quand l'annulation de la tâche a été demandée"""
+
+
+def job_handler(job_type):
+    """Enregistre la fonction exécutant les tâches de type job_type"""
+    def register(func):
+        HANDLERS[job_type] = func
+        return func
+    return register
+
+
+def scheduled(job_type, period):
+    """
+    Soumet job_type une fois par période, period() retournant la période
+    courante (ex: current_month_index pour une tâche mensuelle)
+    """
+    SCHEDULES[job_type] = period
+
+
+def is_retryable(error):
+    """Erreur transitoire de verrou SQLite, qui vaut la peine d'être rejouée"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    errorcode = getattr(error, 'sqlite_errorcode', None)
+    if errorcode is not None:
+        # Codes étendus (SQLITE_BUSY_SNAPSHOT...) : l'octet bas est le code primaire
+        return errorcode & 0xff in RETRYABLE_ERRORCODES
+    return str(error) in RETRYABLE_MESSAGES
+
+
+class Job:
+    """Tâche en cours d'exécution, passée au handler"""
+
+    def __init__(self, row):
+        self.id = row['id']
+        self.type = row['type']
+        self.payload = json.loads(row['payload']) if row['payload'] else {}
+        self.data = row['input']
+        self.attempts = row['attempts']
+        self.max_attempts = row['max_attempts']
+        self._last_progress = 0.0
+
+    def progress(self, done, total):
+        """
+        Enregistre l'avancement (au plus toutes les PROGRESS_MIN_INTERVAL s)
+        et lève JobCancelled si l'annulation a été demandée
+        """
+        now = datetime.datetime.now()
+        if done < total and now.timestamp() - self._last_progress < PROGRESS_MIN_INTERVAL:
+            return
+        self._last_progress = now.timestamp()
+
+        conn = get_db_connection()
+        conn.execute(
+            "UPDATE job SET progress = ?, heartbeat = ?, date_upd = ? WHERE id = ?",
+            (done / total if total else 1.0, now, now, self.id)
+        )
+        conn.commit()
+        cancel = conn.execute("SELECT cancel_requested FROM job WHERE id = ?", (self.id,)).fetchone()
+        conn.close()
+
+        if cancel and cancel['cancel_requested']:
+            raise JobCancelled()
+
+
+def job_to_dict(row):
+    """Représentation JSON d'une tâche (sans le fichier importé)"""
+    job = {key: row[key] for key in row.keys() if key != 'input'}
+    job['payload'] = json.loads(row['payload']) if row['payload'] else None
+    job['result'] = json.loads(row['result']) if row['result'] else None
+    job['cancel_requested'] = bool(row['cancel_requested'])
+    return job
+
+
+def insert_job(conn, job_type, payload=None, data=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Insère une tâche en file dans la transaction courante, retourne son id"""
+    if job_type not in HANDLERS:
+        raise ValueError(f"Unknown job type '{job_type}'")
+
+    now = datetime.datetime.now()
+    cursor = conn.execute(
+        """INSERT INTO job (type, status, payload, input, max_attempts, run_after, date_add, date_upd)
+           VALUES (?, 'queued', ?, ?, ?, ?, ?, ?)""",
+        (job_type, json.dumps(payload or {}), data, max_attempts, now, now, now)
+    )
+    return cursor.lastrowid
+
+
+def submit(job_type, payload=None, data=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Crée une tâche en file et retourne son id"""
+    conn = get_db_connection()
+    job_id = insert_job(conn, job_type, payload, data, max_attempts)
+    conn.commit()
+    conn.close()
+
+    if JOB_WORKERS_IN_PROCESS:
+        start_workers()
+    worker_pool.wakeup.set()
+    return job_id
+
+
+def get_job(job_id):
+    conn = get_db_connection()
+    row = conn.execute("SELECT * FROM job WHERE id = ?", (job_id,)).fetchone()
+    conn.close()
+    return job_to_dict(row) if row else None
+
+
+def list_jobs(status=None, job_type=None, limit=50):
+    """Dernières tâches, les plus récentes d'abord"""
+    where = []
+    params = []
+    if status:
+        where.append("status = ?")
+        params.append(status)
+    if job_type:
+        where.append("type = ?")
+        params.append(job_type)
+
+    query = "SELECT * FROM job"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY id DESC LIMIT ?"
+    params.append(limit)
+
+    conn = get_db_connection()
+    rows = conn.execute(query, params).fetchall()
+    conn.close()
+    return [job_to_dict(row) for row in rows]
+
+
+def cancel_job(job_id):
+    """
+    Annule une tâche en file immédiatement, ou demande l'arrêt d'une tâche
+    en cours. Retourne le nouvel état, None si la tâche n'existe pas.
+    Lève ValueError si la tâche est déjà terminée.
+    """
+    now = datetime.datetime.now()
+    conn = get_db_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    row = conn.execute("SELECT status FROM job WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+        conn.rollback()
+        conn.close()
+        return None
+    if row['status'] in FINISHED_STATUSES:
+        conn.rollback()
+        conn.close()
+        raise ValueError(f"Job already {row['status']}")
+
+    if row['status'] == 'queued':
+        conn.execute(
+            "UPDATE job SET status = 'cancelled', cancel_requested = 1, date_end = ?, date_upd = ? WHERE id = ?",
+            (now, now, job_id)
+        )
+    else:
+        conn.execute("UPDATE job SET cancel_requested = 1, date_upd = ? WHERE id = ?", (now, job_id))
+    conn.commit()
+    conn.close()
+    return get_job(job_id)
+
+
+def retry_job(job_id):
+    """
+    Remet en file une tâche failed ou cancelled, avec un nouveau compteur
+    de tentatives. Retourne None si la tâche n'existe pas, lève ValueError
+    si elle n'est pas dans un état rejouable.
+    """
+    now = datetime.datetime.now()
+    conn = get_db_connection()
+    cursor = conn.execute(
+        """UPDATE job SET status = 'queued', attempts = 0, cancel_requested = 0,
+               progress = 0, result = NULL, error = NULL, worker = NULL,
+               run_after = ?, date_start = NULL, date_end = NULL, date_upd = ?
+           WHERE id = ? AND status IN ('failed', 'cancelled')""",
+        (now, now, job_id)
+    )
+    conn.commit()
+    conn.close()
+
+    if cursor.rowcount == 0:
+        job = get_job(job_id)
+        if job is None:
+            return None
+        raise ValueError(f"Job is {job['status']}, only failed or cancelled jobs can be retried")
+
+    if JOB_WORKERS_IN_PROCESS:
+        start_workers()
+    worker_pool.wakeup.set()
+    return get_job(job_id)
+
+
+def recover_jobs(stale_seconds=STALE_SECONDS):
+    """
+    Reprise après crash: les tâches running sans heartbeat depuis
+    stale_seconds sont remises en file (ou failed / cancelled).
+    Retourne le nombre de tâches reprises.
+    """
+    now = datetime.datetime.now()
+    stale = now - datetime.timedelta(seconds=stale_seconds)
+    conn = get_db_connection()
+    cursor = conn.execute(
+        """UPDATE job SET
+               status = CASE
+                   WHEN cancel_requested THEN 'cancelled'
+                   WHEN attempts >= max_attempts THEN 'failed'
+                   ELSE 'queued'
+               END,
+               error = CASE
+                   WHEN NOT cancel_requested AND attempts >= max_attempts
+                   THEN 'Worker interrompu pendant l''exécution'
+                   ELSE error
+               END,
+               date_end = CASE
+                   WHEN cancel_requested OR attempts >= max_attempts THEN ?
+                   ELSE NULL
+               END,
+               worker = NULL, run_after = ?, date_upd = ?
+           WHERE status = 'running' AND (heartbeat IS NULL OR heartbeat < ?)""",
+        (now, now, now, stale)
+    )
+    conn.commit()
+    conn.close()
+    return cursor.rowcount
+
+
+def run_schedules():
+    """
+    Soumet les tâches périodiques dont la période a changé, une seule fois
+    même avec plusieurs process workers. Retourne les ids soumis.
+    """
+    submitted = []
+    for job_type, period in SCHEDULES.items():
+        current = period()
+        conn = get_db_connection()
+        try:
+            row = conn.execute("SELECT last_period FROM job_schedule WHERE type = ?", (job_type,)).fetchone()
+            if row is not None and row['last_period'] is not None and row['last_period'] >= current:
+                continue
+
+            # Revérifié sous verrou d'écriture
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT last_period FROM job_schedule WHERE type = ?", (job_type,)).fetchone()
+            if row is not None and row['last_period'] is not None and row['last_period'] >= current:
+                conn.rollback()
+                continue
+
+            job_id = insert_job(conn, job_type, {"period": current})
+            conn.execute(
+                """INSERT INTO job_schedule (type, last_period, last_job_id, date_upd) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(type) DO UPDATE SET
+                       last_period = excluded.last_period,
+                       last_job_id = excluded.last_job_id,
+                       date_upd = excluded.date_upd""",
+                (job_type, current, job_id, datetime.datetime.now())
+            )
+            conn.commit()
+            submitted.append(job_id)
+        finally:
+            conn.close()
+
+    if submitted:
+        worker_pool.wakeup.set()
+    return submitted
+
+
+class WorkerPool:
+    """Threads workers exécutant les tâches de la table job"""
+
+    def __init__(self):
+        self.threads = []
+        self.running = {}       # id de tâche -> nom du worker
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self, size=JOB_WORKERS):
+        with self.lock:
+            if self.threads:
+                return False
+            recover_jobs()
+            run_schedules()
+            for index in range(size):
+                thread = threading.Thread(
+                    target=self._work, args=(f"{self.name}:{index}",), daemon=True
+                )
+                thread.start()
+                self.threads.append(thread)
+            monitor = threading.Thread(target=self._monitor, daemon=True)
+            monitor.start()
+            self.threads.append(monitor)
+            return True
+
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+
+    def _claim(self, worker):
+        """Prend la plus ancienne tâche prête, sous verrou d'écriture"""
+        now = datetime.datetime.now()
+        conn = get_db_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                """SELECT id FROM job WHERE status = 'queued' AND run_after <= ?
+                   ORDER BY run_after, id LIMIT 1""",
+                (now,)
+            ).fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+            conn.execute(
+                """UPDATE job SET status = 'running', attempts = attempts + 1, worker = ?,
+                       heartbeat = ?, date_start = COALESCE(date_start, ?), date_upd = ?
+                   WHERE id = ?""",
+                (worker, now, now, now, row['id'])
+            )
+            job = conn.execute("SELECT * FROM job WHERE id = ?", (row['id'],)).fetchone()
+            conn.commit()
+            return Job(job)
+        finally:
+            conn.close()
+
+    def _finish(self, job, worker, status, result=None, error=None, retry_in=None):
+        now = datetime.datetime.now()
+        conn = get_db_connection()
+        if retry_in is not None:
+            conn.execute(
+                """UPDATE job SET status = 'queued', error = ?, worker = NULL,
+                       run_after = ?, date_upd = ?
+                   WHERE id = ? AND worker = ?""",
+                (error, now + datetime.timedelta(seconds=retry_in), now, job.id, worker)
+            )
+        else:
+            conn.execute(
+                """UPDATE job SET status = ?, result = ?, error = ?,
+                       progress = CASE WHEN ? = 'succeeded' THEN 1 ELSE progress END,
+                       date_end = ?, date_upd = ?
+                   WHERE id = ? AND worker = ?""",
+                (status, json.dumps(result) if result is not None else None, error,
+                 status, now, now, job.id, worker)
+            )
+        conn.commit()
+        conn.close()
+
+    def _run(self, job, worker):
+        handler = HANDLERS.get(job.type)
+        if handler is None:
+            self._finish(job, worker, 'failed', error=f"Unknown job type '{job.type}'")
+            return
+
+        try:
+            result = handler(job)
+        except JobCancelled:
+            self._finish(job, worker, 'cancelled', error="Annulée")
+        except Exception as e:
+            if not is_retryable(e):
+                logger.exception("Tâche %s (%s) en échec", job.id, job.type)
+                self._finish(job, worker, 'failed', error=str(e))
+            elif job.attempts < job.max_attempts:
+                self._finish(job, worker, 'queued', error=str(e), retry_in=2 ** job.attempts)
+            else:
+                self._finish(job, worker, 'failed', error=str(e))
+        else:
+            self._finish(job, worker, 'succeeded', result=result)
+
+    def _work(self, worker):
+        while not self.stopping.is_set():
+            try:
+                job = self._claim(worker)
+            except sqlite3.Error:
+                job = None
+            if job is None:
+                self.wakeup.wait(POLL_SECONDS)
+                self.wakeup.clear()
+                continue
+
+            self.running[job.id] = worker
+            try:
+                self._run(job, worker)
+            finally:
+                self.running.pop(job.id, None)
+
+    def _monitor(self):
+        """Heartbeat des tâches en cours, reprise des tâches orphelines et tâches périodiques"""
+        while not self.stopping.wait(HEARTBEAT_SECONDS):
+            try:
+                now = datetime.datetime.now()
+                conn = get_db_connection()
+                conn.executemany(
+                    "UPDATE job SET heartbeat = ? WHERE id = ? AND worker = ?",
+                    [(now, job_id, worker) for job_id, worker in list(self.running.items())]
+                )
+                conn.commit()
+                conn.close()
+                recover_jobs()
+                run_schedules()
+                prune_journal()
+            except sqlite3.Error:
+                logger.exception("Moniteur des tâches : erreur SQLite, relancé au prochain tour")
+
+
+def prune_journal():
+    """Purge du journal des modifications (src/changes.py), appelée par le moniteur"""
+    conn = get_db_connection()
+    try:
+        prune_change_log(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+worker_pool = WorkerPool()
+
+
+def start_workers(size=JOB_WORKERS):
+    """Démarre le pool de workers du process (sans effet s'il tourne déjà)"""
+    return worker_pool.start(size)
+
+
+def init_app(app):
+    """
+    Démarre le pool de workers avec l'application, quel que soit le serveur
+    (gunicorn, uwsgi, flask run) : sans lui, ni les tâches planifiées, ni la
+    reprise des tâches orphelines, ni la purge du journal ne tournent.
+    Fait à la première requête servie par le process, pas à l'import : le
+    process de surveillance du reloader ne sert aucune requête.
+    """
+    @app.before_request
+    def ensure_workers():
+        if JOB_WORKERS_IN_PROCESS and not worker_pool.threads:
+            start_workers()
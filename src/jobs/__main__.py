@@ -0,0 +1,35 @@
+"""
+Process worker séparé de la file de tâches
+
+Usage:
+    python -m src.jobs              # JOB_WORKERS threads
+    python -m src.jobs 4            # nombre de threads explicite
+
+À utiliser avec JOB_WORKERS_IN_PROCESS = False dans src/config.py pour
+que le serveur web ne fasse que soumettre les tâches.
+"""
+import sys
+from src.config import init_db, JOB_WORKERS
+from src.jobs import worker_pool
+# Enregistre les handlers des tâches déclarés dans les routes
+from src.routes import scoring, imports, cv_parser, trends  # noqa: F401
+
+
+def main(argv):
+    size = int(argv[0]) if argv else JOB_WORKERS
+
+    init_db()
+    worker_pool.start(size)
+    print(f"Workers démarrés ({size} threads), Ctrl+C pour arrêter")
+
+    try:
+        while not worker_pool.stopping.wait(60):
+            pass
+    except KeyboardInterrupt:
+        worker_pool.stop()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
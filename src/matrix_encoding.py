@@ -0,0 +1,123 @@
+"""
+Encodages compacts des matrices collaborateurs × technos
+
+Choisis par le paramètre format= ou, à défaut, par l'en-tête Accept :
+- sparse (application/x-matrix-sparse+json) : tables de noms et d'ids des
+  lignes et colonnes, puis les cellules remplies au format CSR (indptr par
+  ligne, indices de colonne, un tableau parallèle par valeur)
+- binary (application/x-matrix-packed) : même contenu, tableaux en
+  little-endian packés, décodables sans parsing (Uint32Array / Float32Array)
+
+Format binaire :
+    magic 'SKMX' | version <u2 | réservé <u2 | longueur de l'en-tête <u4
+    en-tête JSON UTF-8 (shape, nnz, rows, columns, arrays, ...) complété
+    par des espaces pour que les tableaux commencent sur 8 octets
+    tableaux, dans l'ordre de header['arrays'] qui donne pour chacun son
+    dtype, son offset (depuis le début des tableaux) et son nombre
+    d'éléments ; indptr et indices en <u4, valeurs en <f4 (NaN = pas de
+    niveau)
+"""
+import json
+import struct
+import numpy as np
+from flask import Response, jsonify, request
+
+SPARSE_FORMAT = 'sparse'
+BINARY_FORMAT = 'binary'
+MATRIX_FORMATS = ('json', SPARSE_FORMAT, BINARY_FORMAT)
+
+SPARSE_MIMETYPE = 'application/x-matrix-sparse+json'
+BINARY_MIMETYPE = 'application/x-matrix-packed'
+
+BINARY_MAGIC = b'SKMX'
+BINARY_VERSION = 1
+BINARY_ALIGNMENT = 8
+
+
+def requested_matrix_format():
+    """
+    'sparse', 'binary' ou None (JSON classique ou streaming)
+    format= est prioritaire sur Accept ; ValueError si format= est inconnu
+    """
+    value = request.args.get('format', '').strip().lower()
+    if value:
+        if value not in MATRIX_FORMATS:
+            raise ValueError(f"format must be one of {', '.join(MATRIX_FORMATS)}")
+        return None if value == 'json' else value
+
+    best = request.accept_mimetypes.best_match(['application/json', SPARSE_MIMETYPE, BINARY_MIMETYPE])
+    if best == SPARSE_MIMETYPE:
+        return SPARSE_FORMAT
+    if best == BINARY_MIMETYPE:
+        return BINARY_FORMAT
+    return None
+
+
+class SparseMatrix:
+    """Cellules remplies d'une matrice, lignes et colonnes décrites par ids et noms"""
+
+    def __init__(self, row_ids, row_names, column_ids, column_names, cells, values):
+        """
+        cells: masque booléen (lignes × colonnes) des cellules remplies
+        values: nom -> tableau de même forme, seules les cellules remplies sont gardées
+        """
+        self.row_ids = list(row_ids)
+        self.row_names = list(row_names)
+        self.column_ids = list(column_ids)
+        self.column_names = list(column_names)
+        self.shape = cells.shape
+        self.indptr = np.concatenate(([0], np.cumsum(cells.sum(axis=1)))).astype(np.uint32)
+        self.indices = np.nonzero(cells)[1].astype(np.uint32)
+        self.values = {name: np.asarray(array, dtype=float)[cells] for name, array in values.items()}
+
+    def header(self):
+        return {
+            "shape": list(self.shape),
+            "nnz": len(self.indices),
+            "rows": {"ids": self.row_ids, "names": self.row_names},
+            "columns": {"ids": self.column_ids, "names": self.column_names}
+        }
+
+    def to_dict(self):
+        data = {"format": SPARSE_FORMAT}
+        data.update(self.header())
+        data["indptr"] = self.indptr.tolist()
+        data["indices"] = self.indices.tolist()
+        data["values"] = {
+            name: [None if value != value else value for value in array.tolist()]
+            for name, array in self.values.items()
+        }
+        return data
+
+    def to_bytes(self, extra=None):
+        arrays = [('indptr', self.indptr.astype('<u4')), ('indices', self.indices.astype('<u4'))]
+        arrays += [(name, array.astype('<f4')) for name, array in self.values.items()]
+
+        header = self.header()
+        header.update(extra or {})
+        header["format"] = BINARY_FORMAT
+        header["arrays"] = []
+        offset = 0
+        for name, array in arrays:
+            header["arrays"].append({"name": name, "dtype": array.dtype.str, "offset": offset, "count": len(array)})
+            offset += array.nbytes
+
+        # Les tableaux commencent à un offset aligné sur BINARY_ALIGNMENT
+        encoded = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        encoded += b' ' * (-(len(BINARY_MAGIC) + 8 + len(encoded)) % BINARY_ALIGNMENT)
+
+        parts = [BINARY_MAGIC, struct.pack('<HHI', BINARY_VERSION, 0, len(encoded)), encoded]
+        parts += [array.tobytes() for _, array in arrays]
+        return b''.join(parts)
+
+
+def matrix_response(matrix, matrix_format, extra=None):
+    """Réponse HTTP d'une SparseMatrix dans le format demandé"""
+    if matrix_format == BINARY_FORMAT:
+        return Response(matrix.to_bytes(extra), mimetype=BINARY_MIMETYPE)
+
+    data = matrix.to_dict()
+    data.update(extra or {})
+    response = jsonify(data)
+    response.mimetype = SPARSE_MIMETYPE
+    return response
@@ -0,0 +1,7 @@
+"""Colonnes date_fin et duree_mois sur project (absentes des bases créées avant le MVP)"""
+from src.migrations import add_column
+
+
+def upgrade(conn):
+    add_column(conn, 'project', 'date_fin', 'TEXT')
+    add_column(conn, 'project', 'duree_mois', 'INTEGER')
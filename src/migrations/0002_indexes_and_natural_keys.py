@@ -0,0 +1,30 @@
+"""
+Index de recherche et contraintes d'unicité sur les clés naturelles
+
+- project_techno_history(id_collaborator, id_techno, ...) couvre la requête
+  de calculate_score_for_competence
+- techno(name), project(name) servent les get_or_create_* des imports et
+  les ORDER BY de la matrice ; la migration s'arrête en listant les doublons
+  existants plutôt que de les fusionner
+- collaborator(lastname, firstname) n'est pas unique : deux personnes
+  peuvent porter le même nom
+"""
+from src.migrations import check_duplicates
+
+
+def upgrade(conn):
+    check_duplicates(conn, 'techno', ['name'])
+    check_duplicates(conn, 'project', ['name'])
+
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_techno_name ON techno(name)")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_project_name ON project(name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_collaborator_name ON collaborator(lastname, firstname)")
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_history_collaborator_techno
+        ON project_techno_history(id_collaborator, id_techno, date_fin, duree_mois)
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_history_project ON project_techno_history(id_project)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_history_techno ON project_techno_history(id_techno)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_competence_techno ON competence(id_techno, niveau_calcule)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_collaborator_project_project ON collaborator_project(id_project)")
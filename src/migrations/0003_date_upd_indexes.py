@@ -0,0 +1,6 @@
+"""Index sur date_upd pour les filtres d'intervalle des routes de liste (date_upd__gte=...)"""
+
+
+def upgrade(conn):
+    for table in ('collaborator', 'type', 'project', 'techno', 'competence'):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_date_upd ON {table}(date_upd)")
@@ -0,0 +1,67 @@
+"""
+Ensemble des couples (collaborateur, techno) dont le score est à recalculer
+
+Les triggers marquent un couple dès que son historique change, ou que la
+compétence correspondante est créée / son niveau déclaré modifié alors
+qu'un historique existe (sans historique, le score est le niveau déclaré
+et une valeur saisie à la main est conservée).
+Les couples sont recalculés puis vidés par scoring_engine.flush_dirty_scores.
+"""
+
+MARK = "INSERT OR IGNORE INTO score_dirty (id_collaborator, id_techno) VALUES ({0}.id_collaborator, {0}.id_techno);"
+
+HAS_HISTORY = """
+    EXISTS (
+        SELECT 1 FROM project_techno_history
+        WHERE id_collaborator = NEW.id_collaborator AND id_techno = NEW.id_techno
+    )
+"""
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS score_dirty (
+            id_collaborator INTEGER NOT NULL,
+            id_techno INTEGER NOT NULL,
+            PRIMARY KEY(id_collaborator, id_techno)
+        ) WITHOUT ROWID
+    ''')
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_history_insert_score_dirty
+        AFTER INSERT ON project_techno_history
+        BEGIN
+            {MARK.format('NEW')}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_history_update_score_dirty
+        AFTER UPDATE OF id_collaborator, id_techno, date_fin ON project_techno_history
+        BEGIN
+            {MARK.format('OLD')}
+            {MARK.format('NEW')}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_history_delete_score_dirty
+        AFTER DELETE ON project_techno_history
+        BEGIN
+            {MARK.format('OLD')}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_competence_insert_score_dirty
+        AFTER INSERT ON competence
+        WHEN {HAS_HISTORY}
+        BEGIN
+            {MARK.format('NEW')}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_competence_update_score_dirty
+        AFTER UPDATE OF niveau_declare, id_collaborator, id_techno ON competence
+        WHEN {HAS_HISTORY}
+        BEGIN
+            {MARK.format('NEW')}
+        END
+    ''')
@@ -0,0 +1,34 @@
+"""
+File de tâches de fond durable (src/jobs)
+
+- status: queued, running, succeeded, failed, cancelled
+- payload / result: JSON, input: fichier importé (CSV, JSON, CV)
+- heartbeat: mis à jour par le worker, une tâche running sans heartbeat
+  récent est reprise au redémarrage (crash recovery)
+"""
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS job (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            type TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            payload TEXT,
+            input BLOB,
+            result TEXT,
+            error TEXT,
+            progress REAL NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 3,
+            cancel_requested INTEGER NOT NULL DEFAULT 0,
+            worker TEXT,
+            run_after DATETIME NOT NULL,
+            heartbeat DATETIME,
+            date_start DATETIME,
+            date_end DATETIME,
+            date_add DATETIME NOT NULL,
+            date_upd DATETIME NOT NULL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_job_status_run_after ON job(status, run_after, id)")
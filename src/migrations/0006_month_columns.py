@@ -0,0 +1,59 @@
+"""
+Index de mois entiers (année × 12 + mois) pré-calculés à l'écriture
+
+- project_techno_history.mois_debut / mois_fin, project.mois_fin
+- remplis par les modèles à chaque écriture de date_debut / date_fin,
+  rétro-remplis ici pour les lignes existantes
+- le scoring agrège mois_fin sans parser de date, les filtres d'intervalle
+  sur date_debut / date_fin passent par ces colonnes indexées
+"""
+import datetime
+from dateutil import parser as date_parser
+from src.migrations import add_column
+
+
+def month_index(date_fin):
+    """
+    Copie figée de src.scoring_engine.month_index au moment de la migration :
+    le rétro-remplissage ne doit pas changer si le code applicatif évolue
+    """
+    if not date_fin:
+        return None
+    try:
+        if len(date_fin) == 7:
+            date = datetime.datetime.strptime(date_fin, '%Y-%m')
+        else:
+            date = date_parser.parse(date_fin)
+    except (ValueError, OverflowError, TypeError):
+        return None
+    return date.year * 12 + date.month
+
+
+def backfill(conn, table, columns):
+    """columns: [(colonne date, colonne mois)]"""
+    select = ', '.join(date_column for date_column, _ in columns)
+    rows = conn.execute(f"SELECT id, {select} FROM {table}").fetchall()
+    set_clause = ', '.join(f"{month_column} = ?" for _, month_column in columns)
+    conn.executemany(
+        f"UPDATE {table} SET {set_clause} WHERE id = ?",
+        [tuple(month_index(row[i + 1]) for i in range(len(columns))) + (row[0],) for row in rows]
+    )
+
+
+def upgrade(conn):
+    add_column(conn, 'project_techno_history', 'mois_debut', 'INTEGER')
+    add_column(conn, 'project_techno_history', 'mois_fin', 'INTEGER')
+    add_column(conn, 'project', 'mois_fin', 'INTEGER')
+
+    backfill(conn, 'project_techno_history', [('date_debut', 'mois_debut'), ('date_fin', 'mois_fin')])
+    backfill(conn, 'project', [('date_fin', 'mois_fin')])
+
+    # Couvre l'agrégat du scoring (COUNT, MAX(mois_fin)) par collaborateur / techno
+    conn.execute("DROP INDEX IF EXISTS idx_history_collaborator_techno")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_history_collaborator_techno
+        ON project_techno_history(id_collaborator, id_techno, mois_fin, duree_mois)
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_history_mois_fin ON project_techno_history(mois_fin)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_history_mois_debut ON project_techno_history(mois_debut)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_project_mois_fin ON project(mois_fin)")
@@ -0,0 +1,39 @@
+"""
+Paramètres de la formule de scoring, modifiables via PATCH /scoring/parameters
+
+Une ligne par paramètre, initialisée avec les valeurs historiques
+(0.3 / 0.4 / 0.3, pénalité d'ancienneté sur 12 mois, 5 projets max).
+"""
+import datetime
+
+# Valeurs initiales figées au moment de la migration (et non lues dans
+# src/scoring_engine.py, qui peut changer ses valeurs par défaut ensuite)
+PARAMETERS = {
+    "niveau_declare_weight": 0.3,
+    "nb_projets_weight": 0.4,
+    "anciennete_weight": 0.3,
+    "duree_weight": 0.0,
+    "score_par_projet": 1.0,
+    "max_projets_score": 5.0,
+    "anciennete_max": 5.0,
+    "penalite_anciennete_mois": 12.0,
+    "duree_mois_par_point": 6.0,
+    "max_duree_score": 5.0,
+    "min_score": 1.0,
+    "max_score": 5.0,
+}
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS scoring_parameter (
+            name TEXT PRIMARY KEY,
+            value REAL NOT NULL,
+            date_upd DATETIME NOT NULL
+        )
+    ''')
+    now = datetime.datetime.now()
+    conn.executemany(
+        "INSERT OR IGNORE INTO scoring_parameter (name, value, date_upd) VALUES (?, ?, ?)",
+        [(name, value, now) for name, value in PARAMETERS.items()]
+    )
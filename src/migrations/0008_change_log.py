@@ -0,0 +1,63 @@
+"""
+Journal des modifications alimenté par triggers (src/changes.py)
+
+Chaque écriture sur competence, project_techno_history, collaborator et
+techno ajoute une ligne (table, opération, id de ligne, collaborateur,
+techno). L'id croissant du journal sert de version des données pour
+invalider ou mettre à jour incrémentalement les caches en mémoire.
+Quand une modification déplace une ligne vers un autre couple
+(collaborateur, techno), l'ancien couple est aussi journalisé.
+"""
+
+# table -> (expression id_collaborator, expression id_techno) sur la ligne {row}
+TRACKED_TABLES = {
+    'competence': ('{row}.id_collaborator', '{row}.id_techno'),
+    'project_techno_history': ('{row}.id_collaborator', '{row}.id_techno'),
+    'collaborator': ('{row}.id', 'NULL'),
+    'techno': ('NULL', '{row}.id'),
+}
+
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')"
+
+
+def log_statement(table, operation, row):
+    collaborator, techno = (e.format(row=row) for e in TRACKED_TABLES[table])
+    return f"""
+        INSERT INTO change_log (table_name, operation, row_id, id_collaborator, id_techno, date_add)
+        VALUES ('{table}', '{operation}', {row}.id, {collaborator}, {techno}, {NOW});
+    """
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            operation TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            id_collaborator INTEGER,
+            id_techno INTEGER,
+            date_add DATETIME NOT NULL
+        )
+    ''')
+
+    for table in TRACKED_TABLES:
+        for operation, event, row in (('insert', 'INSERT', 'NEW'), ('update', 'UPDATE', 'NEW'), ('delete', 'DELETE', 'OLD')):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{operation}_change_log
+                AFTER {event} ON {table}
+                BEGIN
+                    {log_statement(table, operation, row)}
+                END
+            ''')
+
+    # Ancien couple d'une ligne déplacée vers un autre collaborateur / techno
+    for table in ('competence', 'project_techno_history'):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_move_change_log
+            AFTER UPDATE OF id_collaborator, id_techno ON {table}
+            WHEN OLD.id_collaborator IS NOT NEW.id_collaborator OR OLD.id_techno IS NOT NEW.id_techno
+            BEGIN
+                {log_statement(table, 'update', 'OLD')}
+            END
+        ''')
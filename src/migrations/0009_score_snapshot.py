@@ -0,0 +1,32 @@
+"""
+Historique mensuel des scores et planification des tâches périodiques
+
+- score_snapshot: une ligne par compétence et par mois (index de mois
+  entier, ids entiers, niveau réel), écrite par la tâche mensuelle
+  scoring.monthly_snapshot ; sert les tendances et les matrices "à date"
+- job_schedule: dernière période soumise par tâche périodique (src/jobs)
+"""
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS score_snapshot (
+            mois INTEGER NOT NULL,
+            id_competence INTEGER NOT NULL,
+            id_collaborator INTEGER NOT NULL,
+            id_techno INTEGER NOT NULL,
+            niveau REAL,
+            PRIMARY KEY(mois, id_competence)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_score_snapshot_collaborator ON score_snapshot(id_collaborator, mois)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_score_snapshot_techno ON score_snapshot(id_techno, mois)")
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS job_schedule (
+            type TEXT PRIMARY KEY,
+            last_period INTEGER,
+            last_job_id INTEGER,
+            date_upd DATETIME NOT NULL
+        )
+    ''')
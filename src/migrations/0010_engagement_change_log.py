@@ -0,0 +1,45 @@
+"""
+Journalise aussi project et collaborator_project dans change_log
+
+Le calendrier des disponibilités (src/availability.py) dépend des dates
+des projets et des affectations collaborateur ↔ projet. collaborator_project
+n'a pas d'id : row_id y est l'id du projet.
+"""
+
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')"
+
+# table -> (expression row_id, expression id_collaborator) sur la ligne {row}
+TRACKED_TABLES = {
+    'project': ('{row}.id', 'NULL'),
+    'collaborator_project': ('{row}.id_project', '{row}.id_collaborator'),
+}
+
+
+def log_statement(table, operation, row):
+    row_id, collaborator = (e.format(row=row) for e in TRACKED_TABLES[table])
+    return f"""
+        INSERT INTO change_log (table_name, operation, row_id, id_collaborator, id_techno, date_add)
+        VALUES ('{table}', '{operation}', {row_id}, {collaborator}, NULL, {NOW});
+    """
+
+
+def upgrade(conn):
+    for table in TRACKED_TABLES:
+        for operation, event, row in (('insert', 'INSERT', 'NEW'), ('update', 'UPDATE', 'NEW'), ('delete', 'DELETE', 'OLD')):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{operation}_change_log
+                AFTER {event} ON {table}
+                BEGIN
+                    {log_statement(table, operation, row)}
+                END
+            ''')
+
+    # Affectation déplacée vers un autre collaborateur : l'ancien est aussi journalisé
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_collaborator_project_move_change_log
+        AFTER UPDATE OF id_collaborator ON collaborator_project
+        WHEN OLD.id_collaborator IS NOT NEW.id_collaborator
+        BEGIN
+            {log_statement('collaborator_project', 'update', 'OLD')}
+        END
+    ''')
@@ -0,0 +1,89 @@
+"""
+Compteurs globaux tenus par triggers (src/stats_counters.py)
+
+- stats_counter : une ligne (id = 1) avec les comptes de collaborator,
+  techno, competence, project et la somme / le nombre des niveau_calcule
+- triggers d'insertion / suppression sur les quatre tables, et de
+  modification de niveau_calcule sur competence
+- la ligne est initialisée depuis les données existantes
+"""
+
+# Copie figée de src.stats_counters au moment de la migration :
+# colonne du compteur -> table comptée
+COUNTED_TABLES = {
+    'collaborators': 'collaborator',
+    'technos': 'techno',
+    'competences': 'competence',
+    'projects': 'project',
+}
+
+
+def initialize_counters(conn):
+    """Remplit la ligne des compteurs depuis les données existantes"""
+    counters = {
+        column: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for column, table in COUNTED_TABLES.items()
+    }
+    row = conn.execute("SELECT TOTAL(niveau_calcule), COUNT(niveau_calcule) FROM competence").fetchone()
+    counters['niveau_sum'], counters['niveau_count'] = row[0], row[1]
+    conn.execute(
+        f"INSERT OR REPLACE INTO stats_counter (id, {', '.join(counters)}, date_upd) "
+        f"VALUES (1, {', '.join(['?'] * len(counters))}, strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))",
+        list(counters.values())
+    )
+
+
+def counter_update(assignments):
+    return f"UPDATE stats_counter SET {assignments} WHERE id = 1;"
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS stats_counter (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            collaborators INTEGER NOT NULL DEFAULT 0,
+            technos INTEGER NOT NULL DEFAULT 0,
+            competences INTEGER NOT NULL DEFAULT 0,
+            projects INTEGER NOT NULL DEFAULT 0,
+            niveau_sum REAL NOT NULL DEFAULT 0,
+            niveau_count INTEGER NOT NULL DEFAULT 0,
+            date_upd DATETIME
+        )
+    ''')
+
+    for column, table in COUNTED_TABLES.items():
+        insert = f"{column} = {column} + 1"
+        delete = f"{column} = {column} - 1"
+        if table == 'competence':
+            insert += (", niveau_sum = niveau_sum + COALESCE(NEW.niveau_calcule, 0)"
+                       ", niveau_count = niveau_count + (NEW.niveau_calcule IS NOT NULL)")
+            delete += (", niveau_sum = niveau_sum - COALESCE(OLD.niveau_calcule, 0)"
+                       ", niveau_count = niveau_count - (OLD.niveau_calcule IS NOT NULL)")
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_insert_stats_counter
+            AFTER INSERT ON {table}
+            BEGIN
+                {counter_update(insert)}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_delete_stats_counter
+            AFTER DELETE ON {table}
+            BEGIN
+                {counter_update(delete)}
+            END
+        ''')
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_competence_niveau_stats_counter
+        AFTER UPDATE OF niveau_calcule ON competence
+        WHEN OLD.niveau_calcule IS NOT NEW.niveau_calcule
+        BEGIN
+            {counter_update(
+                "niveau_sum = niveau_sum - COALESCE(OLD.niveau_calcule, 0) + COALESCE(NEW.niveau_calcule, 0)"
+                ", niveau_count = niveau_count - (OLD.niveau_calcule IS NOT NULL) + (NEW.niveau_calcule IS NOT NULL)"
+            )}
+        END
+    ''')
+
+    initialize_counters(conn)
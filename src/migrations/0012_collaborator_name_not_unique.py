@@ -0,0 +1,11 @@
+"""
+Homonymes autorisés : collaborator(lastname, firstname) n'est plus unique
+
+Les bases migrées avec l'ancienne 0002 portent l'index unique
+ux_collaborator_name, remplacé par un index simple (même ORDER BY).
+"""
+
+
+def upgrade(conn):
+    conn.execute("DROP INDEX IF EXISTS ux_collaborator_name")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_collaborator_name ON collaborator(lastname, firstname)")
@@ -0,0 +1,21 @@
+"""
+Le score dépend aussi de mois_fin et de duree_mois (somme des durées) :
+trg_history_update_score_dirty marque le couple quand ces colonnes changent
+
+L'ancien trigger (0004) ne suivait que id_collaborator, id_techno et
+date_fin : un PATCH de duree_mois laissait le score périmé.
+"""
+
+MARK = "INSERT OR IGNORE INTO score_dirty (id_collaborator, id_techno) VALUES ({0}.id_collaborator, {0}.id_techno);"
+
+
+def upgrade(conn):
+    conn.execute("DROP TRIGGER IF EXISTS trg_history_update_score_dirty")
+    conn.execute(f'''
+        CREATE TRIGGER trg_history_update_score_dirty
+        AFTER UPDATE OF id_collaborator, id_techno, date_fin, mois_fin, duree_mois ON project_techno_history
+        BEGIN
+            {MARK.format('OLD')}
+            {MARK.format('NEW')}
+        END
+    ''')
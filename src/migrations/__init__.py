@@ -0,0 +1,139 @@
+"""
+Migrations versionnées du schéma SQLite
+
+Chaque fichier NNNN_description.py de ce dossier définit une fonction
+upgrade(conn). Les migrations sont appliquées dans l'ordre de leur numéro,
+chacune dans sa propre transaction, et la dernière version appliquée est
+enregistrée dans la table schema_version.
+
+Une migration ne doit pas appeler conn.commit() ni conn.executescript()
+(qui committe implicitement) : le runner gère la transaction.
+"""
+import os
+import re
+import datetime
+import importlib.util
+from src.config import get_db_connection
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATION_FILENAME = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+
+def list_migrations():
+    """Retourne la liste triée des migrations disponibles: [(version, nom, chemin)]"""
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILENAME.match(filename)
+        if match:
+            migrations.append((
+                int(match.group(1)),
+                match.group(2),
+                os.path.join(MIGRATIONS_DIR, filename)
+            ))
+    return sorted(migrations)
+
+
+def load_migration(version, name, path):
+    """Charge le module d'une migration (les noms commencent par un chiffre)"""
+    spec = importlib.util.spec_from_file_location(f"src.migrations.m{version:04d}_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def ensure_version_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at DATETIME NOT NULL
+        )
+    ''')
+    conn.commit()
+
+
+def get_current_version(conn):
+    ensure_version_table(conn)
+    row = conn.execute("SELECT MAX(version) as version FROM schema_version").fetchone()
+    return row['version'] or 0
+
+
+def get_pending_migrations(conn):
+    current = get_current_version(conn)
+    return [m for m in list_migrations() if m[0] > current]
+
+
+def migrate(target=None):
+    """
+    Applique les migrations en attente, jusqu'à target si précisé.
+    Retourne la liste des migrations appliquées: [(version, nom)]
+    """
+    conn = get_db_connection()
+    applied = []
+
+    try:
+        for version, name, path in get_pending_migrations(conn):
+            if target is not None and version > target:
+                break
+
+            module = load_migration(version, name, path)
+
+            conn.execute("BEGIN")
+            try:
+                module.upgrade(conn)
+                conn.execute(
+                    "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                    (version, name, datetime.datetime.now())
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+            applied.append((version, name))
+    finally:
+        conn.close()
+
+    return applied
+
+
+# ---------------- Helpers pour les migrations ----------------
+
+def column_exists(conn, table, column):
+    columns = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    return any(c['name'] == column for c in columns)
+
+
+def add_column(conn, table, column, definition):
+    """Ajoute une colonne si elle n'existe pas déjà (bases créées avec un ancien schéma)"""
+    if not column_exists(conn, table, column):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+class DuplicateKeysError(Exception):
+    """Doublons sur une clé naturelle : la migration est annulée sans toucher aux données"""
+
+
+def check_duplicates(conn, table, keys):
+    """
+    Lève DuplicateKeysError, avec la liste des doublons, si des lignes de
+    `table` partagent la même clé naturelle `keys`. Les doublons sont à
+    fusionner à la main avant de relancer la migration.
+    """
+    key_list = ', '.join(keys)
+    duplicates = conn.execute(f'''
+        SELECT {key_list}, GROUP_CONCAT(id) as ids
+        FROM {table}
+        GROUP BY {key_list}
+        HAVING COUNT(*) > 1
+        ORDER BY {key_list}
+    ''').fetchall()
+    if duplicates:
+        lines = [
+            f"  {', '.join(str(row[k]) for k in keys)} (ids {row['ids']})"
+            for row in duplicates
+        ]
+        raise DuplicateKeysError(
+            f"{len(duplicates)} doublon(s) sur {table}({key_list}), à fusionner avant la migration :\n"
+            + '\n'.join(lines)
+        )
@@ -0,0 +1,43 @@
+"""
+Ligne de commande des migrations
+
+Usage:
+    python -m src.migrations            # crée les tables et applique les migrations
+    python -m src.migrations upgrade
+    python -m src.migrations status
+"""
+import sys
+from src.config import get_db_connection, init_db
+from src.migrations import DuplicateKeysError, get_current_version, get_pending_migrations
+
+
+def main(argv):
+    command = argv[0] if argv else 'upgrade'
+
+    if command == 'upgrade':
+        try:
+            applied = init_db()
+        except DuplicateKeysError as e:
+            print(f"  ❌ {e}")
+            return 1
+        for version, name in applied:
+            print(f"  ✅ {version:04d} {name}")
+        print(f"{len(applied)} migration(s) appliquée(s)")
+    elif command == 'status':
+        conn = get_db_connection()
+        current = get_current_version(conn)
+        pending = get_pending_migrations(conn)
+        conn.close()
+        print(f"Version courante: {current}")
+        for version, name, _ in pending:
+            print(f"  ⏳ {version:04d} {name}")
+        print(f"{len(pending)} migration(s) en attente")
+    else:
+        print(__doc__)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
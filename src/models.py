@@ -1,10 +1,189 @@
 import datetime
+import sqlite3
 from src.config import get_db_connection
+from src.scoring_engine import flush_dirty_scores, month_index
+
+FILTER_OPERATORS = ('=', '>=', '>', '<=', '<')
+
+
+def run_batch(conn, query, rows):
+    """
+    Exécute query pour chaque ligne de rows dans la transaction courante.
+
+    Chemin rapide: un seul executemany. Si une ligne échoue, le lot est
+    annulé (savepoint) puis rejoué ligne par ligne pour identifier les
+    lignes fautives.
+
+    Retourne (rowcount, errors, rowids) où errors = [{'index', 'error'}]
+    et rowids est aligné sur rows, ou None si le chemin rapide a réussi.
+    """
+    conn.execute("SAVEPOINT batch")
+    try:
+        cursor = conn.executemany(query, rows)
+        conn.execute("RELEASE batch")
+        return cursor.rowcount, [], None
+    except sqlite3.Error:
+        conn.execute("ROLLBACK TO batch")
+        conn.execute("RELEASE batch")
+
+    rowcount = 0
+    errors = []
+    rowids = []
+    for index, row in enumerate(rows):
+        try:
+            cursor = conn.execute(query, row)
+            rowcount += cursor.rowcount
+            rowids.append(cursor.lastrowid)
+        except sqlite3.Error as e:
+            errors.append({'index': index, 'error': str(e)})
+            rowids.append(None)
+    return rowcount, errors, rowids
+
+
+def begin(conn):
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+
+
+def finish(conn, atomic, errors):
+    """Committe, ou annule tout si le mode tout-ou-rien a rencontré une erreur"""
+    if atomic and errors:
+        conn.rollback()
+        return False
+    conn.commit()
+    return True
+
+
+class PageableModel:
+    """
+    Lecture paginée par curseur (keyset) sur la clé primaire de la table,
+    avec projection des colonnes et filtres d'égalité / d'intervalle
+    """
+    table_name = None
+    key_columns = ('id',)
+    _columns = None
+    # Colonnes date texte -> index de mois entier, utilisé par les filtres d'intervalle
+    month_columns = {}
+
+    def get_columns(self):
+        if self._columns is None:
+            conn = get_db_connection()
+            rows = conn.execute(f"PRAGMA table_info({self.table_name})").fetchall()
+            conn.close()
+            self._columns = [row['name'] for row in rows]
+        return self._columns
+
+    def _check_column(self, column):
+        if column not in self.get_columns():
+            raise ValueError(f"Unknown column '{column}' for {self.table_name}")
+
+    def encode_cursor(self, item):
+        return ','.join(str(item[key]) for key in self.key_columns)
+
+    def decode_cursor(self, cursor):
+        try:
+            values = [int(v) for v in cursor.split(',')]
+        except ValueError:
+            raise ValueError("Invalid cursor")
+        if len(values) != len(self.key_columns):
+            raise ValueError("Invalid cursor")
+        return values
+
+    def _build_select(self, cursor=None, fields=None, filters=None):
+        """Construit le SELECT ordonné sur la clé, sans LIMIT"""
+        if fields:
+            for column in fields:
+                self._check_column(column)
+            selected = list(self.key_columns) + [f for f in fields if f not in self.key_columns]
+            select_clause = ', '.join(selected)
+        else:
+            select_clause = '*'
+
+        where = []
+        params = []
+
+        for column, operator, value in filters or []:
+            self._check_column(column)
+            if operator not in FILTER_OPERATORS:
+                raise ValueError(f"Unknown operator '{operator}'")
+            if operator != '=' and column in self.month_columns:
+                # Comparaison au mois près sur la colonne entière indexée
+                month = month_index(value)
+                if month is None:
+                    raise ValueError(f"Invalid date '{value}' for {column}")
+                column, value = self.month_columns[column], month
+            where.append(f"{column} {operator} ?")
+            params.append(value)
+
+        keys = ', '.join(self.key_columns)
+        if cursor:
+            values = self.decode_cursor(cursor)
+            where.append(f"({keys}) > ({', '.join(['?'] * len(values))})")
+            params.extend(values)
+
+        query = f"SELECT {select_clause} FROM {self.table_name}"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += f" ORDER BY {keys}"
+        return query, params
+
+    def get_page(self, limit, cursor=None, fields=None, filters=None):
+        """
+        Retourne (items, next_cursor), next_cursor valant None sur la dernière page.
+
+        - fields: colonnes à retourner (les colonnes clés sont toujours incluses)
+        - filters: liste de (colonne, opérateur, valeur), opérateur parmi FILTER_OPERATORS
+        """
+        query, params = self._build_select(cursor, fields, filters)
+        query += " LIMIT ?"
+        params.append(limit + 1)
+
+        conn = get_db_connection()
+        rows = conn.execute(query, params).fetchall()
+        conn.close()
+
+        items = [dict(row) for row in rows[:limit]]
+        next_cursor = self.encode_cursor(items[-1]) if len(rows) > limit else None
+        return items, next_cursor
+
+    def iter_rows(self, cursor=None, fields=None, filters=None, limit=None):
+        """
+        Itère sur les lignes sans les matérialiser (mode streaming).
+        La requête est validée immédiatement, l'itération est paresseuse.
+        """
+        query, params = self._build_select(cursor, fields, filters)
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        return self._iterate(query, params)
+
+    def _iterate(self, query, params):
+        conn = get_db_connection()
+        try:
+            for row in conn.execute(query, params):
+                yield dict(row)
+        finally:
+            conn.close()
+
+
+class BaseModel(PageableModel):
+    # Fonctions appelées avec la connexion après chaque écriture, avant le commit
+    write_hooks = ()
 
-class BaseModel:
     def __init__(self, table_name):
         self.table_name = table_name
 
+    def after_write(self, conn):
+        for hook in self.write_hooks:
+            hook(conn)
+
+    def derive(self, data):
+        """Complète data avec les index de mois des dates écrites"""
+        for date_column, month_column in self.month_columns.items():
+            if date_column in data:
+                data[month_column] = month_index(data[date_column])
+        return data
+
     def get_all(self):
         conn = get_db_connection()
         items = conn.execute(f"SELECT * FROM {self.table_name}").fetchall()
@@ -17,10 +196,16 @@ class BaseModel:
         conn.close()
         return dict(item) if item else None
 
+    def has_timestamps(self):
+        """project_techno_history n'a pas de colonnes date_add / date_upd"""
+        return 'date_upd' in self.get_columns()
+
     def create(self, data):
-        now = datetime.datetime.now()
-        data['date_add'] = now
-        data['date_upd'] = now
+        self.derive(data)
+        if self.has_timestamps():
+            now = datetime.datetime.now()
+            data['date_add'] = now
+            data['date_upd'] = now
 
         columns = ', '.join(data.keys())
         placeholders = ', '.join(['?'] * len(data))
@@ -31,13 +216,16 @@ class BaseModel:
             f"INSERT INTO {self.table_name} ({columns}) VALUES ({placeholders})",
             values
         )
-        conn.commit()
         item_id = cursor.lastrowid
+        self.after_write(conn)
+        conn.commit()
         conn.close()
         return item_id
 
     def update(self, item_id, data):
-        data['date_upd'] = datetime.datetime.now()
+        self.derive(data)
+        if self.has_timestamps():
+            data['date_upd'] = datetime.datetime.now()
 
         set_clause = ', '.join([f"{key} = ?" for key in data.keys()])
         values = tuple(data.values()) + (item_id,)
@@ -48,6 +236,7 @@ class BaseModel:
             values
         )
         affected_rows = cursor.rowcount
+        self.after_write(conn)
         conn.commit()
         conn.close()
         return affected_rows > 0
@@ -56,16 +245,120 @@ class BaseModel:
         conn = get_db_connection()
         cursor = conn.execute(f"DELETE FROM {self.table_name} WHERE id = ?", (item_id,))
         affected_rows = cursor.rowcount
+        self.after_write(conn)
         conn.commit()
         conn.close()
         return affected_rows > 0
 
+    def existing_ids(self, item_ids):
+        """Retourne l'ensemble des ids de item_ids présents dans la table"""
+        found = set()
+        conn = get_db_connection()
+        item_ids = list(item_ids)
+        for start in range(0, len(item_ids), 500):
+            chunk = item_ids[start:start + 500]
+            placeholders = ', '.join(['?'] * len(chunk))
+            rows = conn.execute(
+                f"SELECT id FROM {self.table_name} WHERE id IN ({placeholders})",
+                chunk
+            ).fetchall()
+            found.update(row['id'] for row in rows)
+        conn.close()
+        return found
+
+    def bulk_create(self, items, atomic=False):
+        """
+        Insère items dans une seule transaction.
+        Retourne (ids, errors): ids aligné sur items (None si l'item a échoué).
+        En mode atomic, rien n'est écrit si un item échoue.
+        """
+        if not items:
+            return [], []
+
+        now = datetime.datetime.now()
+        items = [self.derive(dict(item)) for item in items]
+        columns = []
+        for item in items:
+            columns.extend(c for c in item if c not in columns)
+        for column in columns:
+            self._check_column(column)
+
+        rows = [tuple(item.get(c) for c in columns) for item in items]
+        if self.has_timestamps():
+            columns += ['date_add', 'date_upd']
+            rows = [row + (now, now) for row in rows]
+        placeholders = ', '.join(['?'] * len(columns))
+        query = f"INSERT INTO {self.table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+
+        conn = get_db_connection()
+        begin(conn)
+        rowcount, errors, rowids = run_batch(conn, query, rows)
+        if rowids is None:
+            # Un seul INSERT par ligne sous verrou d'écriture: ids AUTOINCREMENT contigus
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            rowids = list(range(last_id - len(rows) + 1, last_id + 1))
+        self.after_write(conn)
+        if not finish(conn, atomic, errors):
+            rowids = [None] * len(rows)
+        conn.close()
+        return rowids, errors
+
+    def bulk_update(self, items, atomic=False):
+        """
+        Met à jour une liste de (id, data) dans une seule transaction,
+        avec un executemany par ensemble de colonnes modifiées.
+        Retourne (updated, errors), errors indexés sur items.
+        """
+        now = datetime.datetime.now()
+        groups = {}
+        for index, (item_id, data) in enumerate(items):
+            data = self.derive(dict(data))
+            for column in data:
+                self._check_column(column)
+            groups.setdefault(tuple(data.keys()), []).append((index, item_id, data))
+
+        conn = get_db_connection()
+        begin(conn)
+        updated = 0
+        errors = []
+        timestamps = self.has_timestamps()
+        for columns, group in groups.items():
+            set_columns = list(columns) + (['date_upd'] if timestamps else [])
+            set_clause = ', '.join(f"{c} = ?" for c in set_columns)
+            rows = [
+                tuple(data[c] for c in columns) + ((now,) if timestamps else ()) + (item_id,)
+                for _, item_id, data in group
+            ]
+            rowcount, group_errors, _ = run_batch(
+                conn, f"UPDATE {self.table_name} SET {set_clause} WHERE id = ?", rows
+            )
+            updated += rowcount
+            errors += [{'index': group[e['index']][0], 'error': e['error']} for e in group_errors]
+        self.after_write(conn)
+        if not finish(conn, atomic, errors):
+            updated = 0
+        conn.close()
+        return updated, sorted(errors, key=lambda e: e['index'])
+
+    def bulk_delete(self, item_ids):
+        """Supprime une liste d'ids dans une seule transaction, retourne le nombre supprimé"""
+        conn = get_db_connection()
+        begin(conn)
+        rowcount, _, _ = run_batch(
+            conn, f"DELETE FROM {self.table_name} WHERE id = ?", [(i,) for i in item_ids]
+        )
+        self.after_write(conn)
+        conn.commit()
+        conn.close()
+        return rowcount
+
 
-class RelationModel:
+class RelationModel(PageableModel):
     def __init__(self, table_name, field1, field2):
         self.table_name = table_name
         self.field1 = field1
         self.field2 = field2
+        self.key_columns = (field1, field2)
 
     def get_all(self):
         conn = get_db_connection()
@@ -94,8 +387,47 @@ class RelationModel:
         conn.close()
         return affected_rows > 0
 
+    def bulk_create(self, items, atomic=False):
+        """
+        Insère une liste de relations dans une seule transaction.
+        Retourne (created, errors): created aligné sur items (True / None).
+        """
+        if not items:
+            return [], []
+
+        conn = get_db_connection()
+        begin(conn)
+        _, errors, rowids = run_batch(
+            conn,
+            f"INSERT INTO {self.table_name} ({self.field1}, {self.field2}) VALUES (?, ?)",
+            [(item[self.field1], item[self.field2]) for item in items]
+        )
+        if not finish(conn, atomic, errors):
+            rowids = [None] * len(items)
+        conn.close()
+
+        if rowids is None:
+            return [True] * len(items), errors
+        return [True if rowid is not None else None for rowid in rowids], errors
+
+    def bulk_delete(self, items):
+        """Supprime une liste de relations dans une seule transaction, retourne le nombre supprimé"""
+        conn = get_db_connection()
+        begin(conn)
+        rowcount, _, _ = run_batch(
+            conn,
+            f"DELETE FROM {self.table_name} WHERE {self.field1} = ? AND {self.field2} = ?",
+            [(item[self.field1], item[self.field2]) for item in items]
+        )
+        conn.commit()
+        conn.close()
+        return rowcount
+
 
 class CompetenceModel(BaseModel):
+    # Le score des couples marqués dans score_dirty est recalculé dans la même transaction
+    write_hooks = (flush_dirty_scores,)
+
     def __init__(self):
         super().__init__('competence')
 
@@ -127,7 +459,17 @@ class CompetenceModel(BaseModel):
         return dict(item) if item else None
 
 
+class ProjectModel(BaseModel):
+    month_columns = {'date_fin': 'mois_fin'}
+
+    def __init__(self):
+        super().__init__('project')
+
+
 class ProjectHistoryModel(BaseModel):
+    write_hooks = (flush_dirty_scores,)
+    month_columns = {'date_debut': 'mois_debut', 'date_fin': 'mois_fin'}
+
     def __init__(self):
         super().__init__('project_techno_history')
 
@@ -161,7 +503,7 @@ class ProjectHistoryModel(BaseModel):
 
 collaborator_model = BaseModel('collaborator')
 type_model = BaseModel('type')
-project_model = BaseModel('project')
+project_model = ProjectModel()
 techno_model = BaseModel('techno')
 competence_model = CompetenceModel()
 project_history_model = ProjectHistoryModel()
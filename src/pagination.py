@@ -0,0 +1,86 @@
+"""
+Pagination par curseur, projection et filtres des routes de liste
+
+Query params:
+- limit: nombre d'éléments par page (défaut: 100, max: 1000)
+- cursor: curseur de la page suivante (en-têtes X-Next-Cursor et Link)
+- fields: colonnes à retourner, séparées par des virgules
+- <colonne>=valeur: filtre d'égalité
+- <colonne>__gte, __gt, __lte, __lt=valeur: filtres d'intervalle (ex: date_upd__gte=2024-01-01)
+
+Le corps de la réponse reste un tableau JSON ; la page suivante est
+indiquée par les en-têtes X-Next-Cursor et Link (rel="next").
+
+Avec Accept: application/x-ndjson ou text/csv, la liste complète (filtres,
+projection et curseur appliqués, limit seulement s'il est fourni) est
+streamée sans pagination, voir src/streaming.py.
+"""
+from urllib.parse import urlencode
+from flask import request, jsonify
+from src.streaming import requested_stream_format, streaming_response
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+RANGE_OPERATORS = {'gte': '>=', 'gt': '>', 'lte': '<=', 'lt': '<'}
+RESERVED_PARAMS = {'limit', 'cursor', 'fields'}
+
+
+def parse_list_args():
+    """Lit limit, cursor, fields et les filtres depuis la query string"""
+    limit = request.args.get('limit', default=DEFAULT_PAGE_SIZE, type=int)
+    if limit is None or limit < 1:
+        raise ValueError("limit must be a positive integer")
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    cursor = request.args.get('cursor') or None
+
+    fields = request.args.get('fields', '').strip()
+    fields = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+
+    filters = []
+    for name, value in request.args.items(multi=True):
+        if name in RESERVED_PARAMS:
+            continue
+        column, _, suffix = name.partition('__')
+        if suffix:
+            if suffix not in RANGE_OPERATORS:
+                raise ValueError(f"Unknown filter operator '{suffix}'")
+            filters.append((column, RANGE_OPERATORS[suffix], value))
+        else:
+            filters.append((column, '=', value))
+
+    return limit, cursor, fields, filters
+
+
+def next_page_url(cursor):
+    args = request.args.copy()
+    args['cursor'] = cursor
+    return f"{request.base_url}?{urlencode(list(args.items(multi=True)))}"
+
+
+def paginated_response(model, **fixed_filters):
+    """
+    Réponse paginée d'un modèle (BaseModel ou RelationModel).
+    fixed_filters: filtres d'égalité imposés par la route (ex: id_project=3)
+    """
+    stream_format = requested_stream_format()
+
+    try:
+        limit, cursor, fields, filters = parse_list_args()
+        filters += [(column, '=', value) for column, value in fixed_filters.items()]
+
+        if stream_format:
+            explicit_limit = request.args.get('limit', type=int)
+            rows = model.iter_rows(cursor, fields, filters, explicit_limit)
+            return streaming_response(rows, stream_format)
+
+        items, next_cursor = model.get_page(limit, cursor, fields, filters)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{next_page_url(next_cursor)}>; rel="next"'
+    return response, 200
@@ -0,0 +1,224 @@
+"""
+Allocation conjointe d'un portefeuille de projets (POST /allocation/portfolio)
+
+Un collaborateur ne peut pas être sur deux projets dont les dates se
+chevauchent ; il peut enchaîner des projets disjoints. Les projets sont
+regroupés, par date de début, en périodes de projets qui ont tous au moins
+un mois en commun (deux à deux en conflit). Période par période, dans
+l'ordre des débuts, l'affectation maximise la somme des adéquations (fit)
+collaborateur × projet sous les capacités team_size, par un flot de coût
+minimum :
+
+    source -> collaborateur (capacité 1 : un seul projet de la période)
+    collaborateur -> projet (capacité 1, coût -fit), seulement si le
+        collaborateur n'est pas déjà sur un projet d'une période précédente
+        qui chevauche celui-ci
+    projet -> puits (capacité team_size)
+
+résolu par plus courts chemins successifs (Dijkstra avec potentiels),
+en s'arrêtant dès qu'un chemin augmentant n'améliore plus le coût : les
+places sans candidat utile restent vides.
+
+Le résultat est optimal quand les projets qui se chevauchent de proche en
+proche ont tous un mois en commun (une seule période) ; sinon les périodes
+sont staffées dans l'ordre des débuts, chacune de façon optimale compte
+tenu des affectations précédentes.
+
+Il existe toujours une affectation optimale où chaque projet n'utilise
+que des candidats classés dans le top (nombre total de places de la
+période) de sa propre liste : sinon un mieux classé est libre et peut le
+remplacer. Seules ces arêtes entrent dans le graphe, qui reste petit même
+pour des milliers de collaborateurs.
+"""
+import heapq
+from collections import namedtuple
+import numpy as np
+
+# Les coûts du flot sont entiers : fit × FIT_SCALE arrondi
+FIT_SCALE = 1000
+
+Period = namedtuple('Period', ['start', 'end', 'projects'])
+
+
+def project_fits(levels, weights, niveaux_min):
+    """
+    Adéquation de chaque candidat à un projet : moyenne pondérée des
+    niveaux sur les technos du projet, un niveau sous le minimum comptant 0
+    levels: candidats × technos du projet (NaN = absent)
+    """
+    levels = np.nan_to_num(levels, nan=0.0)
+    useful = np.where(levels >= niveaux_min[np.newaxis, :], levels, 0.0)
+    return useful @ weights / weights.sum()
+
+
+def normalized_bounds(bounds):
+    """(début, fin) avec None -> -inf / +inf"""
+    low, high = float('-inf'), float('inf')
+    return [(low if start is None else start, high if end is None else end) for start, end in bounds]
+
+
+def overlap_matrix(bounds):
+    """Projets × projets : True si les deux projets ont au moins un mois en commun"""
+    starts, ends = (np.array(values, dtype=float) for values in zip(*normalized_bounds(bounds)))
+    return (starts[:, np.newaxis] <= ends[np.newaxis, :]) & (starts[np.newaxis, :] <= ends[:, np.newaxis])
+
+
+def overlap_periods(bounds):
+    """
+    bounds: [(début, fin)] en index de mois, None = non borné
+    Retourne les périodes (début, fin, indices des projets), par date : les
+    projets d'une période ont tous au moins un mois en commun
+    """
+    bounds = normalized_bounds(bounds)
+    order = sorted(range(len(bounds)), key=lambda i: (bounds[i][0], i))
+
+    periods = []
+    common_end = None
+    for i in order:
+        start, end = bounds[i]
+        # Trié par début : le projet chevauche toute la période s'il commence avant sa fin commune
+        if periods and start <= common_end:
+            last = periods[-1]
+            periods[-1] = Period(last.start, max(last.end, end), last.projects + [i])
+            common_end = min(common_end, end)
+        else:
+            periods.append(Period(start, end, [i]))
+            common_end = end
+    return periods
+
+
+class MinCostFlow:
+    """Flot de coût minimum sur un graphe orienté à capacités entières"""
+
+    def __init__(self, size):
+        self.size = size
+        self.graph = [[] for _ in range(size)]
+        # arête: [destination, capacité restante, coût, indice de l'arête inverse]
+
+    def add_edge(self, source, target, capacity, cost):
+        self.graph[source].append([target, capacity, cost, len(self.graph[target])])
+        self.graph[target].append([source, 0, -cost, len(self.graph[source]) - 1])
+        return source, len(self.graph[source]) - 1
+
+    def flow_on(self, edge):
+        source, index = edge
+        target, _, _, reverse = self.graph[source][index]
+        return self.graph[target][reverse][1]
+
+    def _initial_potentials(self, source):
+        """Bellman-Ford (coûts négatifs, pas de cycle négatif au départ)"""
+        potential = [float('inf')] * self.size
+        potential[source] = 0
+        for _ in range(self.size):
+            changed = False
+            for node in range(self.size):
+                if potential[node] == float('inf'):
+                    continue
+                for target, capacity, cost, _ in self.graph[node]:
+                    if capacity > 0 and potential[node] + cost < potential[target]:
+                        potential[target] = potential[node] + cost
+                        changed = True
+            if not changed:
+                break
+        return [0 if value == float('inf') else value for value in potential]
+
+    def solve(self, source, sink):
+        """
+        Augmente tant que le plus court chemin source -> puits a un coût
+        négatif. Retourne (flot, coût, nombre d'augmentations)
+        """
+        potential = self._initial_potentials(source)
+        flow = cost = augmentations = 0
+
+        while True:
+            distance = [float('inf')] * self.size
+            previous = [None] * self.size
+            distance[source] = 0
+            heap = [(0, source)]
+            while heap:
+                dist, node = heapq.heappop(heap)
+                if dist > distance[node]:
+                    continue
+                for index, (target, capacity, edge_cost, _) in enumerate(self.graph[node]):
+                    if capacity <= 0:
+                        continue
+                    candidate = dist + edge_cost + potential[node] - potential[target]
+                    if candidate < distance[target]:
+                        distance[target] = candidate
+                        previous[target] = (node, index)
+                        heapq.heappush(heap, (candidate, target))
+
+            if distance[sink] == float('inf'):
+                break
+            for node in range(self.size):
+                if distance[node] < float('inf'):
+                    potential[node] += distance[node]
+
+            # Coût réel du chemin : une augmentation qui ne baisse pas le coût est inutile
+            path_cost = potential[sink] - potential[source]
+            if path_cost >= 0:
+                break
+
+            push = float('inf')
+            node = sink
+            while node != source:
+                parent, index = previous[node]
+                push = min(push, self.graph[parent][index][1])
+                node = parent
+            node = sink
+            while node != source:
+                parent, index = previous[node]
+                edge = self.graph[parent][index]
+                edge[1] -= push
+                self.graph[node][edge[3]][1] += push
+                node = parent
+
+            flow += push
+            cost += push * path_cost
+            augmentations += 1
+
+        return flow, cost, augmentations
+
+
+def assign_period(fits, seats, allowed=None):
+    """
+    fits: candidats × projets de la période (0 = pas d'adéquation)
+    seats: places par projet
+    allowed: candidats × projets, False si le candidat est déjà pris (optionnel)
+    Retourne ({projet: [candidats]}, nombre d'augmentations)
+    """
+    n, size = fits.shape
+    total_seats = int(sum(seats))
+    if allowed is not None:
+        fits = np.where(allowed, fits, 0.0)
+
+    # Arêtes utiles : candidat dans le top total_seats du projet
+    tops = {}
+    for p in range(size):
+        column = fits[:, p]
+        tops[p] = [int(c) for c in np.argsort(-column, kind='stable')[:total_seats] if column[c] > 0]
+    candidates = sorted({c for top in tops.values() for c in top})
+
+    source, sink = 0, 1
+    project_node = {p: 2 + p for p in range(size)}
+    candidate_node = {c: 2 + size + k for k, c in enumerate(candidates)}
+    network = MinCostFlow(2 + size + len(candidates))
+
+    for p in range(size):
+        network.add_edge(project_node[p], sink, int(seats[p]), 0)
+
+    for c in candidates:
+        network.add_edge(source, candidate_node[c], 1, 0)
+    edges = []
+    for p, top in tops.items():
+        for c in top:
+            cost = -int(round(fits[c, p] * FIT_SCALE))
+            edges.append((c, p, network.add_edge(candidate_node[c], project_node[p], 1, cost)))
+
+    _, _, augmentations = network.solve(source, sink)
+
+    assignment = {p: [] for p in range(size)}
+    for c, p, edge in edges:
+        if network.flow_on(edge) > 0:
+            assignment[p].append(c)
+    return assignment, augmentations
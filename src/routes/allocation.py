@@ -1,8 +1,251 @@
 from flask import Blueprint, request, jsonify
+import time
+import numpy as np
+from src.availability import parse_window, read_availability
+from src.competence_matrix import read_matrix
 from src.config import get_db_connection
+from src.portfolio import assign_period, overlap_matrix, overlap_periods, project_fits
+from src.scoring_engine import format_month, month_index
+from src.skill_risk import techno_risk
+from src.routes.availability import parse_min_availability
+from src.team_solver import SOLVER_METHODS, coverage_values, solve_team
 
 bp = Blueprint('allocation', __name__)
 
+EXPERT_LEVEL = 4
+MAX_TEAM_SIZE = 50
+DEFAULT_TIME_BUDGET_MS = 200
+MAX_TIME_BUDGET_MS = 5000
+MAX_PORTFOLIO_PROJECTS = 100
+MAX_CANDIDATES_LIMIT = 1000
+
+
+def availability_filter(values):
+    """
+    Filtre de disponibilité des routes d'allocation : available_from /
+    available_to (YYYY-MM) et min_availability (part libre, défaut 1)
+    lus dans values (body JSON ou query params)
+    Retourne (ids disponibles, description), (None, None) sans fenêtre ;
+    ValueError si invalide
+    """
+    if not values.get('available_from') and not values.get('available_to'):
+        return None, None
+    start, end = parse_window(
+        values.get('available_from'), values.get('available_to'), 'available_from', 'available_to'
+    )
+    min_rate = parse_min_availability(values.get('min_availability', 1))
+
+    conn = get_db_connection()
+    ids = read_availability(conn, lambda index: index.available(start, end, min_rate))
+    conn.close()
+
+    return ids, {
+        'available_from': format_month(start),
+        'available_to': format_month(end),
+        'min_availability': min_rate,
+        'available_collaborators': len(ids)
+    }
+
+
+def availability_mask(store, ids):
+    """Masque des ordinaux de la matrice disponibles, None sans filtre"""
+    if ids is None:
+        return None
+    return np.array([id in ids for id in store.collaborator_ids], dtype=bool)
+
+
+def parse_technologies(technologies, default_niveau_min=1, require_expert=False, prefix='technologies'):
+    """
+    Noms ou objets {"name", "weight", "niveau_min"} -> [(nom, poids, niveau_min)]
+    ValueError si invalide
+    """
+    technos = []
+    for index, item in enumerate(technologies):
+        if isinstance(item, str):
+            item = {'name': item}
+        if not isinstance(item, dict) or not isinstance(item.get('name'), str) or not item['name'].strip():
+            raise ValueError(f"{prefix}[{index}] must be a name or an object with a name")
+        weight = item.get('weight', 1)
+        niveau_min = item.get('niveau_min', default_niveau_min)
+        if not isinstance(weight, (int, float)) or isinstance(weight, bool) or weight <= 0:
+            raise ValueError(f"{prefix}[{index}].weight must be a positive number")
+        if not isinstance(niveau_min, (int, float)) or isinstance(niveau_min, bool) or not 0 <= niveau_min <= 5:
+            raise ValueError(f"{prefix}[{index}].niveau_min must be between 0 and 5")
+        if require_expert:
+            niveau_min = max(niveau_min, EXPERT_LEVEL)
+        technos.append((item['name'].strip(), float(weight), float(niveau_min)))
+    return technos
+
+
+def parse_team_request(data):
+    """
+    Valide le body du mode optimize, retourne (technos, options)
+    technos: [(nom, poids, niveau_min)] ; ValueError si invalide
+    """
+    technologies = data.get('technologies')
+    if not isinstance(technologies, list) or not technologies:
+        raise ValueError("Au moins une technologie est requise")
+
+    team_size = data.get('team_size', 5)
+    if not isinstance(team_size, int) or isinstance(team_size, bool) or not 1 <= team_size <= MAX_TEAM_SIZE:
+        raise ValueError(f"team_size must be an integer between 1 and {MAX_TEAM_SIZE}")
+
+    time_budget_ms = data.get('time_budget_ms', DEFAULT_TIME_BUDGET_MS)
+    if (not isinstance(time_budget_ms, (int, float)) or isinstance(time_budget_ms, bool)
+            or not 1 <= time_budget_ms <= MAX_TIME_BUDGET_MS):
+        raise ValueError(f"time_budget_ms must be between 1 and {MAX_TIME_BUDGET_MS}")
+
+    solver = data.get('solver', 'auto')
+    if solver not in SOLVER_METHODS:
+        raise ValueError(f"solver must be one of {', '.join(SOLVER_METHODS)}")
+
+    require_expert = bool(data.get('require_expert', False))
+    technos = parse_technologies(technologies, data.get('niveau_min', 1), require_expert)
+
+    return technos, {
+        'team_size': team_size,
+        'time_budget_ms': time_budget_ms,
+        'solver': solver,
+        'require_expert': require_expert
+    }
+
+
+def optimize_team(data):
+    """
+    Mode optimize de /allocation/suggest: équipe d'au plus team_size
+    personnes maximisant la couverture pondérée des technos (src/team_solver.py)
+    """
+    try:
+        technos, options = parse_team_request(data)
+        available, availability = availability_filter(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    start = time.perf_counter()
+
+    def reader(store):
+        columns = [store.index.column(name) for name, _, _ in technos]
+        # Candidats au niveau requis sur au moins une techno (index inversé)
+        candidates = store.index.union_above(
+            [j for j in columns if j is not None],
+            [niveau_min for j, (_, _, niveau_min) in zip(columns, technos) if j is not None]
+        )
+        mask = availability_mask(store, available)
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        levels = np.full((len(candidates), len(technos)), np.nan)
+        for position, j in enumerate(columns):
+            if j is not None:
+                levels[:, position] = np.where(
+                    store.present[candidates, j], store.niveau_calcule[candidates, j], np.nan
+                )
+        return (
+            columns,
+            [store.collaborator_ids[i] for i in candidates.tolist()],
+            [store.collaborator_names[i] for i in candidates.tolist()],
+            levels
+        )
+
+    conn = get_db_connection()
+    columns, ids, names, levels = read_matrix(conn, reader)
+    conn.close()
+
+    weights = np.array([weight for _, weight, _ in technos])
+    niveaux_min = np.array([niveau_min for _, _, niveau_min in technos])
+    values = coverage_values(levels, niveaux_min)
+
+    # Seuls les collaborateurs couvrant au moins une techno sont candidats
+    useful = np.flatnonzero(values.sum(axis=1) > 0)
+    # require_expert : un expert par techno est une contrainte, pas un objectif
+    result = solve_team(
+        values[useful], weights, options['team_size'], options['time_budget_ms'], options['solver'],
+        required=np.full(len(technos), options['require_expert'])
+    )
+    selected = [int(useful[i]) for i in result.selected]
+
+    team = []
+    for i in selected:
+        team.append({
+            'collaborator_id': ids[i],
+            'name': names[i],
+            'technos': [
+                {
+                    'techno': technos[t][0],
+                    'niveau': float(levels[i, t]),
+                    'is_expert': bool(levels[i, t] >= EXPERT_LEVEL)
+                }
+                for t in np.flatnonzero(values[i] > 0).tolist()
+            ]
+        })
+
+    coverage = []
+    gaps = []
+    for t, (name, weight, niveau_min) in enumerate(technos):
+        best = max(selected, key=lambda i: values[i, t], default=None)
+        covered = best is not None and values[best, t] > 0
+        coverage.append({
+            'techno': name,
+            'weight': weight,
+            'niveau_min': niveau_min,
+            'covered': bool(covered),
+            'covered_by': {
+                'collaborator_id': ids[best],
+                'name': names[best],
+                'niveau': float(levels[best, t])
+            } if covered else None
+        })
+        if covered:
+            continue
+        if columns[t] is None:
+            reason = 'Technologie inconnue'
+        elif not (values[:, t] > 0).any():
+            reason = f"Aucun développeur au niveau requis (niveau < {niveau_min:g})"
+        else:
+            reason = "Non couverte dans la limite de team_size"
+        gaps.append({'techno': name, 'reason': reason})
+
+    covered_weight = sum(item['weight'] for item in coverage if item['covered'])
+    solver = {
+        'method': result.method,
+        'optimal': result.optimal,
+        'candidates': result.candidates,
+        'nodes': result.nodes,
+        'time_budget_ms': options['time_budget_ms'],
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+    }
+
+    if not result.feasible:
+        # optimal : aucune équipe ne convient ; sinon aucune trouvée dans le budget de temps
+        response = {
+            'error': (
+                f"Aucune équipe de {options['team_size']} personnes ne couvre chaque techno avec un expert"
+                if result.optimal else
+                "Aucune équipe couvrant chaque techno avec un expert trouvée dans le budget de temps"
+            ),
+            'mode': 'optimize',
+            'require_expert': True,
+            'infeasible': result.optimal,
+            'gaps': gaps,
+            'solver': solver
+        }
+        if availability:
+            response['availability'] = availability
+        return jsonify(response), 422
+
+    response = {
+        'mode': 'optimize',
+        'team': team,
+        'coverage': coverage,
+        'coverage_rate': round(covered_weight / float(weights.sum()) * 100, 2),
+        'score': round(result.score, 2),
+        'gaps': gaps,
+        'total_technologies': len(technos),
+        'solver': solver
+    }
+    if availability:
+        response['availability'] = availability
+    return jsonify(response), 200
+
 
 @bp.route("/allocation/suggest", methods=["POST"])
 def suggest_team():
@@ -19,47 +262,87 @@ def suggest_team():
     - Top développeurs par technologie
     - Score global d'adéquation
     - Gaps identifiés (aucun expert)
+
+    Avec "mode": "optimize", compose une équipe d'au plus team_size
+    personnes couvrant au mieux la stack (voir optimize_team) :
+    {
+        "mode": "optimize",
+        "technologies": ["React", {"name": "MongoDB", "weight": 2, "niveau_min": 3}],
+        "team_size": 3,
+        "niveau_min": 1,           // défaut des technos
+        "require_expert": false,   // au moins un expert (niveau >= 4) par techno, sinon 422
+        "solver": "auto",          // auto, exact ou approx
+        "time_budget_ms": 200
+    }
+
+    Dans les deux modes, available_from / available_to (YYYY-MM) et
+    min_availability limitent aux collaborateurs libres sur la fenêtre
+    (voir availability_filter)
     """
     data = request.get_json()
 
     if not data or 'technologies' not in data:
         return jsonify({"error": "Le champ 'technologies' est requis"}), 400
 
+    if data.get('mode') == 'optimize':
+        return optimize_team(data)
+
     technologies = data.get('technologies', [])
     team_size = data.get('team_size', 5)
 
     if not technologies:
         return jsonify({"error": "Au moins une technologie est requise"}), 400
 
+    if not isinstance(team_size, int) or isinstance(team_size, bool) or team_size < 1:
+        return jsonify({"error": "team_size must be a positive integer"}), 400
+
+    try:
+        available, availability = availability_filter(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def reader(store):
+        # Top team_size par techno dans l'index inversé (src/techno_index.py)
+        results = {}
+        busy = set()
+        mask = availability_mask(store, available)
+        for techno_name in technologies:
+            j = store.index.column(techno_name) if isinstance(techno_name, str) else None
+            if j is None:
+                results[techno_name] = []
+                continue
+            postings = store.index.get(j)
+            rows, _ = postings.top(team_size, allowed=mask)
+            if len(postings) and not len(rows):
+                busy.add(techno_name)
+            results[techno_name] = [
+                {
+                    'collaborator_id': store.collaborator_ids[i],
+                    'name': store.collaborator_names[i],
+                    'niveau_declare': store.niveau_declare[i, j],
+                    'niveau_calcule': store.niveau_calcule[i, j]
+                }
+                for i in rows.tolist()
+            ]
+        return results, busy
+
     conn = get_db_connection()
+    results_by_techno, busy = read_matrix(conn, reader)
+    conn.close()
 
     suggestions = {}
     gaps = []
 
-    for techno_name in technologies:
-        # Récupérer les développeurs qui connaissent cette techno
-        query = """
-            SELECT
-                c.id as collaborator_id,
-                c.firstname,
-                c.lastname,
-                comp.niveau_declare,
-                comp.niveau_calcule,
-                t.name as techno_name
-            FROM competence comp
-            JOIN collaborator c ON comp.id_collaborator = c.id
-            JOIN techno t ON comp.id_techno = t.id
-            WHERE t.name = ?
-            ORDER BY comp.niveau_calcule DESC
-            LIMIT ?
-        """
-
-        results = conn.execute(query, (techno_name, team_size)).fetchall()
+    for techno_name, results in results_by_techno.items():
+        for r in results:
+            r['niveau_declare'] = None if np.isnan(r['niveau_declare']) else int(r['niveau_declare'])
+            r['niveau_calcule'] = None if np.isnan(r['niveau_calcule']) else float(r['niveau_calcule'])
 
         if not results:
             gaps.append({
                 'techno': techno_name,
-                'reason': 'Aucun développeur ne possède cette compétence'
+                'reason': 'Aucun développeur disponible sur la période' if techno_name in busy
+                else 'Aucun développeur ne possède cette compétence'
             })
             suggestions[techno_name] = []
         else:
@@ -76,7 +359,7 @@ def suggest_team():
             suggestions[techno_name] = [
                 {
                     'collaborator_id': r['collaborator_id'],
-                    'name': f"{r['firstname']} {r['lastname']}",
+                    'name': r['name'],
                     'niveau_declare': r['niveau_declare'],
                     'niveau_calcule': r['niveau_calcule'],
                     'is_expert': r['niveau_calcule'] >= 4 if r['niveau_calcule'] else False
@@ -84,8 +367,6 @@ def suggest_team():
                 for r in results
             ]
 
-    conn.close()
-
     # Calculer un score global d'équipe
     all_collaborators = {}
 
@@ -121,52 +402,318 @@ def suggest_team():
         reverse=True
     )
 
-    return jsonify({
+    response = {
         'suggestions_by_techno': suggestions,
         'best_overall_fits': best_fits[:team_size],
         'gaps': gaps,
         'total_technologies': len(technologies),
         'technologies_with_experts': len([t for t in technologies if t not in [g['techno'] for g in gaps]])
-    }), 200
+    }
+    if availability:
+        response['availability'] = availability
+    return jsonify(response), 200
+
+
+def parse_portfolio(data):
+    """Valide le body de /allocation/portfolio, ValueError si invalide"""
+    projects = data.get('projects')
+    if not isinstance(projects, list) or not projects:
+        raise ValueError("Le champ 'projects' doit être une liste non vide")
+    if len(projects) > MAX_PORTFOLIO_PROJECTS:
+        raise ValueError(f"Too many projects (max {MAX_PORTFOLIO_PROJECTS})")
+
+    default_niveau_min = data.get('niveau_min', 1)
+    require_expert = bool(data.get('require_expert', False))
+
+    parsed = []
+    for index, project in enumerate(projects):
+        prefix = f"projects[{index}]"
+        if not isinstance(project, dict):
+            raise ValueError(f"{prefix} must be an object")
+        name = project.get('name') or f"Projet {index + 1}"
+
+        technologies = project.get('technologies')
+        if not isinstance(technologies, list) or not technologies:
+            raise ValueError(f"{prefix}.technologies must be a non-empty list")
+        technos = parse_technologies(technologies, default_niveau_min, require_expert, f"{prefix}.technologies")
+
+        team_size = project.get('team_size', 5)
+        if not isinstance(team_size, int) or isinstance(team_size, bool) or not 1 <= team_size <= MAX_TEAM_SIZE:
+            raise ValueError(f"{prefix}.team_size must be an integer between 1 and {MAX_TEAM_SIZE}")
+
+        bounds = []
+        for field in ('date_debut', 'date_fin'):
+            value = project.get(field)
+            mois = month_index(value) if value else None
+            if value and mois is None:
+                raise ValueError(f"{prefix}.{field} must be a date (YYYY-MM)")
+            bounds.append(mois)
+        if None not in bounds and bounds[1] < bounds[0]:
+            raise ValueError(f"{prefix}.date_fin must not be before date_debut")
+
+        parsed.append({'name': name, 'technos': technos, 'team_size': team_size, 'bounds': tuple(bounds)})
+
+    return parsed
+
+
+@bp.route("/allocation/portfolio", methods=["POST"])
+def allocate_portfolio():
+    """
+    Staffe un portefeuille de projets conjointement: un collaborateur n'est
+    jamais affecté à deux projets qui se chevauchent, et la somme des
+    adéquations est maximisée par période (flot de coût minimum, src/portfolio.py)
+
+    Body:
+    {
+        "projects": [
+            {
+                "name": "Refonte site",
+                "technologies": ["React", {"name": "Node.js", "weight": 2, "niveau_min": 3}],
+                "team_size": 3,
+                "date_debut": "2025-01",
+                "date_fin": "2025-03"
+            }
+        ],
+        "niveau_min": 1,           // défaut des technos
+        "require_expert": false    // niveau minimum 4 sur toutes les technos
+    }
+    Un projet sans date_debut (ou date_fin) est considéré comme ouvert de ce côté.
+    available_from / available_to / min_availability : voir availability_filter
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "Le champ 'projects' est requis"}), 400
+
+    try:
+        projects = parse_portfolio(data)
+        available, availability = availability_filter(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    start = time.perf_counter()
+    techno_names = sorted({name for project in projects for name, _, _ in project['technos']})
+
+    def reader(store):
+        columns = {name: store.index.column(name) for name in techno_names}
+        known = {name for name, j in columns.items() if j is not None}
+        # Niveau minimum le plus bas demandé pour chaque techno
+        thresholds = {}
+        for project in projects:
+            for name, _, niveau_min in project['technos']:
+                thresholds[name] = min(thresholds.get(name, niveau_min), niveau_min)
+        candidates = store.index.union_above(
+            [columns[name] for name in techno_names if name in known],
+            [thresholds[name] for name in techno_names if name in known]
+        )
+        mask = availability_mask(store, available)
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        levels = np.full((len(candidates), len(techno_names)), np.nan)
+        for position, name in enumerate(techno_names):
+            if name in known:
+                j = columns[name]
+                levels[:, position] = np.where(
+                    store.present[candidates, j], store.niveau_calcule[candidates, j], np.nan
+                )
+        return (
+            known,
+            [store.collaborator_ids[i] for i in candidates.tolist()],
+            [store.collaborator_names[i] for i in candidates.tolist()],
+            levels
+        )
+
+    conn = get_db_connection()
+    known, ids, names, levels = read_matrix(conn, reader)
+    conn.close()
+
+    position = {name: k for k, name in enumerate(techno_names)}
+    fits = np.zeros((len(ids), len(projects)))
+    for p, project in enumerate(projects):
+        columns = [position[name] for name, _, _ in project['technos']]
+        weights = np.array([weight for _, weight, _ in project['technos']])
+        niveaux_min = np.array([niveau_min for _, _, niveau_min in project['technos']])
+        fits[:, p] = project_fits(levels[:, columns], weights, niveaux_min)
+
+    bounds = [project['bounds'] for project in projects]
+    periods = overlap_periods(bounds)
+    overlaps = overlap_matrix(bounds)
+    # busy[c, p] : c est déjà affecté à un projet qui chevauche p
+    busy = np.zeros((len(ids), len(projects)), dtype=bool)
+    teams = {}
+    augmentations = 0
+    for period in periods:
+        assignment, count = assign_period(
+            fits[:, period.projects], [projects[p]['team_size'] for p in period.projects],
+            ~busy[:, period.projects]
+        )
+        augmentations += count
+        for k, members in assignment.items():
+            p = period.projects[k]
+            teams[p] = sorted(members, key=lambda c: -fits[c, p])
+            busy[members] |= overlaps[p]
+
+    def bound(value):
+        """Index de mois -> YYYY-MM, None si non borné"""
+        return None if value is None or abs(value) == float('inf') else format_month(int(value))
+
+    period_of = {p: number for number, period in enumerate(periods) for p in period.projects}
+    results = []
+    for p, project in enumerate(projects):
+        members = teams.get(p, [])
+        results.append({
+            'project': project['name'],
+            'date_debut': bound(project['bounds'][0]),
+            'date_fin': bound(project['bounds'][1]),
+            'period': period_of[p],
+            'team_size': project['team_size'],
+            'filled': len(members),
+            'total_fit': round(float(fits[members, p].sum()), 2) if members else 0,
+            'team': [
+                {
+                    'collaborator_id': ids[c],
+                    'name': names[c],
+                    'fit': round(float(fits[c, p]), 2),
+                    'technos': [
+                        {'techno': name, 'niveau': float(levels[c, position[name]])}
+                        for name, _, niveau_min in project['technos']
+                        if levels[c, position[name]] >= niveau_min
+                    ]
+                }
+                for c in members
+            ],
+            'unknown_technologies': [name for name, _, _ in project['technos'] if name not in known]
+        })
+
+    assigned = [c for members in teams.values() for c in members]
+
+    response = {
+        'projects': results,
+        'periods': [
+            {
+                'period': number,
+                'date_debut': bound(period.start),
+                'date_fin': bound(period.end),
+                'projects': [projects[p]['name'] for p in period.projects]
+            }
+            for number, period in enumerate(periods)
+        ],
+        'total_fit': round(float(sum(fits[c, p] for p, members in teams.items() for c in members)), 2),
+        'collaborators_used': len(set(assigned)),
+        'assignments': len(assigned),
+        'solver': {
+            'method': 'min_cost_flow',
+            'augmentations': augmentations,
+            'candidates': len(ids),
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+        }
+    }
+    if availability:
+        response['availability'] = availability
+    return jsonify(response), 200
+
+
+@bp.route("/allocation/candidates", methods=["GET"])
+def find_candidates():
+    """
+    Collaborateurs maîtrisant toutes les technos demandées à un niveau minimum
+    (intersection des listes de l'index inversé, src/techno_index.py)
+
+    Query params:
+    - technologies: noms séparés par des virgules (requis)
+    - niveau_min: niveau calculé minimum sur chaque techno (défaut: 3)
+    - limit: nombre de résultats (défaut: 20, max MAX_CANDIDATES_LIMIT)
+    - available_from / available_to / min_availability: voir availability_filter
+
+    Triés par leur plus faible niveau sur ces technos, décroissant
+    """
+    names = [name.strip() for name in request.args.get('technologies', '').split(',') if name.strip()]
+    if not names:
+        return jsonify({"error": "Le paramètre 'technologies' est requis"}), 400
+    niveau_min = request.args.get('niveau_min', default=3, type=float)
+    limit = request.args.get('limit', default=20, type=int)
+    if not 1 <= limit <= MAX_CANDIDATES_LIMIT:
+        return jsonify({"error": f"limit must be between 1 and {MAX_CANDIDATES_LIMIT}"}), 400
+    try:
+        available, availability = availability_filter(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def reader(store):
+        columns = [store.index.column(name) for name in names]
+        unknown = [name for name, j in zip(names, columns) if j is None]
+        if unknown:
+            return unknown, 0, []
+        rows, levels = store.index.intersect_above(columns, niveau_min)
+        mask = availability_mask(store, available)
+        if mask is not None:
+            keep = mask[rows]
+            rows, levels = rows[keep], levels[keep]
+        return unknown, len(rows), [
+            {
+                'collaborator_id': store.collaborator_ids[i],
+                'name': store.collaborator_names[i],
+                'min_niveau': float(row_levels.min()),
+                'technos': [
+                    {'techno': store.techno_names[j], 'niveau': float(level)}
+                    for j, level in zip(columns, row_levels.tolist())
+                ]
+            }
+            for i, row_levels in zip(rows[:limit].tolist(), levels[:limit])
+        ]
+
+    conn = get_db_connection()
+    unknown, total, candidates = read_matrix(conn, reader)
+    conn.close()
+
+    response = {
+        'technologies': names,
+        'niveau_min': niveau_min,
+        'candidates': candidates,
+        'total_candidates': total,
+        'unknown_technologies': unknown
+    }
+    if availability:
+        response['availability'] = availability
+    return jsonify(response), 200
+
+
+def expert_level_arg():
+    """Paramètre expert_level (niveau à partir duquel on est expert), ValueError si invalide"""
+    expert_level = request.args.get('expert_level', default=EXPERT_LEVEL, type=float)
+    if not 1 <= expert_level <= 5:
+        raise ValueError("expert_level must be between 1 and 5")
+    return expert_level
 
 
 @bp.route("/allocation/capacity", methods=["GET"])
 def get_team_capacity():
     """
     Vue agrégée de la capacité globale de l'équipe par technologie
+    (agrégats par techno de src/skill_risk.py)
 
     Query params:
     - niveau_min: niveau minimum à considérer (défaut: 3)
+    - expert_level: niveau d'expert (défaut: 4)
     """
     niveau_min = request.args.get('niveau_min', default=3, type=float)
+    try:
+        expert_level = expert_level_arg()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     conn = get_db_connection()
-
-    query = """
-        SELECT
-            t.name as techno,
-            COUNT(DISTINCT comp.id_collaborator) as nb_collaborators,
-            AVG(comp.niveau_calcule) as avg_niveau,
-            MAX(comp.niveau_calcule) as max_niveau,
-            MIN(comp.niveau_calcule) as min_niveau,
-            SUM(CASE WHEN comp.niveau_calcule >= 4 THEN 1 ELSE 0 END) as nb_experts,
-            SUM(CASE WHEN comp.niveau_calcule >= 2 AND comp.niveau_calcule < 4 THEN 1 ELSE 0 END) as nb_intermediaires,
-            SUM(CASE WHEN comp.niveau_calcule < 2 THEN 1 ELSE 0 END) as nb_debutants
-        FROM techno t
-        LEFT JOIN competence comp ON t.id = comp.id_techno
-        WHERE comp.niveau_calcule >= ?
-        GROUP BY t.id, t.name
-        ORDER BY nb_experts DESC, avg_niveau DESC
-    """
-
-    results = conn.execute(query, (niveau_min,)).fetchall()
+    technos = read_matrix(conn, lambda store: techno_risk(store, expert_level, niveau_min))
     conn.close()
 
+    # Technos ayant au moins un niveau >= niveau_min, plus d'experts puis meilleure moyenne d'abord
+    results = [row for row in technos if row['nb_levels'] > 0]
+    results.sort(key=lambda row: (-row['nb_experts'], -row['avg_niveau'], row['techno']))
+
     capacity = []
     for row in results:
         capacity.append({
             'techno': row['techno'],
-            'total_collaborators': row['nb_collaborators'],
+            'total_collaborators': row['nb_levels'],
             'avg_niveau': round(row['avg_niveau'], 2) if row['avg_niveau'] else 0,
             'max_niveau': row['max_niveau'],
             'min_niveau': row['min_niveau'],
@@ -179,7 +726,8 @@ def get_team_capacity():
     return jsonify({
         'capacity': capacity,
         'total_technologies': len(capacity),
-        'niveau_min_filter': niveau_min
+        'niveau_min_filter': niveau_min,
+        'expert_level': expert_level
     }), 200
 
 
@@ -187,26 +735,28 @@ def get_team_capacity():
 def identify_gaps():
     """
     Identifie les gaps critiques de compétences
-    Technologies maîtrisées par moins de 2 experts
-    """
-    conn = get_db_connection()
+    Technologies maîtrisées par moins de 2 experts (y compris celles que personne ne possède)
 
-    query = """
-        SELECT
-            t.name as techno,
-            COUNT(DISTINCT comp.id_collaborator) as total_collaborators,
-            SUM(CASE WHEN comp.niveau_calcule >= 4 THEN 1 ELSE 0 END) as nb_experts,
-            MAX(comp.niveau_calcule) as best_niveau
-        FROM techno t
-        LEFT JOIN competence comp ON t.id = comp.id_techno
-        GROUP BY t.id, t.name
-        HAVING nb_experts < 2
-        ORDER BY nb_experts ASC, best_niveau ASC
+    Query params:
+    - min_experts: nombre d'experts en dessous duquel la techno est un gap (défaut: 2)
+    - expert_level: niveau d'expert (défaut: 4)
     """
+    min_experts = request.args.get('min_experts', default=2, type=int)
+    try:
+        expert_level = expert_level_arg()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    results = conn.execute(query).fetchall()
+    conn = get_db_connection()
+    technos = read_matrix(conn, lambda store: techno_risk(store, expert_level))
     conn.close()
 
+    # Moins d'experts d'abord, puis meilleur niveau croissant (sans niveau en premier)
+    results = [row for row in technos if row['nb_experts'] < min_experts]
+    results.sort(key=lambda row: (
+        row['nb_experts'], row['max_niveau'] is not None, row['max_niveau'] or 0, row['techno']
+    ))
+
     gaps = []
     for row in results:
         risk_level = 'critical' if row['nb_experts'] == 0 else 'high' if row['nb_experts'] == 1 else 'medium'
@@ -214,17 +764,19 @@ def identify_gaps():
         gaps.append({
             'techno': row['techno'],
             'nb_experts': row['nb_experts'],
-            'total_collaborators': row['total_collaborators'],
-            'best_niveau': row['best_niveau'] if row['best_niveau'] else 0,
+            'total_collaborators': row['nb_collaborators'],
+            'best_niveau': row['max_niveau'] if row['max_niveau'] else 0,
             'risk_level': risk_level,
-            'recommendation': self._get_recommendation(row['nb_experts'], row['best_niveau'])
+            'recommendation': _get_recommendation(row['nb_experts'], row['max_niveau'])
         })
 
     return jsonify({
         'gaps': gaps,
         'total_gaps': len(gaps),
         'critical_gaps': len([g for g in gaps if g['risk_level'] == 'critical']),
-        'high_risk_gaps': len([g for g in gaps if g['risk_level'] == 'high'])
+        'high_risk_gaps': len([g for g in gaps if g['risk_level'] == 'high']),
+        'min_experts': min_experts,
+        'expert_level': expert_level
     }), 200
 
 
@@ -0,0 +1,153 @@
+from flask import Blueprint, request, jsonify
+import time
+import numpy as np
+from src.competence_matrix import read_matrix
+from src.config import get_db_connection
+from src.departure_impact import DAMAGE_WEIGHTS, damage_scores, departure_impact, rank_departures, risk_level
+from src.routes.allocation import expert_level_arg
+
+bp = Blueprint('analytics', __name__)
+
+MAX_RANKING_LIMIT = 10000
+
+
+def impact_args():
+    """(expert_level, min_experts) des query params, ValueError si invalide"""
+    expert_level = expert_level_arg()
+    min_experts = request.args.get('min_experts', default=2, type=int)
+    if min_experts < 1:
+        raise ValueError("min_experts must be a positive integer")
+    return expert_level, min_experts
+
+
+@bp.route("/analytics/departure-impact", methods=["GET"])
+def rank_departure_impacts():
+    """
+    Classe les collaborateurs par dommage que causerait leur départ
+    (src/departure_impact.py), calculé pour toute l'organisation d'un coup
+
+    Query params:
+    - limit: nombre de collaborateurs retournés (défaut: 50)
+    - expert_level: niveau d'expert (défaut: 4)
+    - min_experts: nombre d'experts en dessous duquel une techno est à risque (défaut: 2)
+    - include_zero: true pour inclure les départs sans impact
+    """
+    try:
+        expert_level, min_experts = impact_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    limit = request.args.get('limit', default=50, type=int)
+    if not 1 <= limit <= MAX_RANKING_LIMIT:
+        return jsonify({"error": f"limit must be between 1 and {MAX_RANKING_LIMIT}"}), 400
+    include_zero = request.args.get('include_zero', '').lower() in ('1', 'true', 'yes')
+
+    start = time.perf_counter()
+
+    def reader(store):
+        impact = departure_impact(store, expert_level, min_experts)
+        counts, damage = damage_scores(impact)
+        order = rank_departures(damage, counts)
+        if not include_zero:
+            order = order[damage[order] > 0]
+
+        ranking = []
+        for rank, i in enumerate(order[:limit].tolist(), start=1):
+            ranking.append({
+                'rank': rank,
+                'collaborator_id': store.collaborator_ids[i],
+                'name': store.collaborator_names[i],
+                'damage': int(damage[i]),
+                **{
+                    name: [store.techno_names[j] for j in np.flatnonzero(getattr(impact, name)[i]).tolist()]
+                    for name in DAMAGE_WEIGHTS
+                }
+            })
+        return ranking, {
+            'collaborators': len(store.collaborator_ids),
+            'collaborators_with_impact': int((damage > 0).sum()),
+            'technos_with_single_expert': int((impact.expert_counts == 1).sum()),
+            'technos_without_expert': int(((impact.expert_counts == 0) & (impact.holder_counts > 0)).sum())
+        }
+
+    conn = get_db_connection()
+    ranking, summary = read_matrix(conn, reader)
+    conn.close()
+
+    return jsonify({
+        'ranking': ranking,
+        'summary': summary,
+        'expert_level': expert_level,
+        'min_experts': min_experts,
+        'damage_weights': DAMAGE_WEIGHTS,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+    }), 200
+
+
+@bp.route("/analytics/departure-impact/<int:id_collaborator>", methods=["GET"])
+def get_departure_impact(id_collaborator):
+    """
+    Technos fragilisées si ce collaborateur part : experts avant / après,
+    niveau de risque avant / après et meilleur remplaçant par techno
+
+    Query params:
+    - expert_level: niveau d'expert (défaut: 4)
+    - min_experts: nombre d'experts en dessous duquel une techno est à risque (défaut: 2)
+    """
+    try:
+        expert_level, min_experts = impact_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def reader(store):
+        i = store.collaborator_index.get(id_collaborator)
+        if i is None:
+            return None
+        impact = departure_impact(store, expert_level, min_experts)
+        counts, damage = damage_scores(impact)
+
+        affected = np.flatnonzero(impact.last_expert[i] | impact.below_min_experts[i] | impact.orphaned[i])
+        technos = []
+        for j in affected.tolist():
+            before = int(impact.expert_counts[j])
+            after = before - int(impact.experts[i, j])
+            # Meilleur niveau parmi les autres détenteurs de la techno
+            others = np.where(store.present[:, j], np.nan_to_num(store.niveau_calcule[:, j], nan=0.0), -1.0)
+            others[i] = -1.0
+            best = int(np.argmax(others))
+            niveau = store.niveau_calcule[i, j]
+            technos.append({
+                'techno': store.techno_names[j],
+                'niveau': None if np.isnan(niveau) else float(niveau),
+                'experts_before': before,
+                'experts_after': after,
+                'risk_before': risk_level(before, min_experts),
+                'risk_after': risk_level(after, min_experts),
+                'holders_after': int(impact.holder_counts[j]) - 1,
+                'effects': [name for name in DAMAGE_WEIGHTS if getattr(impact, name)[i, j]],
+                'next_best': {
+                    'collaborator_id': store.collaborator_ids[best],
+                    'name': store.collaborator_names[best],
+                    'niveau': None if np.isnan(store.niveau_calcule[best, j]) else float(store.niveau_calcule[best, j])
+                } if others[best] >= 0 else None
+            })
+        # Les pertes les plus graves d'abord
+        technos.sort(key=lambda t: (t['experts_after'], t['holders_after'], t['techno']))
+
+        return {
+            'collaborator': {'id': id_collaborator, 'name': store.collaborator_names[i]},
+            'damage': int(damage[i]),
+            'rank': int((damage > damage[i]).sum()) + 1,
+            'collaborators': len(store.collaborator_ids),
+            **{name: int(counts[name][i]) for name in DAMAGE_WEIGHTS},
+            'technos': technos
+        }
+
+    conn = get_db_connection()
+    result = read_matrix(conn, reader)
+    conn.close()
+
+    if result is None:
+        return jsonify({"error": "Collaborator not found"}), 404
+
+    result.update({'expert_level': expert_level, 'min_experts': min_experts})
+    return jsonify(result), 200
@@ -0,0 +1,151 @@
+from flask import Blueprint, request, jsonify
+import numpy as np
+from src.availability import describe_period, parse_window, read_availability
+from src.competence_matrix import read_matrix
+from src.config import get_db_connection
+from src.scoring_engine import format_month
+
+bp = Blueprint('availability', __name__)
+
+
+def parse_min_availability(value):
+    """Part de la fenêtre qui doit être libre (0 à 1), ValueError si invalide"""
+    try:
+        rate = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("min_availability must be a number between 0 and 1")
+    if not 0 <= rate <= 1:
+        raise ValueError("min_availability must be a number between 0 and 1")
+    return rate
+
+
+@bp.route("/availability", methods=["GET"])
+def get_availability():
+    """
+    Disponibilité des collaborateurs sur une fenêtre de mois
+
+    Query params:
+    - from / to: mois YYYY-MM, bornes incluses (défaut: mois courant)
+    - collaborator: filtre sur le nom
+    - min_availability: part de la fenêtre libre pour être disponible (défaut: 1)
+    - available_only: true pour ne garder que les disponibles
+    """
+    try:
+        start, end = parse_window(request.args.get('from'), request.args.get('to'))
+        min_rate = parse_min_availability(request.args.get('min_availability', 1))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    collaborator = request.args.get('collaborator', '').lower()
+    available_only = request.args.get('available_only', '').lower() in ('1', 'true', 'yes')
+    months = end - start + 1
+
+    def reader(index):
+        results = []
+        for id in index.collaborator_ids:
+            name = index.collaborator_names[id]
+            if collaborator and collaborator not in name.lower():
+                continue
+            calendar = index.calendars[id]
+            free = months - calendar.busy_months(start, end)
+            available = free >= min_rate * months - 1e-9
+            if available_only and not available:
+                continue
+            results.append({
+                'collaborator_id': id,
+                'name': name,
+                'busy_months': months - free,
+                'free_months': free,
+                'availability_rate': round(free / months, 4),
+                'available': available,
+                'engagements': [
+                    dict(project_id=id_project, project=index.project_names.get(id_project), **describe_period(s, e))
+                    for s, e, id_project in calendar.engagements(start, end)
+                ],
+                'free_periods': [describe_period(s, e) for s, e in calendar.free_periods(start, end)]
+            })
+        return results, index.describe()
+
+    conn = get_db_connection()
+    collaborators, calendar = read_availability(conn, reader)
+    conn.close()
+
+    return jsonify({
+        'from': format_month(start),
+        'to': format_month(end),
+        'months': months,
+        'min_availability': min_rate,
+        'collaborators': collaborators,
+        'total': len(collaborators),
+        'available_count': len([c for c in collaborators if c['available']]),
+        'calendar': calendar
+    }), 200
+
+
+@bp.route("/availability/capacity", methods=["GET"])
+def get_free_capacity():
+    """
+    Capacité libre mois par mois: nombre de collaborateurs sans engagement
+
+    Query params:
+    - from / to: mois YYYY-MM, bornes incluses (défaut: mois courant)
+    - techno: limite aux collaborateurs ayant cette compétence
+    - niveau_min: niveau calculé minimum sur la techno (défaut: aucun)
+    """
+    try:
+        start, end = parse_window(request.args.get('from'), request.args.get('to'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    techno = request.args.get('techno', '').strip()
+    niveau_min = request.args.get('niveau_min', type=float)
+
+    conn = get_db_connection()
+
+    scope = None
+    if techno:
+        def techno_reader(store):
+            j = store.index.column(techno)
+            if j is None:
+                return None
+            postings = store.index.get(j)
+            rows = postings.rows if niveau_min is None else postings.above(niveau_min)[0]
+            return {store.collaborator_ids[i] for i in rows.tolist()}
+
+        scope = read_matrix(conn, techno_reader)
+        if scope is None:
+            conn.close()
+            return jsonify({"error": f"Techno '{techno}' not found"}), 404
+
+    months = end - start + 1
+
+    def reader(index):
+        ids = [id for id in index.collaborator_ids if scope is None or id in scope]
+        # Collaborateurs occupés par mois: +1 au début de chaque bloc, -1 après sa fin
+        delta = np.zeros(months + 1, dtype=int)
+        for id in ids:
+            for busy_start, busy_end in index.calendars[id].busy_periods(start, end):
+                delta[busy_start - start] += 1
+                delta[busy_end - start + 1] -= 1
+        return len(ids), np.cumsum(delta[:-1])
+
+    total, busy = read_availability(conn, reader)
+    conn.close()
+
+    timeline = [
+        {
+            'mois': format_month(start + offset),
+            'busy': int(count),
+            'free': total - int(count),
+            'free_rate': round((total - int(count)) / total * 100, 2) if total else 0
+        }
+        for offset, count in enumerate(busy.tolist())
+    ]
+
+    return jsonify({
+        'from': format_month(start),
+        'to': format_month(end),
+        'techno': techno or None,
+        'niveau_min': niveau_min,
+        'total_collaborators': total,
+        'free_collaborator_months': total * months - int(busy.sum()),
+        'timeline': timeline
+    }), 200
@@ -1,12 +1,46 @@
 from flask import Blueprint, request, jsonify
+import numpy as np
+from src.competence_matrix import read_matrix
+from src.config import get_db_connection
 from src.models import collaborator_model
+from src.pagination import paginated_response
+from src.skill_similarity import SIMILARITY_METHODS
+from src.bulk import bulk_create_response, bulk_update_response, bulk_delete_response
 
 bp = Blueprint('collaborators', __name__)
 
+MAX_SIMILAR = 100
+TOP_SHARED_TECHNOS = 5
+
+
+def parse_collaborator(data):
+    """Valide un collaborateur à créer"""
+    firstname = data.get("firstname")
+    lastname = data.get("lastname")
+
+    if not firstname or not lastname:
+        raise ValueError("firstname and lastname are required")
+
+    return {"firstname": firstname, "lastname": lastname}
+
+
+def parse_collaborator_update(data):
+    """Valide les champs modifiables d'un collaborateur"""
+    update_data = {}
+    if "firstname" in data:
+        update_data["firstname"] = data["firstname"]
+    if "lastname" in data:
+        update_data["lastname"] = data["lastname"]
+
+    if not update_data:
+        raise ValueError("No valid fields to update")
+
+    return update_data
+
+
 @bp.route("/collaborators", methods=["GET"])
 def get_collaborators():
-    collaborators = collaborator_model.get_all()
-    return jsonify(collaborators), 200
+    return paginated_response(collaborator_model)
 
 @bp.route("/collaborators/<int:collaborator_id>", methods=["GET"])
 def get_collaborator(collaborator_id):
@@ -17,19 +51,14 @@ def get_collaborator(collaborator_id):
 
 @bp.route("/collaborators", methods=["POST"])
 def add_collaborator():
-    data = request.get_json()
-    firstname = data.get("firstname")
-    lastname = data.get("lastname")
-
-    if not firstname or not lastname:
-        return jsonify({"error": "firstname and lastname are required"}), 400
+    try:
+        collaborator = parse_collaborator(request.get_json())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
-        item_id = collaborator_model.create({
-            "firstname": firstname,
-            "lastname": lastname
-        })
-        return jsonify({"message": f"Collaborator {firstname} {lastname} added!", "id": item_id}), 201
+        item_id = collaborator_model.create(collaborator)
+        return jsonify({"message": f"Collaborator {collaborator['firstname']} {collaborator['lastname']} added!", "id": item_id}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -44,14 +73,10 @@ def update_collaborator(collaborator_id):
     if not collaborator:
         return jsonify({"error": "Collaborator not found"}), 404
 
-    update_data = {}
-    if "firstname" in data:
-        update_data["firstname"] = data["firstname"]
-    if "lastname" in data:
-        update_data["lastname"] = data["lastname"]
-
-    if not update_data:
-        return jsonify({"error": "No valid fields to update"}), 400
+    try:
+        update_data = parse_collaborator_update(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
         collaborator_model.update(collaborator_id, update_data)
@@ -70,3 +95,106 @@ def delete_collaborator(collaborator_id):
         return jsonify({"message": f"Collaborator {collaborator_id} deleted!"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 400
+
+@bp.route("/collaborators/<int:collaborator_id>/similar", methods=["GET"])
+def get_similar_collaborators(collaborator_id):
+    """
+    Collaborateurs au profil de compétences le plus proche (similarité
+    cosinus des profils, src/skill_similarity.py), pour remplacer ou
+    accompagner quelqu'un
+
+    Query params:
+    - k: nombre de résultats (défaut: 10, max MAX_SIMILAR)
+    - technologies: technos requises chez les résultats (séparées par des virgules)
+    - niveau_min: niveau calculé minimum sur ces technos (défaut: compétence présente)
+    - method: auto, exact ou approx
+    """
+    k = request.args.get('k', default=10, type=int)
+    if not 1 <= k <= MAX_SIMILAR:
+        return jsonify({"error": f"k must be between 1 and {MAX_SIMILAR}"}), 400
+    method = request.args.get('method', 'auto')
+    if method not in SIMILARITY_METHODS:
+        return jsonify({"error": f"method must be one of {', '.join(SIMILARITY_METHODS)}"}), 400
+    names = [name.strip() for name in request.args.get('technologies', '').split(',') if name.strip()]
+    niveau_min = request.args.get('niveau_min', type=float)
+
+    def reader(store):
+        i = store.collaborator_index.get(collaborator_id)
+        if i is None:
+            return None
+
+        columns = [store.index.column(name) for name in names]
+        unknown = [name for name, j in zip(names, columns) if j is None]
+        allowed = None
+        if columns:
+            if unknown:
+                allowed = np.zeros(len(store.collaborator_ids), dtype=bool)
+            elif niveau_min is None:
+                allowed = store.present[:, columns].all(axis=1)
+            else:
+                allowed = np.zeros(len(store.collaborator_ids), dtype=bool)
+                allowed[store.index.intersect_above(columns, niveau_min)[0]] = True
+
+        profiles = store.profiles()
+        reference = {
+            'id': collaborator_id,
+            'name': store.collaborator_names[i],
+            'nb_technos': int(store.present[i].sum())
+        }
+        if not profiles.vectors[i].any():
+            return reference, unknown, [], None, 0
+
+        rows, scores, used, scanned = profiles.nearest(i, k, allowed, method)
+        results = []
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            niveau = np.nan_to_num(store.niveau([i, row]))
+            shared = np.flatnonzero(store.present[i] & store.present[row])
+            # Technos communes où le candidat est le plus fort
+            shared = shared[np.argsort(-niveau[1, shared], kind='stable')]
+            results.append({
+                'collaborator_id': store.collaborator_ids[row],
+                'name': store.collaborator_names[row],
+                'similarity': round(score, 4),
+                'shared_technos': len(shared),
+                'top_shared': [
+                    {
+                        'techno': store.techno_names[j],
+                        'niveau': float(niveau[1, j]),
+                        'niveau_reference': float(niveau[0, j])
+                    }
+                    for j in shared[:TOP_SHARED_TECHNOS].tolist()
+                ]
+            })
+        return reference, unknown, results, used, scanned
+
+    conn = get_db_connection()
+    found = read_matrix(conn, reader)
+    conn.close()
+
+    if found is None:
+        return jsonify({"error": "Collaborator not found"}), 404
+    reference, unknown, results, used, scanned = found
+
+    return jsonify({
+        'collaborator': reference,
+        'similar': results,
+        'k': k,
+        'technologies': names,
+        'niveau_min': niveau_min,
+        'unknown_technologies': unknown,
+        'method': used,
+        'candidates': scanned
+    }), 200
+
+# ---------------- Bulk ----------------
+@bp.route("/collaborators/bulk", methods=["POST"])
+def bulk_add_collaborators():
+    return bulk_create_response(collaborator_model, parse_collaborator)
+
+@bp.route("/collaborators/bulk", methods=["PATCH"])
+def bulk_update_collaborators():
+    return bulk_update_response(collaborator_model, parse_collaborator_update)
+
+@bp.route("/collaborators/bulk", methods=["DELETE"])
+def bulk_delete_collaborators():
+    return bulk_delete_response(collaborator_model)
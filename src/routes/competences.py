@@ -1,12 +1,60 @@
 from flask import Blueprint, request, jsonify
 from src.models import competence_model
+from src.pagination import paginated_response
+from src.bulk import bulk_create_response, bulk_update_response, bulk_delete_response
 
 bp = Blueprint('competences', __name__)
 
+
+def check_level(name, value, types=(int,)):
+    """Niveau entre 1 et 5 (ValueError sinon, y compris pour un texte ou un booléen)"""
+    if isinstance(value, bool) or not isinstance(value, types) or not (1 <= value <= 5):
+        raise ValueError(f"{name} must be a number between 1 and 5" if float in types else f"{name} must be an integer between 1 and 5")
+    return value
+
+
+def parse_competence(data):
+    """Valide une compétence à créer"""
+    id_collaborator = data.get("id_collaborator")
+    id_techno = data.get("id_techno")
+    niveau_declare = data.get("niveau_declare")
+    niveau_calcule = data.get("niveau_calcule", niveau_declare)
+
+    if not id_collaborator or not id_techno or not niveau_declare:
+        raise ValueError("id_collaborator, id_techno and niveau_declare are required")
+
+    check_level("niveau_declare", niveau_declare)
+
+    if niveau_calcule is not None:
+        check_level("niveau_calcule", niveau_calcule, (int, float))
+
+    return {
+        "id_collaborator": id_collaborator,
+        "id_techno": id_techno,
+        "niveau_declare": niveau_declare,
+        "niveau_calcule": niveau_calcule
+    }
+
+
+def parse_competence_update(data):
+    """Valide les champs modifiables d'une compétence"""
+    update_data = {}
+
+    if "niveau_declare" in data:
+        update_data["niveau_declare"] = check_level("niveau_declare", data["niveau_declare"])
+
+    if "niveau_calcule" in data:
+        update_data["niveau_calcule"] = check_level("niveau_calcule", data["niveau_calcule"], (int, float))
+
+    if not update_data:
+        raise ValueError("No valid fields to update")
+
+    return update_data
+
+
 @bp.route("/competences", methods=["GET"])
 def get_competences():
-    competences = competence_model.get_all()
-    return jsonify(competences), 200
+    return paginated_response(competence_model)
 
 @bp.route("/competences/<int:competence_id>", methods=["GET"])
 def get_competence(competence_id):
@@ -17,13 +65,11 @@ def get_competence(competence_id):
 
 @bp.route("/competences/collaborator/<int:collaborator_id>", methods=["GET"])
 def get_competences_by_collaborator(collaborator_id):
-    competences = competence_model.get_by_collaborator(collaborator_id)
-    return jsonify(competences), 200
+    return paginated_response(competence_model, id_collaborator=collaborator_id)
 
 @bp.route("/competences/techno/<int:techno_id>", methods=["GET"])
 def get_competences_by_techno(techno_id):
-    competences = competence_model.get_by_techno(techno_id)
-    return jsonify(competences), 200
+    return paginated_response(competence_model, id_techno=techno_id)
 
 @bp.route("/competences/collaborator/<int:collaborator_id>/techno/<int:techno_id>", methods=["GET"])
 def get_competence_by_collaborator_techno(collaborator_id, techno_id):
@@ -34,28 +80,13 @@ def get_competence_by_collaborator_techno(collaborator_id, techno_id):
 
 @bp.route("/competences", methods=["POST"])
 def add_competence():
-    data = request.get_json()
-    id_collaborator = data.get("id_collaborator")
-    id_techno = data.get("id_techno")
-    niveau_declare = data.get("niveau_declare")
-    niveau_calcule = data.get("niveau_calcule", niveau_declare)
-
-    if not id_collaborator or not id_techno or not niveau_declare:
-        return jsonify({"error": "id_collaborator, id_techno and niveau_declare are required"}), 400
-
-    if not (1 <= niveau_declare <= 5):
-        return jsonify({"error": "niveau_declare must be between 1 and 5"}), 400
-
-    if niveau_calcule and not (1 <= niveau_calcule <= 5):
-        return jsonify({"error": "niveau_calcule must be between 1 and 5"}), 400
+    try:
+        competence = parse_competence(request.get_json())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
-        item_id = competence_model.create({
-            "id_collaborator": id_collaborator,
-            "id_techno": id_techno,
-            "niveau_declare": niveau_declare,
-            "niveau_calcule": niveau_calcule
-        })
+        item_id = competence_model.create(competence)
         return jsonify({"message": f"Competence added!", "id": item_id}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 400
@@ -71,20 +102,10 @@ def update_competence(competence_id):
     if not competence:
         return jsonify({"error": "Competence not found"}), 404
 
-    update_data = {}
-
-    if "niveau_declare" in data:
-        if not (1 <= data["niveau_declare"] <= 5):
-            return jsonify({"error": "niveau_declare must be between 1 and 5"}), 400
-        update_data["niveau_declare"] = data["niveau_declare"]
-
-    if "niveau_calcule" in data:
-        if not (1 <= data["niveau_calcule"] <= 5):
-            return jsonify({"error": "niveau_calcule must be between 1 and 5"}), 400
-        update_data["niveau_calcule"] = data["niveau_calcule"]
-
-    if not update_data:
-        return jsonify({"error": "No valid fields to update"}), 400
+    try:
+        update_data = parse_competence_update(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
         competence_model.update(competence_id, update_data)
@@ -103,3 +124,16 @@ def delete_competence(competence_id):
         return jsonify({"message": f"Competence {competence_id} deleted!"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 400
+
+# ---------------- Bulk ----------------
+@bp.route("/competences/bulk", methods=["POST"])
+def bulk_add_competences():
+    return bulk_create_response(competence_model, parse_competence)
+
+@bp.route("/competences/bulk", methods=["PATCH"])
+def bulk_update_competences():
+    return bulk_update_response(competence_model, parse_competence_update)
+
+@bp.route("/competences/bulk", methods=["DELETE"])
+def bulk_delete_competences():
+    return bulk_delete_response(competence_model)
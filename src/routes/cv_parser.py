@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 import re
 import io
+from src.jobs import job_handler
+from src.routes.jobs import wants_async, submit_job_response
 
 bp = Blueprint('cv_parser', __name__)
 
@@ -87,6 +89,22 @@ def extract_text_from_docx(file_stream):
         raise Exception(f"Erreur lors de la lecture du document Word: {str(e)}")
 
 
+def extract_text(filename, file_stream):
+    """Extrait le texte selon l'extension, None si le format n'est pas supporté"""
+    filename = filename.lower()
+    if filename.endswith('.pdf'):
+        return extract_text_from_pdf(file_stream)
+    elif filename.endswith('.txt'):
+        return extract_text_from_txt(file_stream)
+    elif filename.endswith('.docx') or filename.endswith('.doc'):
+        return extract_text_from_docx(file_stream)
+    return None
+
+
+def is_supported_file(filename):
+    return filename.lower().endswith(('.pdf', '.txt', '.docx', '.doc'))
+
+
 def detect_technologies(text, custom_technologies=None):
     """
     Détecte les technologies dans un texte
@@ -222,6 +240,87 @@ def parse_cv():
         return jsonify({"error": str(e)}), 400
 
 
+def import_cv_text(text, firstname, lastname, custom_technologies=None, progress=None):
+    """
+    Détecte les technologies du texte d'un CV et les importe comme compétences
+    progress(done, total) est appelé avant chaque technologie (tâches de fond)
+    """
+    # Détecter les technologies
+    detected_technologies = detect_technologies(text, custom_technologies)
+
+    if not detected_technologies:
+        return {
+            "message": "Aucune technologie détectée",
+            "created": 0,
+            "technologies": []
+        }
+
+    # Importer dans la base de données
+    from src.routes.imports import get_or_create_collaborator, get_or_create_techno
+    from src.models import competence_model
+
+    # Créer ou récupérer le collaborateur
+    id_collaborator = get_or_create_collaborator(firstname, lastname)
+
+    created = 0
+    updated = 0
+    errors = []
+    text_length = len(text)
+
+    for index, (tech, occurrences) in enumerate(detected_technologies.items()):
+        if progress:
+            progress(index, len(detected_technologies))
+        try:
+            niveau_estime = estimate_niveau(occurrences, text_length)
+            id_techno = get_or_create_techno(tech)
+
+            # Vérifier si la compétence existe
+            existing = competence_model.get_by_collaborator_techno(id_collaborator, id_techno)
+
+            if existing:
+                # Ne pas écraser si le niveau existant est meilleur
+                if existing['niveau_declare'] < niveau_estime:
+                    competence_model.update(existing['id'], {
+                        'niveau_declare': niveau_estime,
+                        'niveau_calcule': niveau_estime
+                    })
+                    updated += 1
+            else:
+                competence_model.create({
+                    'id_collaborator': id_collaborator,
+                    'id_techno': id_techno,
+                    'niveau_declare': niveau_estime,
+                    'niveau_calcule': niveau_estime
+                })
+                created += 1
+
+        except Exception as e:
+            errors.append(f"{tech}: {str(e)}")
+
+    return {
+        "message": "CV importé avec succès",
+        "collaborator": f"{firstname} {lastname}",
+        "collaborator_id": id_collaborator,
+        "created": created,
+        "updated": updated,
+        "total_technologies_detected": len(detected_technologies),
+        "errors": errors
+    }
+
+
+@job_handler('cv.parse_and_import')
+def run_parse_and_import_job(job):
+    payload = job.payload
+    text = extract_text(payload['filename'], io.BytesIO(job.data))
+    return import_cv_text(
+        text,
+        payload['firstname'],
+        payload['lastname'],
+        payload.get('custom_technologies'),
+        job.progress
+    )
+
+
 @bp.route("/cv/parse-and-import", methods=["POST"])
 def parse_and_import_cv():
     """
@@ -233,6 +332,7 @@ def parse_and_import_cv():
     - lastname: nom du collaborateur (requis)
     - custom_technologies: liste optionnelle de technologies supplémentaires
     - auto_create_collaborator: créer le collaborateur s'il n'existe pas (défaut: true)
+    - async: true pour exécuter l'analyse et l'import en tâche de fond (202 + id de tâche)
     """
     if 'file' not in request.files:
         return jsonify({"error": "Aucun fichier fourni"}), 400
@@ -253,80 +353,24 @@ def parse_and_import_cv():
         except:
             custom_technologies = None
 
-    filename = file.filename.lower()
+    if not is_supported_file(file.filename):
+        return jsonify({
+            "error": "Format de fichier non supporté. Formats acceptés: PDF, TXT, DOCX"
+        }), 400
+
+    if wants_async():
+        return submit_job_response('cv.parse_and_import', {
+            "filename": file.filename,
+            "firstname": firstname,
+            "lastname": lastname,
+            "custom_technologies": custom_technologies
+        }, file.stream.read())
 
     try:
         # Extraire le texte
-        if filename.endswith('.pdf'):
-            text = extract_text_from_pdf(file.stream)
-        elif filename.endswith('.txt'):
-            text = extract_text_from_txt(file.stream)
-        elif filename.endswith('.docx') or filename.endswith('.doc'):
-            text = extract_text_from_docx(file.stream)
-        else:
-            return jsonify({
-                "error": "Format de fichier non supporté. Formats acceptés: PDF, TXT, DOCX"
-            }), 400
-
-        # Détecter les technologies
-        detected_technologies = detect_technologies(text, custom_technologies)
-
-        if not detected_technologies:
-            return jsonify({
-                "message": "Aucune technologie détectée",
-                "created": 0,
-                "technologies": []
-            }), 200
-
-        # Importer dans la base de données
-        from src.routes.imports import get_or_create_collaborator, get_or_create_techno
-        from src.models import competence_model
+        text = extract_text(file.filename, file.stream)
 
-        # Créer ou récupérer le collaborateur
-        id_collaborator = get_or_create_collaborator(firstname, lastname)
-
-        created = 0
-        updated = 0
-        errors = []
-        text_length = len(text)
-
-        for tech, occurrences in detected_technologies.items():
-            try:
-                niveau_estime = estimate_niveau(occurrences, text_length)
-                id_techno = get_or_create_techno(tech)
-
-                # Vérifier si la compétence existe
-                existing = competence_model.get_by_collaborator_techno(id_collaborator, id_techno)
-
-                if existing:
-                    # Ne pas écraser si le niveau existant est meilleur
-                    if existing['niveau_declare'] < niveau_estime:
-                        competence_model.update(existing['id'], {
-                            'niveau_declare': niveau_estime,
-                            'niveau_calcule': niveau_estime
-                        })
-                        updated += 1
-                else:
-                    competence_model.create({
-                        'id_collaborator': id_collaborator,
-                        'id_techno': id_techno,
-                        'niveau_declare': niveau_estime,
-                        'niveau_calcule': niveau_estime
-                    })
-                    created += 1
-
-            except Exception as e:
-                errors.append(f"{tech}: {str(e)}")
-
-        return jsonify({
-            "message": "CV importé avec succès",
-            "collaborator": f"{firstname} {lastname}",
-            "collaborator_id": id_collaborator,
-            "created": created,
-            "updated": updated,
-            "total_technologies_detected": len(detected_technologies),
-            "errors": errors
-        }), 200
+        return jsonify(import_cv_text(text, firstname, lastname, custom_technologies)), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 400
@@ -1,40 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
 from flask import Blueprint, request, jsonify
+import logging
+import time
 from src.config import get_db_connection
+from src.dashboard import (
+    at_risk_technologies, at_risk_technologies_widget, heatmap_points, heatmap_widget, matrix_aggregates,
+    overview_widget, statistics_widget, top_technologies, top_technologies_widget
+)
+from src.matrix_encoding import requested_matrix_format
+from src.routes.allocation import expert_level_arg
+from src.routes.matrix import encoded_matrix_response
+from src.streaming import requested_stream_format, streaming_response
 
 bp = Blueprint('dashboard', __name__)
+logger = logging.getLogger(__name__)
+
+# Widgets de /dashboard/bundle ; ceux de la matrice sont calculés en une seule lecture
+BUNDLE_WIDGETS = ('overview', 'top-technologies', 'at-risk-technologies', 'statistics', 'heatmap')
+MATRIX_WIDGETS = ('top-technologies', 'at-risk-technologies')
+
+_bundle_executor = ThreadPoolExecutor(max_workers=len(BUNDLE_WIDGETS), thread_name_prefix='dashboard-bundle')
 
 
 @bp.route("/dashboard/overview", methods=["GET"])
 def get_dashboard_overview():
     """
     Vue globale du dashboard avec toutes les métriques principales
+
+    Lue sur la ligne de compteurs tenue par triggers (src/stats_counters.py)
     """
     conn = get_db_connection()
-
-    # Statistiques générales
-    stats = {}
-
-    # Nombre total de collaborateurs
-    stats['total_collaborators'] = conn.execute("SELECT COUNT(*) as count FROM collaborator").fetchone()['count']
-
-    # Nombre total de technologies
-    stats['total_technologies'] = conn.execute("SELECT COUNT(*) as count FROM techno").fetchone()['count']
-
-    # Nombre total de compétences
-    stats['total_competences'] = conn.execute("SELECT COUNT(*) as count FROM competence").fetchone()['count']
-
-    # Nombre total de projets
-    stats['total_projects'] = conn.execute("SELECT COUNT(*) as count FROM project").fetchone()['count']
-
-    # Niveau moyen des compétences
-    avg_niveau = conn.execute("SELECT AVG(niveau_calcule) as avg FROM competence").fetchone()['avg']
-    stats['avg_niveau'] = round(avg_niveau, 2) if avg_niveau else 0
-
+    overview = overview_widget(conn)
     conn.close()
 
-    return jsonify({
-        'stats': stats
-    }), 200
+    return jsonify(overview), 200
 
 
 @bp.route("/dashboard/top-technologies", methods=["GET"])
@@ -46,92 +45,45 @@ def get_top_technologies():
     Query params:
     - limit: nombre de technologies à retourner (défaut: 10)
     """
-    limit = request.args.get('limit', default=10, type=int)
-
     conn = get_db_connection()
-
-    query = """
-        SELECT
-            t.name as techno,
-            COUNT(DISTINCT comp.id_collaborator) as nb_collaborators,
-            AVG(comp.niveau_calcule) as avg_niveau,
-            SUM(CASE WHEN comp.niveau_calcule >= 4 THEN 1 ELSE 0 END) as nb_experts,
-            MAX(comp.niveau_calcule) as max_niveau
-        FROM techno t
-        JOIN competence comp ON t.id = comp.id_techno
-        GROUP BY t.id, t.name
-        ORDER BY nb_experts DESC, avg_niveau DESC
-        LIMIT ?
-    """
-
-    results = conn.execute(query, (limit,)).fetchall()
+    payload = top_technologies_widget(conn, **top_technologies_params())
     conn.close()
 
-    top_technologies = []
-    for row in results:
-        top_technologies.append({
-            'techno': row['techno'],
-            'nb_collaborators': row['nb_collaborators'],
-            'avg_niveau': round(row['avg_niveau'], 2) if row['avg_niveau'] else 0,
-            'nb_experts': row['nb_experts'],
-            'max_niveau': row['max_niveau']
-        })
+    return jsonify(payload), 200
 
-    return jsonify({
-        'top_technologies': top_technologies,
-        'limit': limit
-    }), 200
+
+def top_technologies_params():
+    return {'limit': request.args.get('limit', default=10, type=int)}
 
 
 @bp.route("/dashboard/at-risk-technologies", methods=["GET"])
 def get_at_risk_technologies():
     """
     Technologies à risque: maîtrisées par moins de 2 experts
+    (agrégats par techno de src/skill_risk.py)
 
     Query params:
     - threshold: nombre minimum d'experts (défaut: 2)
+    - expert_level: niveau d'expert (défaut: 4)
     """
-    threshold = request.args.get('threshold', default=2, type=int)
+    try:
+        params = at_risk_params()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     conn = get_db_connection()
-
-    query = """
-        SELECT
-            t.name as techno,
-            COUNT(DISTINCT comp.id_collaborator) as nb_collaborators,
-            SUM(CASE WHEN comp.niveau_calcule >= 4 THEN 1 ELSE 0 END) as nb_experts,
-            AVG(comp.niveau_calcule) as avg_niveau,
-            MAX(comp.niveau_calcule) as best_niveau
-        FROM techno t
-        JOIN competence comp ON t.id = comp.id_techno
-        GROUP BY t.id, t.name
-        HAVING nb_experts < ?
-        ORDER BY nb_experts ASC, best_niveau DESC
-    """
-
-    results = conn.execute(query, (threshold,)).fetchall()
+    payload = at_risk_technologies_widget(conn, **params)
     conn.close()
 
-    at_risk = []
-    for row in results:
-        risk_level = 'critical' if row['nb_experts'] == 0 else 'high' if row['nb_experts'] == 1 else 'medium'
+    return jsonify(payload), 200
 
-        at_risk.append({
-            'techno': row['techno'],
-            'nb_collaborators': row['nb_collaborators'],
-            'nb_experts': row['nb_experts'],
-            'avg_niveau': round(row['avg_niveau'], 2) if row['avg_niveau'] else 0,
-            'best_niveau': row['best_niveau'] if row['best_niveau'] else 0,
-            'risk_level': risk_level
-        })
 
-    return jsonify({
-        'at_risk_technologies': at_risk,
-        'total': len(at_risk),
-        'threshold': threshold,
-        'critical': len([t for t in at_risk if t['risk_level'] == 'critical']),
-        'high': len([t for t in at_risk if t['risk_level'] == 'high'])
-    }), 200
+def at_risk_params():
+    """Paramètres de at-risk-technologies, ValueError si invalides"""
+    return {
+        'threshold': request.args.get('threshold', default=2, type=int),
+        'expert_level': expert_level_arg()
+    }
 
 
 @bp.route("/dashboard/collaborator/<int:id_collaborator>/radar", methods=["GET"])
@@ -198,6 +150,18 @@ def get_collaborator_radar(id_collaborator):
     }), 200
 
 
+def iter_global_heatmap_points(top_n=None):
+    """
+    Itère sur les points de la heatmap globale directement depuis le curseur SQLite
+    top_n: limiter aux N technologies les plus utilisées
+    """
+    conn = get_db_connection()
+    try:
+        yield from heatmap_points(conn, top_n)
+    finally:
+        conn.close()
+
+
 @bp.route("/dashboard/heatmap", methods=["GET"])
 def get_global_heatmap():
     """
@@ -206,70 +170,38 @@ def get_global_heatmap():
 
     Query params:
     - top_n: limiter aux N technologies les plus utilisées (optionnel)
+
+    Accept: application/x-ndjson ou text/csv pour streamer les points,
+    format=sparse ou binary pour les encodages compacts (src/matrix_encoding.py)
     """
-    top_n = request.args.get('top_n', type=int)
+    top_n = heatmap_params()['top_n']
 
-    conn = get_db_connection()
+    try:
+        matrix_format = requested_matrix_format()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    if top_n:
-        # Récupérer les top N technologies
-        query = """
-            SELECT
-                t.name as techno,
-                COUNT(DISTINCT comp.id_collaborator) as nb_users
-            FROM techno t
-            JOIN competence comp ON t.id = comp.id_techno
-            GROUP BY t.id, t.name
-            ORDER BY nb_users DESC
-            LIMIT ?
-        """
-        top_technos = conn.execute(query, (top_n,)).fetchall()
-        techno_names = [t['techno'] for t in top_technos]
-
-        # Filtrer les données de la heatmap
-        placeholders = ','.join(['?'] * len(techno_names))
-        query = f"""
-            SELECT
-                c.firstname || ' ' || c.lastname as collaborator,
-                t.name as techno,
-                comp.niveau_calcule as niveau
-            FROM competence comp
-            JOIN collaborator c ON comp.id_collaborator = c.id
-            JOIN techno t ON comp.id_techno = t.id
-            WHERE t.name IN ({placeholders})
-            ORDER BY c.lastname, c.firstname, t.name
-        """
-        results = conn.execute(query, techno_names).fetchall()
-    else:
-        # Toutes les compétences
-        query = """
-            SELECT
-                c.firstname || ' ' || c.lastname as collaborator,
-                t.name as techno,
-                comp.niveau_calcule as niveau
-            FROM competence comp
-            JOIN collaborator c ON comp.id_collaborator = c.id
-            JOIN techno t ON comp.id_techno = t.id
-            ORDER BY c.lastname, c.firstname, t.name
-        """
-        results = conn.execute(query).fetchall()
+    if matrix_format:
+        return encoded_matrix_response(
+            matrix_format,
+            lambda store: store.select_present(store.most_used_technos(top_n) if top_n else None),
+            lambda store: {'niveau': store.niveau_calcule},
+            {'top_n_filter': top_n}
+        )
 
+    stream_format = requested_stream_format()
+    if stream_format:
+        return streaming_response(iter_global_heatmap_points(top_n), stream_format)
+
+    conn = get_db_connection()
+    payload = heatmap_widget(conn, top_n)
     conn.close()
 
-    # Format pour heatmap
-    heatmap_data = []
-    for row in results:
-        heatmap_data.append({
-            'collaborator': row['collaborator'],
-            'techno': row['techno'],
-            'niveau': row['niveau'] if row['niveau'] else 0
-        })
+    return jsonify(payload), 200
 
-    return jsonify({
-        'heatmap_data': heatmap_data,
-        'total_points': len(heatmap_data),
-        'top_n_filter': top_n
-    }), 200
+
+def heatmap_params():
+    return {'top_n': request.args.get('top_n', type=int)}
 
 
 @bp.route("/dashboard/statistics", methods=["GET"])
@@ -278,66 +210,115 @@ def get_detailed_statistics():
     Statistiques détaillées pour le dashboard
     """
     conn = get_db_connection()
+    stats = statistics_widget(conn)
+    conn.close()
 
-    stats = {}
+    return jsonify(stats), 200
 
-    # Distribution des niveaux
-    niveau_distribution = conn.execute("""
-        SELECT
-            CASE
-                WHEN niveau_calcule >= 4 THEN 'Expert (4-5)'
-                WHEN niveau_calcule >= 2 THEN 'Intermédiaire (2-3)'
-                ELSE 'Débutant (0-1)'
-            END as category,
-            COUNT(*) as count
-        FROM competence
-        GROUP BY category
-    """).fetchall()
-
-    stats['niveau_distribution'] = [
-        {'category': row['category'], 'count': row['count']}
-        for row in niveau_distribution
-    ]
-
-    # Technologies les plus demandées (dans les projets)
-    top_project_technos = conn.execute("""
-        SELECT
-            t.name as techno,
-            COUNT(DISTINCT pth.id_project) as nb_projects
-        FROM project_techno_history pth
-        JOIN techno t ON pth.id_techno = t.id
-        GROUP BY t.id, t.name
-        ORDER BY nb_projects DESC
-        LIMIT 10
-    """).fetchall()
-
-    stats['top_project_technos'] = [
-        {'techno': row['techno'], 'nb_projects': row['nb_projects']}
-        for row in top_project_technos
-    ]
-
-    # Collaborateurs les plus polyvalents
-    top_polyvalent = conn.execute("""
-        SELECT
-            c.firstname || ' ' || c.lastname as name,
-            COUNT(DISTINCT comp.id_techno) as nb_technos,
-            AVG(comp.niveau_calcule) as avg_niveau
-        FROM collaborator c
-        JOIN competence comp ON c.id = comp.id_collaborator
-        GROUP BY c.id, name
-        ORDER BY nb_technos DESC, avg_niveau DESC
-        LIMIT 10
-    """).fetchall()
-
-    stats['top_polyvalent'] = [
-        {
-            'name': row['name'],
-            'nb_technos': row['nb_technos'],
-            'avg_niveau': round(row['avg_niveau'], 2) if row['avg_niveau'] else 0
-        }
-        for row in top_polyvalent
-    ]
 
-    conn.close()
+# Paramètres de chaque widget du bundle, lus dans la query string comme sur sa route
+BUNDLE_PARAMS = {
+    'top-technologies': top_technologies_params,
+    'at-risk-technologies': at_risk_params,
+    'heatmap': heatmap_params,
+}
 
-    return jsonify(stats), 200
+# Widgets calculés chacun sur sa connexion (JSON uniquement, jamais format=binary)
+SQL_WIDGETS = {
+    'overview': overview_widget,
+    'statistics': statistics_widget,
+    'heatmap': heatmap_widget,
+}
+
+
+def matrix_widgets(conn, params):
+    """Widgets de la matrice demandés (params: {widget: paramètres}), en une seule lecture"""
+    at_risk = params.get('at-risk-technologies')
+    stats, risks = matrix_aggregates(conn, at_risk['expert_level'] if at_risk else None)
+    payloads = {}
+    if 'top-technologies' in params:
+        payloads['top-technologies'] = top_technologies(stats, **params['top-technologies'])
+    if at_risk:
+        payloads['at-risk-technologies'] = at_risk_technologies(risks, **at_risk)
+    return payloads
+
+
+def run_widgets(names, compute):
+    """
+    Appelle compute(conn) sur une connexion du pool passée en lecture seule.
+    Retourne ({widget: payload}, {widget: erreur}, durée en ms) : une
+    exception est rapportée sur les widgets names, sans faire échouer le bundle
+    """
+    start = time.perf_counter()
+    payloads, errors = {}, {}
+    conn = get_db_connection()
+    try:
+        conn.execute("PRAGMA query_only = ON")
+        try:
+            payloads = compute(conn)
+        finally:
+            conn.execute("PRAGMA query_only = OFF")
+    except Exception as e:
+        logger.exception("Widgets %s en échec", ', '.join(names))
+        errors = {name: f"{type(e).__name__}: {e}" for name in names}
+    finally:
+        conn.close()
+    return payloads, errors, round((time.perf_counter() - start) * 1000, 2)
+
+
+@bp.route("/dashboard/bundle", methods=["GET"])
+def get_dashboard_bundle():
+    """
+    Plusieurs widgets du dashboard en un seul appel, calculés en parallèle
+
+    Query params:
+    - widgets: liste séparée par des virgules parmi overview, top-technologies,
+      at-risk-technologies, statistics, heatmap (défaut: tous)
+    - limit (top-technologies), threshold et expert_level (at-risk-technologies),
+      top_n (heatmap) : chaque widget ne reçoit que les siens
+    """
+    requested = request.args.get('widgets')
+    names = list(BUNDLE_WIDGETS)
+    if requested:
+        names = list(dict.fromkeys(name.strip() for name in requested.split(',') if name.strip()))
+        unknown = [name for name in names if name not in BUNDLE_WIDGETS]
+        if unknown or not names:
+            return jsonify({
+                "error": f"Unknown widgets: {', '.join(unknown)}" if unknown else "widgets is empty",
+                "available_widgets": list(BUNDLE_WIDGETS)
+            }), 400
+
+    start = time.perf_counter()
+    params, errors = {}, {}
+    for name in names:
+        try:
+            params[name] = BUNDLE_PARAMS[name]() if name in BUNDLE_PARAMS else {}
+        except ValueError as e:
+            errors[name] = str(e)
+
+    # Les threads n'ont pas de contexte de requête : connexion du pool, paramètres déjà lus
+    futures = []
+    matrix_params = {name: params[name] for name in MATRIX_WIDGETS if name in params}
+    if matrix_params:
+        futures.append((list(matrix_params), _bundle_executor.submit(
+            run_widgets, list(matrix_params), lambda conn: matrix_widgets(conn, matrix_params)
+        )))
+    for name in names:
+        if name in SQL_WIDGETS and name in params:
+            compute = lambda conn, name=name: {name: SQL_WIDGETS[name](conn, **params[name])}
+            futures.append(([name], _bundle_executor.submit(run_widgets, [name], compute)))
+
+    widgets, timings = {}, {}
+    for group, future in futures:
+        payloads, group_errors, elapsed_ms = future.result()
+        widgets.update(payloads)
+        errors.update(group_errors)
+        for name in group:
+            timings[name] = elapsed_ms
+
+    return jsonify({
+        'widgets': widgets,
+        'errors': errors,
+        'timings_ms': timings,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+    }), 200
@@ -0,0 +1,56 @@
+from flask import Blueprint, Response, request, jsonify
+from src.changes import latest_change_id
+from src.config import get_db_connection
+from src.events import EVENT_TOPICS, hub, parse_position
+
+bp = Blueprint('events', __name__)
+
+
+@bp.route("/events", methods=["GET"])
+def stream_events():
+    """
+    Flux Server-Sent Events des modifications (src/events.py)
+
+    Query params:
+    - topics: liste séparée par des virgules parmi competence,
+      project_techno_history, collaborator, techno, project,
+      collaborator_project, counters (défaut: tous)
+    - last_event_id: reprendre après cet id d'événement, '<id>' ou
+      '<id>:counters' (sinon en-tête Last-Event-ID, sinon seules les
+      modifications à venir sont envoyées)
+    """
+    topics = list(EVENT_TOPICS)
+    requested = request.args.get('topics')
+    if requested:
+        topics = [topic.strip() for topic in requested.split(',') if topic.strip()]
+        unknown = [topic for topic in topics if topic not in EVENT_TOPICS]
+        if unknown or not topics:
+            return jsonify({
+                "error": f"Unknown topics: {', '.join(unknown)}" if unknown else "topics is empty",
+                "available_topics": list(EVENT_TOPICS)
+            }), 400
+
+    last_event_id = request.args.get('last_event_id') or request.headers.get('Last-Event-ID')
+    conn = get_db_connection()
+    latest = latest_change_id(conn)
+    conn.close()
+    if last_event_id is None:
+        position = (latest, True)
+    else:
+        try:
+            position = parse_position(last_event_id)
+        except ValueError:
+            return jsonify({"error": "last_event_id must be an event id (<integer> or <integer>:counters)"}), 400
+        if position[0] < 0:
+            return jsonify({"error": "last_event_id must be a positive integer"}), 400
+        position = min(position, (latest, True))
+
+    hub.start()
+
+    # Pas de stream_with_context : le flux ne garde pas la connexion de la
+    # requête, le hub prend une connexion du pool à chaque lecture
+    return Response(
+        hub.stream(position, set(topics)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
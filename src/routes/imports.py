@@ -4,6 +4,8 @@ import json
 import io
 import datetime
 from src.config import get_db_connection
+from src.jobs import job_handler
+from src.routes.jobs import wants_async, submit_job_response
 from src.models import (
     collaborator_model, techno_model, project_model,
     competence_model, project_history_model,
@@ -61,11 +63,203 @@ def get_or_create_project(name):
         return project_model.create({"name": name})
 
 
+def history_exists(id_project, id_techno, id_collaborator):
+    """Un import rejoué (retry, reprise après crash) ne duplique pas l'historique"""
+    conn = get_db_connection()
+    row = conn.execute(
+        """SELECT 1 FROM project_techno_history
+           WHERE id_collaborator = ? AND id_techno = ? AND id_project = ?""",
+        (id_collaborator, id_techno, id_project)
+    ).fetchone()
+    conn.close()
+    return row is not None
+
+
+def import_competences_from_csv(text, progress=None):
+    """
+    Importe les lignes CSV nom,prenom,technologie,niveau_declare
+    progress(done, total) est appelé avant chaque ligne (tâches de fond)
+    """
+    rows = list(csv.DictReader(io.StringIO(text, newline=None)))
+
+    created = 0
+    updated = 0
+    errors = []
+
+    for row_num, row in enumerate(rows, start=2):
+        if progress:
+            progress(row_num - 2, len(rows))
+        try:
+            lastname = row.get('nom', '').strip()
+            firstname = row.get('prenom', '').strip()
+            techno_name = row.get('technologie', '').strip()
+            niveau_declare = row.get('niveau_declare', '').strip()
+
+            if not all([lastname, firstname, techno_name, niveau_declare]):
+                errors.append(f"Ligne {row_num}: Champs manquants")
+                continue
+
+            niveau_declare = int(niveau_declare)
+            if not (1 <= niveau_declare <= 5):
+                errors.append(f"Ligne {row_num}: niveau_declare doit être entre 1 et 5")
+                continue
+
+            # Créer ou récupérer les entités
+            id_collaborator = get_or_create_collaborator(firstname, lastname)
+            id_techno = get_or_create_techno(techno_name)
+
+            # Vérifier si la compétence existe déjà
+            existing = competence_model.get_by_collaborator_techno(id_collaborator, id_techno)
+
+            if existing:
+                # Mettre à jour
+                competence_model.update(existing['id'], {
+                    "niveau_declare": niveau_declare,
+                    "niveau_calcule": niveau_declare
+                })
+                updated += 1
+            else:
+                # Créer
+                competence_model.create({
+                    "id_collaborator": id_collaborator,
+                    "id_techno": id_techno,
+                    "niveau_declare": niveau_declare,
+                    "niveau_calcule": niveau_declare
+                })
+                created += 1
+
+        except Exception as e:
+            errors.append(f"Ligne {row_num}: {str(e)}")
+
+    return {
+        "message": "Import terminé",
+        "created": created,
+        "updated": updated,
+        "errors": errors
+    }
+
+
+def import_projects(projets, progress=None):
+    """
+    Importe une liste de projets {"nom", "technologies", "equipe", "duree_mois", "date_fin"}
+    progress(done, total) est appelé avant chaque projet (tâches de fond)
+    """
+    created_projects = 0
+    created_history = 0
+    errors = []
+
+    for proj_num, projet in enumerate(projets, start=1):
+        if progress:
+            progress(proj_num - 1, len(projets))
+        try:
+            nom = projet.get('nom', '').strip()
+            technologies = projet.get('technologies', [])
+            equipe = projet.get('equipe', [])
+            duree_mois = projet.get('duree_mois')
+            date_fin = projet.get('date_fin')
+
+            if not nom:
+                errors.append(f"Projet {proj_num}: nom manquant")
+                continue
+
+            # Créer ou récupérer le projet
+            id_project = get_or_create_project(nom)
+
+            # Mettre à jour les infos du projet si fournies
+            if duree_mois or date_fin:
+                update_data = {}
+                if duree_mois:
+                    update_data['duree_mois'] = duree_mois
+                if date_fin:
+                    update_data['date_fin'] = date_fin
+                project_model.update(id_project, update_data)
+
+            created_projects += 1
+
+            # Traiter les technologies
+            techno_ids = []
+            for techno_name in technologies:
+                id_techno = get_or_create_techno(techno_name.strip())
+                techno_ids.append(id_techno)
+
+                # Créer la relation techno-project (ignorer si existe)
+                try:
+                    techno_project_model.create({
+                        "id_techno": id_techno,
+                        "id_project": id_project
+                    })
+                except:
+                    pass  # Relation déjà existante
+
+            # Traiter l'équipe
+            for membre in equipe:
+                # Format attendu: "Prénom Nom"
+                parts = membre.strip().split(' ', 1)
+                if len(parts) == 2:
+                    firstname, lastname = parts
+                else:
+                    errors.append(f"Projet {proj_num}: Format invalide pour '{membre}'")
+                    continue
+
+                id_collaborator = get_or_create_collaborator(firstname, lastname)
+
+                # Créer la relation collaborator-project (ignorer si existe)
+                try:
+                    collaborator_project_model.create({
+                        "id_collaborator": id_collaborator,
+                        "id_project": id_project
+                    })
+                except:
+                    pass  # Relation déjà existante
+
+                # Créer l'historique pour chaque techno
+                for id_techno in techno_ids:
+                    if history_exists(id_project, id_techno, id_collaborator):
+                        continue
+
+                    history_data = {
+                        "id_project": id_project,
+                        "id_techno": id_techno,
+                        "id_collaborator": id_collaborator
+                    }
+
+                    if duree_mois:
+                        history_data['duree_mois'] = duree_mois
+                    if date_fin:
+                        history_data['date_fin'] = date_fin
+
+                    project_history_model.create(history_data)
+                    created_history += 1
+
+        except Exception as e:
+            errors.append(f"Projet {proj_num}: {str(e)}")
+
+    return {
+        "message": "Import terminé",
+        "created_projects": created_projects,
+        "created_history": created_history,
+        "errors": errors
+    }
+
+
+@job_handler('import.competences_csv')
+def run_competences_csv_job(job):
+    return import_competences_from_csv(job.data.decode("UTF8"), job.progress)
+
+
+@job_handler('import.projects_json')
+def run_projects_json_job(job):
+    return import_projects(json.loads(job.data)['projets'], job.progress)
+
+
 @bp.route("/import/competences/csv", methods=["POST"])
 def import_competences_csv():
     """
     Import des compétences depuis un CSV
     Format attendu: nom,prenom,technologie,niveau_declare
+
+    Form data / query params:
+    - async: true pour exécuter l'import en tâche de fond (202 + id de tâche)
     """
     if 'file' not in request.files:
         return jsonify({"error": "No file provided"}), 400
@@ -80,62 +274,13 @@ def import_competences_csv():
 
     try:
         # Lire le fichier CSV
-        stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-        csv_reader = csv.DictReader(stream)
-
-        created = 0
-        updated = 0
-        errors = []
-
-        for row_num, row in enumerate(csv_reader, start=2):
-            try:
-                lastname = row.get('nom', '').strip()
-                firstname = row.get('prenom', '').strip()
-                techno_name = row.get('technologie', '').strip()
-                niveau_declare = row.get('niveau_declare', '').strip()
-
-                if not all([lastname, firstname, techno_name, niveau_declare]):
-                    errors.append(f"Ligne {row_num}: Champs manquants")
-                    continue
-
-                niveau_declare = int(niveau_declare)
-                if not (1 <= niveau_declare <= 5):
-                    errors.append(f"Ligne {row_num}: niveau_declare doit être entre 1 et 5")
-                    continue
-
-                # Créer ou récupérer les entités
-                id_collaborator = get_or_create_collaborator(firstname, lastname)
-                id_techno = get_or_create_techno(techno_name)
+        content = file.stream.read()
+        text = content.decode("UTF8")
 
-                # Vérifier si la compétence existe déjà
-                existing = competence_model.get_by_collaborator_techno(id_collaborator, id_techno)
+        if wants_async():
+            return submit_job_response('import.competences_csv', {"filename": file.filename}, content)
 
-                if existing:
-                    # Mettre à jour
-                    competence_model.update(existing['id'], {
-                        "niveau_declare": niveau_declare,
-                        "niveau_calcule": niveau_declare
-                    })
-                    updated += 1
-                else:
-                    # Créer
-                    competence_model.create({
-                        "id_collaborator": id_collaborator,
-                        "id_techno": id_techno,
-                        "niveau_declare": niveau_declare,
-                        "niveau_calcule": niveau_declare
-                    })
-                    created += 1
-
-            except Exception as e:
-                errors.append(f"Ligne {row_num}: {str(e)}")
-
-        return jsonify({
-            "message": "Import terminé",
-            "created": created,
-            "updated": updated,
-            "errors": errors
-        }), 200
+        return jsonify(import_competences_from_csv(text)), 200
 
     except Exception as e:
         return jsonify({"error": f"Erreur lors du traitement du fichier: {str(e)}"}), 400
@@ -146,6 +291,9 @@ def import_projects_json():
     """
     Import des projets depuis un JSON
     Format attendu: {"projets": [{"nom": "...", "technologies": [...], "equipe": [...], "duree_mois": 6, "date_fin": "2024-08"}]}
+
+    Form data / query params:
+    - async: true pour exécuter l'import en tâche de fond (202 + id de tâche)
     """
     if 'file' not in request.files:
         return jsonify({"error": "No file provided"}), 400
@@ -160,103 +308,16 @@ def import_projects_json():
 
     try:
         # Lire le fichier JSON
-        data = json.load(file.stream)
+        content = file.stream.read()
+        data = json.loads(content)
 
         if 'projets' not in data:
             return jsonify({"error": "Le JSON doit contenir une clé 'projets'"}), 400
 
-        projets = data['projets']
-        created_projects = 0
-        created_history = 0
-        errors = []
-
-        for proj_num, projet in enumerate(projets, start=1):
-            try:
-                nom = projet.get('nom', '').strip()
-                technologies = projet.get('technologies', [])
-                equipe = projet.get('equipe', [])
-                duree_mois = projet.get('duree_mois')
-                date_fin = projet.get('date_fin')
-
-                if not nom:
-                    errors.append(f"Projet {proj_num}: nom manquant")
-                    continue
-
-                # Créer ou récupérer le projet
-                id_project = get_or_create_project(nom)
+        if wants_async():
+            return submit_job_response('import.projects_json', {"filename": file.filename}, content)
 
-                # Mettre à jour les infos du projet si fournies
-                if duree_mois or date_fin:
-                    update_data = {}
-                    if duree_mois:
-                        update_data['duree_mois'] = duree_mois
-                    if date_fin:
-                        update_data['date_fin'] = date_fin
-                    project_model.update(id_project, update_data)
-
-                created_projects += 1
-
-                # Traiter les technologies
-                techno_ids = []
-                for techno_name in technologies:
-                    id_techno = get_or_create_techno(techno_name.strip())
-                    techno_ids.append(id_techno)
-
-                    # Créer la relation techno-project (ignorer si existe)
-                    try:
-                        techno_project_model.create({
-                            "id_techno": id_techno,
-                            "id_project": id_project
-                        })
-                    except:
-                        pass  # Relation déjà existante
-
-                # Traiter l'équipe
-                for membre in equipe:
-                    # Format attendu: "Prénom Nom"
-                    parts = membre.strip().split(' ', 1)
-                    if len(parts) == 2:
-                        firstname, lastname = parts
-                    else:
-                        errors.append(f"Projet {proj_num}: Format invalide pour '{membre}'")
-                        continue
-
-                    id_collaborator = get_or_create_collaborator(firstname, lastname)
-
-                    # Créer la relation collaborator-project (ignorer si existe)
-                    try:
-                        collaborator_project_model.create({
-                            "id_collaborator": id_collaborator,
-                            "id_project": id_project
-                        })
-                    except:
-                        pass  # Relation déjà existante
-
-                    # Créer l'historique pour chaque techno
-                    for id_techno in techno_ids:
-                        history_data = {
-                            "id_project": id_project,
-                            "id_techno": id_techno,
-                            "id_collaborator": id_collaborator
-                        }
-
-                        if duree_mois:
-                            history_data['duree_mois'] = duree_mois
-                        if date_fin:
-                            history_data['date_fin'] = date_fin
-
-                        project_history_model.create(history_data)
-                        created_history += 1
-
-            except Exception as e:
-                errors.append(f"Projet {proj_num}: {str(e)}")
-
-        return jsonify({
-            "message": "Import terminé",
-            "created_projects": created_projects,
-            "created_history": created_history,
-            "errors": errors
-        }), 200
+        return jsonify(import_projects(data['projets'])), 200
 
     except json.JSONDecodeError as e:
         return jsonify({"error": f"JSON invalide: {str(e)}"}), 400
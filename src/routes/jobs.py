@@ -0,0 +1,79 @@
+from flask import Blueprint, request, jsonify
+from src.jobs import JOB_STATUSES, submit, get_job, list_jobs, cancel_job, retry_job
+
+bp = Blueprint('jobs', __name__)
+
+
+def wants_async():
+    """?async=true (ou champ de formulaire async) : exécuter en tâche de fond"""
+    value = request.args.get('async', request.form.get('async', ''))
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def submit_job_response(job_type, payload=None, data=None):
+    """Soumet une tâche et retourne 202 avec son id et l'URL de suivi"""
+    job_id = submit(job_type, payload, data)
+    response = jsonify({
+        "message": "Tâche soumise",
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}"
+    })
+    response.headers['Location'] = f"/jobs/{job_id}"
+    return response, 202
+
+
+@bp.route("/jobs", methods=["GET"])
+def get_jobs():
+    """
+    Liste des dernières tâches
+    Query params:
+    - status: queued, running, succeeded, failed, cancelled
+    - type: type de tâche (ex: import.projects_json)
+    - limit: nombre de tâches (défaut: 50, max 1000)
+    """
+    status = request.args.get('status')
+    if status and status not in JOB_STATUSES:
+        return jsonify({"error": f"status must be one of {', '.join(JOB_STATUSES)}"}), 400
+
+    limit = request.args.get('limit', 50, type=int)
+    if not 1 <= limit <= 1000:
+        return jsonify({"error": "limit must be between 1 and 1000"}), 400
+
+    return jsonify(list_jobs(status, request.args.get('type'), limit)), 200
+
+
+@bp.route("/jobs/<int:job_id>", methods=["GET"])
+def get_job_status(job_id):
+    """État, progression (0 à 1) et résultat d'une tâche"""
+    job = get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+
+@bp.route("/jobs/<int:job_id>/cancel", methods=["POST"])
+def cancel(job_id):
+    """
+    Annule une tâche: immédiat si elle est en file, sinon l'arrêt est
+    demandé et pris en compte au prochain point d'avancement
+    """
+    try:
+        job = cancel_job(job_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+
+@bp.route("/jobs/<int:job_id>/retry", methods=["POST"])
+def retry(job_id):
+    """Remet en file une tâche failed ou cancelled"""
+    try:
+        job = retry_job(job_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 202
@@ -1,8 +1,17 @@
 from flask import Blueprint, request, jsonify
+import numpy as np
+from src.competence_matrix import MatrixWindow, apply_window, describe_window, read_matrix
 from src.config import get_db_connection
+from src.matrix_encoding import matrix_response, requested_matrix_format
+from src.score_snapshots import snapshot_as_of
+from src.scoring_engine import format_month, month_index
+from src.streaming import requested_stream_format, streaming_response
 
 bp = Blueprint('matrix', __name__)
 
+MAX_WINDOW_SIZE = 1000
+WINDOW_PARAMS = ('row_offset', 'row_limit', 'col_offset', 'col_limit')
+
 
 def get_color_code(niveau):
     """
@@ -22,6 +31,64 @@ def get_color_code(niveau):
         return "rouge"
 
 
+def nan_to_none(values, cast=float):
+    """Tableau 2D -> listes Python, NaN (compétence sans niveau) -> None"""
+    return [[None if value != value else cast(value) for value in row] for row in values.tolist()]
+
+
+def parse_window():
+    """
+    Fenêtre demandée (row_offset, row_limit, col_offset, col_limit), None
+    si aucun de ces paramètres n'est fourni. Les limites sont plafonnées à
+    MAX_WINDOW_SIZE ; ValueError si une valeur n'est pas un entier positif.
+    """
+    if not any(name in request.args for name in WINDOW_PARAMS):
+        return None
+
+    values = {}
+    for name in WINDOW_PARAMS:
+        value = request.args.get(name, type=int)
+        if name in request.args and (value is None or value < 0 or (value == 0 and name.endswith('limit'))):
+            raise ValueError(f"{name} must be a {'positive' if name.endswith('limit') else 'non-negative'} integer")
+        values[name] = value
+
+    return MatrixWindow(
+        values['row_offset'] or 0,
+        min(values['row_limit'] or MAX_WINDOW_SIZE, MAX_WINDOW_SIZE),
+        values['col_offset'] or 0,
+        min(values['col_limit'] or MAX_WINDOW_SIZE, MAX_WINDOW_SIZE)
+    )
+
+
+def select_window(store, window, techno, collaborator, niveau_min):
+    """Sélection filtrée puis fenêtrée, et description de la fenêtre (None sans fenêtre)"""
+    rows, columns, cells = store.select(techno, collaborator, niveau_min)
+    if window is None:
+        return rows, columns, cells, None
+    description = describe_window(window, len(rows), len(columns))
+    return apply_window(window, rows, columns, cells) + (description,)
+
+
+def encoded_matrix_response(matrix_format, select, values, extra=None):
+    """
+    Réponse sparse / binaire (src/matrix_encoding.py) du bloc retenu par
+    select(store) -> (lignes, colonnes, masque[, fenêtre]), avec les valeurs
+    values(store) -> {nom: tableau complet}
+    """
+    def reader(store):
+        rows, columns, cells, *window = select(store)
+        return store.to_sparse(rows, columns, cells, values(store)), window
+
+    conn = get_db_connection()
+    matrix, window = read_matrix(conn, reader)
+    conn.close()
+
+    extra = dict(extra or {})
+    if window and window[0]:
+        extra['window'] = window[0]
+    return matrix_response(matrix, matrix_format, extra)
+
+
 @bp.route("/matrix/competences", methods=["GET"])
 def get_competence_matrix():
     """
@@ -32,111 +99,103 @@ def get_competence_matrix():
     - techno: filtrer par nom de technologie (partiel)
     - niveau_min: filtrer par niveau minimum
     - collaborator: filtrer par nom de collaborateur (partiel)
+    - format: json (défaut), sparse ou binary (voir src/matrix_encoding.py)
+    - row_offset, row_limit, col_offset, col_limit: fenêtre sur les lignes
+      et colonnes retenues (limites max 1000), pour les grilles virtualisées
     """
     techno_filter = request.args.get('techno', '').strip()
     niveau_min = request.args.get('niveau_min', type=float)
     collaborator_filter = request.args.get('collaborator', '').strip()
 
-    conn = get_db_connection()
-
-    # Construction de la requête avec filtres
-    query = """
-        SELECT
-            c.id as collaborator_id,
-            c.firstname,
-            c.lastname,
-            t.id as techno_id,
-            t.name as techno_name,
-            comp.niveau_declare,
-            comp.niveau_calcule
-        FROM collaborator c
-        LEFT JOIN competence comp ON c.id = comp.id_collaborator
-        LEFT JOIN techno t ON comp.id_techno = t.id
-        WHERE 1=1
-    """
-
-    params = []
-
-    if techno_filter:
-        query += " AND t.name LIKE ?"
-        params.append(f"%{techno_filter}%")
-
-    if niveau_min is not None:
-        query += " AND comp.niveau_calcule >= ?"
-        params.append(niveau_min)
+    try:
+        matrix_format = requested_matrix_format()
+        window = parse_window()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    filters = {
+        'techno': techno_filter if techno_filter else None,
+        'niveau_min': niveau_min,
+        'collaborator': collaborator_filter if collaborator_filter else None
+    }
+
+    if matrix_format:
+        return encoded_matrix_response(
+            matrix_format,
+            lambda store: select_window(store, window, techno_filter, collaborator_filter, niveau_min),
+            lambda store: {
+                'niveau': store.niveau(),
+                'niveau_declare': store.niveau_declare,
+                'niveau_calcule': store.niveau_calcule
+            },
+            {'filters': filters}
+        )
+
+    def reader(store):
+        rows, columns, cells, window_description = select_window(
+            store, window, techno_filter, collaborator_filter, niveau_min
+        )
+        block = np.ix_(rows, columns)
+        return (
+            [(store.collaborator_ids[i], store.collaborator_names[i]) for i in rows.tolist()],
+            [store.techno_names[j] for j in columns.tolist()],
+            cells,
+            store.niveau_declare[block],
+            store.niveau_calcule[block],
+            window_description
+        )
 
-    if collaborator_filter:
-        query += " AND (c.firstname LIKE ? OR c.lastname LIKE ?)"
-        params.append(f"%{collaborator_filter}%")
-        params.append(f"%{collaborator_filter}%")
-
-    query += " ORDER BY c.lastname, c.firstname, t.name"
-
-    results = conn.execute(query, params).fetchall()
+    conn = get_db_connection()
+    (collaborators, technos_list, cells, niveaux_declares, niveaux_calcules,
+     window_description) = read_matrix(conn, reader)
     conn.close()
 
-    # Organiser les données en matrice
-    # Structure: {collaborator_id: {techno_name: {niveau, color}}}
-    collaborators = {}
-    all_technos = set()
-
-    for row in results:
-        collab_id = row['collaborator_id']
-        collab_name = f"{row['firstname']} {row['lastname']}"
-
-        if collab_id not in collaborators:
-            collaborators[collab_id] = {
-                'id': collab_id,
-                'name': collab_name,
-                'competences': {}
-            }
-
-        if row['techno_name']:
-            all_technos.add(row['techno_name'])
-            niveau = row['niveau_calcule'] if row['niveau_calcule'] else row['niveau_declare']
-
-            collaborators[collab_id]['competences'][row['techno_name']] = {
-                'niveau_declare': row['niveau_declare'],
-                'niveau_calcule': row['niveau_calcule'],
-                'niveau': niveau,
-                'color': get_color_code(niveau)
-            }
-
-    # Convertir en format matrice (tableau)
-    technos_list = sorted(list(all_technos))
+    # Convertir en format matrice (tableau), les cellules absentes en gris
+    empty = {
+        'niveau_declare': None,
+        'niveau_calcule': None,
+        'niveau': None,
+        'color': 'gris'
+    }
     matrix = []
 
-    for collab_id, collab_data in collaborators.items():
+    for (collab_id, collab_name), present, declares, calcules in zip(
+        collaborators, cells.tolist(), nan_to_none(niveaux_declares, int), nan_to_none(niveaux_calcules)
+    ):
         row = {
-            'collaborator_id': collab_data['id'],
-            'collaborator_name': collab_data['name'],
+            'collaborator_id': collab_id,
+            'collaborator_name': collab_name,
             'competences': {}
         }
 
-        for techno in technos_list:
-            if techno in collab_data['competences']:
-                row['competences'][techno] = collab_data['competences'][techno]
-            else:
+        for techno, is_present, niveau_declare, niveau_calcule in zip(technos_list, present, declares, calcules):
+            if is_present:
+                niveau = niveau_calcule if niveau_calcule else niveau_declare
                 row['competences'][techno] = {
-                    'niveau_declare': None,
-                    'niveau_calcule': None,
-                    'niveau': None,
-                    'color': 'gris'
+                    'niveau_declare': niveau_declare,
+                    'niveau_calcule': niveau_calcule,
+                    'niveau': niveau,
+                    'color': get_color_code(niveau)
                 }
+            else:
+                row['competences'][techno] = dict(empty)
 
         matrix.append(row)
 
-    return jsonify({
+    response = {
         'matrix': matrix,
         'technologies': technos_list,
         'total_collaborators': len(matrix),
         'total_technologies': len(technos_list),
-        'filters': {
-            'techno': techno_filter if techno_filter else None,
-            'niveau_min': niveau_min,
-            'collaborator': collaborator_filter if collaborator_filter else None
-        }
-    }), 200
+        'filters': filters
+    }
+    if window_description:
+        # Totaux de la sélection filtrée, pas seulement de la fenêtre
+        response['total_collaborators'] = window_description['total_rows']
+        response['total_technologies'] = window_description['total_columns']
+        response['window'] = window_description
+
+    return jsonify(response), 200
 
 
 @bp.route("/matrix/competences/simple", methods=["GET"])
@@ -144,12 +203,85 @@ def get_simple_matrix():
     """
     Retourne une matrice simplifiée (juste les niveaux)
     Format: [[nom, techno1, techno2, ...], [Jean Dupont, 4.5, 3.2, ...]]
+    Avec format=sparse ou binary: cellules remplies seulement (niveau calculé)
+    Fenêtre: row_offset, row_limit, col_offset, col_limit (voir /matrix/competences)
     """
     techno_filter = request.args.get('techno', '').strip()
     niveau_min = request.args.get('niveau_min', type=float)
     collaborator_filter = request.args.get('collaborator', '').strip()
 
+    try:
+        matrix_format = requested_matrix_format()
+        window = parse_window()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if matrix_format:
+        return encoded_matrix_response(
+            matrix_format,
+            lambda store: select_window(store, window, techno_filter, collaborator_filter, niveau_min),
+            lambda store: {'niveau': store.niveau_calcule}
+        )
+
+    def reader(store):
+        rows, columns, cells, window_description = select_window(
+            store, window, techno_filter, collaborator_filter, niveau_min
+        )
+        niveaux = store.niveau_calcule[np.ix_(rows, columns)]
+        # Cellule absente, non retenue ou sans niveau calculé: 0
+        niveaux = np.where(cells & ~np.isnan(niveaux), niveaux, 0)
+        return (
+            [store.collaborator_names[i] for i in rows.tolist()],
+            [store.techno_names[j] for j in columns.tolist()],
+            niveaux,
+            window_description
+        )
+
     conn = get_db_connection()
+    names, technos_list, niveaux, window_description = read_matrix(conn, reader)
+    conn.close()
+
+    # En-tête
+    headers = ['Collaborateur'] + technos_list
+
+    # Lignes de données
+    rows = [[name] + [niveau if niveau else 0 for niveau in values] for name, values in zip(names, niveaux.tolist())]
+
+    response = {
+        'headers': headers,
+        'rows': rows
+    }
+    if window_description:
+        response['window'] = window_description
+
+    return jsonify(response), 200
+
+
+@bp.route("/matrix/competences/as-of", methods=["GET"])
+def get_matrix_as_of():
+    """
+    Matrice simplifiée telle qu'elle était à une date, lue dans la dernière
+    photo mensuelle des scores prise au plus tard ce mois-là (score_snapshot)
+
+    Query params:
+    - date: mois (YYYY-MM), obligatoire
+    - techno, niveau_min, collaborator: mêmes filtres que /matrix/competences
+    """
+    date = request.args.get('date', '').strip()
+    mois = month_index(date)
+    if mois is None:
+        return jsonify({"error": "date is required (YYYY-MM)"}), 400
+
+    techno_filter = request.args.get('techno', '').strip()
+    niveau_min = request.args.get('niveau_min', type=float)
+    collaborator_filter = request.args.get('collaborator', '').strip()
+
+    conn = get_db_connection()
+
+    snapshot_mois = snapshot_as_of(conn, mois)
+    if snapshot_mois is None:
+        conn.close()
+        return jsonify({"error": f"No score snapshot on or before {format_month(mois)}"}), 404
 
     query = """
         SELECT
@@ -157,21 +289,21 @@ def get_simple_matrix():
             c.firstname,
             c.lastname,
             t.name as techno_name,
-            comp.niveau_calcule
-        FROM collaborator c
-        LEFT JOIN competence comp ON c.id = comp.id_collaborator
-        LEFT JOIN techno t ON comp.id_techno = t.id
-        WHERE 1=1
+            s.niveau
+        FROM score_snapshot s
+        JOIN collaborator c ON c.id = s.id_collaborator
+        JOIN techno t ON t.id = s.id_techno
+        WHERE s.mois = ?
     """
 
-    params = []
+    params = [snapshot_mois]
 
     if techno_filter:
         query += " AND t.name LIKE ?"
         params.append(f"%{techno_filter}%")
 
     if niveau_min is not None:
-        query += " AND comp.niveau_calcule >= ?"
+        query += " AND s.niveau >= ?"
         params.append(niveau_min)
 
     if collaborator_filter:
@@ -184,33 +316,20 @@ def get_simple_matrix():
     results = conn.execute(query, params).fetchall()
     conn.close()
 
-    # Organiser les données
     collaborators = {}
     all_technos = set()
 
     for row in results:
-        collab_id = row['collaborator_id']
-        collab_name = f"{row['firstname']} {row['lastname']}"
-
-        if collab_id not in collaborators:
-            collaborators[collab_id] = {
-                'name': collab_name,
-                'competences': {}
-            }
-
-        if row['techno_name']:
-            all_technos.add(row['techno_name'])
-            collaborators[collab_id]['competences'][row['techno_name']] = row['niveau_calcule']
-
-    # Convertir en format tableau
-    technos_list = sorted(list(all_technos))
-
-    # En-tête
-    headers = ['Collaborateur'] + technos_list
+        collab = collaborators.setdefault(row['collaborator_id'], {
+            'name': f"{row['firstname']} {row['lastname']}",
+            'competences': {}
+        })
+        all_technos.add(row['techno_name'])
+        collab['competences'][row['techno_name']] = row['niveau']
 
-    # Lignes de données
+    technos_list = sorted(all_technos)
     rows = []
-    for collab_id, collab_data in collaborators.items():
+    for collab_data in collaborators.values():
         row = [collab_data['name']]
         for techno in technos_list:
             niveau = collab_data['competences'].get(techno, 0)
@@ -218,42 +337,67 @@ def get_simple_matrix():
         rows.append(row)
 
     return jsonify({
-        'headers': headers,
+        'date': format_month(mois),
+        'snapshot_date': format_month(snapshot_mois),
+        'headers': ['Collaborateur'] + technos_list,
         'rows': rows
     }), 200
 
 
+def heatmap_points():
+    """Itère sur les points de la heatmap (compétences existantes), copiés depuis la matrice en mémoire"""
+    def reader(store):
+        rows, columns = np.nonzero(store.present)
+        return (
+            store.collaborator_names,
+            store.techno_names,
+            rows,
+            columns,
+            np.nan_to_num(store.niveau_calcule[rows, columns])
+        )
+
+    conn = get_db_connection()
+    collaborator_names, techno_names, rows, columns, niveaux = read_matrix(conn, reader)
+    conn.close()
+
+    return (
+        {
+            'collaborator': collaborator_names[i],
+            'techno': techno_names[j],
+            'niveau': niveau if niveau else 0,
+            'color': get_color_code(niveau)
+        }
+        for i, j, niveau in zip(rows.tolist(), columns.tolist(), niveaux.tolist())
+    )
+
+
 @bp.route("/matrix/competences/heatmap", methods=["GET"])
 def get_heatmap_data():
     """
     Retourne les données formatées pour une heatmap
     Format optimisé pour les librairies de visualisation
-    """
-    conn = get_db_connection()
 
-    query = """
-        SELECT
-            c.firstname || ' ' || c.lastname as collaborator,
-            t.name as techno,
-            comp.niveau_calcule as niveau
-        FROM competence comp
-        JOIN collaborator c ON comp.id_collaborator = c.id
-        JOIN techno t ON comp.id_techno = t.id
-        ORDER BY c.lastname, c.firstname, t.name
+    Accept: application/x-ndjson ou text/csv pour streamer les points,
+    format=sparse ou binary pour les encodages compacts
     """
-
-    results = conn.execute(query).fetchall()
-    conn.close()
+    try:
+        matrix_format = requested_matrix_format()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if matrix_format:
+        return encoded_matrix_response(
+            matrix_format,
+            lambda store: store.select_present(),
+            lambda store: {'niveau': store.niveau_calcule}
+        )
+
+    stream_format = requested_stream_format()
+    if stream_format:
+        return streaming_response(heatmap_points(), stream_format)
 
     # Format pour heatmap (tableau d'objets)
-    heatmap_data = []
-    for row in results:
-        heatmap_data.append({
-            'collaborator': row['collaborator'],
-            'techno': row['techno'],
-            'niveau': row['niveau'] if row['niveau'] else 0,
-            'color': get_color_code(row['niveau'])
-        })
+    heatmap_data = list(heatmap_points())
 
     return jsonify({
         'data': heatmap_data
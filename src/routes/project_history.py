@@ -1,38 +1,13 @@
 from flask import Blueprint, request, jsonify
 from src.models import project_history_model
+from src.pagination import paginated_response
+from src.bulk import bulk_create_response, bulk_update_response, bulk_delete_response
 
 bp = Blueprint('project_history', __name__)
 
-@bp.route("/project_history", methods=["GET"])
-def get_project_history():
-    history = project_history_model.get_all()
-    return jsonify(history), 200
-
-@bp.route("/project_history/<int:history_id>", methods=["GET"])
-def get_history_item(history_id):
-    history = project_history_model.get_by_id(history_id)
-    if not history:
-        return jsonify({"error": "History item not found"}), 404
-    return jsonify(history), 200
 
-@bp.route("/project_history/project/<int:project_id>", methods=["GET"])
-def get_history_by_project(project_id):
-    history = project_history_model.get_by_project(project_id)
-    return jsonify(history), 200
-
-@bp.route("/project_history/collaborator/<int:collaborator_id>", methods=["GET"])
-def get_history_by_collaborator(collaborator_id):
-    history = project_history_model.get_by_collaborator(collaborator_id)
-    return jsonify(history), 200
-
-@bp.route("/project_history/techno/<int:techno_id>", methods=["GET"])
-def get_history_by_techno(techno_id):
-    history = project_history_model.get_by_techno(techno_id)
-    return jsonify(history), 200
-
-@bp.route("/project_history", methods=["POST"])
-def add_history():
-    data = request.get_json()
+def parse_history(data):
+    """Valide un élément d'historique à créer"""
     id_project = data.get("id_project")
     id_techno = data.get("id_techno")
     id_collaborator = data.get("id_collaborator")
@@ -41,7 +16,7 @@ def add_history():
     duree_mois = data.get("duree_mois")
 
     if not id_project or not id_techno or not id_collaborator:
-        return jsonify({"error": "id_project, id_techno and id_collaborator are required"}), 400
+        raise ValueError("id_project, id_techno and id_collaborator are required")
 
     history_data = {
         "id_project": id_project,
@@ -56,6 +31,55 @@ def add_history():
     if duree_mois:
         history_data["duree_mois"] = duree_mois
 
+    return history_data
+
+
+def parse_history_update(data):
+    """Valide les champs modifiables d'un élément d'historique"""
+    update_data = {}
+    if "date_debut" in data:
+        update_data["date_debut"] = data["date_debut"]
+    if "date_fin" in data:
+        update_data["date_fin"] = data["date_fin"]
+    if "duree_mois" in data:
+        update_data["duree_mois"] = data["duree_mois"]
+
+    if not update_data:
+        raise ValueError("No valid fields to update")
+
+    return update_data
+
+
+@bp.route("/project_history", methods=["GET"])
+def get_project_history():
+    return paginated_response(project_history_model)
+
+@bp.route("/project_history/<int:history_id>", methods=["GET"])
+def get_history_item(history_id):
+    history = project_history_model.get_by_id(history_id)
+    if not history:
+        return jsonify({"error": "History item not found"}), 404
+    return jsonify(history), 200
+
+@bp.route("/project_history/project/<int:project_id>", methods=["GET"])
+def get_history_by_project(project_id):
+    return paginated_response(project_history_model, id_project=project_id)
+
+@bp.route("/project_history/collaborator/<int:collaborator_id>", methods=["GET"])
+def get_history_by_collaborator(collaborator_id):
+    return paginated_response(project_history_model, id_collaborator=collaborator_id)
+
+@bp.route("/project_history/techno/<int:techno_id>", methods=["GET"])
+def get_history_by_techno(techno_id):
+    return paginated_response(project_history_model, id_techno=techno_id)
+
+@bp.route("/project_history", methods=["POST"])
+def add_history():
+    try:
+        history_data = parse_history(request.get_json())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     try:
         item_id = project_history_model.create(history_data)
         return jsonify({"message": "Project history added!", "id": item_id}), 201
@@ -73,16 +97,10 @@ def update_history(history_id):
     if not history:
         return jsonify({"error": "History item not found"}), 404
 
-    update_data = {}
-    if "date_debut" in data:
-        update_data["date_debut"] = data["date_debut"]
-    if "date_fin" in data:
-        update_data["date_fin"] = data["date_fin"]
-    if "duree_mois" in data:
-        update_data["duree_mois"] = data["duree_mois"]
-
-    if not update_data:
-        return jsonify({"error": "No valid fields to update"}), 400
+    try:
+        update_data = parse_history_update(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
         project_history_model.update(history_id, update_data)
@@ -101,3 +119,16 @@ def delete_history(history_id):
         return jsonify({"message": f"History {history_id} deleted!"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 400
+
+# ---------------- Bulk ----------------
+@bp.route("/project_history/bulk", methods=["POST"])
+def bulk_add_history():
+    return bulk_create_response(project_history_model, parse_history)
+
+@bp.route("/project_history/bulk", methods=["PATCH"])
+def bulk_update_history():
+    return bulk_update_response(project_history_model, parse_history_update)
+
+@bp.route("/project_history/bulk", methods=["DELETE"])
+def bulk_delete_history():
+    return bulk_delete_response(project_history_model)
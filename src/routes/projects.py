@@ -1,29 +1,19 @@
 from flask import Blueprint, request, jsonify
 from src.models import project_model
+from src.pagination import paginated_response
+from src.bulk import bulk_create_response, bulk_update_response, bulk_delete_response
 
 bp = Blueprint('projects', __name__)
 
-@bp.route("/projects", methods=["GET"])
-def get_projects():
-    projects = project_model.get_all()
-    return jsonify(projects), 200
-
-@bp.route("/projects/<int:project_id>", methods=["GET"])
-def get_project(project_id):
-    project = project_model.get_by_id(project_id)
-    if not project:
-        return jsonify({"error": "Project not found"}), 404
-    return jsonify(project), 200
 
-@bp.route("/projects", methods=["POST"])
-def add_project():
-    data = request.get_json()
+def parse_project(data):
+    """Valide un projet à créer"""
     name = data.get("name")
     date_fin = data.get("date_fin")
     duree_mois = data.get("duree_mois")
 
     if not name:
-        return jsonify({"error": "name is required"}), 400
+        raise ValueError("name is required")
 
     project_data = {"name": name}
     if date_fin:
@@ -31,9 +21,46 @@ def add_project():
     if duree_mois:
         project_data["duree_mois"] = duree_mois
 
+    return project_data
+
+
+def parse_project_update(data):
+    """Valide les champs modifiables d'un projet"""
+    update_data = {}
+    if "name" in data:
+        update_data["name"] = data["name"]
+    if "date_fin" in data:
+        update_data["date_fin"] = data["date_fin"]
+    if "duree_mois" in data:
+        update_data["duree_mois"] = data["duree_mois"]
+
+    if not update_data:
+        raise ValueError("No valid fields to update")
+
+    return update_data
+
+
+@bp.route("/projects", methods=["GET"])
+def get_projects():
+    return paginated_response(project_model)
+
+@bp.route("/projects/<int:project_id>", methods=["GET"])
+def get_project(project_id):
+    project = project_model.get_by_id(project_id)
+    if not project:
+        return jsonify({"error": "Project not found"}), 404
+    return jsonify(project), 200
+
+@bp.route("/projects", methods=["POST"])
+def add_project():
+    try:
+        project_data = parse_project(request.get_json())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     try:
         item_id = project_model.create(project_data)
-        return jsonify({"message": f"Project {name} added!", "id": item_id}), 201
+        return jsonify({"message": f"Project {project_data['name']} added!", "id": item_id}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -48,16 +75,10 @@ def update_project(project_id):
     if not project:
         return jsonify({"error": "Project not found"}), 404
 
-    update_data = {}
-    if "name" in data:
-        update_data["name"] = data["name"]
-    if "date_fin" in data:
-        update_data["date_fin"] = data["date_fin"]
-    if "duree_mois" in data:
-        update_data["duree_mois"] = data["duree_mois"]
-
-    if not update_data:
-        return jsonify({"error": "No valid fields to update"}), 400
+    try:
+        update_data = parse_project_update(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
         project_model.update(project_id, update_data)
@@ -76,3 +97,16 @@ def delete_project(project_id):
         return jsonify({"message": f"Project {project_id} deleted!"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 400
+
+# ---------------- Bulk ----------------
+@bp.route("/projects/bulk", methods=["POST"])
+def bulk_add_projects():
+    return bulk_create_response(project_model, parse_project)
+
+@bp.route("/projects/bulk", methods=["PATCH"])
+def bulk_update_projects():
+    return bulk_update_response(project_model, parse_project_update)
+
+@bp.route("/projects/bulk", methods=["DELETE"])
+def bulk_delete_projects():
+    return bulk_delete_response(project_model)
@@ -1,13 +1,26 @@
 from flask import Blueprint, request, jsonify
 from src.models import techno_type_model, techno_project_model, collaborator_project_model
+from src.pagination import paginated_response
+from src.bulk import bulk_create_response, bulk_delete_relations_response
 
 bp = Blueprint('relations', __name__)
 
+
+def relation_parser(model):
+    """Valide une relation à créer: les deux champs de la relation sont requis"""
+    def parse(data):
+        value1 = data.get(model.field1)
+        value2 = data.get(model.field2)
+        if not value1 or not value2:
+            raise ValueError(f"{model.field1} and {model.field2} are required")
+        return {model.field1: value1, model.field2: value2}
+    return parse
+
+
 # ---------------- Techno ↔ Type ----------------
 @bp.route("/techno_type", methods=["GET"])
 def get_techno_type():
-    relations = techno_type_model.get_all()
-    return jsonify(relations), 200
+    return paginated_response(techno_type_model)
 
 @bp.route("/techno_type", methods=["POST"])
 def add_techno_type():
@@ -37,11 +50,18 @@ def delete_techno_type(id_techno, id_type):
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+@bp.route("/techno_type/bulk", methods=["POST"])
+def bulk_add_techno_type():
+    return bulk_create_response(techno_type_model, relation_parser(techno_type_model))
+
+@bp.route("/techno_type/bulk", methods=["DELETE"])
+def bulk_delete_techno_type():
+    return bulk_delete_relations_response(techno_type_model)
+
 # ---------------- Techno ↔ Project ----------------
 @bp.route("/techno_project", methods=["GET"])
 def get_techno_project():
-    relations = techno_project_model.get_all()
-    return jsonify(relations), 200
+    return paginated_response(techno_project_model)
 
 @bp.route("/techno_project", methods=["POST"])
 def add_techno_project():
@@ -71,11 +91,18 @@ def delete_techno_project(id_techno, id_project):
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+@bp.route("/techno_project/bulk", methods=["POST"])
+def bulk_add_techno_project():
+    return bulk_create_response(techno_project_model, relation_parser(techno_project_model))
+
+@bp.route("/techno_project/bulk", methods=["DELETE"])
+def bulk_delete_techno_project():
+    return bulk_delete_relations_response(techno_project_model)
+
 # ---------------- Collaborator ↔ Project ----------------
 @bp.route("/collaborator_project", methods=["GET"])
 def get_collaborator_project():
-    relations = collaborator_project_model.get_all()
-    return jsonify(relations), 200
+    return paginated_response(collaborator_project_model)
 
 @bp.route("/collaborator_project", methods=["POST"])
 def add_collaborator_project():
@@ -104,3 +131,11 @@ def delete_collaborator_project(id_collaborator, id_project):
         return jsonify({"message": f"Relation between Collaborator {id_collaborator} and Project {id_project} deleted!"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 400
+
+@bp.route("/collaborator_project/bulk", methods=["POST"])
+def bulk_add_collaborator_project():
+    return bulk_create_response(collaborator_project_model, relation_parser(collaborator_project_model))
+
+@bp.route("/collaborator_project/bulk", methods=["DELETE"])
+def bulk_delete_collaborator_project():
+    return bulk_delete_relations_response(collaborator_project_model)
@@ -1,8 +1,14 @@
 from flask import Blueprint, request, jsonify
 from src.config import get_db_connection
-from src.models import competence_model, project_history_model
+from src.jobs import job_handler
+from src import score_simulation
+from src.routes.jobs import wants_async, submit_job_response
+from src.scoring_engine import (
+    DEFAULT_PARAMETERS, PARAMETER_DESCRIPTIONS, compute_score, current_month_index,
+    load_parameters, recalculate_scores, save_parameters
+)
 import datetime
-from dateutil import parser as date_parser
+import time
 
 bp = Blueprint('scoring', __name__)
 
@@ -11,106 +17,64 @@ def calculate_score_for_competence(id_collaborator, id_techno, niveau_declare):
     """
     Calcule le niveau_calcule basé sur l'historique des projets
 
-    Formule: Score = (niveau_déclaré × 0.3) + (score_projets × 0.4) + (ancienneté_bonus × 0.3)
-    - score_projets basé sur le nombre de projets (max 5)
-    - ancienneté_bonus = max(0, 5 - mois_depuis_dernière_utilisation/12)
+    Formule et paramètres: voir src/scoring_engine.py et GET /scoring/parameters
     """
     conn = get_db_connection()
 
-    # Récupérer l'historique des projets pour ce collaborateur et cette techno
+    # Agréger l'historique des projets pour ce collaborateur et cette techno
     history = conn.execute("""
-        SELECT date_fin, duree_mois
+        SELECT COUNT(*) as nb_projets, MAX(mois_fin) as dernier_mois, SUM(duree_mois) as duree_totale
         FROM project_techno_history
         WHERE id_collaborator = ? AND id_techno = ?
-    """, (id_collaborator, id_techno)).fetchall()
+    """, (id_collaborator, id_techno)).fetchone()
+    parameters = load_parameters(conn)
 
     conn.close()
 
-    if not history:
-        # Pas d'historique, retourner le niveau déclaré
-        return float(niveau_declare)
+    return compute_score(
+        niveau_declare,
+        history['nb_projets'],
+        history['dernier_mois'],
+        current_month_index(),
+        history['duree_totale'],
+        parameters
+    )
 
-    # 1. Calculer le score basé sur le nombre de projets (max 5 pour obtenir 5/5)
-    nb_projets = len(history)
-    score_projets = min(5.0, nb_projets)  # 1 projet = 1 point, max 5
 
-    # 2. Calculer le bonus d'ancienneté basé sur la date de fin la plus récente
-    dates_fin = []
-    for h in history:
-        if h['date_fin']:
-            try:
-                # Parser la date (format YYYY-MM ou YYYY-MM-DD)
-                if len(h['date_fin']) == 7:  # YYYY-MM
-                    date_fin = datetime.datetime.strptime(h['date_fin'], '%Y-%m')
-                else:
-                    date_fin = date_parser.parse(h['date_fin'])
-                dates_fin.append(date_fin)
-            except:
-                pass
-
-    if dates_fin:
-        # Dernière utilisation
-        derniere_utilisation = max(dates_fin)
-        now = datetime.datetime.now()
+def recalculate_all():
+    """Recalcul complet, partagé par la route et la tâche de fond"""
+    conn = get_db_connection()
 
-        # Calculer les mois écoulés
-        mois_ecoules = (now.year - derniere_utilisation.year) * 12 + (now.month - derniere_utilisation.month)
+    updated, errors = recalculate_scores(conn)
 
-        # Bonus d'ancienneté (pénalité si >12 mois)
-        anciennete_bonus = max(0, 5 - mois_ecoules / 12.0)
-    else:
-        # Pas de date de fin, on considère que c'est récent
-        anciennete_bonus = 5.0
+    conn.commit()
+    conn.close()
 
-    # 3. Calcul final
-    score = (niveau_declare * 0.3) + (score_projets * 0.4) + (anciennete_bonus * 0.3)
+    return {
+        "message": "Recalcul terminé",
+        "updated": updated,
+        "errors": errors
+    }
 
-    # Borner entre 1 et 5
-    score = max(1.0, min(5.0, score))
 
-    return round(score, 2)
+@job_handler('scoring.calculate')
+def run_calculate_job(job):
+    return recalculate_all()
 
 
 @bp.route("/scoring/calculate", methods=["POST"])
 def calculate_all_scores():
     """
     Recalcule tous les scores automatiquement pour toutes les compétences
-    """
-    conn = get_db_connection()
+    (une seule passe agrégée sur l'historique, voir src/scoring_engine.py)
 
-    # Récupérer toutes les compétences
-    competences = conn.execute("SELECT * FROM competence").fetchall()
-
-    updated = 0
-    errors = []
-
-    for comp in competences:
-        try:
-            id_collaborator = comp['id_collaborator']
-            id_techno = comp['id_techno']
-            niveau_declare = comp['niveau_declare']
-
-            # Calculer le nouveau score
-            niveau_calcule = calculate_score_for_competence(id_collaborator, id_techno, niveau_declare)
-
-            # Mettre à jour
-            conn.execute(
-                "UPDATE competence SET niveau_calcule = ?, date_upd = ? WHERE id = ?",
-                (niveau_calcule, datetime.datetime.now(), comp['id'])
-            )
-            updated += 1
-
-        except Exception as e:
-            errors.append(f"Compétence {comp['id']}: {str(e)}")
-
-    conn.commit()
-    conn.close()
+    Query params:
+    - async: true pour exécuter en tâche de fond (202 + id de tâche, suivi via GET /jobs/<id>)
+    """
+    if wants_async():
+        return submit_job_response('scoring.calculate')
 
-    return jsonify({
-        "message": "Recalcul terminé",
-        "updated": updated,
-        "errors": errors
-    }), 200
+    return jsonify(recalculate_all()), 200
 
 
 @bp.route("/scoring/calculate/collaborator/<int:id_collaborator>", methods=["POST"])
@@ -120,37 +84,12 @@ def calculate_scores_for_collaborator(id_collaborator):
     """
     conn = get_db_connection()
 
-    # Récupérer les compétences du collaborateur
-    competences = conn.execute(
-        "SELECT * FROM competence WHERE id_collaborator = ?",
-        (id_collaborator,)
-    ).fetchall()
+    updated, errors = recalculate_scores(conn, id_collaborator)
 
-    if not competences:
+    if not updated and not errors:
         conn.close()
         return jsonify({"error": "Aucune compétence trouvée pour ce collaborateur"}), 404
 
-    updated = 0
-    errors = []
-
-    for comp in competences:
-        try:
-            id_techno = comp['id_techno']
-            niveau_declare = comp['niveau_declare']
-
-            # Calculer le nouveau score
-            niveau_calcule = calculate_score_for_competence(id_collaborator, id_techno, niveau_declare)
-
-            # Mettre à jour
-            conn.execute(
-                "UPDATE competence SET niveau_calcule = ?, date_upd = ? WHERE id = ?",
-                (niveau_calcule, datetime.datetime.now(), comp['id'])
-            )
-            updated += 1
-
-        except Exception as e:
-            errors.append(f"Compétence {comp['id']}: {str(e)}")
-
     conn.commit()
     conn.close()
 
@@ -210,27 +149,135 @@ def calculate_score_for_single_competence(id_competence):
         return jsonify({"error": str(e)}), 400
 
 
+def describe_parameters(parameters):
+    p = parameters
+    formula = (
+        f"Score = (niveau_déclaré × {p['niveau_declare_weight']:g}) "
+        f"+ (score_projets × {p['nb_projets_weight']:g}) "
+        f"+ (ancienneté_bonus × {p['anciennete_weight']:g})"
+    )
+    if p['duree_weight']:
+        formula += f" + (score_durée × {p['duree_weight']:g})"
+
+    return {
+        "algorithm": "weighted_score",
+        "formula": formula,
+        "parameters": parameters,
+        "defaults": DEFAULT_PARAMETERS,
+        "description": {
+            "niveau_declare": "Niveau déclaré initial par le collaborateur",
+            "score_projets": f"Basé sur le nombre de projets ({p['score_par_projet']:g} point(s) par projet, max {p['max_projets_score']:g})",
+            "anciennete_bonus": (
+                f"Pénalité selon la dernière utilisation. "
+                f"Formule: max(0, {p['anciennete_max']:g} - mois_écoulés/{p['penalite_anciennete_mois']:g})"
+            ),
+            "score_duree": (
+                f"Durée cumulée des projets: min({p['max_duree_score']:g}, "
+                f"somme(duree_mois)/{p['duree_mois_par_point']:g})"
+            ),
+            "parameters": PARAMETER_DESCRIPTIONS
+        }
+    }
+
+
 @bp.route("/scoring/parameters", methods=["GET"])
 def get_scoring_parameters():
     """
-    Retourne les paramètres de l'algorithme de scoring
+    Retourne les paramètres de l'algorithme de scoring (stockés en base)
     """
+    conn = get_db_connection()
+    parameters = load_parameters(conn)
+    conn.close()
+
+    return jsonify(describe_parameters(parameters)), 200
+
+
+@bp.route("/scoring/parameters", methods=["PATCH"])
+def update_scoring_parameters():
+    """
+    Modifie un ou plusieurs paramètres ({"nom": valeur}, null = valeur par défaut)
+    puis recalcule tous les scores dans la même transaction
+
+    Query params:
+    - recalculate: false pour enregistrer sans recalculer (défaut: true)
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "No parameters provided"}), 400
+
+    recalculate = request.args.get('recalculate', 'true').lower() not in ('0', 'false', 'no')
+
+    conn = get_db_connection()
+    try:
+        parameters = save_parameters(conn, data)
+    except ValueError as e:
+        conn.rollback()
+        conn.close()
+        return jsonify({"error": str(e)}), 400
+
+    body = describe_parameters(parameters)
+    if recalculate:
+        updated, errors = recalculate_scores(conn, parameters=parameters)
+        body["recalculated"] = {"updated": updated, "errors": errors}
+
+    conn.commit()
+    conn.close()
+
+    return jsonify(body), 200
+
+
+@bp.route("/scoring/simulate", methods=["POST"])
+def simulate_scoring():
+    """
+    Simule un ou plusieurs jeux de paramètres sans modifier les compétences
+
+    Body:
+    {
+        "parameter_sets": [
+            {"name": "decay_24", "parameters": {"penalite_anciennete_mois": 24}},
+            {"name": "duree", "parameters": {"duree_weight": 0.2, "niveau_declare_weight": 0.2}}
+        ],
+        "expert_threshold": 4,     // optionnel
+        "crossings_limit": 500     // optionnel, taille max des listes de franchissements
+    }
+
+    Les paramètres absents d'un jeu sont ceux enregistrés (GET /scoring/parameters).
+    Retourne pour chaque jeu: distribution des scores, compétences franchissant
+    le seuil d'expert et impact sur les gaps, comparés aux scores courants.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Body must be an object"}), 400
+
+    threshold = data.get('expert_threshold', score_simulation.EXPERT_THRESHOLD)
+    crossings_limit = data.get('crossings_limit', score_simulation.DEFAULT_CROSSINGS_LIMIT)
+    if not isinstance(threshold, (int, float)) or isinstance(threshold, bool) or not 1 <= threshold <= 5:
+        return jsonify({"error": "expert_threshold must be between 1 and 5"}), 400
+    if not isinstance(crossings_limit, int) or isinstance(crossings_limit, bool) or crossings_limit < 0:
+        return jsonify({"error": "crossings_limit must be a positive integer"}), 400
+
+    started = time.perf_counter()
+    conn = get_db_connection()
+    try:
+        parameter_sets = score_simulation.parse_parameter_sets(
+            data.get('parameter_sets'), load_parameters(conn)
+        )
+    except ValueError as e:
+        conn.close()
+        return jsonify({"error": str(e)}), 400
+
+    snapshot = score_simulation.get_snapshot(conn)
+    conn.close()
+
+    simulations = []
+    for name, parameters in parameter_sets:
+        result = score_simulation.simulate(snapshot, parameters, threshold, crossings_limit)
+        simulations.append({"name": name, "parameters": parameters, **result})
+
     return jsonify({
-        "algorithm": "weighted_score",
-        "formula": "Score = (niveau_déclaré × 0.3) + (score_projets × 0.4) + (ancienneté_bonus × 0.3)",
-        "parameters": {
-            "niveau_declare_weight": 0.3,
-            "nb_projets_weight": 0.4,
-            "anciennete_weight": 0.3,
-            "max_score": 5.0,
-            "min_score": 1.0,
-            "penalite_anciennete_mois": 12,
-            "score_par_projet": 1.0,
-            "max_projets_score": 5.0
-        },
-        "description": {
-            "niveau_declare": "Niveau déclaré initial par le collaborateur",
-            "score_projets": "Basé sur le nombre de projets (1 projet = 1 point, max 5)",
-            "anciennete_bonus": "Pénalité si dernière utilisation > 12 mois. Formule: max(0, 5 - mois_écoulés/12)"
-        }
+        "snapshot": snapshot.describe(),
+        "expert_threshold": threshold,
+        "current": score_simulation.summarize_current(snapshot, threshold),
+        "simulations": simulations,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1)
     }), 200
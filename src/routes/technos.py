@@ -1,12 +1,32 @@
 from flask import Blueprint, request, jsonify
 from src.models import techno_model
+from src.pagination import paginated_response
+from src.bulk import bulk_create_response, bulk_update_response, bulk_delete_response
 
 bp = Blueprint('technos', __name__)
 
+
+def parse_techno(data):
+    """Valide une techno à créer"""
+    name = data.get("name")
+
+    if not name:
+        raise ValueError("name is required")
+
+    return {"name": name}
+
+
+def parse_techno_update(data):
+    """Valide les champs modifiables d'une techno"""
+    if "name" not in data:
+        raise ValueError("name field is required")
+
+    return {"name": data["name"]}
+
+
 @bp.route("/technos", methods=["GET"])
 def get_technos():
-    technos = techno_model.get_all()
-    return jsonify(technos), 200
+    return paginated_response(techno_model)
 
 @bp.route("/technos/<int:techno_id>", methods=["GET"])
 def get_techno(techno_id):
@@ -17,15 +37,14 @@ def get_techno(techno_id):
 
 @bp.route("/technos", methods=["POST"])
 def add_techno():
-    data = request.get_json()
-    name = data.get("name")
-
-    if not name:
-        return jsonify({"error": "name is required"}), 400
+    try:
+        techno = parse_techno(request.get_json())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
-        item_id = techno_model.create({"name": name})
-        return jsonify({"message": f"Techno {name} added!", "id": item_id}), 201
+        item_id = techno_model.create(techno)
+        return jsonify({"message": f"Techno {techno['name']} added!", "id": item_id}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -40,11 +59,13 @@ def update_techno(techno_id):
     if not techno:
         return jsonify({"error": "Techno not found"}), 404
 
-    if "name" not in data:
-        return jsonify({"error": "name field is required"}), 400
+    try:
+        update_data = parse_techno_update(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
-        techno_model.update(techno_id, {"name": data["name"]})
+        techno_model.update(techno_id, update_data)
         return jsonify({"message": f"Techno {techno_id} updated!"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 400
@@ -60,3 +81,16 @@ def delete_techno(techno_id):
         return jsonify({"message": f"Techno {techno_id} deleted!"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 400
+
+# ---------------- Bulk ----------------
+@bp.route("/technos/bulk", methods=["POST"])
+def bulk_add_technos():
+    return bulk_create_response(techno_model, parse_techno)
+
+@bp.route("/technos/bulk", methods=["PATCH"])
+def bulk_update_technos():
+    return bulk_update_response(techno_model, parse_techno_update)
+
+@bp.route("/technos/bulk", methods=["DELETE"])
+def bulk_delete_technos():
+    return bulk_delete_response(techno_model)
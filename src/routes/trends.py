@@ -0,0 +1,137 @@
+from flask import Blueprint, request, jsonify
+from src.config import get_db_connection
+from src.jobs import job_handler, scheduled
+from src.routes.jobs import wants_async, submit_job_response
+from src.score_snapshots import collaborator_trend, list_snapshots, take_snapshot, techno_trend
+from src.scoring_engine import current_month_index, format_month, month_index, recalculate_scores
+
+bp = Blueprint('trends', __name__)
+
+
+def month_arg(name):
+    """Paramètre de requête YYYY-MM -> index de mois (None si absent), ValueError si illisible"""
+    value = request.args.get(name, '').strip()
+    if not value:
+        return None
+    mois = month_index(value)
+    if mois is None:
+        raise ValueError(f"{name} must be a date (YYYY-MM)")
+    return mois
+
+
+def snapshot_scores(mois=None):
+    """Recalcule les scores puis les photographie, partagé par la route et la tâche"""
+    mois = mois or current_month_index()
+    conn = get_db_connection()
+
+    updated, errors = recalculate_scores(conn)
+    count = take_snapshot(conn, mois)
+
+    conn.commit()
+    conn.close()
+
+    return {
+        "message": "Photo des scores enregistrée",
+        "date": format_month(mois),
+        "competences": count,
+        "updated": updated,
+        "errors": errors
+    }
+
+
+@job_handler('scoring.monthly_snapshot')
+def run_snapshot_job(job):
+    return snapshot_scores(job.payload.get('period'))
+
+
+# Une photo par mois, soumise automatiquement par le pool de workers
+scheduled('scoring.monthly_snapshot', current_month_index)
+
+
+@bp.route("/scoring/snapshots", methods=["GET"])
+def get_snapshots():
+    """Mois photographiés avec le nombre de compétences et le niveau moyen"""
+    conn = get_db_connection()
+    snapshots = list_snapshots(conn)
+    conn.close()
+    return jsonify(snapshots), 200
+
+
+@bp.route("/scoring/snapshots", methods=["POST"])
+def create_snapshot():
+    """
+    Photographie les scores du mois courant (remplace la photo du mois si
+    elle existe). Normalement fait chaque mois par la tâche planifiée.
+
+    Query params:
+    - async: true pour exécuter en tâche de fond (202 + id de tâche)
+    """
+    if wants_async():
+        return submit_job_response('scoring.monthly_snapshot', {"period": current_month_index()})
+
+    return jsonify(snapshot_scores()), 201
+
+
+@bp.route("/trends/collaborator/<int:id_collaborator>", methods=["GET"])
+def get_collaborator_trend(id_collaborator):
+    """
+    Évolution mensuelle des niveaux d'un collaborateur, par techno
+
+    Query params:
+    - from, to: bornes incluses (YYYY-MM)
+    - techno: id de techno pour n'en garder qu'une
+    """
+    try:
+        mois_from = month_arg('from')
+        mois_to = month_arg('to')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    id_techno = request.args.get('techno', type=int)
+
+    conn = get_db_connection()
+    collaborator = conn.execute(
+        "SELECT id, firstname, lastname FROM collaborator WHERE id = ?", (id_collaborator,)
+    ).fetchone()
+    if not collaborator:
+        conn.close()
+        return jsonify({"error": "Collaborator not found"}), 404
+
+    technos = collaborator_trend(conn, id_collaborator, mois_from, mois_to, id_techno)
+    conn.close()
+
+    return jsonify({
+        "id_collaborator": collaborator['id'],
+        "collaborator": f"{collaborator['firstname']} {collaborator['lastname']}",
+        "technos": technos
+    }), 200
+
+
+@bp.route("/trends/techno/<int:id_techno>", methods=["GET"])
+def get_techno_trend(id_techno):
+    """
+    Évolution mensuelle d'une techno: nombre de collaborateurs, niveau
+    moyen et max, nombre d'experts (niveau >= 4)
+
+    Query params:
+    - from, to: bornes incluses (YYYY-MM)
+    """
+    try:
+        mois_from = month_arg('from')
+        mois_to = month_arg('to')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = get_db_connection()
+    techno = conn.execute("SELECT id, name FROM techno WHERE id = ?", (id_techno,)).fetchone()
+    if not techno:
+        conn.close()
+        return jsonify({"error": "Techno not found"}), 404
+
+    points = techno_trend(conn, id_techno, mois_from, mois_to)
+    conn.close()
+
+    return jsonify({
+        "id_techno": techno['id'],
+        "techno": techno['name'],
+        "points": points
+    }), 200
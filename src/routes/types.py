@@ -1,12 +1,32 @@
 from flask import Blueprint, request, jsonify
 from src.models import type_model
+from src.pagination import paginated_response
+from src.bulk import bulk_create_response, bulk_update_response, bulk_delete_response
 
 bp = Blueprint('types', __name__)
 
+
+def parse_type(data):
+    """Valide un type à créer"""
+    name = data.get("name")
+
+    if not name:
+        raise ValueError("name is required")
+
+    return {"name": name}
+
+
+def parse_type_update(data):
+    """Valide les champs modifiables d'un type"""
+    if "name" not in data:
+        raise ValueError("name field is required")
+
+    return {"name": data["name"]}
+
+
 @bp.route("/types", methods=["GET"])
 def get_types():
-    types = type_model.get_all()
-    return jsonify(types), 200
+    return paginated_response(type_model)
 
 @bp.route("/types/<int:type_id>", methods=["GET"])
 def get_type(type_id):
@@ -17,15 +37,14 @@ def get_type(type_id):
 
 @bp.route("/types", methods=["POST"])
 def add_type():
-    data = request.get_json()
-    name = data.get("name")
-
-    if not name:
-        return jsonify({"error": "name is required"}), 400
+    try:
+        type_item = parse_type(request.get_json())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
-        item_id = type_model.create({"name": name})
-        return jsonify({"message": f"Type {name} added!", "id": item_id}), 201
+        item_id = type_model.create(type_item)
+        return jsonify({"message": f"Type {type_item['name']} added!", "id": item_id}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -40,11 +59,13 @@ def update_type(type_id):
     if not type_item:
         return jsonify({"error": "Type not found"}), 404
 
-    if "name" not in data:
-        return jsonify({"error": "name field is required"}), 400
+    try:
+        update_data = parse_type_update(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
-        type_model.update(type_id, {"name": data["name"]})
+        type_model.update(type_id, update_data)
         return jsonify({"message": f"Type {type_id} updated!"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 400
@@ -60,3 +81,16 @@ def delete_type(type_id):
         return jsonify({"message": f"Type {type_id} deleted!"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 400
+
+# ---------------- Bulk ----------------
+@bp.route("/types/bulk", methods=["POST"])
+def bulk_add_types():
+    return bulk_create_response(type_model, parse_type)
+
+@bp.route("/types/bulk", methods=["PATCH"])
+def bulk_update_types():
+    return bulk_update_response(type_model, parse_type_update)
+
+@bp.route("/types/bulk", methods=["DELETE"])
+def bulk_delete_types():
+    return bulk_delete_response(type_model)
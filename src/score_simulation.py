@@ -0,0 +1,219 @@
+"""
+Simulation "what-if" de jeux de paramètres de scoring (POST /scoring/simulate)
+
+Les entrées agrégées de toutes les compétences (niveau déclaré, projets,
+dernier mois, durée, niveau_calcule courant) sont chargées une fois dans
+un snapshot NumPy gardé en mémoire, reconstruit seulement quand le journal
+des modifications (change_log) a avancé. Chaque jeu de paramètres est
+évalué sur ce snapshot sans rien écrire en base, puis comparé aux scores
+courants : distribution, compétences franchissant le seuil d'expert et
+impact sur les gaps (technos avec moins de 2 experts, cf. /allocation/gaps).
+"""
+import datetime
+import threading
+import numpy as np
+from src.changes import latest_change_id
+from src.scoring_engine import compute_scores, current_month_index, load_score_inputs, validate_parameters
+
+EXPERT_THRESHOLD = 4
+GAP_MIN_EXPERTS = 2
+MAX_PARAMETER_SETS = 10
+DEFAULT_CROSSINGS_LIMIT = 500
+
+# Tranches de la distribution, la dernière inclut 5
+SCORE_BINS = [1, 2, 3, 4, 5]
+
+
+class ScoreSnapshot:
+    """Entrées de scoring de toutes les compétences à une version donnée"""
+
+    def __init__(self, conn, version):
+        self.version = version
+        self.built_at = datetime.datetime.now()
+        self.inputs = load_score_inputs(conn)
+        self.scorable = ~np.isnan(self.inputs.niveau_declare)
+        self.techno_names = {row[0]: row[1] for row in conn.execute("SELECT id, name FROM techno")}
+        # Axe des technos : toutes celles de la table, y compris sans aucune
+        # compétence (gaps critiques de /allocation/gaps)
+        self.technos = np.union1d(np.fromiter(self.techno_names, dtype=np.int64), self.inputs.id_techno)
+        self.techno_index = np.searchsorted(self.technos, self.inputs.id_techno)
+        self.collaborator_names = {
+            row[0]: f"{row[1]} {row[2]}"
+            for row in conn.execute("SELECT id, firstname, lastname FROM collaborator")
+        }
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "competences": len(self.inputs.ids),
+            "built_at": self.built_at.isoformat(sep=' ')
+        }
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot(conn):
+    """Snapshot courant, reconstruit si des données ont changé depuis"""
+    global _snapshot
+    version = latest_change_id(conn)
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = ScoreSnapshot(conn, version)
+        return _snapshot
+
+
+def distribution(scores, threshold):
+    """Répartition par tranche et statistiques d'un tableau de scores (NaN ignorés)"""
+    scores = scores[~np.isnan(scores)]
+    counts, _ = np.histogram(scores, bins=SCORE_BINS)
+    if not len(scores):
+        return {"count": 0, "bins": {}, "nb_experts": 0}
+
+    return {
+        "count": int(len(scores)),
+        "mean": round(float(scores.mean()), 2),
+        "median": round(float(np.median(scores)), 2),
+        "p10": round(float(np.percentile(scores, 10)), 2),
+        "p90": round(float(np.percentile(scores, 90)), 2),
+        "nb_experts": int((scores >= threshold).sum()),
+        "bins": {
+            f"{low}-{high}": int(count)
+            for low, high, count in zip(SCORE_BINS[:-1], SCORE_BINS[1:], counts)
+        }
+    }
+
+
+def risk_level(nb_experts):
+    return 'critical' if nb_experts == 0 else 'high' if nb_experts == 1 else 'medium'
+
+
+def crossings(snapshot, current, simulated, threshold, limit):
+    """Compétences passant au-dessus ou en dessous du seuil d'expert"""
+    was_expert = current >= threshold
+    is_expert = simulated >= threshold
+    crossed = np.flatnonzero(was_expert != is_expert)
+    # Les plus gros écarts d'abord
+    crossed = crossed[np.argsort(-np.abs(simulated[crossed] - np.nan_to_num(current[crossed])), kind='stable')]
+
+    inputs = snapshot.inputs
+    items = []
+    for i in crossed[:limit].tolist():
+        id_collaborator = int(inputs.id_collaborator[i])
+        id_techno = int(inputs.id_techno[i])
+        items.append({
+            "id_competence": int(inputs.ids[i]),
+            "id_collaborator": id_collaborator,
+            "collaborator": snapshot.collaborator_names.get(id_collaborator),
+            "id_techno": id_techno,
+            "techno": snapshot.techno_names.get(id_techno),
+            "niveau_calcule": None if np.isnan(current[i]) else float(current[i]),
+            "niveau_simule": float(simulated[i]),
+            "direction": "up" if is_expert[i] else "down"
+        })
+
+    return {
+        "total": int(len(crossed)),
+        "up": int((is_expert & ~was_expert).sum()),
+        "down": int((was_expert & ~is_expert).sum()),
+        "items": items
+    }
+
+
+def gaps_impact(snapshot, current, simulated, threshold):
+    """Technos dont le nombre d'experts change de niveau de risque"""
+    size = len(snapshot.technos)
+    experts_current = np.bincount(snapshot.techno_index, weights=current >= threshold, minlength=size)
+    experts_simulated = np.bincount(snapshot.techno_index, weights=simulated >= threshold, minlength=size)
+
+    gaps_current = experts_current < GAP_MIN_EXPERTS
+    gaps_simulated = experts_simulated < GAP_MIN_EXPERTS
+
+    def describe(indexes):
+        return [
+            {
+                "id_techno": int(snapshot.technos[i]),
+                "techno": snapshot.techno_names.get(int(snapshot.technos[i])),
+                "nb_experts": int(experts_current[i]),
+                "nb_experts_simule": int(experts_simulated[i]),
+                "risk_level": risk_level(experts_current[i]),
+                "risk_level_simule": risk_level(experts_simulated[i])
+            }
+            for i in indexes.tolist()
+        ]
+
+    changed_risk = np.flatnonzero(
+        (gaps_current | gaps_simulated)
+        & (np.minimum(experts_current, GAP_MIN_EXPERTS) != np.minimum(experts_simulated, GAP_MIN_EXPERTS))
+    )
+
+    return {
+        "total_gaps": int(gaps_current.sum()),
+        "total_gaps_simule": int(gaps_simulated.sum()),
+        "critical_gaps": int((experts_current == 0).sum()),
+        "critical_gaps_simule": int((experts_simulated == 0).sum()),
+        "new_gaps": describe(np.flatnonzero(gaps_simulated & ~gaps_current)),
+        "resolved_gaps": describe(np.flatnonzero(gaps_current & ~gaps_simulated)),
+        "risk_changes": describe(changed_risk)
+    }
+
+
+def simulate(snapshot, parameters, threshold=EXPERT_THRESHOLD, crossings_limit=DEFAULT_CROSSINGS_LIMIT):
+    """Évalue un jeu de paramètres complet sur le snapshot, sans écriture"""
+    inputs = snapshot.inputs
+    current = inputs.niveau_calcule
+    simulated = compute_scores(
+        parameters,
+        inputs.niveau_declare,
+        inputs.nb_projets,
+        inputs.dernier_mois,
+        inputs.duree_totale,
+        current_month_index()
+    )
+    # Une compétence sans niveau déclaré garde son score courant
+    simulated = np.where(snapshot.scorable, simulated, current)
+
+    delta = simulated - current
+    changed = ~np.isclose(simulated, current, equal_nan=True)
+
+    return {
+        "distribution": distribution(simulated, threshold),
+        "changed": int(changed.sum()),
+        "mean_delta": round(float(np.nanmean(delta)), 3) if changed.any() else 0.0,
+        "expert_crossings": crossings(snapshot, current, simulated, threshold, crossings_limit),
+        "gaps": gaps_impact(snapshot, current, simulated, threshold)
+    }
+
+
+def summarize_current(snapshot, threshold=EXPERT_THRESHOLD):
+    """Distribution et nombre de gaps des scores courants, référence des simulations"""
+    current = snapshot.inputs.niveau_calcule
+    experts = np.bincount(snapshot.techno_index, weights=current >= threshold, minlength=len(snapshot.technos))
+    return {
+        "distribution": distribution(current, threshold),
+        "total_gaps": int((experts < GAP_MIN_EXPERTS).sum()),
+        "critical_gaps": int((experts == 0).sum())
+    }
+
+
+def parse_parameter_sets(parameter_sets, base):
+    """
+    [{"name": "...", "parameters": {...}}] -> [(name, jeu complet)]
+    Les paramètres absents sont pris dans base (paramètres enregistrés)
+    """
+    if not isinstance(parameter_sets, list) or not parameter_sets:
+        raise ValueError("parameter_sets must be a non-empty array")
+    if len(parameter_sets) > MAX_PARAMETER_SETS:
+        raise ValueError(f"Too many parameter sets (max {MAX_PARAMETER_SETS})")
+
+    parsed = []
+    for index, item in enumerate(parameter_sets):
+        if not isinstance(item, dict):
+            raise ValueError(f"parameter_sets[{index}] must be an object")
+        name = item.get('name') or f"set_{index + 1}"
+        try:
+            parsed.append((name, validate_parameters(item.get('parameters') or {}, base)))
+        except ValueError as e:
+            raise ValueError(f"{name}: {e}")
+    return parsed
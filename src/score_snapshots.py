@@ -0,0 +1,116 @@
+"""
+Photos mensuelles des scores (table score_snapshot, migration 0009)
+
+niveau_calcule dépend du mois courant (bonus d'ancienneté) et est écrasé
+à chaque recalcul : la tâche mensuelle scoring.monthly_snapshot recalcule
+les scores puis copie niveau_calcule de toutes les compétences dans
+score_snapshot, en une seule requête. Les tendances et les matrices
+"à date" lisent ensuite ces photos sans rejouer l'historique.
+"""
+from src.scoring_engine import current_month_index, format_month
+
+EXPERT_THRESHOLD = 4
+
+
+def take_snapshot(conn, mois=None):
+    """
+    Photographie niveau_calcule de toutes les compétences pour le mois donné
+    (défaut: mois courant), en remplaçant une photo existante. Sans commit.
+    Retourne le nombre de lignes écrites.
+    """
+    if mois is None:
+        mois = current_month_index()
+    conn.execute("DELETE FROM score_snapshot WHERE mois = ?", (mois,))
+    cursor = conn.execute("""
+        INSERT INTO score_snapshot (mois, id_competence, id_collaborator, id_techno, niveau)
+        SELECT ?, id, id_collaborator, id_techno, niveau_calcule FROM competence
+    """, (mois,))
+    return cursor.rowcount
+
+
+def list_snapshots(conn):
+    rows = conn.execute("""
+        SELECT mois, COUNT(*) as competences, AVG(niveau) as avg_niveau
+        FROM score_snapshot
+        GROUP BY mois
+        ORDER BY mois
+    """).fetchall()
+    return [
+        {
+            'date': format_month(row['mois']),
+            'competences': row['competences'],
+            'avg_niveau': round(row['avg_niveau'], 2) if row['avg_niveau'] else 0
+        }
+        for row in rows
+    ]
+
+
+def snapshot_as_of(conn, mois):
+    """Mois de la dernière photo prise au plus tard au mois donné, None si aucune"""
+    row = conn.execute("SELECT MAX(mois) FROM score_snapshot WHERE mois <= ?", (mois,)).fetchone()
+    return row[0]
+
+
+def month_range_filter(mois_from, mois_to, params):
+    where = ""
+    if mois_from is not None:
+        where += " AND s.mois >= ?"
+        params.append(mois_from)
+    if mois_to is not None:
+        where += " AND s.mois <= ?"
+        params.append(mois_to)
+    return where
+
+
+def collaborator_trend(conn, id_collaborator, mois_from=None, mois_to=None, id_techno=None):
+    """Série des niveaux d'un collaborateur, par techno"""
+    params = [id_collaborator]
+    query = """
+        SELECT s.mois, s.id_techno, t.name as techno, s.niveau
+        FROM score_snapshot s
+        JOIN techno t ON t.id = s.id_techno
+        WHERE s.id_collaborator = ?
+    """
+    if id_techno is not None:
+        query += " AND s.id_techno = ?"
+        params.append(id_techno)
+    query += month_range_filter(mois_from, mois_to, params)
+    query += " ORDER BY t.name, s.mois"
+
+    technos = {}
+    for row in conn.execute(query, params):
+        techno = technos.setdefault(row['id_techno'], {
+            'id_techno': row['id_techno'],
+            'techno': row['techno'],
+            'points': []
+        })
+        techno['points'].append({'date': format_month(row['mois']), 'niveau': row['niveau']})
+    return list(technos.values())
+
+
+def techno_trend(conn, id_techno, mois_from=None, mois_to=None, expert_threshold=EXPERT_THRESHOLD):
+    """Agrégats mensuels d'une techno: collaborateurs, moyenne, max, experts"""
+    params = [expert_threshold, id_techno]
+    query = """
+        SELECT
+            s.mois,
+            COUNT(*) as nb_collaborators,
+            AVG(s.niveau) as avg_niveau,
+            MAX(s.niveau) as max_niveau,
+            SUM(CASE WHEN s.niveau >= ? THEN 1 ELSE 0 END) as nb_experts
+        FROM score_snapshot s
+        WHERE s.id_techno = ?
+    """
+    query += month_range_filter(mois_from, mois_to, params)
+    query += " GROUP BY s.mois ORDER BY s.mois"
+
+    return [
+        {
+            'date': format_month(row['mois']),
+            'nb_collaborators': row['nb_collaborators'],
+            'avg_niveau': round(row['avg_niveau'], 2) if row['avg_niveau'] else 0,
+            'max_niveau': row['max_niveau'],
+            'nb_experts': row['nb_experts']
+        }
+        for row in conn.execute(query, params)
+    ]
@@ -0,0 +1,325 @@
+"""
+Moteur de recalcul ensembliste des scores (niveau_calcule)
+
+Au lieu d'une requête d'historique par compétence, l'historique est agrégé
+en une seule passe par (id_collaborator, id_techno) : nombre de projets,
+dernier mois de fin (colonne entière mois_fin, aucune date n'est parsée au
+recalcul) et durée totale. La formule est évaluée en NumPy sur les tableaux
+de toutes les compétences à la fois, seuls les scores modifiés sont écrits.
+
+Formule (paramètres de la table scoring_parameter, voir DEFAULT_PARAMETERS):
+    Score = niveau_declare × niveau_declare_weight
+          + min(max_projets_score, nb_projets × score_par_projet) × nb_projets_weight
+          + max(0, anciennete_max - mois_depuis_dernière_utilisation / penalite_anciennete_mois) × anciennete_weight
+          + min(max_duree_score, duree_totale_mois / duree_mois_par_point) × duree_weight
+borné entre min_score et max_score. Sans historique, Score = niveau_declare.
+
+Maintenance incrémentale: les triggers des migrations 0004 et 0013 marquent dans
+score_dirty les couples touchés par une écriture d'historique ou de
+compétence ; flush_dirty_scores ne recalcule que ces couples.
+"""
+import datetime
+from collections import namedtuple
+import numpy as np
+from dateutil import parser as date_parser
+
+# Valeurs par défaut (formule historique 0.3 / 0.4 / 0.3, sans terme de durée)
+DEFAULT_PARAMETERS = {
+    "niveau_declare_weight": 0.3,
+    "nb_projets_weight": 0.4,
+    "anciennete_weight": 0.3,
+    "duree_weight": 0.0,
+    "score_par_projet": 1.0,
+    "max_projets_score": 5.0,
+    "anciennete_max": 5.0,
+    "penalite_anciennete_mois": 12.0,
+    "duree_mois_par_point": 6.0,
+    "max_duree_score": 5.0,
+    "min_score": 1.0,
+    "max_score": 5.0,
+}
+
+PARAMETER_DESCRIPTIONS = {
+    "niveau_declare_weight": "Poids du niveau déclaré par le collaborateur",
+    "nb_projets_weight": "Poids du score projets",
+    "anciennete_weight": "Poids du bonus d'ancienneté",
+    "duree_weight": "Poids du score de durée cumulée (0 = terme désactivé)",
+    "score_par_projet": "Points par projet dans le score projets",
+    "max_projets_score": "Plafond du score projets",
+    "anciennete_max": "Bonus d'ancienneté d'une utilisation récente (ou sans date de fin)",
+    "penalite_anciennete_mois": "Mois écoulés depuis la dernière utilisation pour perdre 1 point de bonus",
+    "duree_mois_par_point": "Mois cumulés (duree_mois de l'historique) par point de score de durée",
+    "max_duree_score": "Plafond du score de durée",
+    "min_score": "Score minimal (entre 1 et 5)",
+    "max_score": "Score maximal (entre 1 et 5)",
+}
+
+# Paramètres devant rester strictement positifs (diviseurs)
+POSITIVE_PARAMETERS = ("penalite_anciennete_mois", "duree_mois_par_point")
+
+ScoreInputs = namedtuple("ScoreInputs", [
+    "ids", "id_collaborator", "id_techno", "niveau_declare",
+    "nb_projets", "dernier_mois", "duree_totale", "niveau_calcule"
+])
+
+
+def month_index(date_fin):
+    """
+    Convertit une date en index de mois (année × 12 + mois)
+    Retourne None si la date est absente ou illisible
+
+    Appelé une seule fois par date, à l'écriture (colonnes mois_debut / mois_fin)
+    """
+    if not date_fin:
+        return None
+    try:
+        # Parser la date (format YYYY-MM ou YYYY-MM-DD)
+        if len(date_fin) == 7:  # YYYY-MM
+            date = datetime.datetime.strptime(date_fin, '%Y-%m')
+        else:
+            date = date_parser.parse(date_fin)
+    except (ValueError, OverflowError, TypeError):
+        return None
+    return date.year * 12 + date.month
+
+
+def format_month(index):
+    """Index de mois -> 'YYYY-MM'"""
+    year, month = divmod(index - 1, 12)
+    return f"{year:04d}-{month + 1:02d}"
+
+
+def current_month_index():
+    now = datetime.datetime.now()
+    return now.year * 12 + now.month
+
+
+def load_parameters(conn):
+    """Paramètres stockés en base, complétés par les valeurs par défaut"""
+    parameters = dict(DEFAULT_PARAMETERS)
+    for row in conn.execute("SELECT name, value FROM scoring_parameter"):
+        if row[0] in parameters:
+            parameters[row[0]] = row[1]
+    return parameters
+
+
+def validate_parameters(values, base=None):
+    """
+    Valide des paramètres partiels (un nom inconnu, une valeur non numérique
+    ou incohérente lève ValueError) et retourne le jeu complet résultant,
+    les valeurs absentes étant prises dans base (défaut: DEFAULT_PARAMETERS)
+    """
+    if not isinstance(values, dict):
+        raise ValueError("Parameters must be an object")
+
+    parameters = dict(base or DEFAULT_PARAMETERS)
+    for name, value in values.items():
+        if name not in DEFAULT_PARAMETERS:
+            raise ValueError(f"Unknown parameter '{name}'")
+        if value is None:
+            value = DEFAULT_PARAMETERS[name]
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or not np.isfinite(value):
+            raise ValueError(f"{name} must be a number")
+        if value < 0:
+            raise ValueError(f"{name} must be positive")
+        parameters[name] = float(value)
+
+    for name in POSITIVE_PARAMETERS:
+        if parameters[name] <= 0:
+            raise ValueError(f"{name} must be greater than 0")
+    if not 1 <= parameters["min_score"] < parameters["max_score"] <= 5:
+        raise ValueError("min_score and max_score must satisfy 1 <= min_score < max_score <= 5")
+
+    return parameters
+
+
+def save_parameters(conn, values):
+    """
+    Enregistre des paramètres partiels (None = retour à la valeur par défaut),
+    sans commit. Retourne le jeu complet.
+    """
+    parameters = validate_parameters(values, load_parameters(conn))
+    now = datetime.datetime.now()
+    conn.executemany(
+        """INSERT INTO scoring_parameter (name, value, date_upd) VALUES (?, ?, ?)
+           ON CONFLICT(name) DO UPDATE SET value = excluded.value, date_upd = excluded.date_upd""",
+        [(name, parameters[name], now) for name in values]
+    )
+    return parameters
+
+
+def compute_scores(parameters, niveau_declare, nb_projets, dernier_mois, duree_totale, mois_courant):
+    """
+    Évalue la formule sur des tableaux alignés (une case par compétence)
+    - nb_projets: nombre de lignes d'historique (0 si aucun)
+    - dernier_mois: index du mois de fin le plus récent, NaN si aucune date
+    - duree_totale: somme des duree_mois de l'historique (0 si inconnue)
+    """
+    p = parameters
+    niveau_declare = np.asarray(niveau_declare, dtype=float)
+    nb_projets = np.asarray(nb_projets, dtype=float)
+    dernier_mois = np.asarray(dernier_mois, dtype=float)
+    duree_totale = np.asarray(duree_totale, dtype=float)
+
+    # 1. Score basé sur le nombre de projets, plafonné
+    score_projets = np.minimum(p["max_projets_score"], nb_projets * p["score_par_projet"])
+
+    # 2. Bonus d'ancienneté (dégressif avec les mois écoulés), maximal si pas de date de fin
+    mois_ecoules = mois_courant - dernier_mois
+    anciennete_bonus = np.where(
+        np.isnan(dernier_mois),
+        p["anciennete_max"],
+        np.maximum(0, p["anciennete_max"] - mois_ecoules / p["penalite_anciennete_mois"])
+    )
+
+    # 3. Score de durée cumulée, plafonné
+    score_duree = np.minimum(p["max_duree_score"], duree_totale / p["duree_mois_par_point"])
+
+    # 4. Calcul final, borné
+    score = (niveau_declare * p["niveau_declare_weight"]) \
+        + (score_projets * p["nb_projets_weight"]) \
+        + (anciennete_bonus * p["anciennete_weight"]) \
+        + (score_duree * p["duree_weight"])
+    # Arrondi de Python valeur par valeur : np.round arrondit autrement les
+    # demi-centièmes (1.725 -> 1.72 au lieu de 1.73) et s'écarterait des scores historiques
+    score = np.clip(score, p["min_score"], p["max_score"])
+    score = np.array([round(value, 2) for value in score.tolist()], dtype=float)
+
+    # Pas d'historique: le niveau déclaré
+    return np.where(nb_projets > 0, score, niveau_declare)
+
+
+def compute_score(niveau_declare, nb_projets, dernier_mois, mois_courant, duree_totale=0, parameters=None):
+    """Score d'une seule compétence (mêmes règles que compute_scores)"""
+    scores = compute_scores(
+        parameters or DEFAULT_PARAMETERS,
+        [niveau_declare],
+        [nb_projets],
+        [np.nan if dernier_mois is None else dernier_mois],
+        [duree_totale or 0],
+        mois_courant
+    )
+    return float(scores[0])
+
+
+def load_score_inputs(conn, id_collaborator=None, dirty=False):
+    """
+    Une seule passe agrégée sur project_techno_history, jointe aux compétences.
+    - id_collaborator: restreint le calcul (et le scan d'historique) à un collaborateur
+    - dirty: restreint le calcul aux couples présents dans score_dirty
+
+    Retourne un ScoreInputs de tableaux NumPy alignés (NaN pour les valeurs absentes)
+    """
+    comp_from = "competence comp"
+    history_from = "project_techno_history h"
+    comp_where = history_where = ""
+    params = ()
+
+    if dirty:
+        comp_from = """score_dirty d
+            JOIN competence comp ON comp.id_collaborator = d.id_collaborator AND comp.id_techno = d.id_techno"""
+        history_from = """score_dirty d
+            JOIN project_techno_history h ON h.id_collaborator = d.id_collaborator AND h.id_techno = d.id_techno"""
+    if id_collaborator is not None:
+        comp_where = "WHERE comp.id_collaborator = ?"
+        history_where = "AND h.id_collaborator = ?"
+        params = (id_collaborator,)
+
+    # Tuples bruts (sans sqlite3.Row) convertis directement en tableau
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    rows = cursor.execute(f"""
+        SELECT
+            comp.id,
+            comp.id_collaborator,
+            comp.id_techno,
+            comp.niveau_declare,
+            COALESCE(agg.nb_projets, 0),
+            agg.dernier_mois,
+            COALESCE(agg.duree_totale, 0),
+            comp.niveau_calcule
+        FROM {comp_from}
+        LEFT JOIN (
+            SELECT
+                h.id_collaborator,
+                h.id_techno,
+                COUNT(*) as nb_projets,
+                MAX(h.mois_fin) as dernier_mois,
+                SUM(h.duree_mois) as duree_totale
+            FROM {history_from}
+            WHERE 1=1 {history_where}
+            GROUP BY h.id_collaborator, h.id_techno
+        ) agg ON agg.id_collaborator = comp.id_collaborator AND agg.id_techno = comp.id_techno
+        {comp_where}
+    """, params * 2).fetchall()
+
+    data = np.array(rows, dtype=float).reshape(-1, 8)
+    return ScoreInputs(
+        ids=data[:, 0].astype(np.int64),
+        id_collaborator=data[:, 1].astype(np.int64),
+        id_techno=data[:, 2].astype(np.int64),
+        niveau_declare=data[:, 3],
+        nb_projets=data[:, 4],
+        dernier_mois=data[:, 5],
+        duree_totale=data[:, 6],
+        niveau_calcule=data[:, 7]
+    )
+
+
+def recalculate_scores(conn, id_collaborator=None, dirty=False, parameters=None):
+    """
+    Recalcule niveau_calcule de toutes les compétences (ou d'un collaborateur,
+    ou des couples marqués dans score_dirty) en une évaluation NumPy, puis
+    écrit les seuls scores modifiés en un executemany, sans commit.
+
+    Retourne (updated, errors): updated = nombre de compétences recalculées
+    """
+    if parameters is None:
+        parameters = load_parameters(conn)
+    inputs = load_score_inputs(conn, id_collaborator, dirty)
+
+    # Une compétence sans niveau déclaré ne peut pas être notée
+    missing = np.isnan(inputs.niveau_declare)
+    errors = [
+        f"Compétence {id_competence}: niveau_declare manquant"
+        for id_competence in inputs.ids[missing].tolist()
+    ]
+
+    scores = compute_scores(
+        parameters,
+        inputs.niveau_declare,
+        inputs.nb_projets,
+        inputs.dernier_mois,
+        inputs.duree_totale,
+        current_month_index()
+    )
+
+    changed = ~missing & (scores != inputs.niveau_calcule)
+    now = datetime.datetime.now()
+    conn.executemany(
+        "UPDATE competence SET niveau_calcule = ?, date_upd = ? WHERE id = ?",
+        ((score, now, id_competence) for score, id_competence in zip(
+            scores[changed].tolist(), inputs.ids[changed].tolist()
+        ))
+    )
+    if id_collaborator is None and not dirty:
+        # Un recalcul complet couvre tous les couples en attente
+        conn.execute("DELETE FROM score_dirty")
+
+    return int((~missing).sum()), errors
+
+
+def flush_dirty_scores(conn):
+    """
+    Recalcule les seuls couples marqués par les triggers de score_dirty puis
+    vide l'ensemble, dans la transaction courante (appelé par les modèles
+    avant leur commit).
+
+    Retourne le nombre de compétences recalculées
+    """
+    if not conn.execute("SELECT 1 FROM score_dirty LIMIT 1").fetchone():
+        return 0
+
+    updated, _ = recalculate_scores(conn, dirty=True)
+    conn.execute("DELETE FROM score_dirty")
+    return updated
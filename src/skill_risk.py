@@ -0,0 +1,139 @@
+"""
+Agrégats de risque par techno (/allocation/gaps, /allocation/capacity,
+/dashboard/at-risk-technologies)
+
+Pour chaque techno, la matrice en mémoire (src/competence_matrix.py)
+tient le nombre de collaborateurs qui ont la compétence et l'histogramme
+de leurs niveaux calculés par pas de 0,01 (le scoring arrondit au
+centième), de 1 à 5. Une écriture sur competence retire la contribution
+des lignes rechargées puis ajoute la nouvelle : rien n'est recompté.
+
+Les sommes cumulées de l'histogramme (nombre et somme des niveaux au-dessus
+de chaque pas), recalculées à la demande après une écriture, donnent pour
+n'importe quel seuil le nombre d'experts, les niveaux moyen / min / max
+et la répartition par tranche sans relire les compétences. Un niveau qui
+n'est pas un multiple de 0,01 compte dans le pas inférieur.
+"""
+import numpy as np
+
+LEVEL_MIN = 1.0
+LEVEL_MAX = 5.0
+LEVEL_STEP = 100  # pas par unité de niveau
+BINS = int((LEVEL_MAX - LEVEL_MIN) * LEVEL_STEP) + 1
+
+
+def level_bins(levels):
+    """Niveaux -> indices de pas (arrondi inférieur au centième)"""
+    bins = np.floor(np.asarray(levels) * LEVEL_STEP + 1e-6).astype(int) - int(LEVEL_MIN * LEVEL_STEP)
+    return np.clip(bins, 0, BINS - 1)
+
+
+def threshold_bin(threshold):
+    """Premier pas de niveau >= threshold (BINS si aucun)"""
+    step = int(np.ceil(threshold * LEVEL_STEP - 1e-6)) - int(LEVEL_MIN * LEVEL_STEP)
+    return min(max(step, 0), BINS)
+
+
+def bin_levels():
+    """Niveau représenté par chaque pas"""
+    return (np.arange(BINS) + LEVEL_MIN * LEVEL_STEP) / LEVEL_STEP
+
+
+class RiskAggregates:
+    """Collaborateurs et histogramme des niveaux par techno (colonne de la matrice)"""
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        size = len(matrix.techno_ids)
+        self.collaborators = np.zeros(size, dtype=np.int64)
+        self.histogram = np.zeros((size, BINS), dtype=np.int64)
+        self._cumulative = None
+        self.add(np.arange(len(matrix.collaborator_ids)))
+
+    def _apply(self, rows, sign):
+        present = self.matrix.present[rows]
+        levels = self.matrix.niveau_calcule[rows]
+        self.collaborators += sign * present.sum(axis=0)
+        scored_rows, columns = np.nonzero(present & ~np.isnan(levels))
+        np.add.at(self.histogram, (columns, level_bins(levels[scored_rows, columns])), sign)
+        self._cumulative = None
+
+    def add(self, rows):
+        self._apply(rows, 1)
+
+    def remove(self, rows):
+        self._apply(rows, -1)
+
+    def cumulative(self):
+        """
+        (nombre, somme des niveaux) des pas >= b pour chaque techno et chaque
+        b de 0 à BINS (la dernière colonne vaut 0)
+        """
+        if self._cumulative is None:
+            counts = np.zeros((len(self.histogram), BINS + 1), dtype=np.int64)
+            sums = np.zeros((len(self.histogram), BINS + 1))
+            counts[:, :BINS] = np.cumsum(self.histogram[:, ::-1], axis=1)[:, ::-1]
+            sums[:, :BINS] = np.cumsum((self.histogram * bin_levels())[:, ::-1], axis=1)[:, ::-1]
+            self._cumulative = counts, sums
+        return self._cumulative
+
+    def count_at_least(self, threshold):
+        """Nombre de collaborateurs de niveau >= threshold, par techno"""
+        counts, _ = self.cumulative()
+        return counts[:, threshold_bin(threshold)]
+
+    def level_stats(self, niveau_min=None):
+        """
+        Sur les niveaux >= niveau_min (tous les niveaux renseignés si None) :
+        nombre, moyenne, min et max par techno (NaN sans niveau)
+        """
+        counts, sums = self.cumulative()
+        start = 0 if niveau_min is None else threshold_bin(niveau_min)
+        count = counts[:, start]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = sums[:, start] / count
+
+        lowest = np.full(len(count), np.nan)
+        highest = np.full(len(count), np.nan)
+        if start < BINS:
+            levels = bin_levels()[start:]
+            window = self.histogram[:, start:] > 0
+            has_level = count > 0
+            lowest[has_level] = levels[np.argmax(window[has_level], axis=1)]
+            highest[has_level] = levels[len(levels) - 1 - np.argmax(window[has_level, ::-1], axis=1)]
+        return count, mean, lowest, highest
+
+
+def techno_risk(matrix, expert_level, niveau_min=None):
+    """
+    Une entrée par techno de la matrice, sur les niveaux >= niveau_min :
+    collaborateurs (tous, avec ou sans niveau), nombre de niveaux, experts
+    (>= expert_level), intermédiaires (>= 2), débutants, moyenne, min, max
+    """
+    risk = matrix.risk()
+    floor = LEVEL_MIN if niveau_min is None else niveau_min
+    expert_floor = max(expert_level, floor)
+    intermediate_floor = min(max(2, floor), expert_floor)
+
+    count, mean, lowest, highest = risk.level_stats(niveau_min)
+    experts = risk.count_at_least(expert_floor)
+    intermediates = risk.count_at_least(intermediate_floor) - experts
+    beginners = count - experts - intermediates
+
+    def value(array, j):
+        return None if np.isnan(array[j]) else float(array[j])
+
+    return [
+        {
+            'techno': name,
+            'nb_collaborators': int(risk.collaborators[j]),
+            'nb_levels': int(count[j]),
+            'nb_experts': int(experts[j]),
+            'nb_intermediaires': int(intermediates[j]),
+            'nb_debutants': int(beginners[j]),
+            'avg_niveau': value(mean, j),
+            'min_niveau': value(lowest, j),
+            'max_niveau': value(highest, j)
+        }
+        for j, name in enumerate(matrix.techno_names)
+    ]
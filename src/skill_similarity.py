@@ -0,0 +1,111 @@
+"""
+Profils de compétences et recherche des plus proches voisins
+(GET /collaborators/<id>/similar)
+
+Le profil d'un collaborateur est son vecteur de niveaux sur toutes les
+technos (niveau calculé, à défaut déclaré, 0 sans compétence) normalisé
+en norme 2 : la similarité cosinus de deux collaborateurs est le produit
+scalaire de leurs profils. Les profils sont tenus par la matrice en
+mémoire (src/competence_matrix.py), dans l'ordre de ses lignes, et
+recalculés pour les seules lignes rechargées après une écriture.
+
+Recherche (paramètre method) :
+- exact : produit matrice × vecteur sur tous les profils, puis
+  sélection partielle des k meilleurs (argpartition)
+- approx : hachage sensible à la localité par hyperplans aléatoires
+  (LSH_TABLES tables de LSH_BITS bits). Deux profils proches ont souvent la
+  même signature dans au moins une table. Seuls ces candidats sont comparés
+  exactement. Chaque table garde ses signatures triées, ce qui permet de
+  trouver un seau par recherche dichotomique. Le tri est refait à la
+  demande après une écriture.
+- auto : approx à partir de APPROX_MIN_COLLABORATORS collaborateurs,
+  exact sinon ; exact aussi quand approx trouve moins de k candidats
+"""
+import numpy as np
+
+SIMILARITY_METHODS = ('auto', 'exact', 'approx')
+APPROX_MIN_COLLABORATORS = 5000
+LSH_TABLES = 24
+LSH_BITS = 10
+LSH_SEED = 0
+
+
+def normalize_rows(vectors):
+    """Lignes en norme 2 unitaire, les lignes nulles restent nulles"""
+    norms = np.linalg.norm(vectors, axis=1)
+    return vectors / np.where(norms > 0, norms, 1)[:, np.newaxis]
+
+
+class SkillProfiles:
+    """Profils normalisés des lignes d'une matrice de compétences"""
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.vectors = normalize_rows(np.nan_to_num(matrix.niveau()) * matrix.present).astype(np.float32)
+        rng = np.random.default_rng(LSH_SEED)
+        self.planes = rng.standard_normal((LSH_TABLES, LSH_BITS, self.vectors.shape[1])).astype(np.float32)
+        self.weights = (1 << np.arange(LSH_BITS)).astype(np.int64)
+        self.signatures = self._sign(self.vectors)
+        self.buckets = None
+
+    def _sign(self, vectors):
+        """Signatures LSH (lignes × tables) : un bit par hyperplan"""
+        bits = np.einsum('tbd,nd->ntb', self.planes, vectors) > 0
+        return bits.astype(np.int64) @ self.weights
+
+    def update(self, ordinals):
+        """Recalcule les profils et signatures des lignes données"""
+        ordinals = np.asarray(ordinals, dtype=int)
+        values = np.nan_to_num(self.matrix.niveau(ordinals)) * self.matrix.present[ordinals]
+        self.vectors[ordinals] = normalize_rows(values)
+        self.signatures[ordinals] = self._sign(self.vectors[ordinals])
+        self.buckets = None
+
+    def _buckets(self):
+        """Par table: (ordre des lignes par signature, signatures triées)"""
+        if self.buckets is None:
+            self.buckets = []
+            for table in range(LSH_TABLES):
+                order = np.argsort(self.signatures[:, table], kind='stable')
+                self.buckets.append((order, self.signatures[order, table]))
+        return self.buckets
+
+    def approx_candidates(self, i):
+        """Lignes partageant la signature de la ligne i dans au moins une table"""
+        parts = []
+        for table, (order, codes) in enumerate(self._buckets()):
+            code = self.signatures[i, table]
+            parts.append(order[np.searchsorted(codes, code, 'left'):np.searchsorted(codes, code, 'right')])
+        return np.unique(np.concatenate(parts))
+
+    def nearest(self, i, k, allowed=None, method='auto'):
+        """
+        k lignes les plus proches de la ligne i (i exclue), masque allowed
+        optionnel. Retourne (lignes, similarités, méthode, candidats comparés)
+        """
+        n = len(self.vectors)
+        if method == 'auto':
+            method = 'approx' if n >= APPROX_MIN_COLLABORATORS else 'exact'
+
+        candidates = None
+        if method == 'approx':
+            candidates = self.approx_candidates(i)
+            candidates = candidates[candidates != i]
+            if allowed is not None:
+                candidates = candidates[allowed[candidates]]
+            if len(candidates) < k:
+                candidates, method = None, 'exact'
+
+        if candidates is None:
+            mask = np.ones(n, dtype=bool) if allowed is None else allowed.copy()
+            mask[i] = False
+            candidates = np.flatnonzero(mask)
+
+        scores = self.vectors[candidates] @ self.vectors[i]
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(candidates))
+        # Similarité décroissante, puis ordre des lignes (nom)
+        top = top[np.lexsort((candidates[top], -scores[top]))]
+        return candidates[top], scores[top].astype(float), method, len(candidates)
@@ -0,0 +1,113 @@
+"""
+Compteurs globaux du dashboard (table stats_counter, migration 0011)
+
+Une seule ligne (id = 1) tient le nombre de collaborateurs, technos,
+compétences et projets, et la somme / le nombre des niveau_calcule
+renseignés. Des triggers la mettent à jour à chaque insertion, suppression
+ou changement de niveau : /dashboard/overview la lit par clé primaire.
+
+La somme des niveaux est un réel accumulé : recompute_counters() la
+recalcule, avec les comptes, depuis les tables.
+
+Usage:
+    python -m src.stats_counters check     # compare les compteurs aux tables
+    python -m src.stats_counters repair    # les recalcule depuis les tables
+"""
+import sys
+
+# colonne du compteur -> table comptée
+COUNTED_TABLES = {
+    'collaborators': 'collaborator',
+    'technos': 'techno',
+    'competences': 'competence',
+    'projects': 'project',
+}
+
+
+def fresh_counters(conn):
+    """Compteurs calculés depuis les tables (une passe par table)"""
+    counters = {
+        column: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for column, table in COUNTED_TABLES.items()
+    }
+    row = conn.execute("SELECT TOTAL(niveau_calcule), COUNT(niveau_calcule) FROM competence").fetchone()
+    counters['niveau_sum'], counters['niveau_count'] = row[0], row[1]
+    return counters
+
+
+def recompute_counters(conn):
+    """Réécrit la ligne des compteurs depuis les tables (sans commit)"""
+    counters = fresh_counters(conn)
+    columns = ', '.join(counters)
+    placeholders = ', '.join(['?'] * len(counters))
+    conn.execute(
+        f"INSERT OR REPLACE INTO stats_counter (id, {columns}, date_upd) "
+        f"VALUES (1, {placeholders}, strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))",
+        list(counters.values())
+    )
+    return counters
+
+
+def read_counters(conn):
+    """Ligne des compteurs, recalculée si elle manque"""
+    row = conn.execute("SELECT * FROM stats_counter WHERE id = 1").fetchone()
+    if row is None:
+        recompute_counters(conn)
+        conn.commit()
+        row = conn.execute("SELECT * FROM stats_counter WHERE id = 1").fetchone()
+    return dict(row)
+
+
+def overview_stats(counters):
+    """Compteurs -> statistiques de /dashboard/overview"""
+    niveau_count = counters['niveau_count']
+    return {
+        'total_collaborators': counters['collaborators'],
+        'total_technologies': counters['technos'],
+        'total_competences': counters['competences'],
+        'total_projects': counters['projects'],
+        # Niveau moyen des compétences
+        'avg_niveau': round(counters['niveau_sum'] / niveau_count, 2) if niveau_count else 0
+    }
+
+
+def check_counters(conn):
+    """Écarts {compteur: (stocké, recalculé)} entre la table stats_counter et les tables"""
+    stored = read_counters(conn)
+    fresh = fresh_counters(conn)
+    return {
+        name: (stored[name], value)
+        for name, value in fresh.items()
+        if abs(stored[name] - value) > (1e-6 if name == 'niveau_sum' else 0)
+    }
+
+
+def main(argv):
+    from src.config import get_db_connection, init_db
+
+    command = argv[0] if argv else 'check'
+    init_db()
+    conn = get_db_connection()
+
+    if command == 'check':
+        drift = check_counters(conn)
+        for name, (stored, value) in drift.items():
+            print(f"  ❌ {name}: {stored} (attendu {value})")
+        print("Compteurs à jour" if not drift else f"{len(drift)} compteur(s) faux, lancer: python -m src.stats_counters repair")
+        status = 1 if drift else 0
+    elif command == 'repair':
+        counters = recompute_counters(conn)
+        conn.commit()
+        for name, value in counters.items():
+            print(f"  ✅ {name}: {value}")
+        status = 0
+    else:
+        print(__doc__)
+        status = 1
+
+    conn.close()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,69 @@
+"""
+Réponses en streaming (NDJSON / CSV) pour les lectures volumineuses
+
+Le mode streaming est activé par l'en-tête Accept :
+- application/x-ndjson : un objet JSON par ligne
+- text/csv : en-tête puis une ligne par élément
+
+Les lignes sont lues sur le curseur SQLite et envoyées au fur et à mesure,
+la mémoire consommée ne dépend donc pas de la taille du résultat.
+"""
+import csv
+import io
+import json
+from flask import Response, request, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+CSV_MIMETYPE = 'text/csv'
+
+# Nombre de lignes regroupées dans un même chunk HTTP
+CHUNK_ROWS = 500
+
+
+def requested_stream_format():
+    """Retourne le mimetype de streaming demandé, ou None pour du JSON classique"""
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE, CSV_MIMETYPE])
+    if best in (NDJSON_MIMETYPE, CSV_MIMETYPE):
+        return best
+    return None
+
+
+def iter_ndjson(rows):
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps(row, ensure_ascii=False, default=str))
+        if len(chunk) >= CHUNK_ROWS:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+
+
+def iter_csv(rows):
+    buffer = io.StringIO()
+    writer = None
+    count = 0
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row.keys()), extrasaction='ignore')
+            writer.writeheader()
+        writer.writerow(row)
+        count += 1
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def streaming_response(rows, mimetype):
+    """
+    Réponse HTTP streamée à partir d'un itérable de dicts.
+    L'itérable est consommé dans le contexte de la requête (connexion poolée incluse).
+    """
+    if mimetype == CSV_MIMETYPE:
+        body = iter_csv(rows)
+    else:
+        body = iter_ndjson(rows)
+    return Response(stream_with_context(body), mimetype=mimetype)
@@ -0,0 +1,220 @@
+"""
+Composition d'équipe optimale (POST /allocation/suggest avec mode=optimize)
+
+Chaque techno demandée t a un poids w_t et un niveau minimum. Un
+collaborateur c apporte v[c, t] = COVERAGE_VALUE + niveau si son niveau
+atteint le minimum, 0 sinon. La valeur d'une équipe S est
+
+    f(S) = somme des w_t × max(v[c, t] pour c dans S)
+
+La couverture d'une techno compte donc plus que le niveau de la personne
+qui la couvre (COVERAGE_VALUE = 5 > écart maximal de niveau), et ajouter
+quelqu'un n'apporte que les technos qu'il couvre mieux que l'équipe.
+
+f est monotone et sous-modulaire :
+- approx : glouton (garantie 1 - 1/e) puis échanges 1 contre 1 tant
+  qu'ils améliorent f, dans le budget de temps
+- exact : séparation et évaluation sur les candidats non dominés, borne
+  f(S) + min(somme des k meilleurs gains marginaux, gain maximal par techno) ;
+  optimal=False si le budget de temps est épuisé avant la fin
+- auto : approx, puis exact si le nombre de candidats non dominés le permet
+
+Technos obligatoires (required) : chacune ajoute à f une colonne de
+couverture (1 si le candidat la couvre) de poids supérieur à toute la
+valeur possible de f. L'optimum couvre donc d'abord le plus de technos
+obligatoires possible, puis maximise f. feasible=False si l'équipe trouvée
+n'en couvre pas toutes ; avec optimal=True, aucune équipe ne le peut.
+"""
+import time
+from collections import namedtuple
+import numpy as np
+
+COVERAGE_VALUE = 5.0
+SOLVER_METHODS = ('auto', 'exact', 'approx')
+
+# Au-delà, exact n'est pas tenté en mode auto
+EXACT_MAX_CANDIDATES = 80
+# Au-delà, les candidats dominés ne sont pas recherchés (coût quadratique)
+DOMINANCE_MAX_POOL = 2000
+
+SolverResult = namedtuple(
+    'SolverResult', ['selected', 'score', 'method', 'optimal', 'nodes', 'candidates', 'feasible'],
+    defaults=(True,)
+)
+
+
+def coverage_values(levels, niveaux_min):
+    """levels: niveaux (candidats × technos, NaN = absent) -> matrice v"""
+    levels = np.nan_to_num(levels, nan=-1.0)
+    return np.where(levels >= niveaux_min[np.newaxis, :], COVERAGE_VALUE + levels, 0.0)
+
+
+def team_score(values, weights, selected):
+    if not len(selected):
+        return 0.0
+    return float(values[selected].max(axis=0) @ weights)
+
+
+def marginal_gains(values, weights, current):
+    return (np.maximum(values, current) - current) @ weights
+
+
+def greedy(values, weights, team_size):
+    current = np.zeros(values.shape[1])
+    selected = []
+    for _ in range(team_size):
+        gains = marginal_gains(values, weights, current)
+        gains[selected] = -1
+        best = int(np.argmax(gains))
+        if gains[best] <= 0:
+            break
+        selected.append(best)
+        current = np.maximum(current, values[best])
+    return selected
+
+
+def local_search(values, weights, selected, deadline):
+    """Échanges 1 contre 1 améliorants jusqu'à l'optimum local ou l'échéance"""
+    selected = list(selected)
+    score = team_score(values, weights, selected)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for position in range(len(selected)):
+            others = selected[:position] + selected[position + 1:]
+            current = values[others].max(axis=0) if others else np.zeros(values.shape[1])
+            gains = marginal_gains(values, weights, current)
+            gains[selected] = -1
+            best = int(np.argmax(gains))
+            if float(current @ weights) + gains[best] > score + 1e-9:
+                selected[position] = best
+                score = team_score(values, weights, selected)
+                improved = True
+            if time.perf_counter() >= deadline:
+                break
+    return selected, score
+
+
+def non_dominated(values):
+    """
+    Indices des candidats utiles pour l'optimum exact : sans valeur nulle
+    partout, non dominés (un autre fait au moins aussi bien sur chaque
+    techno) et sans doublon
+    """
+    order = np.argsort(-values.sum(axis=1), kind='stable')
+    order = order[values[order].sum(axis=1) > 0]
+    kept = []
+    for index in order.tolist():
+        if kept and np.all(values[kept] >= values[index], axis=1).any():
+            continue
+        kept.append(index)
+    return kept
+
+
+def branch_and_bound(values, weights, team_size, incumbent, incumbent_score, deadline):
+    """Retourne (sélection, score, terminé, noeuds)"""
+    n, size = values.shape
+    column_max = [values[i:].max(axis=0) if i < n else np.zeros(size) for i in range(n + 1)]
+    best = {'selected': list(incumbent), 'score': incumbent_score}
+    nodes = 0
+    finished = True
+
+    def explore(start, current, chosen, remaining):
+        nonlocal nodes, finished
+        nodes += 1
+        if nodes % 256 == 0 and time.perf_counter() >= deadline:
+            finished = False
+            return
+        score = float(current @ weights)
+        if score > best['score'] + 1e-9:
+            best['selected'], best['score'] = list(chosen), score
+        if remaining == 0 or start >= n:
+            return
+
+        gains = marginal_gains(values[start:], weights, current)
+        top = np.sum(np.sort(gains)[-remaining:])
+        residual = float(np.maximum(column_max[start] - current, 0) @ weights)
+        if score + min(top, residual) <= best['score'] + 1e-9:
+            return
+
+        # Candidats par gain décroissant, pour trouver tôt de bonnes équipes
+        for offset in np.argsort(-gains, kind='stable').tolist():
+            if gains[offset] <= 0 or not finished:
+                break
+            # Chaque combinaison est visitée une fois, depuis son plus petit indice
+            index = start + offset
+            chosen.append(index)
+            explore(index + 1, np.maximum(current, values[index]), chosen, remaining - 1)
+            chosen.pop()
+
+    explore(0, np.zeros(size), [], team_size)
+    return best['selected'], best['score'], finished, nodes
+
+
+def drop_useless(values, weights, selected):
+    """Retire les membres qui n'apportent rien au reste de l'équipe"""
+    selected = list(selected)
+    for member in list(selected):
+        others = [index for index in selected if index != member]
+        if team_score(values, weights, others) >= team_score(values, weights, selected) - 1e-9:
+            selected = others
+    return selected
+
+
+def solve_team(values, weights, team_size, time_budget_ms, method='auto', required=None):
+    """
+    Choisit au plus team_size lignes de values maximisant f.
+    values: candidats × technos (voir coverage_values), weights: poids des technos,
+    required: masque des technos à couvrir obligatoirement (optionnel)
+    """
+    weights = np.asarray(weights, dtype=float)
+    search_values, search_weights = values, weights
+    required = np.zeros(values.shape[1], dtype=bool) if required is None else np.asarray(required, dtype=bool)
+    if required.any():
+        covers = (values[:, required] > 0).astype(float)
+        bonus = float(values.max(axis=0) @ weights) + 1.0 if len(values) else 1.0
+        search_values = np.hstack([values, covers])
+        search_weights = np.concatenate([weights, np.full(covers.shape[1], bonus)])
+
+    result = search_team(search_values, search_weights, team_size, time_budget_ms, method)
+    selected = drop_useless(search_values, search_weights, result.selected)
+    covered = values[selected].max(axis=0) > 0 if selected else np.zeros(values.shape[1], dtype=bool)
+    return result._replace(
+        selected=selected,
+        score=team_score(values, weights, selected),
+        feasible=bool(np.all(covered[required]))
+    )
+
+
+def search_team(values, weights, team_size, time_budget_ms, method):
+    deadline = time.perf_counter() + time_budget_ms / 1000
+    weights = np.asarray(weights, dtype=float)
+    n = len(values)
+
+    if n == 0 or team_size <= 0:
+        return SolverResult([], 0.0, method, True, 0, n)
+
+    selected, score = [], 0.0
+    if method in ('auto', 'approx'):
+        selected, score = local_search(values, weights, greedy(values, weights, team_size), deadline)
+        # Chaque techno couverte au meilleur niveau disponible : optimal
+        optimal = score >= float(values.max(axis=0) @ weights) - 1e-9
+        if method == 'approx' or optimal or n > DOMINANCE_MAX_POOL:
+            return SolverResult(selected, score, 'approx', optimal, 0, n)
+
+    candidates = non_dominated(values)
+    if len(candidates) <= team_size:
+        # Tous les candidats utiles tiennent dans l'équipe
+        return SolverResult(candidates, team_score(values, weights, candidates), 'exact', True, 0, n)
+    if method == 'auto' and len(candidates) > EXACT_MAX_CANDIDATES:
+        return SolverResult(selected, score, 'approx', False, 0, n)
+
+    reduced = values[candidates]
+    position = {index: i for i, index in enumerate(candidates)}
+    incumbent = [position[index] for index in selected if index in position]
+    incumbent_score = team_score(reduced, weights, incumbent) if incumbent else 0.0
+
+    found, found_score, finished, nodes = branch_and_bound(
+        reduced, weights, team_size, incumbent, incumbent_score, deadline
+    )
+    return SolverResult([candidates[i] for i in found], found_score, 'exact', finished, nodes, n)
@@ -0,0 +1,143 @@
+"""
+Index inversé techno -> collaborateurs triés par niveau
+
+Tenu par la matrice en mémoire (src/competence_matrix.py) : pour chaque
+techno, les ordinaux des collaborateurs qui ont la compétence, triés par
+niveau calculé décroissant (sans niveau en dernier, puis par nom), et les
+niveaux alignés. Une liste est construite à la première lecture puis
+invalidée quand une écriture touche la colonne de cette techno ; les
+autres restent valides.
+
+Opérations : top-k, seuil (recherche dichotomique dans la liste triée),
+intersection de plusieurs technos au-dessus d'un seuil.
+
+Les noms sont cherchés sans tenir compte de la casse ni des espaces en trop.
+Des technos qui ne diffèrent que par la casse ("Go" / "GO") restent toutes
+accessibles par leur nom exact ; un nom qui n'en désigne aucune exactement
+est ambigu et traité comme inconnu. Ces collisions sont signalées dans les
+logs à la construction de l'index.
+"""
+import logging
+import re
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def clean_name(name):
+    """Nom de techno sans espaces en trop"""
+    return re.sub(r'\s+', ' ', name).strip()
+
+
+def normalize_name(name):
+    """Nom de techno comparable: casse et espaces ignorés"""
+    return clean_name(name).casefold()
+
+
+class Postings:
+    """Collaborateurs d'une techno par niveau décroissant"""
+
+    def __init__(self, rows, levels):
+        self.rows = rows
+        self.levels = levels
+        # Les niveaux absents (NaN) sont à la fin
+        self.scored = int(np.count_nonzero(~np.isnan(levels)))
+        self.total = float(levels[:self.scored].sum())
+
+    def __len__(self):
+        return len(self.rows)
+
+    def count_above(self, threshold):
+        """Nombre de collaborateurs de niveau >= threshold"""
+        return int(np.searchsorted(-self.levels[:self.scored], -threshold, side='right'))
+
+    def above(self, threshold):
+        count = self.count_above(threshold)
+        return self.rows[:count], self.levels[:count]
+
+    def top(self, k, threshold=None, allowed=None):
+        """
+        k premiers, éventuellement limités au niveau >= threshold et aux
+        ordinaux où le masque allowed est vrai
+        """
+        count = len(self.rows) if threshold is None else self.count_above(threshold)
+        rows, levels = self.rows[:count], self.levels[:count]
+        if allowed is not None:
+            keep = allowed[rows]
+            rows, levels = rows[keep], levels[keep]
+        return rows[:k], levels[:k]
+
+    def mean(self):
+        return self.total / self.scored if self.scored else None
+
+    def max(self):
+        return float(self.levels[0]) if self.scored else None
+
+
+class TechnoIndex:
+    """Listes triées par techno (ordinal de colonne), construites à la demande"""
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.postings = {}
+        # Nom normalisé -> ordinaux des technos de ce nom (plusieurs si la casse diffère)
+        self.by_name = {}
+        for j, name in enumerate(matrix.techno_names):
+            self.by_name.setdefault(normalize_name(name), []).append(j)
+        self.collisions = {
+            key: [matrix.techno_names[j] for j in columns]
+            for key, columns in self.by_name.items() if len(columns) > 1
+        }
+        for names in self.collisions.values():
+            logger.warning("Technos homonymes à la casse près : %s", ', '.join(names))
+
+    def invalidate(self, columns):
+        for j in columns:
+            self.postings.pop(int(j), None)
+
+    def column(self, name):
+        """
+        Ordinal de la techno par nom normalisé, None si inconnue ; entre
+        technos homonymes à la casse près, celle qui porte exactement ce nom
+        (None si aucune)
+        """
+        columns = self.by_name.get(normalize_name(name), [])
+        if len(columns) == 1:
+            return columns[0]
+        name = clean_name(name)
+        return next((j for j in columns if clean_name(self.matrix.techno_names[j]) == name), None)
+
+    def get(self, j):
+        postings = self.postings.get(j)
+        if postings is None:
+            rows = np.flatnonzero(self.matrix.present[:, j])
+            levels = self.matrix.niveau_calcule[rows, j]
+            # Niveau décroissant, NaN en dernier, puis ordre alphabétique
+            order = np.lexsort((rows, np.isnan(levels), -np.nan_to_num(levels)))
+            postings = Postings(rows[order], levels[order])
+            self.postings[j] = postings
+        return postings
+
+    def union_above(self, columns, thresholds):
+        """Ordinaux des collaborateurs au niveau requis sur au moins une des technos"""
+        parts = [self.get(j).above(threshold)[0] for j, threshold in zip(columns, thresholds)]
+        if not parts:
+            return np.array([], dtype=int)
+        return np.unique(np.concatenate(parts))
+
+    def intersect_above(self, columns, threshold):
+        """
+        Collaborateurs au niveau >= threshold sur toutes les technos, triés
+        par leur plus faible niveau sur ces technos puis par nom
+        Retourne (ordinaux, niveaux: ordinaux × technos)
+        """
+        if not columns:
+            return np.array([], dtype=int), np.zeros((0, 0))
+        # Les listes les plus courtes d'abord
+        lists = sorted((self.get(j).above(threshold)[0] for j in columns), key=len)
+        rows = lists[0]
+        for other in lists[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        levels = self.matrix.niveau_calcule[np.ix_(rows, columns)]
+        order = np.lexsort((rows, -levels.min(axis=1))) if len(rows) else np.array([], dtype=int)
+        return rows[order], levels[order]
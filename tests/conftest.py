@@ -0,0 +1,76 @@
+"""
+Fixtures communes : chaque test a sa propre base SQLite temporaire,
+migrée par init_db(), et des caches en mémoire vides
+"""
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import src.config as config
+import src.availability as availability
+import src.competence_matrix as competence_matrix
+import src.score_simulation as score_simulation
+import src.jobs as jobs
+
+# Les tests exécutent les tâches à la main : pas de threads workers démarrés
+# par une requête ou une soumission
+jobs.JOB_WORKERS_IN_PROCESS = False
+
+
+def reset_caches():
+    config.pool.close_all()
+    competence_matrix._matrix = None
+    availability._index = None
+    score_simulation._snapshot = None
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Base vide migrée ; retourne une connexion du pool"""
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr(config, 'DATABASE', str(tmp_path / 'test.db'))
+    reset_caches()
+    config.init_db()
+    conn = config.get_db_connection()
+    yield conn
+    conn.close()
+    reset_caches()
+
+
+@pytest.fixture
+def client(db):
+    from app import app
+    app.config['TESTING'] = True
+    return app.test_client()
+
+
+def add_collaborator(conn, firstname, lastname):
+    return conn.execute(
+        "INSERT INTO collaborator (firstname, lastname, date_add, date_upd) VALUES (?, ?, datetime('now'), datetime('now'))",
+        (firstname, lastname)
+    ).lastrowid
+
+
+def add_techno(conn, name):
+    return conn.execute(
+        "INSERT INTO techno (name, date_add, date_upd) VALUES (?, datetime('now'), datetime('now'))",
+        (name,)
+    ).lastrowid
+
+
+def add_project(conn, name, mois_fin=None, duree_mois=None):
+    return conn.execute(
+        "INSERT INTO project (name, mois_fin, duree_mois, date_add, date_upd) VALUES (?, ?, ?, datetime('now'), datetime('now'))",
+        (name, mois_fin, duree_mois)
+    ).lastrowid
+
+
+def add_competence(conn, id_collaborator, id_techno, niveau_declare, niveau_calcule=None):
+    return conn.execute(
+        """INSERT INTO competence (id_collaborator, id_techno, niveau_declare, niveau_calcule, date_add, date_upd)
+           VALUES (?, ?, ?, ?, datetime('now'), datetime('now'))""",
+        (id_collaborator, id_techno, niveau_declare, niveau_calcule)
+    ).lastrowid
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+from conftest import add_collaborator, add_project, add_techno
+import src.availability as availability
+from src.availability import AvailabilityIndex, Calendar, load_engagements, read_availability
+
+
+def busy_set(engagements):
+    return {month for start, end, _ in engagements for month in range(start, end + 1)}
+
+
+def runs(months):
+    """Mois triés -> intervalles [(début, fin)] de mois consécutifs"""
+    periods = []
+    for month in sorted(months):
+        if periods and month == periods[-1][1] + 1:
+            periods[-1] = (periods[-1][0], month)
+        else:
+            periods.append((month, month))
+    return periods
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_calendar_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    engagements = []
+    for project in range(int(rng.integers(0, 12))):
+        start = int(rng.integers(0, 60))
+        engagements.append((start, start + int(rng.integers(0, 10)), project))
+    calendar = Calendar(engagements)
+    busy = busy_set(engagements)
+
+    for _ in range(40):
+        start = int(rng.integers(-5, 70))
+        end = start + int(rng.integers(0, 30))
+        window = set(range(start, end + 1))
+        assert calendar.busy_months(start, end) == len(busy & window)
+        assert calendar.busy_periods(start, end) == runs(busy & window)
+        assert calendar.free_periods(start, end) == runs(window - busy)
+        assert sorted(calendar.engagements(start, end)) == sorted(
+            e for e in engagements if e[0] <= end and e[1] >= start
+        )
+
+
+def add_history(conn, id_collaborator, id_project, id_techno, mois_debut=None, mois_fin=None, duree_mois=None):
+    conn.execute(
+        """INSERT INTO project_techno_history (id_project, id_techno, id_collaborator, duree_mois, mois_debut, mois_fin)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        (id_project, id_techno, id_collaborator, duree_mois, mois_debut, mois_fin)
+    )
+
+
+def test_load_engagements(db):
+    ada, bob = add_collaborator(db, 'Ada', 'Lovelace'), add_collaborator(db, 'Bob', 'Martin')
+    python, java = add_techno(db, 'Python'), add_techno(db, 'Java')
+    site = add_project(db, 'Site', mois_fin=120, duree_mois=6)
+    api = add_project(db, 'API')
+    open_ended = add_project(db, 'Ouvert')
+
+    # Deux technos d'un même projet réunies, durée pour compléter une borne
+    add_history(db, ada, api, python, mois_debut=100, mois_fin=104)
+    add_history(db, ada, api, java, mois_debut=103, duree_mois=4)
+    add_history(db, bob, api, python, mois_fin=110, duree_mois=3)
+    # Affectation à un projet daté réunie à l'historique du même projet
+    add_history(db, bob, site, python, mois_debut=112, mois_fin=113)
+    db.execute("INSERT INTO collaborator_project (id_collaborator, id_project) VALUES (?, ?)", (bob, site))
+    # Projet sans date de fin : n'occupe personne
+    db.execute("INSERT INTO collaborator_project (id_collaborator, id_project) VALUES (?, ?)", (ada, open_ended))
+    db.commit()
+
+    engagements = load_engagements(db)
+    assert sorted(engagements[ada]) == [(100, 106, api)]
+    assert sorted(engagements[bob]) == [(108, 110, api), (112, 120, site)]
+    assert load_engagements(db, [bob]).keys() == {bob}
+
+
+def test_index_follows_the_change_log(db, monkeypatch):
+    monkeypatch.setattr(availability, '_index', None)
+    ada, bob = add_collaborator(db, 'Ada', 'Lovelace'), add_collaborator(db, 'Bob', 'Martin')
+    python = add_techno(db, 'Python')
+    api = add_project(db, 'API')
+    add_history(db, ada, api, python, mois_debut=100, mois_fin=105)
+    db.commit()
+
+    assert read_availability(db, lambda index: index.available(100, 105)) == {bob}
+    index = availability._index
+
+    # Écriture sur l'historique : seul le collaborateur touché est rechargé
+    add_history(db, bob, api, python, mois_debut=104, mois_fin=104)
+    db.commit()
+    assert read_availability(db, lambda index: index.available(100, 105, min_rate=0.8)) == {bob}
+    assert availability._index is index
+    assert index.free_months(bob, 100, 105) == 5
+
+    # Nouveau collaborateur : reconstruction
+    carl = add_collaborator(db, 'Carl', 'Sagan')
+    db.commit()
+    assert read_availability(db, lambda index: index.available(100, 105)) == {carl}
+    assert availability._index is not index
+    assert isinstance(availability._index, AvailabilityIndex)
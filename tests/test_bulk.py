@@ -0,0 +1,80 @@
+from conftest import add_techno
+from src.models import begin, run_batch, techno_model, techno_type_model
+
+INSERT_TECHNO = "INSERT INTO techno (name, date_add, date_upd) VALUES (?, datetime('now'), datetime('now'))"
+
+
+def techno_names(conn):
+    return [row['name'] for row in conn.execute("SELECT name FROM techno ORDER BY id")]
+
+
+def test_run_batch_fast_path(db):
+    rowcount, errors, rowids = run_batch(db, INSERT_TECHNO, [('Python',), ('Java',)])
+    db.commit()
+    assert (rowcount, errors, rowids) == (2, [], None)
+    assert techno_names(db) == ['Python', 'Java']
+
+
+def test_run_batch_falls_back_row_by_row(db):
+    add_techno(db, 'Python')
+    begin(db)
+    db.execute(INSERT_TECHNO, ('Go',))
+
+    # Le doublon fait échouer l'executemany : le lot est annulé puis rejoué ligne par ligne
+    rowcount, errors, rowids = run_batch(db, INSERT_TECHNO, [('Java',), ('Python',), ('Rust',)])
+    db.commit()
+
+    assert rowcount == 2
+    assert [e['index'] for e in errors] == [1]
+    assert rowids[1] is None and None not in (rowids[0], rowids[2])
+    # Écriture antérieure au savepoint conservée, aucune ligne du premier essai en double
+    assert techno_names(db) == ['Python', 'Go', 'Java', 'Rust']
+
+
+def test_bulk_create_partial_and_atomic(db):
+    add_techno(db, 'Python')
+    db.commit()
+
+    ids, errors = techno_model.bulk_create([{'name': 'Java'}, {'name': 'Python'}, {'name': 'Rust'}], atomic=True)
+    assert ids == [None, None, None]
+    assert [e['index'] for e in errors] == [1]
+    assert techno_names(db) == ['Python']
+
+    ids, errors = techno_model.bulk_create([{'name': 'Java'}, {'name': 'Python'}, {'name': 'Rust'}])
+    assert ids[1] is None and None not in (ids[0], ids[2])
+    assert [e['index'] for e in errors] == [1]
+    assert techno_names(db) == ['Python', 'Java', 'Rust']
+
+
+def test_bulk_create_fast_path_ids(db):
+    add_techno(db, 'Python')
+    db.commit()
+    ids, errors = techno_model.bulk_create([{'name': 'Java'}, {'name': 'Rust'}])
+    assert errors == []
+    assert ids == [row['id'] for row in db.execute("SELECT id FROM techno WHERE name IN ('Java', 'Rust') ORDER BY id")]
+
+
+def test_relation_bulk_create_atomic(db):
+    id_techno = add_techno(db, 'Python')
+    id_type = db.execute("INSERT INTO type (name, date_add, date_upd) VALUES ('Langage', datetime('now'), datetime('now'))").lastrowid
+    db.commit()
+
+    items = [{'id_techno': id_techno, 'id_type': id_type}] * 2
+    created, errors = techno_type_model.bulk_create(items, atomic=True)
+    assert created == [None, None] and [e['index'] for e in errors] == [1]
+    assert db.execute("SELECT COUNT(*) FROM techno_type").fetchone()[0] == 0
+
+
+def test_bulk_route_atomic_rejects_whole_batch(db, client):
+    add_techno(db, 'Python')
+    db.commit()
+
+    response = client.post('/technos/bulk', json={'items': [{'name': 'Java'}, {'name': 'Python'}], 'atomic': True})
+    assert response.status_code == 400
+    assert response.get_json()['created'] == 0
+    assert techno_names(db) == ['Python']
+
+    response = client.post('/technos/bulk', json=[{'name': 'Java'}, {'name': 'Python'}])
+    body = response.get_json()
+    assert [e['index'] for e in body['errors']] == [1]
+    assert techno_names(db) == ['Python', 'Java']
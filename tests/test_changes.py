@@ -0,0 +1,53 @@
+import src.changes as changes
+import src.competence_matrix as competence_matrix
+from src.changes import latest_change_id, prune_change_log, pruned_through
+from src.competence_matrix import read_matrix
+from conftest import add_collaborator, add_competence, add_techno
+
+
+def test_prune_keeps_rows_after_held_versions(db, monkeypatch):
+    collaborator = add_collaborator(db, 'Ada', 'Lovelace')
+    for name in ('Python', 'Go', 'Rust'):
+        add_competence(db, collaborator, add_techno(db, name), 3)
+    db.commit()
+    latest = latest_change_id(db)
+    assert latest == 7
+
+    monkeypatch.setattr(changes, '_version_holders', [lambda: 3, lambda: None])
+    assert prune_change_log(db, retention_seconds=0) == 3
+    db.commit()
+    assert pruned_through(db) == 3
+    assert [c['id'] for c in changes.changes_since(db, 3)] == [4, 5, 6, 7]
+
+    monkeypatch.setattr(changes, '_version_holders', [])
+    prune_change_log(db, retention_seconds=0)
+    db.commit()
+    # Journal vide : la version ne recule pas
+    assert latest_change_id(db) == latest == pruned_through(db)
+
+
+def test_retention_window_is_kept(db, monkeypatch):
+    add_collaborator(db, 'Ada', 'Lovelace')
+    db.commit()
+    monkeypatch.setattr(changes, '_version_holders', [])
+    assert prune_change_log(db) == 0
+    assert pruned_through(db) == 0
+
+
+def test_matrix_rebuilds_when_journal_pruned_past_its_version(db, monkeypatch):
+    collaborator = add_collaborator(db, 'Ada', 'Lovelace')
+    python = add_techno(db, 'Python')
+    competence = add_competence(db, collaborator, python, 3, 3.0)
+    db.commit()
+    assert read_matrix(db, lambda store: float(store.niveau_calcule[0, 0])) == 3.0
+    version = competence_matrix._matrix.version
+
+    # Un autre process purge le journal sans connaître la version de ce cache
+    db.execute("UPDATE competence SET niveau_calcule = 4.5 WHERE id = ?", (competence,))
+    db.commit()
+    monkeypatch.setattr(changes, '_version_holders', [])
+    prune_change_log(db, retention_seconds=0)
+    db.commit()
+    assert pruned_through(db) > version
+
+    assert read_matrix(db, lambda store: float(store.niveau_calcule[0, 0])) == 4.5
@@ -0,0 +1,107 @@
+import pytest
+from conftest import add_collaborator, add_competence, add_techno
+import src.competence_matrix as competence_matrix
+from src.competence_matrix import read_matrix
+
+
+@pytest.fixture
+def team(db):
+    python, java, go = add_techno(db, 'Python'), add_techno(db, 'Java'), add_techno(db, 'Go')
+    alice = add_collaborator(db, 'Alice', 'Martin')
+    bob = add_collaborator(db, 'Bob', 'Durand')
+    carl = add_collaborator(db, 'Carl', 'Petit')
+    add_competence(db, alice, python, 4, 4.5)
+    add_competence(db, alice, java, 3)
+    add_competence(db, bob, python, 2, 2.0)
+    add_competence(db, bob, go, 5, 5.0)
+    db.commit()
+    return {'db': db, 'python': python, 'java': java, 'go': go, 'alice': alice, 'bob': bob, 'carl': carl}
+
+
+def test_matrix_rows_and_cells(client, team):
+    body = client.get('/matrix/competences').get_json()
+    assert [row['collaborator_name'] for row in body['matrix']] == ['Bob Durand', 'Alice Martin', 'Carl Petit']
+    assert body['technologies'] == ['Go', 'Java', 'Python']
+    alice = body['matrix'][1]['competences']
+    assert alice['Python'] == {'niveau_declare': 4, 'niveau_calcule': 4.5, 'niveau': 4.5, 'color': 'vert'}
+    assert alice['Java']['niveau'] == 3 and alice['Java']['niveau_calcule'] is None
+    assert alice['Go'] == {'niveau_declare': None, 'niveau_calcule': None, 'niveau': None, 'color': 'gris'}
+
+
+def test_filters_match_the_original_join(client, team):
+    body = client.get('/matrix/competences?techno=PY&niveau_min=3').get_json()
+    assert body['technologies'] == ['Python']
+    assert [row['collaborator_name'] for row in body['matrix']] == ['Alice Martin']
+
+    # Java (Alice) n'a pas de niveau calculé : la colonne disparaît avec niveau_min
+    body = client.get('/matrix/competences?niveau_min=1').get_json()
+    assert body['technologies'] == ['Go', 'Python']
+    assert [row['collaborator_name'] for row in body['matrix']] == ['Bob Durand', 'Alice Martin']
+
+    body = client.get('/matrix/competences?collaborator=petit').get_json()
+    assert [row['collaborator_name'] for row in body['matrix']] == ['Carl Petit']
+    assert body['technologies'] == []
+
+
+def test_competence_writes_reload_only_the_touched_rows(team, monkeypatch):
+    db = team['db']
+    before = read_matrix(db, lambda store: store)
+
+    rebuilt = []
+    monkeypatch.setattr(competence_matrix, 'CompetenceMatrix', lambda *args: rebuilt.append(args))
+    add_competence(db, team['carl'], team['java'], 4, 4.0)
+    db.execute("UPDATE competence SET niveau_calcule = 3.0 WHERE id_collaborator = ? AND id_techno = ?",
+               (team['alice'], team['python']))
+    db.commit()
+
+    def reader(store):
+        python = store.index.column('Python')
+        return store, store.index.get(python).max(), store.index.get(store.index.column('Java')).max()
+
+    store, python_max, java_max = read_matrix(db, reader)
+    assert store is before and not rebuilt
+    assert (python_max, java_max) == (3.0, 4.0)
+    assert store.version == db.execute("SELECT MAX(id) FROM change_log").fetchone()[0]
+
+
+def test_new_collaborator_or_techno_rebuilds_the_matrix(client, team):
+    db = team['db']
+    before = read_matrix(db, lambda store: store)
+    add_techno(db, 'Rust')
+    db.commit()
+
+    after = read_matrix(db, lambda store: store)
+    assert after is not before
+    assert after.techno_names == ['Go', 'Java', 'Python', 'Rust']
+    assert client.get('/matrix/competences/simple').get_json()['headers'] == ['Collaborateur', 'Go', 'Java', 'Python']
+
+
+def test_window_slices_the_filtered_selection(client, team):
+    full = client.get('/matrix/competences').get_json()
+    body = client.get('/matrix/competences?row_offset=1&row_limit=1&col_offset=1').get_json()
+
+    assert [row['collaborator_name'] for row in body['matrix']] == ['Alice Martin']
+    assert body['technologies'] == ['Java', 'Python']
+    assert body['matrix'][0]['competences'] == {
+        techno: full['matrix'][1]['competences'][techno] for techno in ('Java', 'Python')
+    }
+    assert (body['total_collaborators'], body['total_technologies']) == (3, 3)
+    assert body['window'] == {
+        'row_offset': 1, 'row_limit': 1, 'col_offset': 1, 'col_limit': 1000,
+        'total_rows': 3, 'total_columns': 3
+    }
+
+    simple = client.get('/matrix/competences/simple?row_offset=2&col_limit=2').get_json()
+    assert simple['headers'] == ['Collaborateur', 'Go', 'Java']
+    assert simple['rows'] == [['Carl Petit', 0, 0]]
+
+    sparse = client.get('/matrix/competences?format=sparse&row_limit=1').get_json()
+    assert sparse['rows']['names'] == ['Bob Durand']
+    assert sparse['window']['total_rows'] == 3
+
+
+@pytest.mark.parametrize('query', ['row_limit=0', 'row_offset=-1', 'col_offset=x'])
+def test_invalid_windows_are_rejected(client, team, query):
+    response = client.get(f'/matrix/competences?{query}')
+    assert response.status_code == 400
+    assert query.split('=')[0] in response.get_json()['error']
@@ -0,0 +1,40 @@
+import src.config as config
+from src.config import ConnectionPool, get_db_connection
+
+
+def test_connections_are_reused_with_their_pragmas(db):
+    pool = ConnectionPool(size=1)
+    conn = pool.acquire()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    conn.close()
+
+    assert pool.acquire() is conn
+    pool.close_all()
+
+
+def test_release_rolls_back_and_bounds_the_idle_connections(db):
+    pool = ConnectionPool(size=1)
+    first, second = pool.acquire(), pool.acquire()
+    first.execute("INSERT INTO techno (name, date_add, date_upd) VALUES ('Rust', datetime('now'), datetime('now'))")
+    first.close()
+    first.close()   # déjà rendue : sans effet
+    second.close()  # pool plein : vraiment fermée
+
+    assert not first.in_transaction
+    assert first.execute("SELECT COUNT(*) FROM techno").fetchone()[0] == 0
+    assert pool._idle.qsize() == 1
+    pool.close_all()
+
+
+def test_request_connection_is_bound_to_the_app_context(db):
+    from app import app
+
+    with app.app_context():
+        conn = get_db_connection()
+        conn.close()  # sans effet tant que la connexion est liée au contexte
+        assert get_db_connection() is conn
+        assert not conn.idle
+    assert conn.idle and not conn.bound
+    assert config.pool.acquire() is conn
+    conn.close()
@@ -0,0 +1,55 @@
+import pytest
+from conftest import add_collaborator, add_competence, add_techno
+import src.routes.dashboard as dashboard
+
+WIDGET_ROUTES = {
+    'overview': '/dashboard/overview',
+    'top-technologies': '/dashboard/top-technologies?limit=1',
+    'at-risk-technologies': '/dashboard/at-risk-technologies?threshold=3&expert_level=3',
+    'statistics': '/dashboard/statistics',
+    'heatmap': '/dashboard/heatmap?top_n=1',
+}
+
+
+@pytest.fixture
+def team(db):
+    python, java = add_techno(db, 'Python'), add_techno(db, 'Java')
+    for k in range(3):
+        id_collaborator = add_collaborator(db, 'Dev', str(k))
+        add_competence(db, id_collaborator, python, 5 - k, 5 - k)
+        if k:
+            add_competence(db, id_collaborator, java, 2 + k, 2 + k)
+    db.commit()
+
+
+def test_bundle_matches_widget_routes(client, team):
+    response = client.get('/dashboard/bundle?limit=1&threshold=3&expert_level=3&top_n=1&format=binary')
+    assert response.status_code == 200
+    bundle = response.get_json()
+    assert bundle['errors'] == {}
+    assert set(bundle['widgets']) == set(WIDGET_ROUTES)
+    for name, url in WIDGET_ROUTES.items():
+        # format=binary ne concerne que la route heatmap : le bundle reste en JSON
+        assert bundle['widgets'][name] == client.get(url).get_json()
+
+
+def test_bundle_reports_widget_errors(client, team, monkeypatch, caplog):
+    def broken(conn):
+        raise RuntimeError("boom")
+    monkeypatch.setitem(dashboard.SQL_WIDGETS, 'statistics', broken)
+
+    response = client.get('/dashboard/bundle?widgets=overview,statistics,at-risk-technologies,top-technologies&expert_level=9')
+    assert response.status_code == 200
+    bundle = response.get_json()
+    assert bundle['errors'] == {
+        'statistics': 'RuntimeError: boom',
+        'at-risk-technologies': 'expert_level must be between 1 and 5',
+    }
+    assert set(bundle['widgets']) == {'overview', 'top-technologies'}
+    assert [r.getMessage() for r in caplog.records if r.name == 'src.routes.dashboard'] == ['Widgets statistics en échec']
+
+
+def test_bundle_rejects_unknown_widgets(client, team):
+    response = client.get('/dashboard/bundle?widgets=overview,nope')
+    assert response.status_code == 400
+    assert 'nope' in response.get_json()['error']
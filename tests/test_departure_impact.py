@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from conftest import add_collaborator, add_competence, add_techno
+from src.departure_impact import damage_scores, departure_impact, rank_departures
+
+
+class FakeMatrix:
+    def __init__(self, levels):
+        self.niveau_calcule = np.asarray(levels, dtype=float)
+        self.present = ~np.isnan(self.niveau_calcule)
+
+
+@pytest.mark.parametrize('seed, min_experts', [(0, 2), (1, 3), (2, 1)])
+def test_masks_match_removing_each_row(seed, min_experts):
+    rng = np.random.default_rng(seed)
+    levels = np.where(rng.random((60, 15)) < 0.3, rng.uniform(1, 5, (60, 15)).round(2), np.nan)
+    matrix = FakeMatrix(levels)
+    impact = departure_impact(matrix, 4, min_experts)
+
+    for i in range(len(levels)):
+        others = np.delete(levels, i, axis=0)
+        with np.errstate(invalid='ignore'):
+            before = (levels >= 4).sum(axis=0)
+            after = (others >= 4).sum(axis=0)
+        holders_after = (~np.isnan(others)).sum(axis=0)
+        lost = after < before
+        assert (impact.last_expert[i] == (lost & (after == 0))).all()
+        # Passe sous min_experts : la techno n'y était pas déjà
+        below = lost & (after > 0) & (after < min_experts) & (before >= min_experts)
+        assert (impact.below_min_experts[i] == below).all()
+        assert (impact.orphaned[i] == (~np.isnan(levels[i]) & (holders_after == 0))).all()
+
+
+def test_ranking_by_damage_then_lost_technos():
+    counts = {'last_expert': np.array([0, 1, 0, 1])}
+    damage = np.array([2, 3, 3, 4])
+    assert rank_departures(damage, counts).tolist() == [3, 1, 2, 0]
+
+
+@pytest.fixture
+def team(db):
+    python, java, go = add_techno(db, 'Python'), add_techno(db, 'Java'), add_techno(db, 'Go')
+    alice = add_collaborator(db, 'Alice', 'Martin')
+    bob = add_collaborator(db, 'Bob', 'Durand')
+    carl = add_collaborator(db, 'Carl', 'Petit')
+    add_competence(db, alice, python, 5, 4.5)
+    add_competence(db, alice, go, 3, 2.0)
+    add_competence(db, bob, python, 4, 4.0)
+    add_competence(db, bob, java, 5, 5.0)
+    add_competence(db, carl, java, 3, 3.0)
+    db.commit()
+    return {'alice': alice, 'bob': bob, 'carl': carl}
+
+
+def test_routes(client, team):
+    body = client.get('/analytics/departure-impact').get_json()
+    # Bob : seul expert Java (3) + Python sous 2 experts (1) ; Alice : Python (1) + seule sur Go (1)
+    assert [(row['name'], row['damage']) for row in body['ranking']] == [('Bob Durand', 4), ('Alice Martin', 2)]
+    assert body['ranking'][0]['last_expert'] == ['Java']
+    assert body['summary']['technos_without_expert'] == 1
+
+    body = client.get(f"/analytics/departure-impact/{team['bob']}").get_json()
+    assert (body['damage'], body['rank']) == (4, 1)
+    java = body['technos'][0]
+    assert (java['techno'], java['experts_before'], java['experts_after'], java['risk_after']) == ('Java', 1, 0, 'critical')
+    assert java['next_best']['name'] == 'Carl Petit'
+
+    body = client.get(f"/analytics/departure-impact/{team['carl']}").get_json()
+    assert (body['damage'], body['technos']) == (0, [])
+    assert client.get('/analytics/departure-impact/999').status_code == 404
+    assert client.get('/analytics/departure-impact?min_experts=0').status_code == 400
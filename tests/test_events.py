@@ -0,0 +1,76 @@
+import pytest
+from conftest import add_collaborator
+import src.events as events
+from src.changes import latest_change_id
+from src.events import EventHub, parse_position
+
+
+@pytest.fixture
+def hub(db):
+    hub = EventHub()
+    hub.first_id = hub.last_id = latest_change_id(db)
+    return hub
+
+
+def test_parse_position():
+    assert parse_position('12') == (12, False)
+    assert parse_position('12:counters') == (12, True)
+    for value in ('abc', '12:', '12:competence'):
+        with pytest.raises(ValueError):
+            parse_position(value)
+
+
+def test_counters_have_their_own_resumable_id(db, hub):
+    start = hub.last_id
+    add_collaborator(db, 'Ada', 'Lovelace')
+    db.commit()
+    hub._read_journal()
+    change_id = hub.last_id
+
+    stream = hub.stream((start, True), {'collaborator', 'counters'})
+    next(stream)
+    chunk = next(stream)
+    assert f"id: {change_id}\nevent: collaborator\n" in chunk
+    assert f"id: {change_id}:counters\nevent: counters\n" in chunk
+
+    # Reprise après la modification : seuls les compteurs restent à envoyer
+    stream = hub.stream((change_id, False), {'collaborator', 'counters'})
+    next(stream)
+    chunk = next(stream)
+    assert chunk.startswith(f"id: {change_id}:counters\n")
+    assert "event: collaborator" not in chunk
+
+    # Même reprise hors du tampon : les compteurs courants sont relus
+    hub.first_id = change_id + 1
+    stream = hub.stream((change_id, False), {'counters'})
+    next(stream)
+    assert next(stream).startswith(f"id: {change_id}:counters\nevent: counters\n")
+
+
+def test_poll_logs_errors_and_keeps_running(hub, monkeypatch, caplog):
+    class Stop(BaseException):
+        pass
+
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) > 2:
+            raise Stop()
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("journal illisible")
+
+    monkeypatch.setattr(events.time, 'sleep', sleep)
+    monkeypatch.setattr(events, 'changes_since', broken)
+    with pytest.raises(Stop):
+        hub._poll()
+    errors = [r for r in caplog.records if r.name == 'src.events' and r.levelname == 'ERROR']
+    assert len(errors) == 2
+    assert "journal illisible" in str(errors[0].exc_info[1])
+
+
+def test_invalid_last_event_id(client):
+    for value in ('abc', '5:competence', '-1'):
+        response = client.get(f'/events?last_event_id={value}')
+        assert response.status_code == 400
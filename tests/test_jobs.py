@@ -0,0 +1,194 @@
+import datetime
+import sqlite3
+import pytest
+import src.jobs as jobs
+from src.config import get_db_connection
+from src.jobs import WorkerPool, cancel_job, get_job, insert_job, recover_jobs, retry_job, run_schedules
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    """Handlers de test ; pas de workers démarrés par retry_job / submit"""
+    monkeypatch.setattr(jobs, 'JOB_WORKERS_IN_PROCESS', False)
+    calls = []
+
+    def ok(job):
+        job.progress(1, 1)
+        calls.append(job.payload)
+        return {'double': job.payload['value'] * 2}
+
+    def locked(job):
+        raise sqlite3.OperationalError("database is locked")
+
+    def broken(job):
+        raise ValueError("payload invalide")
+
+    def missing_table(job):
+        conn = get_db_connection()
+        try:
+            conn.execute("SELECT * FROM table_absente")
+        finally:
+            conn.close()
+
+    for name, handler in (
+        ('test.ok', ok), ('test.locked', locked), ('test.broken', broken), ('test.missing_table', missing_table)
+    ):
+        monkeypatch.setitem(jobs.HANDLERS, name, handler)
+    return calls
+
+
+def submit(conn, job_type, payload=None, max_attempts=3):
+    job_id = insert_job(conn, job_type, payload, max_attempts=max_attempts)
+    conn.commit()
+    return job_id
+
+
+def test_claim_takes_oldest_ready_job_once(db, handlers):
+    first = submit(db, 'test.ok', {'value': 1})
+    second = submit(db, 'test.ok', {'value': 2})
+    later = submit(db, 'test.ok', {'value': 3})
+    db.execute("UPDATE job SET run_after = ? WHERE id = ?", (datetime.datetime.now() + datetime.timedelta(hours=1), later))
+    db.commit()
+
+    pool = WorkerPool()
+    claimed = [pool._claim('w1'), pool._claim('w2'), pool._claim('w3')]
+    assert [job.id for job in claimed[:2]] == [first, second]
+    assert claimed[2] is None
+    assert get_job(first)['status'] == 'running' and get_job(first)['worker'] == 'w1'
+    assert get_job(first)['attempts'] == 1
+
+    pool._run(claimed[0], 'w1')
+    job = get_job(first)
+    assert job['status'] == 'succeeded' and job['result'] == {'double': 2} and job['progress'] == 1
+
+
+def test_retryable_errors_are_requeued_until_max_attempts(db, handlers):
+    job_id = submit(db, 'test.locked', max_attempts=2)
+    pool = WorkerPool()
+
+    pool._run(pool._claim('w'), 'w')
+    job = get_job(job_id)
+    assert job['status'] == 'queued' and job['error'] == 'database is locked'
+    assert job['run_after'] > job['date_upd']
+
+    db.execute("UPDATE job SET run_after = ? WHERE id = ?", (datetime.datetime.now(), job_id))
+    db.commit()
+    pool._run(pool._claim('w'), 'w')
+    assert get_job(job_id)['status'] == 'failed'
+
+
+def test_other_errors_fail_the_job(db, handlers, caplog):
+    job_id = submit(db, 'test.broken')
+    pool = WorkerPool()
+    pool._run(pool._claim('w'), 'w')
+    job = get_job(job_id)
+    assert (job['status'], job['error'], job['attempts']) == ('failed', 'payload invalide', 1)
+    assert [r.name for r in caplog.records if r.exc_info] == ['src.jobs']
+
+
+def test_permanent_sqlite_errors_are_not_retried(db, handlers):
+    job_id = submit(db, 'test.missing_table')
+    pool = WorkerPool()
+    pool._run(pool._claim('w'), 'w')
+    job = get_job(job_id)
+    assert (job['status'], job['attempts']) == ('failed', 1)
+    assert 'no such table' in job['error']
+
+
+def test_is_retryable(tmp_path):
+    assert jobs.is_retryable(sqlite3.OperationalError("database is locked"))
+    assert jobs.is_retryable(sqlite3.OperationalError("database table is locked"))
+    assert not jobs.is_retryable(sqlite3.OperationalError("no such column: x"))
+    assert not jobs.is_retryable(ValueError("database is locked"))
+
+    holder = sqlite3.connect(tmp_path / 'lock.db', timeout=0, isolation_level=None)
+    other = sqlite3.connect(tmp_path / 'lock.db', timeout=0, isolation_level=None)
+    holder.execute("CREATE TABLE t (x)")
+    holder.execute("BEGIN IMMEDIATE")
+    with pytest.raises(sqlite3.OperationalError) as locked:
+        other.execute("INSERT INTO t VALUES (1)")
+    assert jobs.is_retryable(locked.value)
+    with pytest.raises(sqlite3.OperationalError) as syntax:
+        other.execute("SELEC 1")
+    assert not jobs.is_retryable(syntax.value)
+    holder.close()
+    other.close()
+
+
+def test_recover_stale_running_jobs(db, handlers):
+    requeued = submit(db, 'test.ok', {'value': 1})
+    exhausted = submit(db, 'test.ok', {'value': 2}, max_attempts=1)
+    cancelled = submit(db, 'test.ok', {'value': 3})
+    alive = submit(db, 'test.ok', {'value': 4})
+    pool = WorkerPool()
+    for _ in range(4):
+        pool._claim('w')
+    old = datetime.datetime.now() - datetime.timedelta(seconds=jobs.STALE_SECONDS + 10)
+    db.execute("UPDATE job SET heartbeat = ? WHERE id IN (?, ?, ?)", (old, requeued, exhausted, cancelled))
+    db.execute("UPDATE job SET cancel_requested = 1 WHERE id = ?", (cancelled,))
+    db.commit()
+
+    assert recover_jobs() == 3
+    statuses = {job_id: get_job(job_id)['status'] for job_id in (requeued, exhausted, cancelled, alive)}
+    assert statuses == {requeued: 'queued', exhausted: 'failed', cancelled: 'cancelled', alive: 'running'}
+    assert get_job(requeued)['worker'] is None
+
+    job = pool._claim('w2')
+    assert job.id == requeued and job.attempts == 2
+
+    # Le worker interrompu ne peut plus écrire le résultat d'une tâche reprise
+    pool._finish(job, 'w', 'succeeded', result={})
+    assert get_job(requeued)['status'] == 'running'
+
+
+def test_cancel_and_retry(db, handlers):
+    queued = submit(db, 'test.ok', {'value': 1})
+    assert cancel_job(queued)['status'] == 'cancelled'
+    with pytest.raises(ValueError):
+        cancel_job(queued)
+
+    job = retry_job(queued)
+    assert (job['status'], job['attempts'], job['cancel_requested']) == ('queued', 0, False)
+    with pytest.raises(ValueError):
+        retry_job(queued)
+    assert retry_job(queued + 100) is None
+
+
+def test_running_job_stops_at_next_progress_when_cancelled(db, handlers):
+    job_id = submit(db, 'test.ok', {'value': 1})
+    pool = WorkerPool()
+    job = pool._claim('w')
+    assert cancel_job(job_id)['cancel_requested'] is True
+    pool._run(job, 'w')
+    assert get_job(job_id)['status'] == 'cancelled'
+    assert handlers == []
+
+
+def test_schedules_submit_once_per_period(db, handlers, monkeypatch):
+    period = [202501]
+    monkeypatch.setattr(jobs, 'SCHEDULES', {'test.ok': lambda: period[0]})
+
+    first = run_schedules()
+    assert len(first) == 1 and get_job(first[0])['payload'] == {'period': 202501}
+    assert run_schedules() == []
+
+    period[0] += 1
+    assert len(run_schedules()) == 1
+    assert db.execute("SELECT last_period FROM job_schedule WHERE type = 'test.ok'").fetchone()[0] == 202502
+
+
+def test_workers_start_with_the_first_request(client, monkeypatch):
+    pool = WorkerPool()
+    started = []
+
+    def start(size=jobs.JOB_WORKERS):
+        started.append(size)
+        pool.threads.append(None)
+
+    monkeypatch.setattr(jobs, 'JOB_WORKERS_IN_PROCESS', True)
+    monkeypatch.setattr(jobs, 'worker_pool', pool)
+    monkeypatch.setattr(jobs, 'start_workers', start)
+
+    client.get('/technos')
+    client.get('/technos')
+    assert started == [jobs.JOB_WORKERS]
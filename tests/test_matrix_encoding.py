@@ -0,0 +1,86 @@
+import json
+import struct
+import numpy as np
+import pytest
+from conftest import add_collaborator, add_competence, add_techno
+from src.matrix_encoding import BINARY_MIMETYPE, SPARSE_MIMETYPE, SparseMatrix
+
+
+@pytest.fixture
+def team(db):
+    python, java, go = add_techno(db, 'Python'), add_techno(db, 'Java'), add_techno(db, 'Go')
+    alice = add_collaborator(db, 'Alice', 'Martin')
+    bob = add_collaborator(db, 'Bob', 'Durand')
+    add_competence(db, alice, python, 4, 4.5)
+    add_competence(db, alice, java, 3)
+    add_competence(db, bob, go, 5, 5.0)
+    db.commit()
+    return db
+
+
+def decode_binary(data):
+    """Décodeur de référence du format binaire (voir src/matrix_encoding.py)"""
+    assert data[:4] == b'SKMX'
+    version, _, length = struct.unpack('<HHI', data[4:12])
+    header = json.loads(data[12:12 + length])
+    start = 12 + length
+    assert version == 1 and start % 8 == 0
+    arrays = {
+        spec['name']: np.frombuffer(data, dtype=spec['dtype'], count=spec['count'], offset=start + spec['offset'])
+        for spec in header['arrays']
+    }
+    return header, arrays
+
+
+def cells_by_name(header, indptr, indices, values):
+    """{(ligne, colonne): valeur} à partir des tableaux CSR"""
+    return {
+        (name, header['columns']['names'][indices[k]]): values[k]
+        for i, name in enumerate(header['rows']['names'])
+        for k in range(indptr[i], indptr[i + 1])
+    }
+
+
+def test_csr_layout():
+    cells = np.array([[True, False, True], [False, False, False], [False, True, False]])
+    values = np.array([[1.0, 0, np.nan], [0, 0, 0], [0, 2.5, 0]])
+    matrix = SparseMatrix([10, 20, 30], ['a', 'b', 'c'], [1, 2, 3], ['x', 'y', 'z'], cells, {'niveau': values})
+
+    data = matrix.to_dict()
+    assert (data['shape'], data['nnz']) == ([3, 3], 3)
+    assert data['indptr'] == [0, 2, 2, 3]
+    assert data['indices'] == [0, 2, 1]
+    assert data['values'] == {'niveau': [1.0, None, 2.5]}
+
+    header, arrays = decode_binary(matrix.to_bytes({'extra': 1}))
+    assert header['extra'] == 1
+    assert arrays['indptr'].tolist() == data['indptr']
+    assert arrays['indices'].tolist() == data['indices']
+    assert np.array_equal(arrays['niveau'], [1.0, np.nan, 2.5], equal_nan=True)
+
+
+def test_sparse_and_binary_carry_the_json_matrix(client, team):
+    body = client.get('/matrix/competences').get_json()
+    expected = {
+        (row['collaborator_name'], techno): cell['niveau']
+        for row in body['matrix'] for techno, cell in row['competences'].items() if cell['niveau'] is not None
+    }
+
+    response = client.get('/matrix/competences?format=sparse')
+    assert response.mimetype == SPARSE_MIMETYPE
+    sparse = response.get_json()
+
+    response = client.get('/matrix/competences', headers={'Accept': BINARY_MIMETYPE})
+    assert response.mimetype == BINARY_MIMETYPE
+    header, arrays = decode_binary(response.get_data())
+    assert header['rows'] == sparse['rows'] and header['columns'] == sparse['columns']
+
+    assert cells_by_name(sparse, sparse['indptr'], sparse['indices'], sparse['values']['niveau']) == expected
+    assert cells_by_name(
+        header, arrays['indptr'].tolist(), arrays['indices'].tolist(), arrays['niveau'].tolist()
+    ) == expected
+
+def test_unknown_format_is_rejected(client, team):
+    response = client.get('/matrix/competences?format=xml')
+    assert response.status_code == 400
+    assert 'format must be one of' in response.get_json()['error']
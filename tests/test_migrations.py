@@ -0,0 +1,144 @@
+import pytest
+import src.config as config
+import src.migrations as migrations
+import src.scoring_engine as scoring_engine
+from conftest import ROOT, reset_caches, add_collaborator, add_techno, add_project
+
+
+@pytest.fixture
+def old_db(tmp_path, monkeypatch):
+    """Base créée par init_db() mais migrée seulement jusqu'à la version donnée"""
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr(config, 'DATABASE', str(tmp_path / 'old.db'))
+    reset_caches()
+
+    def create(version):
+        with monkeypatch.context() as m:
+            m.setattr(migrations, 'migrate', lambda target=None: [])
+            config.init_db()
+        migrations.migrate(target=version)
+        return config.get_db_connection()
+
+    yield create
+    reset_caches()
+
+
+def test_init_db_applies_every_migration_once(db):
+    versions = [row['version'] for row in db.execute("SELECT version FROM schema_version ORDER BY version")]
+    assert versions == [version for version, _, _ in migrations.list_migrations()]
+    assert migrations.get_pending_migrations(db) == []
+    assert config.init_db() == []
+
+
+def test_duplicate_natural_keys_stop_the_migration_untouched(old_db, capsys):
+    from src.migrations.__main__ import main
+
+    conn = old_db(1)
+    add_techno(conn, 'Python')
+    add_techno(conn, 'Python')
+    conn.commit()
+    conn.close()
+
+    with pytest.raises(migrations.DuplicateKeysError, match=r"techno\(name\)"):
+        migrations.migrate()
+    assert main(['upgrade']) == 1
+    assert "1 doublon(s) sur techno(name)" in capsys.readouterr().out
+
+    conn = config.get_db_connection()
+    assert migrations.get_current_version(conn) == 1
+    assert conn.execute("SELECT COUNT(*) FROM techno").fetchone()[0] == 2
+    assert not conn.execute("SELECT name FROM sqlite_master WHERE name = 'ux_techno_name'").fetchone()
+    conn.close()
+
+    assert main(['status']) == 0
+    assert "Version courante: 1" in capsys.readouterr().out
+
+
+def test_homonym_collaborators_are_allowed(db):
+    add_collaborator(db, 'Alice', 'Martin')
+    add_collaborator(db, 'Alice', 'Martin')
+    db.commit()
+    assert db.execute("SELECT COUNT(*) FROM collaborator").fetchone()[0] == 2
+
+
+def test_month_columns_are_backfilled_with_the_frozen_parser(old_db, monkeypatch):
+    conn = old_db(5)
+    alice = add_collaborator(conn, 'Alice', 'Martin')
+    python = add_techno(conn, 'Python')
+    project = add_project(conn, 'Alpha')
+    conn.execute("UPDATE project SET date_fin = '2023-04-15' WHERE id = ?", (project,))
+    conn.execute(
+        """INSERT INTO project_techno_history (id_project, id_techno, id_collaborator, date_debut, date_fin)
+           VALUES (?, ?, ?, '2022-11', 'pas une date')""",
+        (project, python, alice)
+    )
+    conn.commit()
+    conn.close()
+
+    # La migration ne dépend pas du code applicatif courant
+    monkeypatch.setattr(scoring_engine, 'month_index', lambda date_fin: -1)
+    applied = migrations.migrate()
+
+    assert applied[0] == (6, 'month_columns')
+    conn = config.get_db_connection()
+    history = conn.execute("SELECT mois_debut, mois_fin FROM project_techno_history").fetchone()
+    assert (history['mois_debut'], history['mois_fin']) == (2022 * 12 + 11, None)
+    assert conn.execute("SELECT mois_fin FROM project").fetchone()['mois_fin'] == 2023 * 12 + 4
+    conn.close()
+
+
+def test_scoring_parameters_are_seeded_with_frozen_defaults(old_db, monkeypatch):
+    old_db(6).close()
+
+    monkeypatch.setitem(scoring_engine.DEFAULT_PARAMETERS, 'niveau_declare_weight', 0.9)
+    migrations.migrate(target=7)
+
+    conn = config.get_db_connection()
+    rows = dict(conn.execute("SELECT name, value FROM scoring_parameter").fetchall())
+    assert rows['niveau_declare_weight'] == 0.3
+    assert rows['penalite_anciennete_mois'] == 12.0
+    assert len(rows) == 12
+    conn.close()
+
+
+def test_stats_counter_is_initialized_from_existing_rows(old_db, monkeypatch):
+    import src.stats_counters as stats_counters
+
+    conn = old_db(10)
+    add_collaborator(conn, 'Alice', 'Martin')
+    add_techno(conn, 'Python')
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(stats_counters, 'COUNTED_TABLES', {})
+    migrations.migrate(target=11)
+
+    conn = config.get_db_connection()
+    row = conn.execute("SELECT collaborators, technos, competences FROM stats_counter").fetchone()
+    assert tuple(row) == (1, 1, 0)
+    conn.close()
+
+
+def test_month_columns_follow_writes_and_serve_range_filters(db, client):
+    alice = add_collaborator(db, 'Alice', 'Martin')
+    python = add_techno(db, 'Python')
+    project = add_project(db, 'Alpha')
+    db.commit()
+
+    ids = [
+        client.post('/project_history', json={
+            'id_project': project, 'id_techno': python, 'id_collaborator': alice,
+            'date_debut': debut, 'date_fin': fin
+        }).get_json()['id']
+        for debut, fin in (('2021-01', '2021-06-30'), ('2022-03-01', '2022-09'))
+    ]
+    rows = db.execute("SELECT mois_debut, mois_fin FROM project_techno_history ORDER BY id").fetchall()
+    assert [tuple(row) for row in rows] == [(2021 * 12 + 1, 2021 * 12 + 6), (2022 * 12 + 3, 2022 * 12 + 9)]
+
+    # Au mois près : 2021-06-30 tombe dans le mois 2021-06
+    body = client.get('/project_history?date_fin__lte=2021-06-01').get_json()
+    assert [item['id'] for item in body] == [ids[0]]
+    assert client.get('/project_history?date_fin__gt=nope').status_code == 400
+
+    assert client.patch(f'/project_history/{ids[1]}', json={'date_fin': None}).status_code == 200
+    assert db.execute("SELECT mois_fin FROM project_techno_history WHERE id = ?", (ids[1],)).fetchone()[0] is None
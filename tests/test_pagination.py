@@ -0,0 +1,61 @@
+from urllib.parse import urlparse
+from conftest import add_techno
+from src.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+
+def add_technos(conn, count):
+    ids = [add_techno(conn, f'T{k:04d}') for k in range(count)]
+    conn.commit()
+    return ids
+
+
+def test_default_list_is_capped(db, client):
+    add_technos(db, DEFAULT_PAGE_SIZE + 20)
+    response = client.get('/technos')
+    assert response.status_code == 200
+    assert len(response.get_json()) == DEFAULT_PAGE_SIZE
+    assert response.headers['X-Next-Cursor']
+    assert 'rel="next"' in response.headers['Link']
+
+
+def test_cursor_walks_every_row_once(db, client):
+    ids = add_technos(db, 25)
+    seen, url = [], '/technos?limit=10&fields=id,name'
+    while url:
+        response = client.get(url)
+        page = response.get_json()
+        assert len(page) <= 10 and all(set(item) == {'id', 'name'} for item in page)
+        seen += [item['id'] for item in page]
+        link = response.headers.get('Link')
+        url = None
+        if link:
+            parsed = urlparse(link[1:link.index('>')])
+            url = f"{parsed.path}?{parsed.query}"
+    assert seen == ids
+
+
+def test_limit_is_capped_and_validated(db, client):
+    add_technos(db, MAX_PAGE_SIZE + 5)
+    response = client.get(f'/technos?limit={MAX_PAGE_SIZE * 10}')
+    assert len(response.get_json()) == MAX_PAGE_SIZE
+    assert 'X-Next-Cursor' in response.headers
+
+    assert client.get('/technos?limit=0').status_code == 400
+    assert client.get('/technos?nope=1').status_code == 400
+    assert client.get('/technos?id__between=1').status_code == 400
+
+
+def test_filters_apply_before_paging(db, client):
+    ids = add_technos(db, 30)
+    response = client.get(f'/technos?id__gt={ids[24]}&limit=3')
+    assert [item['id'] for item in response.get_json()] == ids[25:28]
+
+    response = client.get('/technos?name=T0007')
+    assert [item['id'] for item in response.get_json()] == [ids[7]]
+    assert 'X-Next-Cursor' not in response.headers
+
+
+def test_stream_returns_every_row(db, client):
+    add_technos(db, DEFAULT_PAGE_SIZE + 20)
+    response = client.get('/technos', headers={'Accept': 'application/x-ndjson'})
+    assert len(response.get_data(as_text=True).splitlines()) == DEFAULT_PAGE_SIZE + 20
@@ -0,0 +1,71 @@
+import itertools
+import numpy as np
+import pytest
+from conftest import add_collaborator, add_competence, add_techno
+from src.portfolio import FIT_SCALE, assign_period, overlap_matrix, overlap_periods
+
+
+def brute_force(fits, seats, allowed):
+    """Meilleure somme des adéquations, chaque candidat sur au plus un projet (ou aucun)"""
+    n, size = fits.shape
+    best = 0
+    for choice in itertools.product(range(-1, size), repeat=n):
+        if any(p >= 0 and not allowed[c, p] for c, p in enumerate(choice)):
+            continue
+        if any(choice.count(p) > seats[p] for p in range(size)):
+            continue
+        best = max(best, sum(round(fits[c, p] * FIT_SCALE) for c, p in enumerate(choice) if p >= 0))
+    return best
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_assign_period_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    n, size = int(rng.integers(1, 7)), int(rng.integers(1, 4))
+    fits = np.where(rng.random((n, size)) < 0.7, rng.random((n, size)) * 5, 0.0)
+    seats = [int(s) for s in rng.integers(1, 3, size)]
+    allowed = rng.random((n, size)) < 0.8
+
+    assignment, _ = assign_period(fits, seats, allowed)
+
+    used = [c for members in assignment.values() for c in members]
+    assert len(used) == len(set(used))
+    assert all(len(assignment[p]) <= seats[p] for p in range(size))
+    assert all(allowed[c, p] for p, members in assignment.items() for c in members)
+    total = sum(round(fits[c, p] * FIT_SCALE) for p, members in assignment.items() for c in members)
+    assert total == brute_force(fits, seats, allowed)
+
+
+def test_overlap_periods_do_not_chain_projects():
+    # A (0-2), B (2-5), C (5-8) : A et C ne se chevauchent pas
+    bounds = [(0, 2), (2, 5), (5, 8)]
+    assert [period.projects for period in overlap_periods(bounds)] == [[0, 1], [2]]
+    overlaps = overlap_matrix(bounds)
+    assert overlaps[0, 1] and overlaps[1, 2] and not overlaps[0, 2]
+
+    # Un projet sans fin ne chevauche que les projets qui finissent après son début
+    overlaps = overlap_matrix([(0, 2), (4, None), (6, 8)])
+    assert not overlaps[0, 1] and overlaps[1, 2] and not overlaps[0, 2]
+
+
+def test_portfolio_reuses_collaborators_on_disjoint_projects(db, client):
+    python = add_techno(db, 'Python')
+    ids = [add_collaborator(db, 'Dev', str(k)) for k in range(2)]
+    for k, id_collaborator in enumerate(ids):
+        add_competence(db, id_collaborator, python, 5 - k, 5 - k)
+    db.commit()
+
+    project = lambda name, debut, fin: {
+        'name': name, 'technologies': ['Python'], 'team_size': 1, 'date_debut': debut, 'date_fin': fin
+    }
+    response = client.post('/allocation/portfolio', json={'projects': [
+        project('A', '2025-01', '2025-03'),
+        project('B', '2025-03', '2025-06'),
+        project('C', '2025-06', '2025-09'),
+    ]})
+    assert response.status_code == 200
+    teams = {p['project']: [m['collaborator_id'] for m in p['team']] for p in response.get_json()['projects']}
+
+    # A et C ne se chevauchent pas : C reprend le membre de A, pas celui de B
+    assert teams['A'] == teams['C']
+    assert len(teams['B']) == 1 and teams['B'] != teams['A']
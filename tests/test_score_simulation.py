@@ -0,0 +1,36 @@
+from conftest import add_collaborator, add_competence, add_project, add_techno
+from src.scoring_engine import recalculate_scores
+
+
+def test_simulated_gaps_match_allocation_gaps(db, client):
+    python, java, go = add_techno(db, 'Python'), add_techno(db, 'Java'), add_techno(db, 'Go')
+    project = add_project(db, 'P')
+    ada, bob = add_collaborator(db, 'Ada', 'Lovelace'), add_collaborator(db, 'Bob', 'Martin')
+    # Python : deux niveaux déclarés 4 avec historique, 3.1 avec la formule par défaut
+    for collaborator in (ada, bob):
+        add_competence(db, collaborator, python, 4)
+        db.execute(
+            "INSERT INTO project_techno_history (id_project, id_techno, id_collaborator) VALUES (?, ?, ?)",
+            (project, python, collaborator)
+        )
+    # Java : un seul expert ; Go : personne
+    add_competence(db, ada, java, 5, 5)
+    recalculate_scores(db)
+    db.commit()
+
+    gaps = client.get('/allocation/gaps').get_json()
+    assert {g['techno'] for g in gaps['gaps']} == {'Python', 'Java', 'Go'}
+
+    response = client.post('/scoring/simulate', json={
+        'parameter_sets': [{'name': 'declare', 'parameters': {'niveau_declare_weight': 1.0}}]
+    })
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['current']['total_gaps'] == gaps['total_gaps'] == 3
+    assert body['current']['critical_gaps'] == gaps['critical_gaps'] == 2
+
+    simulated = body['simulations'][0]['gaps']
+    assert (simulated['total_gaps'], simulated['total_gaps_simule']) == (3, 2)
+    assert (simulated['critical_gaps'], simulated['critical_gaps_simule']) == (2, 1)
+    assert [g['techno'] for g in simulated['resolved_gaps']] == ['Python']
+    assert simulated['new_gaps'] == []
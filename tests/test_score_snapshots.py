@@ -0,0 +1,94 @@
+from conftest import add_collaborator, add_competence, add_techno
+from src.score_snapshots import collaborator_trend, list_snapshots, snapshot_as_of, take_snapshot, techno_trend
+from src.scoring_engine import month_index
+
+JAN, FEB, APR = month_index('2025-01'), month_index('2025-02'), month_index('2025-04')
+
+
+def set_levels(conn, levels):
+    for id_competence, niveau in levels.items():
+        conn.execute("UPDATE competence SET niveau_calcule = ? WHERE id = ?", (niveau, id_competence))
+
+
+def history(db):
+    """Deux collaborateurs sur Python et Java, photographiés en janvier, février et avril"""
+    python, java = add_techno(db, 'Python'), add_techno(db, 'Java')
+    ada, bob = add_collaborator(db, 'Ada', 'Lovelace'), add_collaborator(db, 'Bob', 'Martin')
+    ada_python = add_competence(db, ada, python, 3)
+    ada_java = add_competence(db, ada, java, 2)
+    bob_python = add_competence(db, bob, python, 2)
+    for mois, levels in (
+        (JAN, {ada_python: 3.0, ada_java: 2.0, bob_python: 2.0}),
+        (FEB, {ada_python: 4.0, ada_java: 2.5, bob_python: 2.0}),
+        (APR, {ada_python: 4.5, ada_java: 3.0, bob_python: 4.0}),
+    ):
+        set_levels(db, levels)
+        assert take_snapshot(db, mois) == 3
+    db.commit()
+    return {'python': python, 'java': java, 'ada': ada, 'bob': bob, 'ada_python': ada_python}
+
+
+def test_take_snapshot_replaces_the_month(db):
+    ids = history(db)
+    set_levels(db, {ids['ada_python']: 5.0})
+    take_snapshot(db, FEB)
+    db.commit()
+
+    snapshots = list_snapshots(db)
+    assert [s['date'] for s in snapshots] == ['2025-01', '2025-02', '2025-04']
+    assert [s['competences'] for s in snapshots] == [3, 3, 3]
+    assert db.execute(
+        "SELECT niveau FROM score_snapshot WHERE mois = ? AND id_competence = ?", (FEB, ids['ada_python'])
+    ).fetchone()[0] == 5.0
+
+
+def test_snapshot_as_of(db):
+    history(db)
+    assert snapshot_as_of(db, month_index('2024-12')) is None
+    assert snapshot_as_of(db, FEB) == FEB
+    assert snapshot_as_of(db, month_index('2025-03')) == FEB
+    assert snapshot_as_of(db, month_index('2030-01')) == APR
+
+
+def test_collaborator_trend(db):
+    ids = history(db)
+    technos = collaborator_trend(db, ids['ada'])
+    assert [t['techno'] for t in technos] == ['Java', 'Python']
+    assert technos[1]['points'] == [
+        {'date': '2025-01', 'niveau': 3.0}, {'date': '2025-02', 'niveau': 4.0}, {'date': '2025-04', 'niveau': 4.5}
+    ]
+
+    technos = collaborator_trend(db, ids['ada'], FEB, APR, id_techno=ids['java'])
+    assert len(technos) == 1
+    assert [p['niveau'] for p in technos[0]['points']] == [2.5, 3.0]
+
+
+def test_techno_trend(db):
+    ids = history(db)
+    points = techno_trend(db, ids['python'])
+    assert [p['date'] for p in points] == ['2025-01', '2025-02', '2025-04']
+    assert [p['nb_collaborators'] for p in points] == [2, 2, 2]
+    assert [p['avg_niveau'] for p in points] == [2.5, 3.0, 4.25]
+    assert [p['max_niveau'] for p in points] == [3.0, 4.0, 4.5]
+    assert [p['nb_experts'] for p in points] == [0, 1, 2]
+
+    assert [p['nb_experts'] for p in techno_trend(db, ids['python'], mois_to=FEB, expert_threshold=3)] == [1, 1]
+
+
+def test_trend_routes(db, client):
+    ids = history(db)
+    response = client.get(f"/trends/techno/{ids['python']}?from=2025-02")
+    assert response.status_code == 200
+    assert [p['date'] for p in response.get_json()['points']] == ['2025-02', '2025-04']
+
+    assert client.get(f"/trends/techno/{ids['python']}?from=février").status_code == 400
+    assert client.get("/trends/techno/999").status_code == 404
+    assert client.get("/trends/collaborator/999").status_code == 404
+
+    response = client.get("/matrix/competences/as-of?date=2025-03")
+    assert response.status_code == 200
+    matrix = response.get_json()
+    assert matrix['snapshot_date'] == '2025-02'
+    assert matrix['headers'] == ['Collaborateur', 'Java', 'Python']
+    assert matrix['rows'] == [['Ada Lovelace', 2.5, 4.0], ['Bob Martin', 0, 2.0]]
+    assert client.get("/matrix/competences/as-of?date=2024-12").status_code == 404
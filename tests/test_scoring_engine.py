@@ -0,0 +1,188 @@
+import itertools
+import math
+import numpy as np
+from src.scoring_engine import (
+    DEFAULT_PARAMETERS, compute_score, compute_scores, current_month_index, recalculate_scores, save_parameters
+)
+from conftest import add_collaborator, add_competence, add_techno
+
+MOIS_COURANT = 2025 * 12 + 6
+
+
+def baseline_score(niveau_declare, nb_projets, dernier_mois, mois_courant):
+    """Formule scalaire d'origine (calculate_score_for_competence avant le moteur NumPy)"""
+    if not nb_projets:
+        return float(niveau_declare)
+    score_projets = min(5.0, nb_projets)
+    if dernier_mois is not None:
+        anciennete_bonus = max(0, 5 - (mois_courant - dernier_mois) / 12.0)
+    else:
+        anciennete_bonus = 5.0
+    score = (niveau_declare * 0.3) + (score_projets * 0.4) + (anciennete_bonus * 0.3)
+    score = max(1.0, min(5.0, score))
+    return round(score, 2)
+
+
+def test_vectorised_scores_match_scalar_formula():
+    cases = list(itertools.product(
+        range(1, 6),                               # niveau_declare
+        range(0, 8),                               # nb_projets
+        [None] + list(range(MOIS_COURANT - 80, MOIS_COURANT + 1)),  # dernier_mois
+    ))
+    scores = compute_scores(
+        DEFAULT_PARAMETERS,
+        [c[0] for c in cases],
+        [c[1] for c in cases],
+        [np.nan if c[2] is None else c[2] for c in cases],
+        [0] * len(cases),
+        MOIS_COURANT
+    )
+    expected = [baseline_score(n, p, m, MOIS_COURANT) for n, p, m in cases]
+    assert scores.tolist() == expected
+
+
+def test_halfway_values_round_like_python():
+    # 1 × 0.3 + 1 × 0.4 + bonus × 0.3 tombe sur des demi-centièmes pour ces mois
+    for mois_ecoules in range(0, 61):
+        dernier_mois = MOIS_COURANT - mois_ecoules
+        assert compute_score(1, 1, dernier_mois, MOIS_COURANT) == baseline_score(1, 1, dernier_mois, MOIS_COURANT)
+
+
+def test_recalculate_scores_writes_formula_results(db):
+    collaborator = add_collaborator(db, 'Ada', 'Lovelace')
+    python, go = add_techno(db, 'Python'), add_techno(db, 'Go')
+    add_competence(db, collaborator, python, 3)
+    add_competence(db, collaborator, go, 2)
+    project = db.execute(
+        "INSERT INTO project (name, date_add, date_upd) VALUES ('P', datetime('now'), datetime('now'))"
+    ).lastrowid
+    db.execute(
+        "INSERT INTO project_techno_history (id_project, id_techno, id_collaborator, date_fin, mois_fin) VALUES (?, ?, ?, NULL, NULL)",
+        (project, python, collaborator)
+    )
+
+    updated, errors = recalculate_scores(db)
+    db.commit()
+
+    assert (updated, errors) == (2, [])
+    levels = dict(db.execute("SELECT id_techno, niveau_calcule FROM competence").fetchall())
+    assert math.isclose(levels[python], baseline_score(3, 1, None, MOIS_COURANT))
+    assert levels[go] == 2.0
+
+
+def test_set_based_recalculation_matches_per_competence_formula(db):
+    rng = np.random.default_rng(0)
+    mois_courant = current_month_index()
+    collaborators = [add_collaborator(db, 'Dev', str(k)) for k in range(6)]
+    technos = [add_techno(db, f'T{k}') for k in range(5)]
+    projects = [
+        db.execute(
+            "INSERT INTO project (name, date_add, date_upd) VALUES (?, datetime('now'), datetime('now'))", (f'P{k}',)
+        ).lastrowid
+        for k in range(8)
+    ]
+
+    declared = {}
+    for collaborator in collaborators:
+        for techno in technos:
+            if rng.random() < 0.7:
+                declared[collaborator, techno] = int(rng.integers(1, 6))
+                add_competence(db, collaborator, techno, declared[collaborator, techno])
+    history = {}
+    for _ in range(60):
+        key = (collaborators[rng.integers(6)], technos[rng.integers(5)])
+        mois_fin = None if rng.random() < 0.2 else mois_courant - int(rng.integers(0, 90))
+        db.execute(
+            "INSERT INTO project_techno_history (id_project, id_techno, id_collaborator, mois_fin) VALUES (?, ?, ?, ?)",
+            (projects[rng.integers(8)], key[1], key[0], mois_fin)
+        )
+        history.setdefault(key, []).append(mois_fin)
+
+    def expected(key):
+        fins = [m for m in history.get(key, []) if m is not None]
+        return baseline_score(declared[key], len(history.get(key, [])), max(fins) if fins else None, mois_courant)
+
+    # Recalcul limité à un collaborateur : les autres ne bougent pas
+    db.execute("UPDATE competence SET niveau_calcule = NULL")
+    updated, _ = recalculate_scores(db, id_collaborator=collaborators[0])
+    rows = db.execute("SELECT id_collaborator, id_techno, niveau_calcule FROM competence").fetchall()
+    assert updated == sum(1 for c, _ in declared if c == collaborators[0])
+    for c, t, niveau in rows:
+        assert niveau == (expected((c, t)) if c == collaborators[0] else None)
+
+    updated, errors = recalculate_scores(db)
+    assert (updated, errors) == (len(declared), [])
+    for c, t, niveau in db.execute("SELECT id_collaborator, id_techno, niveau_calcule FROM competence"):
+        assert niveau == expected((c, t))
+
+
+def test_patching_history_duration_marks_the_score_dirty(db, client):
+    save_parameters(db, {'duree_weight': 0.5})
+    collaborator = add_collaborator(db, 'Ada', 'Lovelace')
+    python = add_techno(db, 'Python')
+    add_competence(db, collaborator, python, 3)
+    project = db.execute(
+        "INSERT INTO project (name, date_add, date_upd) VALUES ('P', datetime('now'), datetime('now'))"
+    ).lastrowid
+    history = db.execute(
+        "INSERT INTO project_techno_history (id_project, id_techno, id_collaborator, duree_mois, mois_fin) VALUES (?, ?, ?, 2, ?)",
+        (project, python, collaborator, current_month_index() - 30)
+    ).lastrowid
+    recalculate_scores(db)
+    db.commit()
+    before = db.execute("SELECT niveau_calcule FROM competence").fetchone()[0]
+
+    for change in ({'duree_mois': 30}, {'date_fin': '2020-01'}):
+        assert client.patch(f'/project_history/{history}', json=change).status_code == 200
+        incremental = db.execute("SELECT niveau_calcule FROM competence").fetchone()[0]
+        recalculate_scores(db)
+        db.commit()
+        assert incremental == db.execute("SELECT niveau_calcule FROM competence").fetchone()[0]
+        assert incremental != before
+        before = incremental
+
+
+def test_writes_through_the_api_keep_scores_incremental(db, client):
+    collaborator = add_collaborator(db, 'Ada', 'Lovelace')
+    python, java = add_techno(db, 'Python'), add_techno(db, 'Java')
+    project = db.execute(
+        "INSERT INTO project (name, date_add, date_upd) VALUES ('P', datetime('now'), datetime('now'))"
+    ).lastrowid
+    db.commit()
+
+    def score(id_competence):
+        return client.get(f'/competences/{id_competence}').get_json()['niveau_calcule']
+
+    def full_recalculation_agrees(id_competence):
+        incremental = score(id_competence)
+        recalculate_scores(db)
+        db.commit()
+        return incremental == score(id_competence)
+
+    # Sans historique, la valeur saisie est conservée
+    manual = client.post('/competences', json={
+        'id_collaborator': collaborator, 'id_techno': java, 'niveau_declare': 2, 'niveau_calcule': 4.5
+    }).get_json()['id']
+    competence = client.post('/competences', json={
+        'id_collaborator': collaborator, 'id_techno': python, 'niveau_declare': 3
+    }).get_json()['id']
+    assert (score(manual), score(competence)) == (4.5, 3)
+
+    history = client.post('/project_history', json={
+        'id_project': project, 'id_techno': python, 'id_collaborator': collaborator, 'date_fin': '2000-01'
+    }).get_json()['id']
+    assert db.execute("SELECT COUNT(*) FROM score_dirty").fetchone()[0] == 0
+    with_history = score(competence)
+    assert with_history != 3
+    assert full_recalculation_agrees(competence)
+
+    assert client.patch(f'/competences/{competence}', json={'niveau_declare': 5}).status_code == 200
+    assert score(competence) > with_history
+    assert full_recalculation_agrees(competence)
+
+    # Le recalcul complet a remplacé la valeur saisie : seuls les couples marqués bougent ensuite
+    db.execute("UPDATE competence SET niveau_calcule = 4.5 WHERE id = ?", (manual,))
+    db.commit()
+    assert client.delete(f'/project_history/{history}').status_code == 200
+    assert score(competence) == 5
+    assert score(manual) == 4.5
@@ -0,0 +1,91 @@
+import random
+import pytest
+from conftest import add_collaborator, add_competence, add_techno
+from src.competence_matrix import read_matrix
+from src.skill_risk import RiskAggregates, techno_risk
+
+
+@pytest.fixture
+def random_team(db):
+    rng = random.Random(7)
+    technos = [add_techno(db, f"T{j}") for j in range(6)]
+    for i in range(40):
+        collaborator = add_collaborator(db, 'Dev', f"{i:02d}")
+        for techno in rng.sample(technos, rng.randint(0, 4)):
+            niveau = None if rng.random() < 0.2 else round(rng.uniform(1, 5), 2)
+            add_competence(db, collaborator, techno, rng.randint(1, 5), niveau)
+    db.commit()
+    return db
+
+
+def brute_force(db, expert_level, niveau_min):
+    """Mêmes agrégats en SQL, par techno"""
+    floor = 1 if niveau_min is None else niveau_min
+    rows = {}
+    for techno in db.execute("SELECT id, name FROM techno ORDER BY name, id"):
+        levels = [row[0] for row in db.execute(
+            "SELECT niveau_calcule FROM competence WHERE id_techno = ? AND niveau_calcule >= ?", (techno['id'], floor)
+        )]
+        experts = sum(1 for level in levels if level >= max(expert_level, floor))
+        intermediates = sum(1 for level in levels if level >= min(max(2, floor), max(expert_level, floor))) - experts
+        rows[techno['name']] = {
+            'nb_collaborators': db.execute(
+                "SELECT COUNT(*) FROM competence WHERE id_techno = ?", (techno['id'],)
+            ).fetchone()[0],
+            'nb_levels': len(levels),
+            'nb_experts': experts,
+            'nb_intermediaires': intermediates,
+            'nb_debutants': len(levels) - experts - intermediates,
+            'min_niveau': min(levels) if levels else None,
+            'max_niveau': max(levels) if levels else None,
+            'avg_niveau': sum(levels) / len(levels) if levels else None,
+        }
+    return rows
+
+
+def compare(db, expert_level, niveau_min):
+    risk = read_matrix(db, lambda store: techno_risk(store, expert_level, niveau_min))
+    expected = brute_force(db, expert_level, niveau_min)
+    assert [row['techno'] for row in risk] == list(expected)
+    for row in risk:
+        wanted = expected[row['techno']]
+        for key, value in wanted.items():
+            if key == 'avg_niveau' and value is not None:
+                assert row[key] == pytest.approx(value)
+            else:
+                assert row[key] == value, (row['techno'], key)
+
+
+@pytest.mark.parametrize('expert_level, niveau_min', [(4, None), (3.5, None), (4, 2.25), (2, 4.5)])
+def test_histogram_matches_the_competences(random_team, expert_level, niveau_min):
+    compare(random_team, expert_level, niveau_min)
+
+
+def test_writes_update_the_aggregates_in_place(random_team):
+    db = random_team
+    before = read_matrix(db, lambda store: store.risk())
+
+    db.execute("UPDATE competence SET niveau_calcule = 4.99 WHERE id % 3 = 0")
+    db.execute("DELETE FROM competence WHERE id % 5 = 0")
+    db.commit()
+
+    compare(db, 4, None)
+    assert read_matrix(db, lambda store: store.risk()) is before
+    fresh = read_matrix(db, lambda store: RiskAggregates(store))
+    assert (fresh.histogram == before.histogram).all()
+    assert (fresh.collaborators == before.collaborators).all()
+
+
+def test_gap_routes_use_the_aggregates(client, random_team):
+    expected = brute_force(random_team, 3.5, None)
+
+    body = client.get('/allocation/gaps?min_experts=3&expert_level=3.5').get_json()
+    assert body['gaps']
+    assert {(gap['techno'], gap['nb_experts'], gap['best_niveau']) for gap in body['gaps']} == {
+        (name, row['nb_experts'], row['max_niveau'] or 0) for name, row in expected.items() if row['nb_experts'] < 3
+    }
+
+    body = client.get('/dashboard/at-risk-technologies?threshold=3&expert_level=3.5').get_json()
+    assert {row['techno'] for row in body['at_risk_technologies']} == {
+        name for name, row in expected.items() if row['nb_collaborators'] and row['nb_experts'] < 3
+    }
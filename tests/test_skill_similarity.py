@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from conftest import add_collaborator, add_competence, add_techno
+from src.skill_similarity import SkillProfiles
+
+
+class FakeMatrix:
+    def __init__(self, levels):
+        self.levels = np.asarray(levels, dtype=float)
+        self.present = self.levels > 0
+
+    def niveau(self, rows=None):
+        return self.levels if rows is None else self.levels[rows]
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_nearest_matches_brute_force_cosine(seed):
+    rng = np.random.default_rng(seed)
+    levels = rng.integers(0, 6, size=(200, 12)) * (rng.random((200, 12)) < 0.4)
+    levels[0] = 0
+    profiles = SkillProfiles(FakeMatrix(levels))
+
+    vectors = levels / np.maximum(np.linalg.norm(levels, axis=1), 1e-12)[:, np.newaxis]
+    for i in (1, 50, 199):
+        rows, scores, method, scanned = profiles.nearest(i, 5, method='exact')
+        expected = np.delete(vectors @ vectors[i], i)
+        assert method == 'exact' and scanned == 199
+        assert i not in rows
+        assert np.allclose(scores, np.sort(expected)[::-1][:5], atol=1e-5)
+        assert np.allclose(scores, vectors[rows] @ vectors[i], atol=1e-5)
+
+
+def test_approx_falls_back_to_exact_with_too_few_candidates():
+    levels = np.eye(4) * 5
+    profiles = SkillProfiles(FakeMatrix(levels))
+    allowed = np.array([True, False, True, True])
+
+    rows, scores, method, _ = profiles.nearest(0, 3, allowed, method='approx')
+    assert method == 'exact'
+    assert rows.tolist() == [2, 3] and scores.tolist() == [0.0, 0.0]
+
+
+def test_update_recomputes_only_the_given_rows():
+    matrix = FakeMatrix([[5, 0], [0, 5], [4, 0]])
+    profiles = SkillProfiles(matrix)
+    assert profiles.nearest(0, 1)[0].tolist() == [2]
+
+    matrix.levels[2] = [0, 3]
+    matrix.present = matrix.levels > 0
+    profiles.update([2])
+    assert np.allclose(profiles.vectors[2], [0, 1])
+    assert profiles.nearest(1, 2)[0].tolist() == [2, 0]
+
+
+def test_similar_route(client, db):
+    python, java, go = add_techno(db, 'Python'), add_techno(db, 'Java'), add_techno(db, 'Go')
+    alice = add_collaborator(db, 'Alice', 'Martin')
+    bob = add_collaborator(db, 'Bob', 'Durand')
+    carl = add_collaborator(db, 'Carl', 'Petit')
+    add_competence(db, alice, python, 4, 4.0)
+    add_competence(db, alice, java, 3, 3.0)
+    add_competence(db, bob, python, 5, 4.0)
+    add_competence(db, bob, java, 2, 3.0)
+    add_competence(db, carl, go, 5, 5.0)
+    db.commit()
+
+    body = client.get(f'/collaborators/{alice}/similar?k=2').get_json()
+    assert [(s['name'], s['similarity']) for s in body['similar']] == [('Bob Durand', 1.0), ('Carl Petit', 0.0)]
+    assert body['similar'][0]['top_shared'][0] == {'techno': 'Python', 'niveau': 4.0, 'niveau_reference': 4.0}
+
+    body = client.get(f'/collaborators/{alice}/similar?technologies=go').get_json()
+    assert [s['name'] for s in body['similar']] == ['Carl Petit']
+    body = client.get(f'/collaborators/{alice}/similar?technologies=Python&niveau_min=4.5').get_json()
+    assert body['similar'] == []
+
+    assert client.get('/collaborators/999/similar').status_code == 404
+    assert client.get(f'/collaborators/{alice}/similar?method=fast').status_code == 400
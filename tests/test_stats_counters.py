@@ -0,0 +1,55 @@
+import pytest
+from conftest import add_collaborator, add_competence, add_project, add_techno
+from src.stats_counters import check_counters, main, overview_stats, read_counters
+
+
+@pytest.fixture
+def filled(db):
+    alice = add_collaborator(db, 'Alice', 'Martin')
+    bob = add_collaborator(db, 'Bob', 'Durand')
+    python = add_techno(db, 'Python')
+    add_project(db, 'Alpha')
+    add_competence(db, alice, python, 4, 4.5)
+    add_competence(db, bob, python, 2)
+    db.commit()
+    return db
+
+
+def test_triggers_keep_the_counters_in_sync(filled):
+    stats = overview_stats(read_counters(filled))
+    assert stats == {
+        'total_collaborators': 2,
+        'total_technologies': 1,
+        'total_competences': 2,
+        'total_projects': 1,
+        'avg_niveau': 4.5
+    }
+
+    filled.execute("UPDATE competence SET niveau_calcule = 2.5 WHERE niveau_calcule IS NULL")
+    filled.execute("DELETE FROM project")
+    filled.commit()
+
+    stats = overview_stats(read_counters(filled))
+    assert stats['total_projects'] == 0
+    assert stats['avg_niveau'] == 3.5
+    assert check_counters(filled) == {}
+
+
+def test_check_reports_drift_and_repair_fixes_it(filled, capsys):
+    filled.execute("UPDATE stats_counter SET collaborators = 7, niveau_sum = 0 WHERE id = 1")
+    filled.commit()
+
+    assert check_counters(filled) == {'collaborators': (7, 2), 'niveau_sum': (0, 4.5)}
+    assert main(['check']) == 1
+    assert 'collaborators: 7 (attendu 2)' in capsys.readouterr().out
+
+    assert main(['repair']) == 0
+    assert check_counters(filled) == {}
+    assert main(['check']) == 0
+
+
+def test_missing_row_is_recomputed_on_read(filled):
+    filled.execute("DELETE FROM stats_counter")
+    filled.commit()
+
+    assert read_counters(filled)['competences'] == 2
@@ -0,0 +1,52 @@
+import csv
+import io
+import json
+import pytest
+from conftest import add_collaborator, add_competence, add_techno
+import src.streaming as streaming
+from src.streaming import iter_csv, iter_ndjson
+
+
+@pytest.fixture
+def team(db):
+    python = add_techno(db, 'Python')
+    for k in range(5):
+        add_competence(db, add_collaborator(db, 'Dev', str(k)), python, 3, 3.0 + k / 2)
+    db.commit()
+    return db
+
+
+def test_rows_are_grouped_in_chunks(monkeypatch):
+    monkeypatch.setattr(streaming, 'CHUNK_ROWS', 2)
+    rows = [{'id': k, 'name': f"é{k}"} for k in range(5)]
+
+    chunks = list(iter_ndjson(rows))
+    assert [chunk.count('\n') for chunk in chunks] == [2, 2, 1]
+    assert [json.loads(line) for chunk in chunks for line in chunk.splitlines()] == rows
+
+    chunks = list(iter_csv(rows))
+    assert len(chunks) == 3
+    assert list(csv.DictReader(io.StringIO(''.join(chunks)))) == [
+        {'id': str(k), 'name': f"é{k}"} for k in range(5)
+    ]
+    assert list(iter_csv([])) == []
+
+
+def test_heatmap_streams_the_same_points_as_json(client, team):
+    points = client.get('/dashboard/heatmap').get_json()['heatmap_data']
+
+    response = client.get('/dashboard/heatmap', headers={'Accept': 'application/x-ndjson'})
+    assert response.mimetype == 'application/x-ndjson'
+    assert [json.loads(line) for line in response.get_data(as_text=True).splitlines()] == points
+
+    response = client.get('/dashboard/heatmap', headers={'Accept': 'text/csv'})
+    assert response.mimetype == 'text/csv'
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [(row['collaborator'], float(row['niveau'])) for row in rows] == [
+        (point['collaborator'], point['niveau']) for point in points
+    ]
+
+
+def test_json_stays_the_default(client, team):
+    response = client.get('/dashboard/heatmap', headers={'Accept': 'application/json, text/csv;q=0.5'})
+    assert response.mimetype == 'application/json'
@@ -0,0 +1,107 @@
+import itertools
+import numpy as np
+import pytest
+from src.routes.allocation import parse_team_request
+from src.team_solver import coverage_values, greedy, solve_team, team_score
+
+
+def brute_force(values, weights, team_size, required=None):
+    """Meilleure équipe par énumération : (score, couvre toutes les technos requises)"""
+    best = (False, 0.0)
+    for size in range(0, team_size + 1):
+        for team in itertools.combinations(range(len(values)), size):
+            team = list(team)
+            covered = values[team].max(axis=0) > 0 if team else np.zeros(values.shape[1], dtype=bool)
+            feasible = required is None or bool(covered[required].all())
+            best = max(best, (feasible, team_score(values, weights, team)))
+    return best
+
+
+def random_instance(rng, candidates, technos):
+    levels = np.where(rng.random((candidates, technos)) < 0.35, rng.integers(1, 6, (candidates, technos)), np.nan)
+    niveaux_min = rng.integers(1, 4, technos).astype(float)
+    weights = rng.integers(1, 4, technos).astype(float)
+    return coverage_values(levels, niveaux_min), weights
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_exact_matches_brute_force_and_bounds_greedy(seed):
+    rng = np.random.default_rng(seed)
+    values, weights = random_instance(rng, int(rng.integers(4, 11)), int(rng.integers(2, 7)))
+    team_size = int(rng.integers(1, 4))
+    _, optimum = brute_force(values, weights, team_size)
+
+    result = solve_team(values, weights, team_size, 5000, 'exact')
+    assert result.optimal
+    assert len(result.selected) <= team_size
+    assert result.score == pytest.approx(optimum)
+
+    greedy_score = team_score(values, weights, greedy(values, weights, team_size))
+    assert greedy_score <= optimum + 1e-9
+    assert greedy_score >= (1 - 1 / np.e) * optimum - 1e-9
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_required_technos_are_a_hard_constraint(seed):
+    rng = np.random.default_rng(100 + seed)
+    values, weights = random_instance(rng, int(rng.integers(4, 10)), int(rng.integers(2, 6)))
+    team_size = int(rng.integers(1, 4))
+    required = np.ones(values.shape[1], dtype=bool)
+    feasible, optimum = brute_force(values, weights, team_size, required)
+
+    result = solve_team(values, weights, team_size, 5000, 'exact', required=required)
+    assert result.optimal
+    assert result.feasible == feasible
+    if feasible:
+        assert (values[result.selected].max(axis=0) > 0).all()
+        assert result.score == pytest.approx(optimum)
+
+
+def test_required_coverage_beats_a_higher_unconstrained_score():
+    # Sans contrainte, la techno D (poids 10) passe avant C ;
+    # avec A, B et C obligatoires, C doit être couverte
+    values = coverage_values(np.array([
+        [5.0, 5.0, np.nan, np.nan],
+        [np.nan, np.nan, 1.0, np.nan],
+        [np.nan, np.nan, np.nan, 5.0],
+    ]), np.ones(4))
+    weights = np.array([3.0, 3.0, 0.1, 10.0])
+    required = np.array([True, True, True, False])
+
+    unconstrained = solve_team(values, weights, 2, 1000, 'approx')
+    assert sorted(unconstrained.selected) == [0, 2]
+
+    constrained = solve_team(values, weights, 2, 1000, 'approx', required=required)
+    assert constrained.feasible
+    assert sorted(constrained.selected) == [0, 1]
+
+    infeasible = solve_team(values, weights, 1, 1000, 'exact', required=required)
+    assert infeasible.optimal and not infeasible.feasible
+
+
+@pytest.mark.parametrize('field, value', [
+    ('time_budget_ms', True),
+    ('time_budget_ms', 0),
+    ('team_size', True),
+    ('solver', 'random'),
+])
+def test_parse_team_request_rejects_invalid_options(field, value):
+    with pytest.raises(ValueError, match=field):
+        parse_team_request({'technologies': ['Python'], field: value})
+
+
+@pytest.mark.parametrize('item', [
+    {'name': 'Python', 'weight': True},
+    {'name': 'Python', 'niveau_min': True},
+])
+def test_parse_team_request_rejects_boolean_technology_numbers(item):
+    with pytest.raises(ValueError, match=r'technologies\[0\]'):
+        parse_team_request({'technologies': [item]})
+
+
+def test_optimize_rejects_a_boolean_time_budget(client):
+    response = client.post('/allocation/suggest', json={
+        'mode': 'optimize', 'technologies': ['Python'], 'time_budget_ms': True
+    })
+    assert response.status_code == 400
+    assert 'time_budget_ms' in response.get_json()['error']
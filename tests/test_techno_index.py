@@ -0,0 +1,73 @@
+import pytest
+from conftest import add_collaborator, add_competence, add_techno
+from src.competence_matrix import read_matrix
+
+
+@pytest.fixture
+def team(db):
+    python, java = add_techno(db, 'Python'), add_techno(db, 'Java')
+    alice = add_collaborator(db, 'Alice', 'Martin')
+    bob = add_collaborator(db, 'Bob', 'Durand')
+    carl = add_collaborator(db, 'Carl', 'Petit')
+    add_competence(db, alice, python, 4, 4.5)
+    add_competence(db, bob, python, 3, 3.0)
+    add_competence(db, carl, python, 2)
+    add_competence(db, alice, java, 3, 3.5)
+    add_competence(db, bob, java, 5, 5.0)
+    db.commit()
+    return db
+
+
+def names(store, rows):
+    return [store.collaborator_names[i] for i in rows.tolist()]
+
+
+def test_postings_are_sorted_by_level_with_unscored_last(team):
+    def reader(store):
+        postings = store.index.get(store.index.column('  python '))
+        return names(store, postings.rows), postings.count_above(3), postings.mean(), postings.max()
+
+    ordered, above, mean, best = read_matrix(team, reader)
+    assert ordered == ['Alice Martin', 'Bob Durand', 'Carl Petit']
+    assert (above, mean, best) == (2, 3.75, 4.5)
+
+
+def test_intersection_is_sorted_by_weakest_level(team):
+    def reader(store):
+        columns = [store.index.column('Python'), store.index.column('Java')]
+        rows, levels = store.index.intersect_above(columns, 3)
+        return names(store, rows), levels.min(axis=1).tolist()
+
+    assert read_matrix(team, reader) == (['Alice Martin', 'Bob Durand'], [3.5, 3.0])
+
+
+def test_names_differing_only_by_case_are_not_shadowed(team, caplog):
+    go, GO = add_techno(team, 'Go'), add_techno(team, 'GO')
+    dev = add_collaborator(team, 'Dev', 'Go')
+    add_competence(team, dev, GO, 4, 4.0)
+    team.commit()
+
+    def reader(store):
+        columns = {name: store.index.column(name) for name in ('Go', 'GO', 'go', 'java')}
+        return {
+            name: None if j is None else store.techno_names[j] for name, j in columns.items()
+        }, store.index.collisions
+
+    columns, collisions = read_matrix(team, reader)
+    assert columns == {'Go': 'Go', 'GO': 'GO', 'go': None, 'java': 'Java'}
+    assert collisions == {'go': ['GO', 'Go']}
+    assert "Technos homonymes à la casse près : GO, Go" in caplog.text
+
+
+def test_candidates_route_uses_the_exact_case(client, team):
+    go, GO = add_techno(team, 'Go'), add_techno(team, 'GO')
+    dev = add_collaborator(team, 'Dev', 'Go')
+    add_competence(team, dev, GO, 4, 4.0)
+    team.commit()
+
+    body = client.get('/allocation/candidates?technologies=GO').get_json()
+    assert [c['name'] for c in body['candidates']] == ['Dev Go']
+    body = client.get('/allocation/candidates?technologies=Go').get_json()
+    assert (body['candidates'], body['unknown_technologies']) == ([], [])
+    body = client.get('/allocation/candidates?technologies=go').get_json()
+    assert body['unknown_technologies'] == ['go']